@@ -0,0 +1,38 @@
+"""Latency statistics shared by the benchmark scripts."""
+from __future__ import annotations
+
+import bisect
+from typing import Optional
+
+from inference_engine.consumer._metrics import DEFAULT_BUCKETS
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(ordered: list[float], p: float) -> Optional[float]:
+    """Get the nearest rank percentile p of sorted samples."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+def percentiles(samples: list[float]) -> dict[str, Optional[float]]:
+    """Get the nearest rank percentiles, mean & max of samples."""
+    ordered = sorted(samples)
+    summary: dict[str, Optional[float]] = {
+        f"p{p}": percentile(ordered, p) for p in PERCENTILES
+    }
+    summary["mean"] = sum(ordered) / len(ordered) if ordered else None
+    summary["max"] = ordered[-1] if ordered else None
+    return summary
+
+
+def histogram(
+    samples: list[float], buckets: tuple[float, ...] = DEFAULT_BUCKETS
+) -> dict[str, int]:
+    """Get the (non-cumulative) counts of samples per bucket upper bound."""
+    counts = [0] * (len(buckets) + 1)
+    for sample in samples:
+        counts[bisect.bisect_left(buckets, sample)] += 1
+    labels = [f"{upper:g}" for upper in buckets] + ["+Inf"]
+    return dict(zip(labels, counts))
@@ -0,0 +1,77 @@
+"""Compare two JSON results of benchmarks/run.py.
+
+Prints every numeric result of the baseline next to the candidate's, with
+the relative change. Latencies & per call timings are better when lower,
+throughput when higher.
+
+Usage::
+
+    python benchmarks/compare.py baseline.json candidate.json
+
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from typing import Any, Iterator, Optional
+
+
+def _flatten(results: Any, prefix: str = "") -> Iterator[tuple[str, float]]:
+    if isinstance(results, dict):
+        for key, value in results.items():
+            yield from _flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(results, (int, float)) and not isinstance(results, bool):
+        yield prefix, float(results)
+
+
+def compare(
+    baseline: dict[str, Any], candidate: dict[str, Any]
+) -> list[tuple[str, float, Optional[float], Optional[float]]]:
+    """Get (name, baseline, candidate, relative change) rows.
+
+    Parameters
+    ----------
+    baseline : dict
+        The JSON results of the baseline run.
+    candidate : dict
+        The JSON results of the candidate run.
+
+    Returns
+    -------
+    list of tuple
+
+    """
+    candidate_values = dict(_flatten(candidate["results"]))
+    rows = []
+    for name, value in _flatten(baseline["results"]):
+        other = candidate_values.get(name)
+        change = (
+            (other - value) / value if other is not None and value else None
+        )
+        rows.append((name, value, other, change))
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Print the comparison of two benchmark results."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding="utf-8") as f:
+        candidate = json.load(f)
+
+    rows = compare(baseline, candidate)
+    width = max((len(name) for name, *_ in rows), default=0)
+    print(f"{'':{width}}  {'baseline':>12}  {'candidate':>12}  {'change':>8}")
+    for name, value, other, change in rows:
+        other_str = f"{other:12.6g}" if other is not None else f"{'-':>12}"
+        change_str = f"{change:+8.1%}" if change is not None else f"{'-':>8}"
+        print(f"{name:{width}}  {value:12.6g}  {other_str}  {change_str}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""Open loop load generator for a deployed Producer -> Consumer pipeline.
+
+Requests arrive on a schedule, independently of how fast earlier requests
+complete (open loop), with up to --max-in-flight concurrent requests. Each
+request is a blocking Producer.post, and records:
+
+* submit latency, from the scheduled arrival until the message was sent and
+  its SUBMITTED item written,
+* end to end latency, from the scheduled arrival until the result was
+  retrieved,
+* the status code of the Response, or the error code of the exception.
+
+Latencies are measured from the scheduled arrival, so that time spent
+waiting for a free slot (when the system can't keep up) is included, rather
+than hidden (coordinated omission). The report has the percentiles and a
+histogram of both latencies, and the counts by status/error code.
+
+Schedules (--schedule):
+
+* constant:RATE, RATE requests per second for --duration seconds,
+* step:RATE@SECONDS,RATE@SECONDS,..., constant rates one after another,
+* poisson:RATE, Poisson arrivals at an average RATE for --duration seconds,
+* replay:PATH, arrival offsets in seconds, one per line (e.g. taken from
+  production logs).
+
+Usage, against the queue & table of a deployment (credentials & region from
+the usual AWS environment variables/profile)::
+
+    python benchmarks/loadgen.py --queue-name queue.fifo --table-name table \
+        --schedule step:5@60,20@60,50@120 --max-in-flight 256 \
+        --shared-poller --output report.json
+
+or as a dry run, against in-memory backends & consumers::
+
+    python benchmarks/loadgen.py --memory-consumers 8 \
+        --memory-compute-seconds 0.05 --schedule poisson:100 --duration 10
+
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import random
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+import boto3
+from _stats import histogram, percentiles
+from botocore.exceptions import ClientError
+from loguru import logger
+
+from inference_engine.backends import InMemoryDynamoDB, InMemorySQS
+from inference_engine.consumer.consumer import Consumer
+from inference_engine.dynamo_db_client import DynamoDBClient
+from inference_engine.producer import MessageGrouping, Producer
+from inference_engine.tracing import Span, Tracer
+
+
+def constant_schedule(rate: float, duration: float) -> list[float]:
+    """Get the arrival offsets of a constant rate."""
+    return [i / rate for i in range(int(rate * duration))]
+
+
+def step_schedule(steps: list[tuple[float, float]]) -> list[float]:
+    """Get the arrival offsets of consecutive (rate, duration) steps."""
+    offsets: list[float] = []
+    start = 0.0
+    for rate, duration in steps:
+        offsets += [start + o for o in constant_schedule(rate, duration)]
+        start += duration
+    return offsets
+
+
+def poisson_schedule(
+    rate: float, duration: float, seed: Optional[int] = None
+) -> list[float]:
+    """Get the arrival offsets of a Poisson process of average rate."""
+    rng = random.Random(seed)
+    offsets: list[float] = []
+    offset = rng.expovariate(rate)
+    while offset < duration:
+        offsets.append(offset)
+        offset += rng.expovariate(rate)
+    return offsets
+
+
+def replay_schedule(path: str) -> list[float]:
+    """Get the arrival offsets from a file with one offset per line."""
+    with open(path, encoding="utf-8") as f:
+        offsets = [float(line) for line in f if line.strip()]
+    start = min(offsets, default=0.0)
+    return sorted(offset - start for offset in offsets)
+
+
+def parse_schedule(
+    spec: str, duration: float, seed: Optional[int] = None
+) -> list[float]:
+    """Get the arrival offsets of a --schedule spec.
+
+    Parameters
+    ----------
+    spec : str
+        E.g. "constant:10", "step:5@60,20@60", "poisson:10" or
+        "replay:arrivals.txt".
+    duration : float
+        The duration of the constant & poisson schedules, in seconds.
+    seed : int, optional
+        The random seed of the poisson schedule.
+
+    Returns
+    -------
+    list of float
+        The sorted arrival offsets, in seconds from the start.
+
+    Raises
+    ------
+    ValueError
+        If the spec is invalid.
+
+    """
+    kind, _, value = spec.partition(":")
+    if kind == "constant":
+        return constant_schedule(float(value), duration)
+    if kind == "step":
+        steps = [
+            (float(rate), float(seconds))
+            for rate, seconds in (s.split("@") for s in value.split(","))
+        ]
+        return step_schedule(steps)
+    if kind == "poisson":
+        return poisson_schedule(float(value), duration, seed)
+    if kind == "replay":
+        return replay_schedule(value)
+    raise ValueError(f"Invalid schedule {spec=}")
+
+
+class LoadGenerator:
+    """Sends requests on a schedule & records their outcome."""
+
+    def __init__(self, producer: Producer, payload: dict, max_in_flight: int):
+        """Get a new LoadGenerator.
+
+        Parameters
+        ----------
+        producer : Producer
+            The producer posting the requests, its tracer is replaced.
+        payload : dict
+            The message body of every request.
+        max_in_flight : int
+            The maximum number of concurrent requests.
+
+        """
+        self.producer = producer
+        self.payload = payload
+        self.max_in_flight = max_in_flight
+        self.submit_latencies: list[float] = []
+        self.end_to_end_latencies: list[float] = []
+        self.outcomes: collections.Counter[str] = collections.Counter()
+        self.max_dispatch_lag = 0.0
+        # producer.await_result starts once the message is submitted
+        self._submitted_ns: dict[str, int] = {}
+        self._lock = threading.Lock()
+        producer.tracer = Tracer(max_spans=0, hooks=[self._on_span])
+
+    def _on_span(self, span: Span) -> None:
+        if span.name == "producer.await_result":
+            with self._lock:
+                self._submitted_ns[
+                    span.attributes["message_id"]
+                ] = span.start_ns
+
+    def _request(self, scheduled_ns: int) -> None:
+        try:
+            response = self.producer.post(dict(self.payload))
+        except ClientError as exp:
+            outcome = exp.response.get("Error", {}).get("Code", "ClientError")
+        except Exception as exp:  # pylint: disable=broad-except
+            outcome = type(exp).__name__
+        else:
+            outcome = str(response.status_code)
+        finished_ns = time.perf_counter_ns()
+
+        with self._lock:
+            self.outcomes[outcome] += 1
+            if outcome != "200":
+                return
+            submitted_ns = self._submitted_ns.pop(response.message_id)
+            self.submit_latencies.append((submitted_ns - scheduled_ns) / 1e9)
+            self.end_to_end_latencies.append(
+                (finished_ns - scheduled_ns) / 1e9
+            )
+
+    def run(self, offsets: list[float]) -> float:
+        """Send a request at each of the arrival offsets.
+
+        Parameters
+        ----------
+        offsets : list of float
+            The sorted arrival offsets, in seconds from now.
+
+        Returns
+        -------
+        float
+            The elapsed time, until the last request completed.
+
+        """
+        start_ns = time.perf_counter_ns()
+        with concurrent.futures.ThreadPoolExecutor(
+            self.max_in_flight, thread_name_prefix="loadgen"
+        ) as pool:
+            for offset in offsets:
+                scheduled_ns = start_ns + int(offset * 1e9)
+                sleep_seconds = (scheduled_ns - time.perf_counter_ns()) / 1e9
+                if sleep_seconds > 0:
+                    time.sleep(sleep_seconds)
+                else:
+                    self.max_dispatch_lag = max(
+                        self.max_dispatch_lag, -sleep_seconds
+                    )
+                pool.submit(self._request, scheduled_ns)
+
+        return (time.perf_counter_ns() - start_ns) / 1e9
+
+    def report(self, elapsed: float) -> dict[str, Any]:
+        """Get the report of the recorded requests."""
+        completed = len(self.end_to_end_latencies)
+        return {
+            "requests": sum(self.outcomes.values()),
+            "completed": completed,
+            "outcomes": dict(self.outcomes),
+            "elapsed_seconds": elapsed,
+            "throughput_per_second": completed / elapsed if elapsed else None,
+            "max_dispatch_lag_seconds": self.max_dispatch_lag,
+            "submit_latency_seconds": {
+                **percentiles(self.submit_latencies),
+                "histogram": histogram(self.submit_latencies),
+            },
+            "end_to_end_latency_seconds": {
+                **percentiles(self.end_to_end_latencies),
+                "histogram": histogram(self.end_to_end_latencies),
+            },
+        }
+
+
+def _memory_pipeline(
+    args: argparse.Namespace,
+) -> tuple[DynamoDBClient, dict[str, Any], list[Consumer]]:
+    sqs, dynamodb = InMemorySQS(), InMemoryDynamoDB()
+    sqs.create_queue(
+        QueueName=args.queue_name,
+        Attributes={"FifoQueue": "true", "ContentBasedDeduplication": "true"},
+    )
+    dynamodb.create_table(
+        TableName=args.table_name,
+        KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
+    )
+    ddb_client = DynamoDBClient(args.table_name, dynamodb=dynamodb)
+
+    def compute(body: dict, message_id: str) -> dict:
+        time.sleep(args.memory_compute_seconds)
+        return {"ok": True}
+
+    consumers = [
+        Consumer(
+            args.queue_name,
+            ddb_client=ddb_client,
+            compute_result=compute,
+            enable_ecs_scalein_protection=False,
+            sqs=sqs,
+        )
+        for _ in range(args.memory_consumers)
+    ]
+    return ddb_client, {"sqs": sqs}, consumers
+
+
+def print_report(report: dict[str, Any], file=sys.stderr) -> None:
+    """Print a human readable summary of the report."""
+    print(
+        f"{report['completed']}/{report['requests']} completed in "
+        f"{report['elapsed_seconds']:.1f}s "
+        f"({report['throughput_per_second'] or 0:.1f}/s), "
+        f"outcomes={report['outcomes']}, "
+        f"max dispatch lag={report['max_dispatch_lag_seconds']:.3f}s",
+        file=file,
+    )
+    for name in ("submit_latency_seconds", "end_to_end_latency_seconds"):
+        stats = report[name]
+        print(
+            f"\n{name}: "
+            + ", ".join(
+                f"{k}={v:.4f}"
+                for k, v in stats.items()
+                if k != "histogram" and v is not None
+            ),
+            file=file,
+        )
+        total = max(sum(stats["histogram"].values()), 1)
+        for upper, count in stats["histogram"].items():
+            if count:
+                bar = "#" * max(1, round(50 * count / total))
+                print(f"  <= {upper:>6}s {count:>8} {bar}", file=file)
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--queue-name", default="loadgen.fifo")
+    parser.add_argument("--table-name", default="loadgen")
+    parser.add_argument("--sqs-endpoint-url")
+    parser.add_argument("--ddb-endpoint-url")
+    parser.add_argument("--schedule", default="constant:10")
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=60,
+        help="Seconds, for the constant & poisson schedules",
+    )
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--max-in-flight", type=int, default=64)
+    parser.add_argument("--payload-bytes", type=int, default=256)
+    parser.add_argument("--timeout-seconds", type=float, default=300)
+    parser.add_argument("--poll-seconds", type=float, default=1)
+    parser.add_argument("--shared-poller", action="store_true")
+    parser.add_argument(
+        "--message-group-id-mode",
+        default="request",
+        choices=["global", "producer", "request", "sharded"],
+    )
+    parser.add_argument("--message-group-shards", type=int, default=16)
+    parser.add_argument(
+        "--memory-consumers",
+        type=int,
+        default=0,
+        help="If set, a dry run against in-memory backends & consumers",
+    )
+    parser.add_argument("--memory-compute-seconds", type=float, default=0.1)
+    parser.add_argument("--output", help="Path of the JSON report")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> dict[str, Any]:
+    """Run the load & report the results."""
+    args = parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    offsets = parse_schedule(args.schedule, args.duration, args.seed)
+    consumers: list[Consumer] = []
+    if args.memory_consumers:
+        ddb_client, sqs_kwargs, consumers = _memory_pipeline(args)
+    else:
+        ddb_kwargs = {"endpoint_url": args.ddb_endpoint_url}
+        ddb_client = DynamoDBClient(
+            args.table_name,
+            dynamodb=boto3.resource("dynamodb", **ddb_kwargs),
+        )
+        sqs_kwargs = {
+            "sqs": boto3.resource("sqs", endpoint_url=args.sqs_endpoint_url)
+        }
+
+    producer = Producer(
+        args.queue_name,
+        ddb_client=ddb_client,
+        message_group_id_mode=MessageGrouping(
+            mode=args.message_group_id_mode, shards=args.message_group_shards
+        ),
+        timeout_seconds=args.timeout_seconds,
+        poll_time_seconds=args.poll_seconds,
+        use_shared_poller=args.shared_poller,
+        **sqs_kwargs,
+    )
+    generator = LoadGenerator(
+        producer,
+        payload={"payload": "x" * args.payload_bytes},
+        max_in_flight=args.max_in_flight,
+    )
+
+    for consumer in consumers:
+        consumer.start_consuming()
+    try:
+        elapsed = generator.run(offsets)
+    finally:
+        for consumer in consumers:
+            consumer.stop_consuming()
+
+    report = {
+        "args": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": generator.report(elapsed),
+    }
+    print_report(report["results"])
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""Throughput & latency benchmarks of the Producer -> Consumer pipeline.
+
+Two suites, both writing their results as JSON so runs can be compared with
+benchmarks/compare.py:
+
+* e2e: closed loop clients post (blocking) to a queue served by consumers
+  with a sleep of --compute-seconds as compute function. Reports the
+  throughput and p50/p95/p99 latencies, split into queue wait (post until
+  a consumer received the message), processing (received until the message
+  was deleted) and result retrieval (the rest, i.e. polling DynamoDB).
+* micro: per call timings of DynamoDBItem.to_puttable / from_get_item and
+  of the result serialisers.
+
+By default everything runs in-process against the in-memory backends
+(inference_engine.backends), so the numbers are the framework overhead. Pass
+--sqs-endpoint-url & --ddb-endpoint-url to run against local stand-ins
+instead, e.g. `docker-compose up dynamodb-local sqs`.
+
+Usage::
+
+    python benchmarks/run.py e2e --messages 500 --clients 8 --consumers 8 \
+        --output e2e.json
+    python benchmarks/run.py micro --payload-bytes 1024 --output micro.json
+
+"""
+from __future__ import annotations
+
+import argparse
+import concurrent.futures
+import datetime as dt
+import json
+import platform
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import uuid
+from typing import Any, Optional
+
+import boto3
+from _stats import percentiles
+from loguru import logger
+
+from inference_engine._ddb_item import _deserialise_result, _serialise_result
+from inference_engine.backends import InMemoryDynamoDB, InMemorySQS
+from inference_engine.consumer.consumer import Consumer
+from inference_engine.dynamo_db_client import DynamoDBClient, DynamoDBItem
+from inference_engine.producer.producer import Producer
+from inference_engine.tracing import Span, Tracer
+from inference_engine.types import ResultStatus
+
+
+def _metadata(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "suite": args.suite,
+        "started_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "args": {k: v for k, v in vars(args).items() if k != "output"},
+    }
+
+
+def _create_resources(
+    args: argparse.Namespace, queue_name: str, table_name: str
+) -> tuple[Any, Any]:
+    if args.sqs_endpoint_url:
+        sqs = boto3.resource(
+            "sqs", endpoint_url=args.sqs_endpoint_url, region_name="eu-west-2"
+        )
+    else:
+        sqs = InMemorySQS()
+    if args.ddb_endpoint_url:
+        dynamodb = boto3.resource(
+            "dynamodb",
+            endpoint_url=args.ddb_endpoint_url,
+            region_name="eu-west-2",
+        )
+    else:
+        dynamodb = InMemoryDynamoDB()
+
+    sqs.create_queue(
+        QueueName=queue_name,
+        Attributes={
+            "FifoQueue": "true",
+            "ContentBasedDeduplication": "true",
+            "VisibilityTimeout": "30",
+        },
+    )
+    dynamodb.create_table(
+        TableName=table_name,
+        KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
+        AttributeDefinitions=[
+            {"AttributeName": "message_id", "AttributeType": "S"}
+        ],
+        ProvisionedThroughput={
+            "ReadCapacityUnits": 5,
+            "WriteCapacityUnits": 5,
+        },
+    )
+    if args.ddb_endpoint_url:
+        waiter = dynamodb.meta.client.get_waiter("table_exists")
+        waiter.wait(TableName=table_name)
+    return sqs, dynamodb
+
+
+def run_e2e(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the end-to-end benchmark."""
+    run_id = uuid.uuid4().hex[:8]
+    queue_name, table_name = f"bench_{run_id}.fifo", f"bench_{run_id}"
+    sqs, dynamodb = _create_resources(args, queue_name, table_name)
+
+    # Consumer spans give when each message was received & deleted
+    received: dict[str, tuple[int, int]] = {}
+
+    def on_span(span: Span) -> None:
+        if span.name == "consumer.message":
+            received[span.attributes["message_id"]] = (
+                span.start_ns,
+                span.end_ns,
+            )
+
+    tracer = Tracer(max_spans=0, hooks=[on_span])
+    ddb_client = DynamoDBClient(table_name, dynamodb=dynamodb)
+
+    def compute(body: dict, message_id: str) -> dict:
+        time.sleep(args.compute_seconds)
+        return {"payload": body["payload"]}
+
+    consumers = [
+        Consumer(
+            queue_name,
+            ddb_client=ddb_client,
+            compute_result=compute,
+            enable_ecs_scalein_protection=False,
+            tracer=tracer,
+            sqs=sqs,
+        )
+        for _ in range(args.consumers)
+    ]
+    producer = Producer(
+        queue_name,
+        ddb_client=ddb_client,
+        message_group_id_mode="request",
+        poll_time_seconds=args.poll_seconds,
+        use_shared_poller=args.shared_poller,
+        sqs=sqs,
+    )
+
+    payload = "x" * args.payload_bytes
+    submitted: dict[str, int] = {}
+    end_to_end: dict[str, float] = {}
+    errors: dict[str, int] = {}
+    lock = threading.Lock()
+    remaining = iter(range(args.messages))
+
+    def client() -> None:
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            started_ns = time.perf_counter_ns()
+            response = producer.post({"payload": payload})
+            finished_ns = time.perf_counter_ns()
+            with lock:
+                if response.status != ResultStatus.SUCCESS:
+                    status = ResultStatus(response.status).value
+                    errors[status] = errors.get(status, 0) + 1
+                    continue
+                submitted[response.message_id] = started_ns
+                end_to_end[response.message_id] = (
+                    finished_ns - started_ns
+                ) / 1e9
+
+    for consumer in consumers:
+        consumer.start_consuming()
+    try:
+        started = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(args.clients) as pool:
+            for future in [pool.submit(client) for _ in range(args.clients)]:
+                future.result()
+        elapsed = time.perf_counter() - started
+    finally:
+        for consumer in consumers:
+            consumer.stop_consuming()
+
+    queue_wait, processing, retrieval = [], [], []
+    for message_id, started_ns in submitted.items():
+        received_ns, deleted_ns = received[message_id]
+        queue_wait.append((received_ns - started_ns) / 1e9)
+        processing.append((deleted_ns - received_ns) / 1e9)
+        retrieval.append(
+            end_to_end[message_id] - queue_wait[-1] - processing[-1]
+        )
+
+    return {
+        "messages": len(submitted),
+        "errors": errors,
+        "elapsed_seconds": elapsed,
+        "throughput_per_second": len(submitted) / elapsed,
+        "latency_seconds": {
+            "end_to_end": percentiles(list(end_to_end.values())),
+            "queue_wait": percentiles(queue_wait),
+            "processing": percentiles(processing),
+            "result_retrieval": percentiles(retrieval),
+        },
+        "overhead_seconds_per_message": percentiles(
+            [p - args.compute_seconds for p in processing]
+        ),
+    }
+
+
+def _time_per_call(stmt, number: int) -> float:
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number
+
+
+def run_micro(args: argparse.Namespace) -> dict[str, Any]:
+    """Run the microbenchmarks."""
+    result = {"payload": "x" * args.payload_bytes, "values": list(range(50))}
+    item = DynamoDBItem(message_id=str(uuid.uuid4()), result=result)
+    puttable = item.to_puttable()
+    json_str = _serialise_result(result)
+
+    def from_get_item_and_decode() -> Any:
+        return DynamoDBItem.from_get_item(puttable).result
+
+    timings = {
+        "to_puttable": lambda: DynamoDBItem(
+            message_id=item.message_id, result=result
+        ).to_puttable(),
+        "from_get_item": lambda: DynamoDBItem.from_get_item(puttable),
+        "from_get_item_and_decode": from_get_item_and_decode,
+        "serialise_result": lambda: _serialise_result(result),
+        "deserialise_result": lambda: _deserialise_result(json_str),
+    }
+    return {
+        "seconds_per_call": {
+            name: _time_per_call(stmt, args.number)
+            for name, stmt in timings.items()
+        }
+    }
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    subparsers = parser.add_subparsers(dest="suite", required=True)
+
+    e2e = subparsers.add_parser("e2e", help="Producer -> Consumer benchmark")
+    e2e.add_argument("--messages", type=int, default=200)
+    e2e.add_argument("--clients", type=int, default=4)
+    e2e.add_argument("--consumers", type=int, default=4)
+    e2e.add_argument("--compute-seconds", type=float, default=0.0)
+    e2e.add_argument("--poll-seconds", type=float, default=0.01)
+    e2e.add_argument(
+        "--shared-poller",
+        action="store_true",
+        help="Batch result polling across clients, see ResultPoller",
+    )
+    e2e.add_argument("--sqs-endpoint-url")
+    e2e.add_argument("--ddb-endpoint-url")
+
+    micro = subparsers.add_parser("micro", help="Serialisation benchmarks")
+    micro.add_argument("--number", type=int, default=2000)
+
+    for subparser in (e2e, micro):
+        subparser.add_argument("--payload-bytes", type=int, default=1024)
+        subparser.add_argument(
+            "--output", help="Path of the JSON results, default stdout"
+        )
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> dict[str, Any]:
+    """Run a benchmark suite and write its JSON results."""
+    args = parse_args(argv)
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+    metadata = _metadata(args)
+    run = run_e2e if args.suite == "e2e" else run_micro
+    results = {"metadata": metadata, "results": run(args)}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    else:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    return results
+
+
+if __name__ == "__main__":
+    main()
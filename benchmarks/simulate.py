@@ -0,0 +1,664 @@
+"""Offline discrete-event simulator of the queue backlog autoscaling.
+
+Replays an arrival schedule against a model of the consumer tasks, scaled by
+the same policies as the ecs-sqs-autoscaling terraform module, to compare
+its variables (and the backlog lambda's) before applying them:
+
+* every --metric-interval seconds, QueueBacklog & QueueRequiresConsumer are
+  computed as compute_queue_backlog does, with the
+  --processing-time-statistic of the messages processed in the last
+  --processing-time-window seconds as secs_per_msg,
+* the target tracking policy scales out (in) to
+  ceil(desired * QueueBacklog / --target-value) once --scaleout-datapoints
+  (--scalein-datapoints) consecutive datapoints are above (below) the
+  target, outside of the cooldowns,
+* the step scaling policy sets the desired count to --rampup-capacity when
+  QueueRequiresConsumer, i.e. when messages are visible but there are no
+  tasks.
+
+Tasks start consuming --cold-start seconds after being launched, and run
+--concurrency consumers, each processing one message at a time for a
+--service-time. The heartbeat keeps messages invisible while processed;
+with --no-heartbeat, messages processed for longer than
+--visibility-timeout are redelivered (up to --max-receive-count receives).
+With scale-in protection, scaling in stops the starting & idle tasks, and
+the busy tasks once their messages are processed; with
+--no-scalein-protection, busy tasks are stopped straight away and their
+messages redelivered after --visibility-timeout.
+
+The report has the percentiles of the queue wait (arrival until received by
+the consumer which processed it) & end to end latency (arrival until
+processed), the task-hours, the number of tasks & redeliveries and, given
+--slo-seconds, whether the policy met the SLO on the queue wait and the
+smallest fixed number of warm tasks that would.
+Write the reports of two policies with --output to compare them with
+benchmarks/compare.py.
+
+Service times (--service-time):
+
+* constant:SECONDS,
+* exponential:MEAN,
+* lognormal:MEAN,SIGMA, SIGMA being the standard deviation of the log,
+* replay:PATH, sampled from the seconds in a file, one per line (e.g. the
+  ProcessingTime metric of a deployment).
+
+Usage::
+
+    python benchmarks/simulate.py --schedule step:0.5@600,5@1800,0.5@600 \
+        --service-time lognormal:2,0.5 --cold-start 90 --target-value 60 \
+        --max-capacity 20 --slo-seconds 30 --output policy.json
+
+"""
+from __future__ import annotations
+
+import argparse
+import collections
+import dataclasses
+import heapq
+import json
+import math
+import random
+import sys
+from typing import Any, Callable, Optional
+
+from _stats import percentile, percentiles
+from loadgen import parse_schedule
+
+ServiceTimeT = Callable[[random.Random], float]
+
+
+def parse_service_time(spec: str) -> ServiceTimeT:
+    """Get the sampler of a --service-time spec.
+
+    Parameters
+    ----------
+    spec : str
+        E.g. "constant:2", "exponential:2", "lognormal:2,0.5" or
+        "replay:processing_times.txt".
+
+    Returns
+    -------
+    callable
+        Samples a service time, in seconds, with a random.Random.
+
+    Raises
+    ------
+    ValueError
+        If the spec is invalid.
+
+    """
+    kind, _, value = spec.partition(":")
+    if kind == "constant":
+        seconds = float(value)
+        return lambda rng: seconds
+    if kind == "exponential":
+        mean = float(value)
+        return lambda rng: rng.expovariate(1 / mean)
+    if kind == "lognormal":
+        mean, sigma = (float(v) for v in value.split(","))
+        mu = math.log(mean) - sigma**2 / 2
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == "replay":
+        with open(value, encoding="utf-8") as f:
+            samples = [float(line) for line in f if line.strip()]
+        return lambda rng: rng.choice(samples)
+    raise ValueError(f"Invalid service time {spec=}")
+
+
+def statistic(samples: list[float], stat: str) -> Optional[float]:
+    """Get a CloudWatch statistic ("Average" or e.g. "p90") of samples."""
+    if stat == "Average":
+        return sum(samples) / len(samples) if samples else None
+    return percentile(sorted(samples), float(stat.lstrip("p")))
+
+
+@dataclasses.dataclass
+class ConsumerModel:
+    """The behaviour of the consumer tasks."""
+
+    service_time: ServiceTimeT
+    concurrency: int = 1
+    cold_start: float = 60.0
+    heartbeat: bool = True
+    visibility_timeout: float = 30.0
+    max_receive_count: Optional[int] = None
+    scalein_protection: bool = True
+
+
+@dataclasses.dataclass
+class ScalingPolicy:
+    """The ecs-sqs-autoscaling module & backlog lambda variables."""
+
+    min_capacity: int = 1
+    max_capacity: int = 10
+    target_value: float = 600.0
+    scalein_cooldown: float = 60.0
+    scaleout_cooldown: float = 30.0
+    rampup_capacity: int = 1
+    metric_interval: float = 60.0
+    scaleout_datapoints: int = 3
+    scalein_datapoints: int = 15
+    in_flight_weight: float = 0.5
+    est_secs_per_msg: float = 1.0
+    processing_time_statistic: str = "p90"
+    processing_time_window: float = 600.0
+
+
+@dataclasses.dataclass
+class _Task:
+    launched_at: float
+    running: bool = False
+    stopping: bool = False
+    stopped_at: Optional[float] = None
+    attempts: set[int] = dataclasses.field(default_factory=set)
+
+
+class Simulation:
+    """A discrete-event simulation of the queue & its autoscaled tasks."""
+
+    def __init__(
+        self,
+        offsets: list[float],
+        consumer: ConsumerModel,
+        policy: ScalingPolicy,
+        *,
+        fixed_tasks: Optional[int] = None,
+        seed: Optional[int] = None,
+        max_seconds: float = 7 * 24 * 3600,
+        record_timeline: bool = False,
+    ):
+        """Get a new Simulation.
+
+        Parameters
+        ----------
+        offsets : list of float
+            The sorted arrival offsets of the messages, in seconds.
+        consumer : ConsumerModel
+            The model of the consumer tasks.
+        policy : ScalingPolicy
+            The autoscaling policy, unused if fixed_tasks.
+        fixed_tasks : int, optional
+            If set, a fixed number of tasks. Else min_capacity tasks, both
+            already running at the start.
+        seed : int, optional
+            The random seed of the service times.
+        max_seconds : float
+            The simulated time after which messages still not processed are
+            reported as unfinished.
+        record_timeline : bool
+            Whether to report the metrics & task counts at every metric
+            interval.
+
+        """
+        self.offsets = offsets
+        self.consumer = consumer
+        self.policy = policy
+        self.fixed_tasks = fixed_tasks
+        self.max_seconds = max_seconds
+        self.record_timeline = record_timeline
+        self._rng = random.Random(seed)
+
+        self._events: list[tuple[float, int, str, Any]] = []
+        self._seq = 0
+        self._queue: collections.deque[int] = collections.deque()
+        self._queued: set[int] = set()
+        self._receives = [0] * len(offsets)
+        self._done_at: list[Optional[float]] = [None] * len(offsets)
+        # Per processed message, from its arrival until received by the
+        # consumer which processed it
+        self.queue_waits: list[float] = []
+        self._unresolved = len(offsets)
+        self._dead_lettered = 0
+        self._redeliveries = 0
+        self._duplicates = 0
+
+        self._tasks: list[_Task] = []
+        # attempt id -> (message, task, received at, service time)
+        self._attempts: dict[int, tuple[int, _Task, float, float]] = {}
+        self._next_attempt = 0
+        self._processed: collections.deque[
+            tuple[float, float]
+        ] = collections.deque()
+
+        self._desired = 0
+        self._max_desired = 0
+        self._datapoints: list[Optional[float]] = []
+        self._last_scale_out = -math.inf
+        self._last_scaling = -math.inf
+        self._timeline: list[dict[str, Any]] = []
+
+    def _push(self, at: float, kind: str, payload: Any = None) -> None:
+        heapq.heappush(self._events, (at, self._seq, kind, payload))
+        self._seq += 1
+
+    def _enqueue(self, message: int, front: bool = False) -> None:
+        if self._done_at[message] is not None or message in self._queued:
+            return
+        self._queued.add(message)
+        if front:
+            self._queue.appendleft(message)
+        else:
+            self._queue.append(message)
+
+    def _dispatch(self, now: float) -> None:
+        for task in self._tasks:
+            while (
+                task.running
+                and not task.stopping
+                and len(task.attempts) < self.consumer.concurrency
+                and self._queue
+            ):
+                message = self._queue.popleft()
+                if message not in self._queued:
+                    continue
+                self._queued.discard(message)
+                max_receives = self.consumer.max_receive_count
+                if max_receives and self._receives[message] >= max_receives:
+                    # Moved to the dead letter queue by the redrive policy
+                    self._dead_lettered += 1
+                    self._unresolved -= 1
+                    continue
+                self._receive(now, message, task)
+            if not self._queue:
+                return
+
+    def _receive(self, now: float, message: int, task: _Task) -> None:
+        self._receives[message] += 1
+        if self._receives[message] > 1:
+            self._redeliveries += 1
+        attempt = self._next_attempt
+        self._next_attempt += 1
+        service_time = self.consumer.service_time(self._rng)
+        self._attempts[attempt] = (message, task, now, service_time)
+        task.attempts.add(attempt)
+        self._push(now + service_time, "processed", attempt)
+        if (
+            not self.consumer.heartbeat
+            and service_time > self.consumer.visibility_timeout
+        ):
+            self._push(
+                now + self.consumer.visibility_timeout, "visible", message
+            )
+
+    def _processed_event(self, now: float, attempt: int) -> None:
+        if attempt not in self._attempts:
+            # Its task was stopped while processing it
+            return
+        message, task, received_at, service_time = self._attempts.pop(attempt)
+        task.attempts.discard(attempt)
+        self._processed.append((now, service_time))
+        if self._done_at[message] is None:
+            self._done_at[message] = now
+            self.queue_waits.append(received_at - self.offsets[message])
+            self._queued.discard(message)
+            self._unresolved -= 1
+        else:
+            self._duplicates += 1
+        if task.stopping and not task.attempts:
+            self._stop(now, task)
+
+    def _stop(self, now: float, task: _Task) -> None:
+        for attempt in task.attempts:
+            message = self._attempts.pop(attempt)[0]
+            # The heartbeat stops, the message is visible once its last
+            # visibility timeout expires
+            self._push(
+                now + self.consumer.visibility_timeout, "visible", message
+            )
+        task.attempts.clear()
+        task.running = False
+        task.stopped_at = now
+
+    def _set_desired(self, now: float, desired: int) -> None:
+        if self.fixed_tasks is None:
+            desired = min(
+                max(desired, self.policy.min_capacity),
+                self.policy.max_capacity,
+            )
+        self._desired = desired
+        self._max_desired = max(self._max_desired, desired)
+        active = [
+            t for t in self._tasks if t.stopped_at is None and not t.stopping
+        ]
+        for _ in range(desired - len(active)):
+            task = _Task(launched_at=now)
+            self._tasks.append(task)
+            self._push(now + self.consumer.cold_start, "running", task)
+
+        excess = len(active) - desired
+        if excess <= 0:
+            return
+        # Starting, then idle, then busy tasks are stopped first
+        for task in sorted(
+            active, key=lambda t: (t.running, len(t.attempts), -t.launched_at)
+        )[:excess]:
+            if task.attempts and self.consumer.scalein_protection:
+                task.stopping = True
+            else:
+                self._stop(now, task)
+
+    def _metric_event(self, now: float) -> None:
+        policy = self.policy
+        while (
+            self._processed
+            and self._processed[0][0] < now - policy.processing_time_window
+        ):
+            self._processed.popleft()
+        secs_per_msg = statistic(
+            [s for _, s in self._processed], policy.processing_time_statistic
+        )
+        if secs_per_msg is None:
+            secs_per_msg = policy.est_secs_per_msg
+
+        visible = len(self._queued)
+        in_flight = len(self._attempts)
+        running = sum(t.running for t in self._tasks)
+        messages = visible + policy.in_flight_weight * in_flight
+        backlog: Optional[float] = None
+        if running > 0:
+            backlog = messages * secs_per_msg / running
+        elif messages == 0:
+            backlog = 0
+        self._datapoints.append(backlog)
+
+        if self.record_timeline:
+            self._timeline.append(
+                {
+                    "seconds": now,
+                    "visible": visible,
+                    "in_flight": in_flight,
+                    "running": running,
+                    "desired": self._desired,
+                    "queue_backlog": backlog,
+                }
+            )
+
+        if self._desired == 0 and visible > 0:
+            if now - self._last_scale_out >= policy.scaleout_cooldown:
+                self._scale(now, policy.rampup_capacity)
+            return
+        if backlog is None or self._desired == 0:
+            return
+
+        proposed = math.ceil(self._desired * backlog / policy.target_value)
+        scaleout = self._datapoints[-policy.scaleout_datapoints :]
+        scalein = self._datapoints[-policy.scalein_datapoints :]
+        if (
+            proposed > self._desired
+            and len(scaleout) == policy.scaleout_datapoints
+            and all(
+                d is not None and d > policy.target_value for d in scaleout
+            )
+            and now - self._last_scale_out >= policy.scaleout_cooldown
+        ):
+            self._scale(now, proposed)
+        elif (
+            proposed < self._desired
+            and len(scalein) == policy.scalein_datapoints
+            and all(d is not None and d < policy.target_value for d in scalein)
+            and now - self._last_scaling >= policy.scalein_cooldown
+        ):
+            self._scale(now, proposed)
+
+    def _scale(self, now: float, desired: int) -> None:
+        previous = self._desired
+        self._set_desired(now, desired)
+        if self._desired > previous:
+            self._last_scale_out = now
+        if self._desired != previous:
+            self._last_scaling = now
+
+    def run(self) -> dict[str, Any]:
+        """Run the simulation until all the messages are processed.
+
+        Returns
+        -------
+        dict
+            The report of the simulation.
+
+        """
+        # The initial tasks are already running
+        if self.fixed_tasks is not None:
+            self._set_desired(0, self.fixed_tasks)
+        else:
+            self._set_desired(0, self.policy.min_capacity)
+            self._push(self.policy.metric_interval, "metric")
+        self._events = [e for e in self._events if e[2] != "running"]
+        for task in self._tasks:
+            task.running = True
+        for message, offset in enumerate(self.offsets):
+            self._push(offset, "arrival", message)
+
+        now = 0.0
+        while self._events and self._unresolved:
+            now, _, kind, payload = heapq.heappop(self._events)
+            if now > self.max_seconds:
+                now = self.max_seconds
+                break
+            if kind == "arrival":
+                self._enqueue(payload)
+            elif kind == "visible":
+                self._enqueue(payload, front=True)
+            elif kind == "processed":
+                self._processed_event(now, payload)
+            elif kind == "running":
+                if payload.stopped_at is None:
+                    payload.running = True
+            elif kind == "metric":
+                self._metric_event(now)
+                self._push(now + self.policy.metric_interval, "metric")
+            self._dispatch(now)
+
+        return self._report(now)
+
+    def _report(self, end: float) -> dict[str, Any]:
+        task_seconds = sum(
+            (t.stopped_at if t.stopped_at is not None else end) - t.launched_at
+            for t in self._tasks
+        )
+        end_to_end = [
+            done_at - offset
+            for offset, done_at in zip(self.offsets, self._done_at)
+            if done_at is not None
+        ]
+        report: dict[str, Any] = {
+            "messages": len(self.offsets),
+            "processed": len(end_to_end),
+            "unfinished": self._unresolved,
+            "dead_lettered": self._dead_lettered,
+            "redeliveries": self._redeliveries,
+            "duplicate_processing": self._duplicates,
+            "elapsed_seconds": end,
+            "task_hours": task_seconds / 3600,
+            "tasks_launched": len(self._tasks),
+            "max_desired_tasks": self._max_desired,
+            "queue_wait_seconds": percentiles(self.queue_waits),
+            "end_to_end_seconds": percentiles(end_to_end),
+        }
+        if self.record_timeline:
+            report["timeline"] = self._timeline
+        return report
+
+
+def recommend_tasks(
+    offsets: list[float],
+    consumer: ConsumerModel,
+    slo_seconds: float,
+    slo_percentile: float,
+    seed: Optional[int] = None,
+    max_tasks: int = 4096,
+) -> Optional[int]:
+    """Get the smallest fixed number of tasks meeting a queue wait SLO.
+
+    Parameters
+    ----------
+    offsets : list of float
+        The sorted arrival offsets of the messages, in seconds.
+    consumer : ConsumerModel
+        The model of the consumer tasks.
+    slo_seconds : float
+        The maximum queue wait, in seconds.
+    slo_percentile : float
+        The percentile of the queue wait the SLO applies to, e.g. 95.
+    seed : int, optional
+        The random seed of the service times, the same for every number of
+        tasks tried.
+    max_tasks : int
+        The maximum number of tasks tried.
+
+    Returns
+    -------
+    int or None
+        None if max_tasks don't meet the SLO.
+
+    """
+
+    def meets(tasks: int) -> bool:
+        simulation = Simulation(
+            offsets, consumer, ScalingPolicy(), fixed_tasks=tasks, seed=seed
+        )
+        report = simulation.run()
+        wait = percentile(sorted(simulation.queue_waits), slo_percentile)
+        return (
+            report["unfinished"] == 0
+            and wait is not None
+            and wait <= slo_seconds
+        )
+
+    upper = 1
+    while not meets(upper):
+        if upper >= max_tasks:
+            return None
+        upper = min(upper * 2, max_tasks)
+    lower = upper // 2
+    # meets(upper) and, unless lower is 0, not meets(lower)
+    while upper - lower > 1:
+        middle = (lower + upper) // 2
+        if meets(middle):
+            upper = middle
+        else:
+            lower = middle
+    return upper
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--schedule", default="poisson:1")
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=3600,
+        help="Seconds, for the constant & poisson schedules",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+
+    consumer = parser.add_argument_group("consumer model")
+    consumer.add_argument("--service-time", default="exponential:1")
+    consumer.add_argument("--concurrency", type=int, default=1)
+    consumer.add_argument("--cold-start", type=float, default=60)
+    consumer.add_argument(
+        "--no-heartbeat", dest="heartbeat", action="store_false"
+    )
+    consumer.add_argument("--visibility-timeout", type=float, default=30)
+    consumer.add_argument("--max-receive-count", type=int)
+    consumer.add_argument(
+        "--no-scalein-protection",
+        dest="scalein_protection",
+        action="store_false",
+    )
+
+    policy = parser.add_argument_group("scaling policy")
+    policy.add_argument(
+        "--fixed-tasks",
+        type=int,
+        help="If set, a fixed number of warm tasks instead of autoscaling",
+    )
+    for field in dataclasses.fields(ScalingPolicy):
+        policy.add_argument(
+            "--" + field.name.replace("_", "-"),
+            type=type(field.default),
+            default=field.default,
+        )
+
+    slo = parser.add_argument_group("SLO")
+    slo.add_argument("--slo-seconds", type=float, help="Maximum queue wait")
+    slo.add_argument("--slo-percentile", type=float, default=95)
+
+    parser.add_argument(
+        "--timeline",
+        action="store_true",
+        help="Report the metrics & task counts at every metric interval",
+    )
+    parser.add_argument("--output", help="Path of the JSON report")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> dict[str, Any]:
+    """Run the simulation & report the results."""
+    args = parse_args(argv)
+    offsets = parse_schedule(args.schedule, args.duration, args.seed)
+    consumer = ConsumerModel(
+        service_time=parse_service_time(args.service_time),
+        concurrency=args.concurrency,
+        cold_start=args.cold_start,
+        heartbeat=args.heartbeat,
+        visibility_timeout=args.visibility_timeout,
+        max_receive_count=args.max_receive_count,
+        scalein_protection=args.scalein_protection,
+    )
+    policy = ScalingPolicy(
+        **{
+            field.name: getattr(args, field.name)
+            for field in dataclasses.fields(ScalingPolicy)
+        }
+    )
+    simulation = Simulation(
+        offsets,
+        consumer,
+        policy,
+        fixed_tasks=args.fixed_tasks,
+        seed=args.seed,
+        record_timeline=args.timeline,
+    )
+    results = simulation.run()
+
+    if args.slo_seconds is not None:
+        wait = percentile(sorted(simulation.queue_waits), args.slo_percentile)
+        tasks = recommend_tasks(
+            offsets,
+            consumer,
+            args.slo_seconds,
+            args.slo_percentile,
+            seed=args.seed,
+        )
+        results["slo"] = {
+            "seconds": args.slo_seconds,
+            "percentile": args.slo_percentile,
+            "queue_wait_seconds": wait,
+            "met": (
+                results["unfinished"] == 0
+                and wait is not None
+                and wait <= args.slo_seconds
+            ),
+            "recommended_fixed_tasks": tasks,
+            "recommended_fixed_consumers": (
+                tasks * args.concurrency if tasks is not None else None
+            ),
+        }
+
+    report = {
+        "args": {k: v for k, v in vars(args).items() if k != "output"},
+        "results": results,
+    }
+    summary = {k: v for k, v in results.items() if k != "timeline"}
+    json.dump(summary, sys.stderr, indent=2)
+    print(file=sys.stderr)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -32,8 +32,10 @@ def ddb_kwargs() -> dict[str, Any]:
 
 
 def ddb_client() -> DynamoDBClient:
+    index_name = os.environ.get("DDB_REQUEST_ID_INDEX_NAME")
     return DynamoDBClient(
         table_name=ddb_table_name(),
+        request_id_index_name=index_name or None,
         **ddb_kwargs(),
     )
 
@@ -7,6 +7,14 @@ from _share import sqs_kwargs, sqs_queue_name
 from dotenv import load_dotenv
 from logzero import logger
 
+from inference_engine.consumer import (
+    CircuitBreakerConfig,
+    ConsumerMetrics,
+    ConsumerOptions,
+    EmfStageHook,
+    PoisonMessagePolicy,
+    RetryPolicy,
+)
 from inference_engine.consumer.api_wrapper import get_app
 from inference_engine.consumer.consumer import Consumer
 
@@ -37,6 +45,35 @@ def compute_function(body, message_id) -> dict:
     return {"recieved_message_body": body, "message_id": message_id}
 
 
+metrics = ConsumerMetrics()
+if emf_namespace := os.environ.get("METRICS_EMF_NAMESPACE"):
+    # ProcessingTime, used by the autoscaling
+    metrics.add_hook(
+        EmfStageHook(emf_namespace, {"QueueName": sqs_queue_name()})
+    )
+
+retry_policy = None
+if retry_base_delay := os.environ.get("RETRY_BASE_DELAY_SECONDS"):
+    retry_policy = RetryPolicy(
+        base_delay_seconds=float(retry_base_delay),
+        max_delay_seconds=float(
+            os.environ.get("RETRY_MAX_DELAY_SECONDS", 900)
+        ),
+        in_place_retries=int(os.environ.get("RETRY_IN_PLACE_RETRIES", 0)),
+    )
+
+poison_policy = None
+if poison_max_receive_count := os.environ.get("POISON_MAX_RECEIVE_COUNT"):
+    poison_policy = PoisonMessagePolicy(
+        max_receive_count=int(poison_max_receive_count)
+    )
+
+circuit_breaker = None
+if failure_threshold := os.environ.get("CIRCUIT_BREAKER_FAILURE_THRESHOLD"):
+    circuit_breaker = CircuitBreakerConfig(
+        failure_threshold=int(failure_threshold)
+    )
+
 consumer = Consumer(
     queue_name=sqs_queue_name(),
     ddb_client=ddb_client,
@@ -49,6 +86,13 @@ consumer = Consumer(
         os.environ.get("HEARTBEAT_VISIBILITY_TIMEOUT", 30)
     ),
     heartbeat_interval=float(os.environ.get("HEARTBEAT_INTERVAL", 10)),
+    options=ConsumerOptions(
+        max_concurrency=int(os.environ.get("CONSUMER_MAX_CONCURRENCY", 1)),
+        retry_policy=retry_policy,
+        poison_policy=poison_policy,
+        circuit_breaker=circuit_breaker,
+        metrics=metrics,
+    ),
     **sqs_kwargs(),
 )
 consumer.start_consuming()
@@ -0,0 +1,113 @@
+"""Bounded, thread safe LRU cache with TTL."""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+_KT = TypeVar("_KT", bound=Hashable)
+_VT = TypeVar("_VT")
+
+
+class LRUCache(Generic[_KT, _VT]):
+    """Least recently used cache, bounded in size and entry age."""
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        """Get a new LRUCache.
+
+        Parameters
+        ----------
+        max_size : int
+            The maximum number of entries, least recently used entries are
+            evicted first.
+        ttl_seconds : float, optional
+            The maximum age of an entry. If None entries do not expire.
+
+        """
+        if max_size < 1:
+            raise ValueError(f"Invalid {max_size=}")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[_KT, tuple[float, _VT]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Get the number of entries, including not yet evicted stale ones."""
+        return len(self._data)
+
+    def get(self, key: _KT) -> Optional[_VT]:
+        """Get the value for key, counting a hit or a miss.
+
+        Parameters
+        ----------
+        key : Hashable
+
+        Returns
+        -------
+        Any or None
+            The value, None if key is not cached or has expired.
+
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and self._is_stale(entry[0]):
+                del self._data[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: _KT, value: _VT) -> None:
+        """Set the value for key, evicting the least recently used entry.
+
+        Parameters
+        ----------
+        key : Hashable
+        value : Any
+
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: _KT) -> Optional[_VT]:
+        """Remove key from the cache.
+
+        Parameters
+        ----------
+        key : Hashable
+
+        Returns
+        -------
+        Any or None
+            The removed value, None if key was not cached.
+
+        """
+        with self._lock:
+            entry = self._data.pop(key, None)
+
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        """Remove all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _is_stale(self, put_at: float) -> bool:
+        if self.ttl_seconds is None:
+            return False
+
+        return time.monotonic() - put_at > self.ttl_seconds
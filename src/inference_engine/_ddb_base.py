@@ -0,0 +1,103 @@
+"""Shared DynamoDB functionality."""
+from __future__ import annotations
+
+import concurrent.futures
+import copy
+import threading
+from typing import TYPE_CHECKING, Any, Literal, Optional
+
+from mypy_boto3_dynamodb.service_resource import DynamoDBServiceResource, Table
+
+from ._cache import LRUCache
+from ._ddb_item import DynamoDBItem
+from .exceptions import KeyNotFoundError, UnparseableItemError
+from .tracing import Tracer
+from .types import MessageIdT, ResultStatus
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+_KeyT = dict[Literal["message_id"], MessageIdT]
+# Items with this status are never rewritten, so are safe to cache. ERROR
+# items aren't, a retry of the message may still succeed.
+_CACHEABLE_STATUS = ResultStatus.SUCCESS
+
+
+class _DynamoDBBase:
+    """The table & helpers shared by the DynamoDBClient stores."""
+
+    table_name: str
+    dynamodb: DynamoDBServiceResource
+    table: Table
+    # Items are cached serialised, every get returns a new DynamoDBItem
+    cache: Optional[LRUCache[MessageIdT, dict[str, Any]]]
+    request_id_index_name: Optional[str]
+    batch_get_concurrency: int
+    tracer: Tracer
+    logger: Logger
+    _executor: Optional[concurrent.futures.ThreadPoolExecutor]
+    _executor_lock: threading.Lock
+
+    def _cache_get(self, message_id: MessageIdT) -> Optional[DynamoDBItem]:
+        if self.cache is None:
+            return None
+
+        item = self.cache.get(message_id)
+        if item is None:
+            return None
+        return DynamoDBItem.from_get_item(copy.deepcopy(item))
+
+    def _cache_put(self, item_obj: DynamoDBItem) -> None:
+        if self.cache is not None and item_obj.status == _CACHEABLE_STATUS:
+            self.cache.put(item_obj.message_id, item_obj.to_puttable())
+
+    @staticmethod
+    def _message_id_to_key(message_id: MessageIdT) -> _KeyT:
+        return {"message_id": message_id}
+
+    def _map_concurrently(self, function, args: list) -> list:
+        """Call function on each arg, concurrently if there are many."""
+        if len(args) <= 1 or self.batch_get_concurrency == 1:
+            return [function(arg) for arg in args]
+
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = concurrent.futures.ThreadPoolExecutor(
+                    self.batch_get_concurrency,
+                    thread_name_prefix="ddb-batch-get",
+                )
+        return list(self._executor.map(function, args))
+
+    def _projected_get(
+        self,
+        message_id: MessageIdT,
+        consistent_read: bool,
+        projection_kwargs: dict[str, Any],
+    ) -> dict[str, Any]:
+        """Get some attributes of the item of a message_id.
+
+        Raises
+        ------
+        KeyNotFoundError
+            If there is no object corresponding to message_id.
+
+        """
+        key = self._message_id_to_key(message_id)
+        with self.tracer.span("ddb.get_item", message_id=message_id):
+            response = self.table.get_item(
+                Key=key, ConsistentRead=consistent_read, **projection_kwargs
+            )
+        item = response.get("Item", {})
+        if not item:
+            raise KeyNotFoundError(f"No item found for key={key}")
+        return item
+
+    @staticmethod
+    def _parse_item(item: dict[str, Any], key: _KeyT) -> DynamoDBItem:
+        try:
+            return DynamoDBItem.from_get_item(item)
+        except Exception as exp:
+            raise UnparseableItemError(
+                f"Unable to parse {item=} with {key=}: "
+                f"{type(exp)} - {str(exp)}"
+            ) from exp
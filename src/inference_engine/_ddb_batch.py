@@ -0,0 +1,390 @@
+"""Bulk gets of DynamoDB items, by message_id or request_id."""
+from __future__ import annotations
+
+import random
+import time
+from typing import Any, Iterable
+
+from boto3.dynamodb.conditions import Key
+
+from ._ddb_base import _DynamoDBBase, _KeyT
+from ._ddb_coalesce import _coalesced_message_id
+from ._ddb_item import DynamoDBItem, _item_status
+from .exceptions import (
+    ExpiredItemError,
+    KeyNotFoundError,
+    UnprocessedKeysError,
+)
+from .types import MessageIdT, ResultStatus
+
+_BATCH_GET_MAX_KEYS = 100
+# Backoff between retries of UnprocessedKeys, in seconds
+_BATCH_GET_BACKOFF_BASE = 0.05
+_BATCH_GET_BACKOFF_MAX = 2
+# Calls of a chunk before giving up on its UnprocessedKeys, i.e. up to ~9s
+# of backoff
+_BATCH_GET_MAX_ATTEMPTS = 10
+# "status" is a DDB reserved word, so must be aliased in expressions
+_BATCH_STATUS_PROJECTION_KWARGS: dict[str, Any] = {
+    "ProjectionExpression": "message_id, #status, updated_at, expiration",
+    "ExpressionAttributeNames": {"#status": "status"},
+}
+
+
+class _BatchGetStore(_DynamoDBBase):
+    def _batch_get_chunk(
+        self, keys: list[_KeyT], **kwargs
+    ) -> list[dict[str, Any]]:
+        """Get up to 100 keys with BatchGetItem, retrying UnprocessedKeys.
+
+        Raises UnprocessedKeysError if keys are still unprocessed after
+        _BATCH_GET_MAX_ATTEMPTS calls, e.g. under sustained throttling.
+
+        """
+        request_items: Any = {
+            self.table_name: {"Keys": keys, "ConsistentRead": True, **kwargs}
+        }
+        items: list[dict[str, Any]] = []
+        attempt = 0
+        while True:
+            with self.tracer.span("ddb.batch_get_item", num_keys=len(keys)):
+                response = self.dynamodb.batch_get_item(
+                    RequestItems=request_items
+                )
+            items += response["Responses"].get(self.table_name, [])
+            request_items = response.get("UnprocessedKeys")
+            if not request_items:
+                return items
+
+            unprocessed_keys = request_items[self.table_name]["Keys"]
+            if attempt + 1 >= _BATCH_GET_MAX_ATTEMPTS:
+                raise UnprocessedKeysError(
+                    f"{len(unprocessed_keys)} keys still unprocessed after "
+                    f"{_BATCH_GET_MAX_ATTEMPTS} BatchGetItem calls: "
+                    f"{unprocessed_keys}",
+                    unprocessed_keys,
+                )
+
+            # Unprocessed keys are due to throttling, so back off with full
+            # jitter before retrying
+            backoff = min(
+                _BATCH_GET_BACKOFF_MAX, _BATCH_GET_BACKOFF_BASE * 2**attempt
+            )
+            attempt += 1
+            self.logger.debug(
+                "Retrying {} unprocessed keys, attempt={}",
+                len(unprocessed_keys),
+                attempt,
+            )
+            time.sleep(random.uniform(0, backoff))  # nosec B311
+
+    def _batch_get(
+        self, message_ids: list[MessageIdT], **kwargs
+    ) -> list[dict[str, Any]]:
+        """Get any number of keys with concurrent BatchGetItem chunks."""
+        chunks = [
+            [
+                self._message_id_to_key(id_)
+                for id_ in message_ids[start : start + _BATCH_GET_MAX_KEYS]
+            ]
+            for start in range(0, len(message_ids), _BATCH_GET_MAX_KEYS)
+        ]
+        return [
+            item
+            for items in self._map_concurrently(
+                lambda keys: self._batch_get_chunk(keys, **kwargs), chunks
+            )
+            for item in items
+        ]
+
+    def items_batch_get(
+        self, message_ids: Iterable[MessageIdT]
+    ) -> dict[MessageIdT, DynamoDBItem]:
+        """Get the DDB items for many message_ids using BatchGetItem.
+
+        Keys are requested in chunks of 100 (the BatchGetItem limit), up to
+        batch_get_concurrency chunks at a time, and any UnprocessedKeys are
+        re-requested with exponential backoff, up to 10 calls per chunk.
+        Expiry is not checked, use DynamoDBItem.is_expired on the returned
+        items.
+
+        Parameters
+        ----------
+        message_ids : iterable of str
+            The SQS message_ids to fetch.
+
+        Returns
+        -------
+        dict of str to DynamoDBItem
+            The found items keyed by message_id. Message ids without an item
+            are not included.
+
+        Raises
+        ------
+        UnparseableItemError
+            If a found item can't be used to instantiate a DynamoDBItem.
+        UnprocessedKeysError
+            If keys are still unprocessed after the retries, e.g. under
+            sustained throttling.
+
+        """
+        items: dict[MessageIdT, DynamoDBItem] = {}
+        unique_ids = []
+        for message_id in dict.fromkeys(message_ids):
+            if cached := self._cache_get(message_id):
+                items[message_id] = cached
+            else:
+                unique_ids.append(message_id)
+
+        for item in self._batch_get(unique_ids):
+            item_obj = self._parse_item(
+                item, self._message_id_to_key(item["message_id"])
+            )
+            items[item_obj.message_id] = item_obj
+            self._cache_put(item_obj)
+
+        self.logger.debug(
+            "Batch got {} items for {} keys", len(items), len(unique_ids)
+        )
+        return items
+
+    def statuses_batch_get(
+        self, message_ids: Iterable[MessageIdT]
+    ) -> dict[MessageIdT, ResultStatus]:
+        """Get the statuses of many message_ids using BatchGetItem.
+
+        Like items_batch_get, but only the status attributes are fetched, see
+        status_get. Expired or unparseable items have status ERROR.
+
+        Parameters
+        ----------
+        message_ids : iterable of str
+            The SQS message_ids to fetch.
+
+        Returns
+        -------
+        dict of str to ResultStatus
+            The statuses keyed by message_id. Message ids without an item are
+            not included.
+
+        Raises
+        ------
+        UnprocessedKeysError
+            If keys are still unprocessed after the retries, e.g. under
+            sustained throttling.
+
+        """
+        statuses: dict[MessageIdT, ResultStatus] = {}
+        unique_ids = []
+        for message_id in dict.fromkeys(message_ids):
+            if cached := self._cache_get(message_id):
+                statuses[message_id] = (
+                    ResultStatus.ERROR
+                    if cached.is_expired()
+                    else cached.status
+                )
+            else:
+                unique_ids.append(message_id)
+
+        for item in self._batch_get(
+            unique_ids, **_BATCH_STATUS_PROJECTION_KWARGS
+        ):
+            statuses[item["message_id"]] = self._parse_status(item)
+        return statuses
+
+    def _parse_status(self, item: dict[str, Any]) -> ResultStatus:
+        try:
+            return _item_status(item)
+        except Exception as exp:
+            self.logger.opt(exception=True).warning(
+                "Unable to parse status of item={}: {}", item, str(exp)
+            )
+            return ResultStatus.ERROR
+
+    def message_ids_get_by_request_id(
+        self, request_id: str
+    ) -> list[MessageIdT]:
+        """Get the message_ids of a request_id, using the request_id index.
+
+        A request_id has many message_ids if it was posted more than once,
+        e.g. when retried, or coalesced onto the message of another request
+        (see coalesced_request_put). The index is eventually consistent, so
+        just submitted items may be missing.
+
+        Parameters
+        ----------
+        request_id : str
+
+        Returns
+        -------
+        list of str
+
+        Raises
+        ------
+        ValueError
+            If there is no request_id_index_name.
+
+        """
+        if not self.request_id_index_name:
+            raise ValueError(
+                "Getting items by request_id requires a request_id_index_name"
+            )
+
+        message_ids: list[MessageIdT] = []
+        kwargs: dict[str, Any] = {}
+        while True:
+            with self.tracer.span("ddb.query", request_id=request_id):
+                response = self.table.query(
+                    IndexName=self.request_id_index_name,
+                    KeyConditionExpression=Key("request_id").eq(request_id),
+                    ProjectionExpression="message_id",
+                    **kwargs,
+                )
+            message_ids += [
+                _coalesced_message_id(item["message_id"])
+                for item in response["Items"]
+            ]
+            if "LastEvaluatedKey" not in response:
+                return list(dict.fromkeys(message_ids))
+            kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    def items_batch_get_by_request_ids(
+        self, request_ids: Iterable[str]
+    ) -> dict[str, DynamoDBItem]:
+        """Get the DDB items of many request_ids.
+
+        Queries the request_id index for the message_ids of each request_id,
+        up to batch_get_concurrency at a time, then gets their items with
+        items_batch_get. Of the many items of a request_id, the most recently
+        updated is returned. Expiry is not checked, use
+        DynamoDBItem.is_expired on the returned items.
+
+        Parameters
+        ----------
+        request_ids : iterable of str
+
+        Returns
+        -------
+        dict of str to DynamoDBItem
+            The found items keyed by request_id. Request ids without an item
+            are not included.
+
+        Raises
+        ------
+        ValueError
+            If there is no request_id_index_name.
+        UnparseableItemError
+            If a found item can't be used to instantiate a DynamoDBItem.
+        UnprocessedKeysError
+            If keys are still unprocessed after the retries, e.g. under
+            sustained throttling.
+
+        """
+        unique_request_ids = list(dict.fromkeys(request_ids))
+        message_ids = dict(
+            zip(
+                unique_request_ids,
+                self._map_concurrently(
+                    self.message_ids_get_by_request_id, unique_request_ids
+                ),
+            )
+        )
+        items = self.items_batch_get(
+            message_id for ids in message_ids.values() for message_id in ids
+        )
+        latest_items = {}
+        for request_id, ids in message_ids.items():
+            if request_items := [items[id_] for id_ in ids if id_ in items]:
+                latest_items[request_id] = max(
+                    request_items, key=lambda item_obj: item_obj.updated_at
+                )
+        return latest_items
+
+    def item_get_by_request_id(
+        self, request_id: str, raise_for_expiry: bool = True
+    ) -> DynamoDBItem:
+        """Get the most recently updated DDB item of a request_id.
+
+        Parameters
+        ----------
+        request_id : str
+        raise_for_expiry : bool
+            Check for item expiry and raise if it is expired.
+
+        Returns
+        -------
+        DynamoDBItem
+
+        Raises
+        ------
+        ValueError
+            If there is no request_id_index_name.
+        KeyNotFoundError
+            If there is no item for the request_id.
+        ExpiredItemError
+            If the found item is expired.
+
+        """
+        items = self.items_batch_get_by_request_ids([request_id])
+        if request_id not in items:
+            raise KeyNotFoundError(f"No item found for {request_id=}")
+
+        item_obj = items[request_id]
+        if raise_for_expiry and item_obj.is_expired():
+            raise ExpiredItemError(
+                f"Item of {request_id=} has expired, "
+                f"expiry={item_obj.expiration}"
+            )
+        return item_obj
+
+    def status_get_by_request_id(self, request_id: str) -> ResultStatus:
+        """Get the status of the most recently updated item of a request_id.
+
+        Parameters
+        ----------
+        request_id : str
+
+        Only the status attributes of the request_id's items are fetched,
+        like statuses_batch_get.
+
+        Returns
+        -------
+        ResultStatus
+            ERROR if the item is expired or unparseable.
+
+        Raises
+        ------
+        ValueError
+            If there is no request_id_index_name.
+        KeyNotFoundError
+            If there is no item for the request_id.
+        UnprocessedKeysError
+            If keys are still unprocessed after the retries, e.g. under
+            sustained throttling.
+
+        """
+        # (updated_at timestamp, status) of each item of the request_id
+        statuses: list[tuple[float, ResultStatus]] = []
+        unique_ids = []
+        for message_id in self.message_ids_get_by_request_id(request_id):
+            if cached := self._cache_get(message_id):
+                statuses.append(
+                    (
+                        cached.updated_at.timestamp(),
+                        ResultStatus.ERROR
+                        if cached.is_expired()
+                        else cached.status,
+                    )
+                )
+            else:
+                unique_ids.append(message_id)
+
+        for item in self._batch_get(
+            unique_ids, **_BATCH_STATUS_PROJECTION_KWARGS
+        ):
+            statuses.append(
+                (float(item.get("updated_at") or 0), self._parse_status(item))
+            )
+        if not statuses:
+            raise KeyNotFoundError(f"No item found for {request_id=}")
+        return max(statuses, key=lambda status: status[0])[1]
@@ -0,0 +1,132 @@
+"""Partial results (chunks) & progress of IN_PROGRESS items."""
+from __future__ import annotations
+
+import dataclasses
+from typing import Any
+
+from boto3.dynamodb.conditions import Attr
+
+from ._ddb_base import _DynamoDBBase
+from ._ddb_item import (
+    _deserialise_result,
+    _dt_to_ts,
+    _item_status,
+    _serialise_result,
+    _utcnow,
+)
+from .types import JsonStrT, JsonT, MessageIdT, Progress, ResultStatus
+
+_CHUNKS_PROJECTION_KWARGS: dict[str, Any] = {
+    "ProjectionExpression": "#status, updated_at, expiration, chunks",
+    "ExpressionAttributeNames": {"#status": "status"},
+}
+
+
+class _ChunkStore(_DynamoDBBase):
+    def chunks_append(
+        self, message_id: MessageIdT, serialised_chunks: list[JsonStrT]
+    ) -> None:
+        """Append partial result chunks to an IN_PROGRESS item.
+
+        The chunks are appended to the item's chunks list attribute with an
+        UpdateItem, so readers can consume them before the result is final.
+        Note that all chunks count towards the DynamoDB item size limit.
+
+        Parameters
+        ----------
+        message_id : str
+        serialised_chunks : list of str
+            The json serialised chunks to append.
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            ConditionalCheckFailedException if the item isn't IN_PROGRESS.
+
+        """
+        with self.tracer.span("ddb.update_item", message_id=message_id):
+            self.table.update_item(
+                Key=self._message_id_to_key(message_id),
+                UpdateExpression=(
+                    "SET chunks = list_append(if_not_exists(chunks, :empty), "
+                    ":chunks), updated_at = :updated_at"
+                ),
+                ConditionExpression=Attr("status").eq(
+                    ResultStatus.IN_PROGRESS
+                ),
+                ExpressionAttributeValues={
+                    ":empty": [],
+                    ":chunks": serialised_chunks,
+                    ":updated_at": _dt_to_ts(_utcnow()),
+                },
+            )
+        self.logger.debug(
+            "Appended {} chunks, message_id={}",
+            len(serialised_chunks),
+            message_id,
+        )
+
+    def progress_put(self, message_id: MessageIdT, progress: Progress) -> None:
+        """Set the reported progress of an IN_PROGRESS item.
+
+        Parameters
+        ----------
+        message_id : str
+        progress : Progress
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            ConditionalCheckFailedException if the item isn't IN_PROGRESS.
+
+        """
+        with self.tracer.span("ddb.update_item", message_id=message_id):
+            self.table.update_item(
+                Key=self._message_id_to_key(message_id),
+                UpdateExpression=(
+                    "SET progress = :progress, updated_at = :updated_at"
+                ),
+                ConditionExpression=Attr("status").eq(
+                    ResultStatus.IN_PROGRESS
+                ),
+                ExpressionAttributeValues={
+                    ":progress": _serialise_result(
+                        dataclasses.asdict(progress)
+                    ),
+                    ":updated_at": _dt_to_ts(_utcnow()),
+                },
+            )
+        self.logger.debug(
+            "Put progress={}, message_id={}", progress, message_id
+        )
+
+    def chunks_get(
+        self, message_id: MessageIdT, consistent_read: bool = True
+    ) -> tuple[ResultStatus, list[JsonT]]:
+        """Get the status and partial result chunks appended so far.
+
+        Only the status and chunks are fetched, not the final result.
+
+        Parameters
+        ----------
+        message_id : str
+        consistent_read : bool
+            Whether to use a strongly consistent read.
+
+        Returns
+        -------
+        tuple of (ResultStatus, list)
+            The status (ERROR if expired) and the deserialised chunks.
+
+        Raises
+        ------
+        KeyNotFoundError
+            If there is no object corresponding to message_id.
+
+        """
+        item = self._projected_get(
+            message_id, consistent_read, _CHUNKS_PROJECTION_KWARGS
+        )
+        status = _item_status(item)
+        chunks = [_deserialise_result(c) for c in item.get("chunks", [])]
+        return status, chunks
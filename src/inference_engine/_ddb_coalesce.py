@@ -0,0 +1,151 @@
+"""Records of in flight requests, which identical requests coalesce on."""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from ._ddb_base import _DynamoDBBase, _KeyT
+from ._ddb_item import (
+    _dt_to_ts,
+    _expiration_from_ttl,
+    _is_conditional_check_failure,
+    _utcnow,
+)
+from .types import MessageIdT
+
+# Coalesced (in flight) requests, keyed by the prefixed hash of their body
+_COALESCE_PREFIX = "coalesce#"
+# Request_ids coalesced onto the message of another request, keyed by the
+# prefixed request_id & message_id, as the request_id index is keys only
+_COALESCED_REQUEST_PREFIX = "coalesced_request#"
+
+
+def _coalesced_message_id(message_id: MessageIdT) -> MessageIdT:
+    """Get the message_id a request_id index key stands for."""
+    if message_id.startswith(_COALESCED_REQUEST_PREFIX):
+        # SQS message_ids have no "#", request_ids may
+        return message_id.rsplit("#", 1)[1]
+    return message_id
+
+
+class _CoalesceStore(_DynamoDBBase):
+    @staticmethod
+    def _coalesce_key(body_hash: str) -> _KeyT:
+        return {"message_id": f"{_COALESCE_PREFIX}{body_hash}"}
+
+    def coalesce_get(self, body_hash: str) -> Optional[MessageIdT]:
+        """Get the message_id of the request coalescing a body, if any.
+
+        Parameters
+        ----------
+        body_hash : str
+            The hash of the normalised message body.
+
+        Returns
+        -------
+        str or None
+            The message_id, None if there is none or it expired.
+
+        """
+        with self.tracer.span("ddb.get_item"):
+            item = self.table.get_item(
+                Key=self._coalesce_key(body_hash), ConsistentRead=True
+            ).get("Item")
+        if not item or int(item["expiration"]) <= _dt_to_ts(_utcnow()):
+            return None
+        return item["coalesced_message_id"]
+
+    def coalesce_put(
+        self,
+        body_hash: str,
+        message_id: MessageIdT,
+        ttl_seconds: int,
+        replaces: Optional[MessageIdT] = None,
+    ) -> Optional[MessageIdT]:
+        """Record the message_id identical requests should be coalesced on.
+
+        Parameters
+        ----------
+        body_hash : str
+            The hash of the normalised message body.
+        message_id : str
+            The message_id of the submitted request.
+        ttl_seconds : int
+            The expiry ttl of the record.
+        replaces : str, optional
+            The message_id of a stale record (i.e. no longer in flight) that
+            may be overwritten.
+
+        Returns
+        -------
+        str or None
+            None if recorded, else the message_id of the record that won.
+
+        """
+        now = _utcnow()
+        condition = Attr("message_id").not_exists() | Attr("expiration").lte(
+            _dt_to_ts(now)
+        )
+        if replaces:
+            condition = condition | Attr("coalesced_message_id").eq(replaces)
+        try:
+            with self.tracer.span("ddb.put_item", message_id=message_id):
+                self.table.put_item(
+                    Item={
+                        **self._coalesce_key(body_hash),
+                        "coalesced_message_id": message_id,
+                        "updated_at": _dt_to_ts(now),
+                        "expiration": _dt_to_ts(
+                            _expiration_from_ttl(ttl_seconds, now)
+                        ),
+                    },
+                    ConditionExpression=condition,
+                )
+        except ClientError as exp:
+            if not _is_conditional_check_failure(exp):
+                raise
+            return self.coalesce_get(body_hash) or message_id
+        return None
+
+    def coalesced_request_put(
+        self,
+        request_id: str,
+        message_id: MessageIdT,
+        ttl_seconds: Optional[int] = None,
+    ) -> None:
+        """Record that a request_id was coalesced onto another message_id.
+
+        Getting items by request_id then gets the item of the message_id.
+
+        Parameters
+        ----------
+        request_id : str
+            The request_id of the coalesced request.
+        message_id : str
+            The message_id it was coalesced onto.
+        ttl_seconds : int, optional
+            The expiry ttl of the record.
+
+        """
+        now = _utcnow()
+        item: dict[str, Any] = {
+            "message_id": (
+                f"{_COALESCED_REQUEST_PREFIX}{request_id}#{message_id}"
+            ),
+            "request_id": request_id,
+            "coalesced_message_id": message_id,
+            "updated_at": _dt_to_ts(now),
+        }
+        if ttl_seconds:
+            item["expiration"] = _dt_to_ts(
+                _expiration_from_ttl(ttl_seconds, now)
+            )
+        with self.tracer.span("ddb.put_item", message_id=message_id):
+            self.table.put_item(Item=item)
+        self.logger.info(
+            "Coalesced request_id={} onto message_id={}",
+            request_id,
+            message_id,
+        )
@@ -0,0 +1,299 @@
+"""DynamoDB result items, and the serialisation of their attributes."""
+from __future__ import annotations
+
+import datetime as dt
+import json
+from decimal import Decimal
+from typing import Any, Optional
+
+from botocore.exceptions import ClientError
+
+from .types import (
+    JsonStrT,
+    JsonT,
+    MessageAsDictT,
+    MessageIdT,
+    ResultStatus,
+    ResultT,
+)
+
+
+def _utcnow() -> dt.datetime:
+    dt_ = dt.datetime.now(dt.timezone.utc)
+    rounded_down = dt_.replace(microsecond=0)
+    return rounded_down
+
+
+def _expiration_from_ttl(
+    ttl_seconds: int, dt_: Optional[dt.datetime] = None
+) -> dt.datetime:
+    dt_ = dt_ or _utcnow()
+    ttl = dt.timedelta(seconds=ttl_seconds)
+    return dt_ + ttl
+
+
+def _dt_to_ts(dt_: dt.datetime) -> int:
+    if not dt_.tzinfo:
+        raise ValueError("Got naive datetime")
+
+    return int(round(dt_.timestamp()))
+
+
+def _ts_to_dt(
+    timestamp: float | Decimal, tzinfo: dt.tzinfo = dt.timezone.utc
+) -> dt.datetime:
+    timestamp = float(timestamp)
+    return dt.datetime.fromtimestamp(timestamp, tzinfo)
+
+
+class DynamoDBItem:
+    """Class encapsulating a DynamoDB result item.
+
+    Instances are slotted to keep them compact. Items created by
+    from_get_item keep the serialised result and the timestamps, and only
+    decode them on first access.
+
+    """
+
+    __slots__ = (
+        "message_id",
+        "request_id",
+        "status",
+        "serialised_message",
+        "error",
+        "_result",
+        "_result_json",
+        "_updated_at",
+        "_updated_at_ts",
+        "_expiration",
+        "_expiration_ts",
+        "streamed",
+    )
+    _fields = (
+        "message_id",
+        "request_id",
+        "status",
+        "result",
+        "updated_at",
+        "serialised_message",
+        "error",
+        "expiration",
+        "streamed",
+    )
+
+    def __init__(
+        self,
+        *,
+        message_id: MessageIdT,
+        result: Optional[ResultT],
+        request_id: Optional[str] = None,
+        status: ResultStatus = ResultStatus.SUCCESS,
+        updated_at: Optional[dt.datetime] = None,
+        serialised_message: Optional[MessageAsDictT] = None,
+        error: Optional[str] = None,
+        expiration: Optional[dt.datetime] = None,
+        streamed: bool = False,
+    ):
+        """Get a new DynamoDBItem.
+
+        Parameters
+        ----------
+        message_id : str
+            The SQS message_id, primary key for DDB.
+        result : dict (json.dumps serialisable), optional
+            The result, required for status SUCCESS.
+        request_id : str, optional
+            The corresponding request_id.
+        status : ResultStatus
+            The result status.
+        updated_at : datetime, optional
+            The update time, defaults to now.
+        serialised_message : dict, optional
+            The serialised message.
+        error : str, optional
+            The error message string, for error statuses.
+        expiration : datetime, optional
+            The expiry (DDB ttl) of this item.
+        streamed : bool
+            Whether the result is the list of chunks of a streamed result.
+
+        """
+        self.message_id = message_id
+        self.request_id = request_id
+        self.status = ResultStatus(status)
+        self.serialised_message = serialised_message
+        self.error = error
+        self._result = result
+        self._result_json: Optional[JsonStrT] = None
+        self._updated_at = updated_at or _utcnow()
+        self._updated_at_ts: Optional[float | Decimal] = None
+        self._expiration = expiration
+        self._expiration_ts: Optional[float | Decimal] = None
+        self.streamed = streamed
+        self._validate()
+
+    def _validate(self) -> None:
+        if self.status == ResultStatus.SUCCESS and self.error:
+            raise ValueError("Cannot set error message and status=SUCCESS")
+        if self.status == ResultStatus.SUCCESS and not self.has_result:
+            raise ValueError("Successful result should not be none")
+        if (self._result or self._result_json) and (
+            self._expiration or self._expiration_ts
+        ):
+            raise ValueError("Successful result should not expire")
+
+    @property
+    def has_result(self) -> bool:
+        """Check whether this item has a result, without decoding it."""
+        return self._result is not None or self._result_json is not None
+
+    @property
+    def result(self) -> Optional[ResultT]:
+        """Get the result, decoding it on first access."""
+        if self._result_json is not None:
+            self._result = _deserialise_result(self._result_json)
+            self._result_json = None
+        return self._result
+
+    @result.setter
+    def result(self, result: Optional[ResultT]) -> None:
+        self._result = result
+        self._result_json = None
+
+    @property
+    def updated_at(self) -> dt.datetime:
+        """Get the update time."""
+        if self._updated_at is None:
+            self._updated_at = _ts_to_dt(self._updated_at_ts)  # type: ignore
+        return self._updated_at
+
+    @updated_at.setter
+    def updated_at(self, updated_at: dt.datetime) -> None:
+        self._updated_at = updated_at
+        self._updated_at_ts = None
+
+    @property
+    def expiration(self) -> Optional[dt.datetime]:
+        """Get the expiry (DDB ttl) of this item."""
+        if self._expiration is None and self._expiration_ts is not None:
+            self._expiration = _ts_to_dt(self._expiration_ts)
+        return self._expiration
+
+    @expiration.setter
+    def expiration(self, expiration: Optional[dt.datetime]) -> None:
+        self._expiration = expiration
+        self._expiration_ts = None
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, DynamoDBItem):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self._fields)
+
+    def to_puttable(
+        self,
+    ) -> dict[str, str | JsonT | MessageAsDictT | None | int]:
+        """Get a DDB puttable version of this Item."""
+        out = {
+            "message_id": self.message_id,
+            "status": self.status,
+            "updated_at": (
+                int(self._updated_at_ts)
+                if self._updated_at_ts is not None
+                else _dt_to_ts(self.updated_at)
+            ),
+        }
+        if self._result_json:
+            out["result"] = self._result_json
+        elif self._result is not None:
+            out["result"] = _serialise_result(self._result)
+        if self.serialised_message:
+            out["serialised_message"] = self.serialised_message
+        if self.error:
+            out["error"] = self.error
+        if self.expiration:
+            out["expiration"] = _dt_to_ts(self.expiration)
+        if self.request_id:
+            out["request_id"] = self.request_id
+        if self.streamed:
+            out["streamed"] = True
+        return out
+
+    @classmethod
+    def from_get_item(cls, item: dict[str, Any]) -> DynamoDBItem:
+        """Instantiate a DynamoDBItem from a .get_item call.
+
+        The result and timestamps are kept serialised until accessed.
+
+        Parameters
+        ----------
+        item : dict
+
+        Returns
+        -------
+        DynamoDBItem
+
+        """
+        item_obj = cls.__new__(cls)
+        item_obj.message_id = item["message_id"]
+        item_obj.request_id = item.get("request_id")
+        item_obj.status = ResultStatus(item["status"])
+        item_obj.serialised_message = item.get("serialised_message")
+        item_obj.error = item.get("error")
+        item_obj._result = None
+        item_obj._result_json = item.get("result") or None
+        item_obj._updated_at = None
+        item_obj._updated_at_ts = item["updated_at"]
+        item_obj._expiration = None
+        item_obj._expiration_ts = item.get("expiration") or None
+        item_obj.streamed = bool(item.get("streamed"))
+        item_obj._validate()
+        return item_obj
+
+    def is_expired(self) -> bool:
+        """Check whether this item is expired.
+
+        Returns
+        -------
+        bool
+            Whether or not this Item is expired.
+
+        """
+        return _is_expired(self.status, self.expiration)
+
+
+def _is_expired(
+    status: ResultStatus, expiration: Optional[dt.datetime]
+) -> bool:
+    if status == ResultStatus.SUCCESS:
+        return False
+
+    if not expiration:
+        return False
+
+    return _utcnow() > expiration
+
+
+def _item_status(item: dict[str, Any]) -> ResultStatus:
+    """Get the status of a (projected) item, ERROR if it is expired."""
+    status = ResultStatus(item["status"])
+    expiration = item.get("expiration")
+    if _is_expired(status, _ts_to_dt(expiration) if expiration else None):
+        return ResultStatus.ERROR
+    return status
+
+
+def _is_conditional_check_failure(exp: ClientError) -> bool:
+    error_code = exp.response.get("Error", {}).get("Code")
+    return error_code == "ConditionalCheckFailedException"
+
+
+def _serialise_result(result: ResultT) -> JsonStrT:
+    return json.dumps(result)
+
+
+def _deserialise_result(json_str: JsonStrT) -> ResultT:
+    return json.loads(json_str)
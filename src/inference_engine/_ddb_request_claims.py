@@ -0,0 +1,248 @@
+"""Claims of request_ids, which deduplicate the messages of a request."""
+from __future__ import annotations
+
+from typing import Any, Optional
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from ._ddb_base import _DynamoDBBase, _KeyT
+from ._ddb_item import (
+    _dt_to_ts,
+    _expiration_from_ttl,
+    _is_conditional_check_failure,
+    _utcnow,
+)
+from .types import MessageIdT, RequestClaim, ResultStatus
+
+# Request claims share the table, keyed by the prefixed request_id
+_REQUEST_CLAIM_PREFIX = "request_claim#"
+
+
+class _RequestClaimStore(_DynamoDBBase):
+    @staticmethod
+    def _request_claim_key(request_id: str) -> _KeyT:
+        return {"message_id": f"{_REQUEST_CLAIM_PREFIX}{request_id}"}
+
+    def request_claim_put(
+        self,
+        request_id: str,
+        *,
+        message_id: MessageIdT,
+        claim_token: str,
+        lease_seconds: int,
+        ttl_seconds: Optional[int] = None,
+    ) -> Optional[RequestClaim]:
+        """Claim the processing of a request_id, to deduplicate messages.
+
+        The claim succeeds if the request_id isn't claimed, or if the lease
+        of an IN_PROGRESS claim expired (i.e. its consumer died).
+
+        Parameters
+        ----------
+        request_id : str
+            The request_id to claim.
+        message_id : str
+            The message_id of the message being processed.
+        claim_token : str
+            Unique to this processing attempt, required to renew, complete
+            or release the claim.
+        lease_seconds : int
+            The time after which the claim can be taken over, unless renewed.
+        ttl_seconds : int, optional
+            The expiry ttl of the claim.
+
+        Returns
+        -------
+        RequestClaim or None
+            None if claimed, else the existing claim.
+
+        """
+        key = self._request_claim_key(request_id)
+        now = _utcnow()
+        item: dict[str, Any] = {
+            **key,
+            # Not request_id, to keep claims out of the request_id index
+            "claimed_request_id": request_id,
+            "owner_message_id": message_id,
+            "claim_token": claim_token,
+            "status": ResultStatus.IN_PROGRESS.value,
+            "lease_expires_at": _dt_to_ts(
+                _expiration_from_ttl(lease_seconds, now)
+            ),
+            "updated_at": _dt_to_ts(now),
+        }
+        if ttl_seconds:
+            item["expiration"] = _dt_to_ts(
+                _expiration_from_ttl(ttl_seconds, now)
+            )
+        condition = Attr("message_id").not_exists() | (
+            Attr("status").eq(ResultStatus.IN_PROGRESS.value)
+            & Attr("lease_expires_at").lt(_dt_to_ts(now))
+        )
+        while True:
+            try:
+                with self.tracer.span("ddb.put_item", message_id=message_id):
+                    self.table.put_item(
+                        Item=item, ConditionExpression=condition
+                    )
+            except ClientError as exp:
+                if not _is_conditional_check_failure(exp):
+                    raise
+            else:
+                self.logger.info(
+                    "Claimed request_id={}, message_id={}",
+                    request_id,
+                    message_id,
+                )
+                return None
+
+            if (claim := self.request_claim_get(request_id)) is not None:
+                return claim
+            # The claim was released in the meantime, try again
+
+    def request_claim_get(self, request_id: str) -> Optional[RequestClaim]:
+        """Get the claim of a request_id, if any.
+
+        Parameters
+        ----------
+        request_id : str
+
+        Returns
+        -------
+        RequestClaim or None
+
+        """
+        with self.tracer.span("ddb.get_item"):
+            item = self.table.get_item(
+                Key=self._request_claim_key(request_id), ConsistentRead=True
+            ).get("Item")
+        if not item:
+            return None
+
+        return RequestClaim(
+            request_id=request_id,
+            message_id=item["owner_message_id"],
+            claim_token=item["claim_token"],
+            status=ResultStatus(item["status"]),
+            lease_expires_at=float(item["lease_expires_at"]),
+        )
+
+    def _request_claim_update(
+        self,
+        request_id: str,
+        claim_token: str,
+        update_expression: str,
+        values: dict[str, Any],
+    ) -> bool:
+        kwargs: dict[str, Any] = {}
+        if "#status" in update_expression:
+            kwargs["ExpressionAttributeNames"] = {"#status": "status"}
+        try:
+            with self.tracer.span("ddb.update_item"):
+                self.table.update_item(
+                    Key=self._request_claim_key(request_id),
+                    UpdateExpression=update_expression,
+                    ConditionExpression=Attr("claim_token").eq(claim_token),
+                    ExpressionAttributeValues=values,
+                    **kwargs,
+                )
+        except ClientError as exp:
+            if _is_conditional_check_failure(exp):
+                self.logger.warning(
+                    "Lost the claim of request_id={}", request_id
+                )
+                return False
+            raise
+        return True
+
+    def request_claim_renew(
+        self, request_id: str, claim_token: str, lease_seconds: int
+    ) -> bool:
+        """Extend the lease of an IN_PROGRESS claim.
+
+        Parameters
+        ----------
+        request_id : str
+        claim_token : str
+            The claim_token of request_claim_put.
+        lease_seconds : int
+            The new lease, from now.
+
+        Returns
+        -------
+        bool
+            False if the claim was lost (taken over).
+
+        """
+        now = _utcnow()
+        return self._request_claim_update(
+            request_id,
+            claim_token,
+            "SET lease_expires_at = :lease_expires_at, "
+            "updated_at = :updated_at",
+            {
+                ":lease_expires_at": _dt_to_ts(
+                    _expiration_from_ttl(lease_seconds, now)
+                ),
+                ":updated_at": _dt_to_ts(now),
+            },
+        )
+
+    def request_claim_complete(
+        self, request_id: str, claim_token: str, status: ResultStatus
+    ) -> bool:
+        """Mark a claim with the final status of the processed request.
+
+        Later messages of the request_id are then duplicates.
+
+        Parameters
+        ----------
+        request_id : str
+        claim_token : str
+            The claim_token of request_claim_put.
+        status : ResultStatus
+            The final status, SUCCESS, ERROR or CANCELLED.
+
+        Returns
+        -------
+        bool
+            False if the claim was lost (taken over).
+
+        """
+        return self._request_claim_update(
+            request_id,
+            claim_token,
+            "SET #status = :status, updated_at = :updated_at",
+            {
+                ":status": ResultStatus(status).value,
+                ":updated_at": _dt_to_ts(_utcnow()),
+            },
+        )
+
+    def request_claim_release(self, request_id: str, claim_token: str) -> bool:
+        """Delete a claim, so that the request can be processed again.
+
+        Parameters
+        ----------
+        request_id : str
+        claim_token : str
+            The claim_token of request_claim_put.
+
+        Returns
+        -------
+        bool
+            False if the claim was lost (taken over).
+
+        """
+        try:
+            with self.tracer.span("ddb.delete_item"):
+                self.table.delete_item(
+                    Key=self._request_claim_key(request_id),
+                    ConditionExpression=Attr("claim_token").eq(claim_token),
+                )
+        except ClientError as exp:
+            if _is_conditional_check_failure(exp):
+                return False
+            raise
+        return True
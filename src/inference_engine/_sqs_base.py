@@ -1,6 +1,6 @@
 """Shared SQS functionality."""
 import json
-from typing import Literal
+from typing import Any, Literal, Optional
 
 import boto3
 from mypy_boto3_sqs.service_resource import Message, Queue, SQSServiceResource
@@ -16,18 +16,27 @@ class _SQSBase:
         queue_name: str,
         *,
         ddb_client: DynamoDBClient,
+        sqs: Optional[Any] = None,
         **boto3_sqs_resource_kwargs,
     ):
         self.queue_name = queue_name
         self.ddb_client = ddb_client
         self._boto3_sqs_resource_kwargs = boto3_sqs_resource_kwargs
-        self.sqs: SQSServiceResource = boto3.resource(
+        # E.g. an inference_engine.backends.InMemorySQS
+        self._sqs_injected = sqs is not None
+        self.sqs: SQSServiceResource = sqs or boto3.resource(
             "sqs", **boto3_sqs_resource_kwargs
         )
         self.queue: Queue = self.sqs.get_queue_by_name(
             QueueName=self.queue_name
         )
 
+    @property
+    def is_fifo(self) -> bool:
+        """Whether the queue is a FIFO queue, else a standard queue."""
+        # SQS requires the names of FIFO queues to end with .fifo
+        return self.queue_name.endswith(".fifo")
+
     def ping_queue(self) -> Literal["pong"]:
         """Test queue connection.
 
@@ -93,3 +102,13 @@ def message_to_dict(message: Message) -> MessageAsDictT:
         "message_attributes": message.message_attributes,
         "message_id": message.message_id,
     }
+
+
+def receive_count(message: Message) -> int:
+    """Get the number of times a message was received, including this one.
+
+    The message must have been received with the ApproximateReceiveCount
+    attribute, otherwise it counts as received once.
+
+    """
+    return int((message.attributes or {}).get("ApproximateReceiveCount", 1))
@@ -0,0 +1,33 @@
+"""In-memory queue and result store backends.
+
+Producer, Consumer and DynamoDBClient talk to SQS and DynamoDB through the
+interface of boto3's service resources. The backends here implement the
+subset of that interface used by this package, in memory and thread safe,
+so that they can be passed in place of the boto3 resources::
+
+    sqs, dynamodb = InMemorySQS(), InMemoryDynamoDB()
+    sqs.create_queue(
+        QueueName="queue.fifo",
+        Attributes={"FifoQueue": "true", "ContentBasedDeduplication": "true"},
+    )
+    dynamodb.create_table(
+        TableName="table",
+        KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
+        TimeToLiveAttribute="expiration",
+    )
+    ddb_client = DynamoDBClient("table", dynamodb=dynamodb)
+    producer = Producer("queue.fifo", ddb_client=ddb_client, sqs=sqs)
+    consumer = Consumer(
+        "queue.fifo", ddb_client=ddb_client, sqs=sqs, compute_result=...
+    )
+
+This runs producers and consumers in one process with no network, e.g. for
+tests, benchmarks and local load tests.
+
+"""
+from ._dynamodb import (  # noqa: F401
+    InMemoryDynamoDB,
+    InMemoryTable,
+    evaluate_condition,
+)
+from ._sqs import InMemoryMessage, InMemoryQueue, InMemorySQS  # noqa: F401
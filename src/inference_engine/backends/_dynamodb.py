@@ -0,0 +1,696 @@
+"""In-memory DynamoDB backend."""
+# Methods & their arguments mirror boto3's, e.g. Table(TableName=...)
+# pylint: disable=invalid-name
+from __future__ import annotations
+
+import re
+import threading
+import time
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from boto3.dynamodb.conditions import AttributeBase, ConditionBase
+from boto3.dynamodb.types import TypeDeserializer, TypeSerializer
+from botocore.exceptions import ClientError
+
+_BATCH_GET_MAX_KEYS = 100
+_MISSING = object()
+_SERIALIZER = TypeSerializer()
+_DESERIALIZER = TypeDeserializer()
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": 400},
+        },
+        operation,
+    )
+
+
+def _normalise(value: Any) -> Any:
+    """Round trip value through the DynamoDB types, as boto3 would.
+
+    Numbers come back as Decimal, and unsupported types (e.g. float) raise
+    TypeError. The result shares no mutable state with value.
+
+    """
+    if isinstance(value, str):  # Incl. str enums, e.g. ResultStatus
+        return str.__str__(value)
+    return _DESERIALIZER.deserialize(_SERIALIZER.serialize(value))
+
+
+def _copy(item: dict[str, Any]) -> dict[str, Any]:
+    return {k: _normalise(v) for k, v in item.items()}
+
+
+def _get_path(item: dict[str, Any], path: str) -> Any:
+    value: Any = item
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(operator: str, left: Any, right: Any) -> bool:
+    if operator == "<>":
+        return left is _MISSING or left != right
+    if left is _MISSING or right is _MISSING:
+        return False
+    if operator == "=":
+        return left == right
+    if type(left) is not type(right) and not (
+        isinstance(left, str) and isinstance(right, str)
+    ):
+        return False
+    return {
+        "<": left < right,
+        "<=": left <= right,
+        ">": left > right,
+        ">=": left >= right,
+    }[operator]
+
+
+def evaluate_condition(condition: ConditionBase, item: dict[str, Any]) -> bool:
+    """Evaluate a boto3 condition (Attr/Key expressions) against an item.
+
+    Parameters
+    ----------
+    condition : ConditionBase
+        E.g. Attr("status").eq("success") | Attr("status").not_exists().
+    item : dict
+        The item, {} if it doesn't exist.
+
+    Returns
+    -------
+    bool
+
+    """
+    expression = condition.get_expression()
+    operator = expression["operator"]
+    values = expression["values"]
+
+    def resolve(value: Any) -> Any:
+        if isinstance(value, ConditionBase):  # size(path), also an attribute
+            resolved = resolve(value.get_expression()["values"][0])
+            return _MISSING if resolved is _MISSING else len(resolved)
+        if isinstance(value, AttributeBase):
+            return _get_path(item, value.name)
+        return _normalise(value)
+
+    if operator == "AND":
+        return all(evaluate_condition(value, item) for value in values)
+    if operator == "OR":
+        return any(evaluate_condition(value, item) for value in values)
+    if operator == "NOT":
+        return not evaluate_condition(values[0], item)
+    if operator in ("attribute_exists", "attribute_not_exists"):
+        exists = resolve(values[0]) is not _MISSING
+        return exists == (operator == "attribute_exists")
+
+    return _evaluate_operator(operator, [resolve(value) for value in values])
+
+
+def _evaluate_operator(operator: str, operands: list[Any]) -> bool:
+    if operator in ("=", "<>", "<", "<=", ">", ">="):
+        return _compare(operator, operands[0], operands[1])
+    if operator == "IN":
+        # Attr.is_in passes the values as a single list operand
+        return operands[0] is not _MISSING and operands[0] in operands[1]
+    if operator == "BETWEEN":
+        return _compare(">=", operands[0], operands[1]) and _compare(
+            "<=", operands[0], operands[2]
+        )
+    if operator == "begins_with":
+        return isinstance(operands[0], str) and operands[0].startswith(
+            operands[1]
+        )
+    if operator == "contains":
+        return operands[0] is not _MISSING and operands[1] in operands[0]
+
+    raise NotImplementedError(f"Unsupported condition {operator=}")
+
+
+_UPDATE_TOKEN_RE = re.compile(
+    r"\s*(?:(?P<name>[#:]?[A-Za-z_][A-Za-z0-9_.#]*)|(?P<op>[(),=+-]))"
+)
+
+
+class _UpdateExpression:
+    """Parser & evaluator of the SET, REMOVE & ADD update expressions.
+
+    SET operands may be paths, :values, if_not_exists(path, operand),
+    list_append(operand, operand) and operand +/- operand.
+
+    """
+
+    def __init__(
+        self,
+        expression: str,
+        names: Optional[dict[str, str]],
+        values: Optional[dict[str, Any]],
+    ):
+        self.names = names or {}
+        self.values = {k: _normalise(v) for k, v in (values or {}).items()}
+        self.tokens = self._tokenise(expression)
+        self.pos = 0
+
+    @staticmethod
+    def _tokenise(expression: str) -> list[str]:
+        tokens, pos = [], 0
+        while pos < len(expression.rstrip()):
+            match = _UPDATE_TOKEN_RE.match(expression, pos)
+            if not match:
+                raise ValueError(
+                    f"Invalid UpdateExpression {expression!r} at {pos}"
+                )
+            tokens.append(match.group("name") or match.group("op"))
+            pos = match.end()
+        return tokens
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _next(self, expected: Optional[str] = None) -> str:
+        token = self._peek()
+        if token is None or (expected is not None and token != expected):
+            raise ValueError(f"Expected {expected!r}, got {token!r}")
+        self.pos += 1
+        return token
+
+    def _path(self, token: str) -> str:
+        return ".".join(
+            self.names.get(part, part) for part in token.split(".")
+        )
+
+    def apply(self, item: dict[str, Any]) -> dict[str, Any]:
+        """Apply the update to a copy of item.
+
+        As in DynamoDB, all operands refer to the item before the update.
+
+        """
+        updated = dict(item)
+        while (keyword := self._peek()) is not None:
+            keyword = self._next().upper()
+            while True:
+                if keyword == "SET":
+                    path = self._path(self._next())
+                    self._next("=")
+                    self._set(updated, path, self._operand(item))
+                elif keyword == "REMOVE":
+                    self._remove(updated, self._path(self._next()))
+                elif keyword == "ADD":
+                    path = self._path(self._next())
+                    current = _get_path(item, path)
+                    value = self.values[self._next()]
+                    self._set(
+                        updated,
+                        path,
+                        value if current is _MISSING else current + value,
+                    )
+                else:
+                    raise NotImplementedError(f"Unsupported {keyword=}")
+
+                if self._peek() != ",":
+                    break
+                self._next(",")
+        return updated
+
+    def _operand(self, item: dict[str, Any]) -> Any:
+        value = self._term(item)
+        while self._peek() in ("+", "-"):
+            operator = self._next()
+            right = self._term(item)
+            value = value + right if operator == "+" else value - right
+        return value
+
+    def _term(self, item: dict[str, Any]) -> Any:
+        token = self._next()
+        if token.startswith(":"):
+            return self.values[token]
+        if self._peek() == "(":
+            self._next("(")
+            if token == "if_not_exists":
+                current = _get_path(item, self._path(self._next()))
+                self._next(",")
+                default = self._operand(item)
+                value = default if current is _MISSING else current
+            elif token == "list_append":
+                left = self._operand(item)
+                self._next(",")
+                value = list(left) + list(self._operand(item))
+            else:
+                raise NotImplementedError(f"Unsupported function {token=}")
+            self._next(")")
+            return value
+
+        value = _get_path(item, self._path(token))
+        if value is _MISSING:
+            raise _client_error(
+                "ValidationException",
+                "The provided expression refers to an attribute that does "
+                f"not exist in the item: {token}",
+                "UpdateItem",
+            )
+        return value
+
+    @staticmethod
+    def _set(item: dict[str, Any], path: str, value: Any) -> None:
+        *parents, leaf = path.split(".")
+        target = item
+        for parent in parents:
+            target[parent] = dict(target.get(parent, {}))
+            target = target[parent]
+        target[leaf] = value
+
+    @staticmethod
+    def _remove(item: dict[str, Any], path: str) -> None:
+        *parents, leaf = path.split(".")
+        target: Any = item
+        for parent in parents:
+            target = target.get(parent, {})
+        if isinstance(target, dict):
+            target.pop(leaf, None)
+
+
+class InMemoryTable:
+    """Thread safe in-memory table, mirroring boto3's dynamodb.Table.
+
+    Supports ConditionExpression given as boto3 condition objects (not as
+    strings), SET/REMOVE/ADD UpdateExpressions, top level
+    ProjectionExpressions, queries of global secondary indexes (without
+    pagination) and TTL. Items past their TTL are deleted
+    ttl_deletion_delay_seconds after expiring, like DynamoDB, which deletes
+    expired items in the background.
+
+    """
+
+    def __init__(
+        self,
+        dynamodb: InMemoryDynamoDB,
+        name: str,
+        key_schema: list[dict[str, str]],
+        global_secondary_indexes: Optional[list[dict[str, Any]]] = None,
+    ):
+        """Get a new InMemoryTable, use InMemoryDynamoDB.create_table."""
+        self._dynamodb = dynamodb
+        self.name = self.table_name = name
+        self.key_names = [schema["AttributeName"] for schema in key_schema]
+        # index name -> (key names, projected attributes or None for ALL)
+        self.indexes: dict[str, tuple[list[str], Optional[list[str]]]] = {}
+        for index in global_secondary_indexes or []:
+            index_key_names = [
+                schema["AttributeName"] for schema in index["KeySchema"]
+            ]
+            projection = index.get("Projection", {})
+            projected = None
+            if projection.get("ProjectionType", "ALL") != "ALL":
+                projected = list(
+                    dict.fromkeys(
+                        self.key_names
+                        + index_key_names
+                        + projection.get("NonKeyAttributes", [])
+                    )
+                )
+            self.indexes[index["IndexName"]] = (index_key_names, projected)
+        self.ttl_attribute: Optional[str] = None
+        self._items: dict[tuple, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def item_count(self) -> int:
+        """Get the number of items."""
+        return len(self._items)
+
+    def _key(self, key: dict[str, Any], operation: str) -> tuple:
+        if set(key) != set(self.key_names):
+            raise _client_error(
+                "ValidationException",
+                "The provided key element does not match the schema",
+                operation,
+            )
+        return tuple(_normalise(key[name]) for name in self.key_names)
+
+    def _get_live(self, key: tuple) -> Optional[dict[str, Any]]:
+        item = self._items.get(key)
+        if item is None or self.ttl_attribute is None:
+            return item
+
+        expiration = item.get(self.ttl_attribute)
+        if (
+            isinstance(expiration, Decimal)
+            and expiration + self._dynamodb.ttl_deletion_delay_seconds
+            < time.time()
+        ):
+            del self._items[key]
+            return None
+        return item
+
+    def _check_condition(
+        self,
+        condition: Any,
+        item: Optional[dict[str, Any]],
+        operation: str,
+    ) -> None:
+        if condition is None:
+            return
+        if isinstance(condition, str):
+            raise NotImplementedError(
+                "Only boto3 condition objects are supported as "
+                "ConditionExpression"
+            )
+        if not evaluate_condition(condition, item or {}):
+            raise _client_error(
+                "ConditionalCheckFailedException",
+                "The conditional request failed",
+                operation,
+            )
+
+    @staticmethod
+    def _project(
+        item: dict[str, Any],
+        projection: Optional[str],
+        names: Optional[dict[str, str]],
+    ) -> dict[str, Any]:
+        if not projection:
+            return _copy(item)
+
+        names = names or {}
+        attributes = [
+            names.get(name.strip(), name.strip())
+            for name in projection.split(",")
+        ]
+        return _copy({k: item[k] for k in attributes if k in item})
+
+    def get_item(
+        self,
+        *,
+        Key: dict[str, Any],
+        ConsistentRead: bool = False,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict[str, str]] = None,
+    ) -> dict[str, Any]:
+        """Get an item, see DynamoDB.Table.get_item."""
+        del ConsistentRead  # Reads are always consistent
+        key = self._key(Key, "GetItem")
+        with self._lock:
+            item = self._get_live(key)
+            if item is None:
+                return {}
+            return {
+                "Item": self._project(
+                    item, ProjectionExpression, ExpressionAttributeNames
+                )
+            }
+
+    def put_item(
+        self,
+        *,
+        Item: dict[str, Any],
+        ConditionExpression: Any = None,
+        **_,
+    ) -> dict[str, Any]:
+        """Put an item, see DynamoDB.Table.put_item."""
+        key = self._key(
+            {name: Item.get(name) for name in self.key_names}, "PutItem"
+        )
+        item = _copy(Item)
+        with self._lock:
+            self._check_condition(
+                ConditionExpression, self._get_live(key), "PutItem"
+            )
+            self._items[key] = item
+        return {}
+
+    def update_item(
+        self,
+        *,
+        Key: dict[str, Any],
+        UpdateExpression: str,
+        ConditionExpression: Any = None,
+        ExpressionAttributeNames: Optional[dict[str, str]] = None,
+        ExpressionAttributeValues: Optional[dict[str, Any]] = None,
+        ReturnValues: str = "NONE",
+    ) -> dict[str, Any]:
+        """Update (or create) an item, see DynamoDB.Table.update_item."""
+        key = self._key(Key, "UpdateItem")
+        update = _UpdateExpression(
+            UpdateExpression,
+            ExpressionAttributeNames,
+            ExpressionAttributeValues,
+        )
+        with self._lock:
+            current = self._get_live(key)
+            self._check_condition(ConditionExpression, current, "UpdateItem")
+            updated = update.apply({**(current or {}), **_copy(Key)})
+            self._items[key] = _copy(updated)
+
+        if ReturnValues == "ALL_NEW":
+            return {"Attributes": _copy(updated)}
+        if ReturnValues == "ALL_OLD" and current is not None:
+            return {"Attributes": _copy(current)}
+        return {}
+
+    def delete_item(
+        self, *, Key: dict[str, Any], ConditionExpression: Any = None, **_
+    ) -> dict[str, Any]:
+        """Delete an item, see DynamoDB.Table.delete_item."""
+        key = self._key(Key, "DeleteItem")
+        with self._lock:
+            self._check_condition(
+                ConditionExpression, self._get_live(key), "DeleteItem"
+            )
+            self._items.pop(key, None)
+        return {}
+
+    def scan(self, *, FilterExpression: Any = None, **_) -> dict[str, Any]:
+        """Get all (matching) items, without pagination."""
+        with self._lock:
+            items = [
+                item
+                for key in list(self._items)
+                if (item := self._get_live(key)) is not None
+                and (
+                    FilterExpression is None
+                    or evaluate_condition(FilterExpression, item)
+                )
+            ]
+            return {"Items": [_copy(item) for item in items]}
+
+    def query(
+        self,
+        *,
+        KeyConditionExpression: ConditionBase,
+        IndexName: Optional[str] = None,
+        ConsistentRead: bool = False,
+        ProjectionExpression: Optional[str] = None,
+        ExpressionAttributeNames: Optional[dict[str, str]] = None,
+        **_,
+    ) -> dict[str, Any]:
+        """Get the items matching a key condition, without pagination."""
+        projected = None
+        if IndexName is not None:
+            if IndexName not in self.indexes:
+                raise _client_error(
+                    "ValidationException",
+                    f"The table does not have the specified index: "
+                    f"{IndexName}",
+                    "Query",
+                )
+            if ConsistentRead:
+                raise _client_error(
+                    "ValidationException",
+                    "Consistent reads are not supported on global secondary "
+                    "indexes",
+                    "Query",
+                )
+            key_names, projected = self.indexes[IndexName]
+        else:
+            key_names = self.key_names
+
+        with self._lock:
+            items = [
+                item
+                for key in list(self._items)
+                if (item := self._get_live(key)) is not None
+                # Items without the index keys aren't in the (sparse) index
+                and all(name in item for name in key_names)
+                and evaluate_condition(KeyConditionExpression, item)
+            ]
+            if projected is not None:
+                items = [
+                    {k: item[k] for k in projected if k in item}
+                    for item in items
+                ]
+            items = [
+                self._project(
+                    item, ProjectionExpression, ExpressionAttributeNames
+                )
+                for item in items
+            ]
+        return {"Items": items, "Count": len(items)}
+
+    def delete(self) -> dict[str, Any]:
+        """Delete the table."""
+        self._dynamodb.delete_table(self.name)
+        return {}
+
+
+class InMemoryDynamoDBClient:
+    """The subset of boto3's DynamoDB client used with the resource."""
+
+    def __init__(self, dynamodb: InMemoryDynamoDB):
+        """Get a new InMemoryDynamoDBClient, use InMemoryDynamoDB.meta."""
+        self._dynamodb = dynamodb
+
+    def update_time_to_live(
+        self, TableName: str, TimeToLiveSpecification: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Enable or disable TTL on a table."""
+        table = self._dynamodb.get_table(TableName, "UpdateTimeToLive")
+        table.ttl_attribute = (
+            TimeToLiveSpecification["AttributeName"]
+            if TimeToLiveSpecification.get("Enabled")
+            else None
+        )
+        return {"TimeToLiveSpecification": TimeToLiveSpecification}
+
+
+class InMemoryDynamoDB:
+    """In-memory DynamoDB, mirroring the used subset of boto3's resource.
+
+    Pass as dynamodb= to DynamoDBClient to run it without network.
+
+    """
+
+    def __init__(self, ttl_deletion_delay_seconds: float = 0):
+        """Get a new InMemoryDynamoDB, without tables.
+
+        Parameters
+        ----------
+        ttl_deletion_delay_seconds : float
+            How long after expiring items with a TTL are deleted.
+
+        """
+        self.ttl_deletion_delay_seconds = ttl_deletion_delay_seconds
+        self._tables: dict[str, InMemoryTable] = {}
+        self._lock = threading.Lock()
+        self.meta = SimpleNamespace(client=InMemoryDynamoDBClient(self))
+
+    def create_table(
+        self,
+        TableName: str,
+        KeySchema: list[dict[str, str]],
+        GlobalSecondaryIndexes: Optional[list[dict[str, Any]]] = None,
+        TimeToLiveAttribute: Optional[str] = None,
+        **_,
+    ) -> InMemoryTable:
+        """Create a table, ignoring e.g. ProvisionedThroughput.
+
+        Parameters
+        ----------
+        TableName : str
+        KeySchema : list of dict
+            The HASH and optional RANGE key schema.
+        GlobalSecondaryIndexes : list of dict, optional
+            The IndexName, KeySchema & Projection of the indexes to query.
+        TimeToLiveAttribute : str, optional
+            Shortcut to enable TTL on this attribute.
+
+        Returns
+        -------
+        InMemoryTable
+
+        """
+        with self._lock:
+            if TableName in self._tables:
+                raise _client_error(
+                    "ResourceInUseException",
+                    f"Table already exists: {TableName}",
+                    "CreateTable",
+                )
+            table = self._tables[TableName] = InMemoryTable(
+                self, TableName, KeySchema, GlobalSecondaryIndexes
+            )
+
+        table.ttl_attribute = TimeToLiveAttribute
+        return table
+
+    def Table(self, name: str) -> InMemoryTable:
+        """Get an existing table."""
+        return self.get_table(name)
+
+    def get_table(
+        self, name: str, operation: str = "DescribeTable"
+    ) -> InMemoryTable:
+        """Get an existing table.
+
+        Parameters
+        ----------
+        name : str
+            The name of the table.
+        operation : str
+            The operation named by the error if the table doesn't exist.
+
+        Returns
+        -------
+        InMemoryTable
+
+        Raises
+        ------
+        botocore.exceptions.ClientError
+            ResourceNotFoundException if the table doesn't exist.
+
+        """
+        with self._lock:
+            table = self._tables.get(name)
+
+        if table is None:
+            raise _client_error(
+                "ResourceNotFoundException",
+                f"Requested resource not found: Table: {name} not found",
+                operation,
+            )
+        return table
+
+    def delete_table(self, name: str) -> None:
+        """Delete a table, if it exists."""
+        with self._lock:
+            self._tables.pop(name, None)
+
+    def batch_get_item(
+        self, RequestItems: dict[str, dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Get up to 100 items from one or more tables."""
+        num_keys = sum(len(r["Keys"]) for r in RequestItems.values())
+        if num_keys > _BATCH_GET_MAX_KEYS:
+            raise _client_error(
+                "ValidationException",
+                f"Too many items requested for the BatchGetItem call, "
+                f"{num_keys=}",
+                "BatchGetItem",
+            )
+
+        responses: dict[str, list[dict[str, Any]]] = {}
+        for table_name, request in RequestItems.items():
+            table = self.get_table(table_name, "BatchGetItem")
+            responses[table_name] = [
+                response["Item"]
+                for key in request["Keys"]
+                if (
+                    response := table.get_item(
+                        Key=key,
+                        ProjectionExpression=request.get(
+                            "ProjectionExpression"
+                        ),
+                        ExpressionAttributeNames=request.get(
+                            "ExpressionAttributeNames"
+                        ),
+                    )
+                )
+            ]
+
+        return {"Responses": responses, "UnprocessedKeys": {}}
@@ -0,0 +1,539 @@
+"""In-memory SQS backend."""
+# Methods & their arguments mirror boto3's, e.g. send_message(MessageBody=...)
+# pylint: disable=invalid-name
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+from typing import Any, Optional
+
+from botocore.exceptions import ClientError
+
+_ACCOUNT_ID = "000000000000"
+_REGION = "memory"
+_DEDUPLICATION_INTERVAL_SECONDS = 300
+_DEFAULT_ATTRIBUTES = {
+    "VisibilityTimeout": "30",
+    "MessageRetentionPeriod": "345600",
+    "DelaySeconds": "0",
+}
+
+
+def _client_error(code: str, message: str, operation: str) -> ClientError:
+    return ClientError(
+        {
+            "Error": {"Code": code, "Message": message},
+            "ResponseMetadata": {"HTTPStatusCode": 400},
+        },
+        operation,
+    )
+
+
+def _md5(data: str) -> str:
+    return hashlib.md5(data.encode(), usedforsecurity=False).hexdigest()
+
+
+@dataclasses.dataclass(kw_only=True)
+class _StoredMessage:
+    message_id: str
+    body: str
+    sent_at: float  # time.time
+    sequence_number: int
+    group_id: Optional[str] = None
+    deduplication_id: Optional[str] = None
+    message_attributes: Optional[dict[str, Any]] = None
+    visible_at: float = 0  # time.monotonic
+    receive_count: int = 0
+    first_received_at: Optional[float] = None
+    receipt_handle: Optional[str] = None
+
+    def is_in_flight(self, now: float) -> bool:
+        return self.receipt_handle is not None and self.visible_at > now
+
+    def system_attributes(self) -> dict[str, str]:
+        attributes = {
+            "SentTimestamp": str(int(self.sent_at * 1000)),
+            "ApproximateReceiveCount": str(self.receive_count),
+            "ApproximateFirstReceiveTimestamp": str(
+                int((self.first_received_at or 0) * 1000)
+            ),
+            "SenderId": _ACCOUNT_ID,
+        }
+        if self.group_id is not None:
+            attributes["MessageGroupId"] = self.group_id
+            attributes["SequenceNumber"] = str(self.sequence_number)
+        if self.deduplication_id is not None:
+            attributes["MessageDeduplicationId"] = self.deduplication_id
+        return attributes
+
+
+class InMemoryMessage:
+    """A received message, mirroring boto3's sqs.Message."""
+
+    def __init__(
+        self,
+        queue: InMemoryQueue,
+        stored: _StoredMessage,
+        attribute_names: Optional[list[str]] = None,
+    ):
+        """Get a new InMemoryMessage, snapshotting the stored message."""
+        self._queue = queue
+        self.queue_url = queue.url
+        self.message_id = stored.message_id
+        self.receipt_handle = stored.receipt_handle
+        self.body = stored.body
+        self.md5_of_body = _md5(stored.body)
+        self.message_attributes = stored.message_attributes
+        self.md5_of_message_attributes = (
+            _md5(json.dumps(stored.message_attributes, sort_keys=True))
+            if stored.message_attributes
+            else None
+        )
+        system_attributes = stored.system_attributes()
+        names = attribute_names or []
+        self.attributes: Optional[dict[str, str]] = (
+            {
+                name: value
+                for name, value in system_attributes.items()
+                if "All" in names or name in names
+            }
+            if names
+            else None
+        )
+
+    def delete(self) -> dict[str, Any]:
+        """Delete the message from the queue."""
+        return self._queue.delete_message(self.receipt_handle)
+
+    def change_visibility(self, VisibilityTimeout: int) -> dict[str, Any]:
+        """Change the visibility timeout of the in flight message."""
+        return self._queue.change_message_visibility(
+            self.receipt_handle, VisibilityTimeout
+        )
+
+
+class InMemoryQueue:
+    """Thread safe in-memory queue, mirroring boto3's sqs.Queue.
+
+    Models visibility timeouts, receipt handles, long polling, delays,
+    retention, redrive to a dead letter queue, and for FIFO queues, message
+    group ordering (a group is blocked while one of its messages is in
+    flight) and deduplication.
+
+    """
+
+    def __init__(
+        self, sqs: InMemorySQS, name: str, attributes: dict[str, str]
+    ):
+        """Get a new InMemoryQueue, use InMemorySQS.create_queue instead."""
+        self._sqs = sqs
+        self.name = name
+        self.url = f"memory://{_ACCOUNT_ID}/{name}"
+        self.arn = f"arn:aws:sqs:{_REGION}:{_ACCOUNT_ID}:{name}"
+        self._attributes = {**_DEFAULT_ATTRIBUTES, **attributes}
+        self.fifo = self._attributes.get("FifoQueue", "false") == "true"
+        if name.endswith(".fifo") != self.fifo:
+            raise _client_error(
+                "InvalidParameterValue",
+                "FIFO queue names must end with .fifo",
+                "CreateQueue",
+            )
+
+        self._messages: list[_StoredMessage] = []
+        self._deduplication: dict[str, tuple[str, float]] = {}
+        self._sequence_number = 0
+        self._condition = threading.Condition()
+
+    @property
+    def visibility_timeout(self) -> int:
+        """Get the default visibility timeout."""
+        return int(self._attributes["VisibilityTimeout"])
+
+    @property
+    def attributes(self) -> dict[str, str]:
+        """Get the queue attributes, including approximate counts."""
+        now = time.monotonic()
+        with self._condition:
+            self._expire_retained()
+            in_flight = sum(m.is_in_flight(now) for m in self._messages)
+            delayed = sum(
+                m.receipt_handle is None and m.visible_at > now
+                for m in self._messages
+            )
+            visible = len(self._messages) - in_flight - delayed
+
+        return {
+            **self._attributes,
+            "QueueArn": self.arn,
+            "ApproximateNumberOfMessages": str(visible),
+            "ApproximateNumberOfMessagesNotVisible": str(in_flight),
+            "ApproximateNumberOfMessagesDelayed": str(delayed),
+        }
+
+    def load(self) -> None:
+        """Do nothing, attributes are always up to date."""
+
+    reload = load
+
+    def send_message(
+        self,
+        MessageBody: str,
+        MessageGroupId: Optional[str] = None,
+        MessageDeduplicationId: Optional[str] = None,
+        DelaySeconds: Optional[int] = None,
+        MessageAttributes: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """Send a message, see SQS.Queue.send_message."""
+        if self.fifo and not MessageGroupId:
+            raise _client_error(
+                "MissingParameter",
+                "The request must contain the parameter MessageGroupId.",
+                "SendMessage",
+            )
+        if self.fifo and not MessageDeduplicationId:
+            if self._attributes.get("ContentBasedDeduplication") != "true":
+                raise _client_error(
+                    "InvalidParameterValue",
+                    "The queue should either have ContentBasedDeduplication "
+                    "enabled or MessageDeduplicationId provided explicitly",
+                    "SendMessage",
+                )
+            MessageDeduplicationId = hashlib.sha256(
+                MessageBody.encode()
+            ).hexdigest()
+
+        delay = (
+            DelaySeconds
+            if DelaySeconds is not None
+            else int(self._attributes["DelaySeconds"])
+        )
+        now = time.time()
+        with self._condition:
+            if self.fifo:
+                duplicate_of = self._duplicate_of(MessageDeduplicationId, now)
+                if duplicate_of is not None:
+                    return self._send_response(duplicate_of, MessageBody)
+
+            self._sequence_number += 1
+            stored = _StoredMessage(
+                message_id=str(uuid.uuid4()),
+                body=MessageBody,
+                sent_at=now,
+                sequence_number=self._sequence_number,
+                group_id=MessageGroupId,
+                deduplication_id=MessageDeduplicationId,
+                message_attributes=MessageAttributes,
+                visible_at=time.monotonic() + delay,
+            )
+            self._messages.append(stored)
+            if self.fifo:
+                self._deduplication[MessageDeduplicationId] = (  # type: ignore
+                    stored.message_id,
+                    now,
+                )
+            self._condition.notify_all()
+
+        return self._send_response(stored.message_id, MessageBody)
+
+    def _duplicate_of(
+        self, deduplication_id: Optional[str], now: float
+    ) -> Optional[str]:
+        self._deduplication = {
+            id_: (message_id, sent_at)
+            for id_, (message_id, sent_at) in self._deduplication.items()
+            if now - sent_at < _DEDUPLICATION_INTERVAL_SECONDS
+        }
+        entry = self._deduplication.get(deduplication_id)  # type: ignore
+        return entry[0] if entry else None
+
+    @staticmethod
+    def _send_response(message_id: str, body: str) -> dict[str, Any]:
+        return {
+            "MessageId": message_id,
+            "MD5OfMessageBody": _md5(body),
+            "ResponseMetadata": {"HTTPStatusCode": 200},
+        }
+
+    def receive_messages(
+        self,
+        MaxNumberOfMessages: int = 1,
+        WaitTimeSeconds: Optional[int] = None,
+        VisibilityTimeout: Optional[int] = None,
+        AttributeNames: Optional[list[str]] = None,
+        MessageSystemAttributeNames: Optional[list[str]] = None,
+        **_,
+    ) -> list[InMemoryMessage]:
+        """Receive up to MaxNumberOfMessages, long polling WaitTimeSeconds."""
+        if not 1 <= MaxNumberOfMessages <= 10:
+            raise _client_error(
+                "InvalidParameterValue",
+                f"Invalid {MaxNumberOfMessages=}",
+                "ReceiveMessage",
+            )
+
+        visibility_timeout = (
+            self.visibility_timeout
+            if VisibilityTimeout is None
+            else VisibilityTimeout
+        )
+        attribute_names = (AttributeNames or []) + (
+            MessageSystemAttributeNames or []
+        )
+        deadline = time.monotonic() + (WaitTimeSeconds or 0)
+        with self._condition:
+            while True:
+                received = self._receive(
+                    MaxNumberOfMessages, visibility_timeout
+                )
+                now = time.monotonic()
+                if received or now >= deadline:
+                    return [
+                        InMemoryMessage(self, stored, attribute_names)
+                        for stored in received
+                    ]
+
+                # Wake up on sends, deletes & visibility changes, or when the
+                # next in flight/delayed message becomes visible
+                next_visible_at = min(
+                    (m.visible_at for m in self._messages),
+                    default=deadline,
+                )
+                self._condition.wait(
+                    max(min(deadline, next_visible_at) - now, 0.001)
+                )
+
+    def _receive(
+        self, max_number: int, visibility_timeout: int
+    ) -> list[_StoredMessage]:
+        self._expire_retained()
+        now = time.monotonic()
+        received: list[_StoredMessage] = []
+        blocked_groups: set[Optional[str]] = set()
+        for stored in list(self._messages):
+            if len(received) >= max_number:
+                break
+            if self.fifo and stored.group_id in blocked_groups:
+                continue
+            if stored.visible_at > now:
+                # In order delivery within a FIFO group
+                blocked_groups.add(stored.group_id)
+                continue
+            if self._redrive(stored):
+                continue
+
+            stored.receive_count += 1
+            stored.first_received_at = stored.first_received_at or time.time()
+            stored.receipt_handle = str(uuid.uuid4())
+            stored.visible_at = now + visibility_timeout
+            received.append(stored)
+
+        return received
+
+    def _redrive(self, stored: _StoredMessage) -> bool:
+        policy = self._attributes.get("RedrivePolicy")
+        if not policy:
+            return False
+
+        policy_dict = json.loads(policy)
+        if stored.receive_count < int(policy_dict["maxReceiveCount"]):
+            return False
+
+        dl_queue = self._sqs.get_queue_by_arn(
+            policy_dict["deadLetterTargetArn"]
+        )
+        self._messages.remove(stored)
+        dl_queue.enqueue_redriven(stored)
+        return True
+
+    def enqueue_redriven(self, stored: _StoredMessage) -> None:
+        """Enqueue a message moved here by a source queue's redrive policy."""
+        with self._condition:
+            self._messages.append(
+                dataclasses.replace(
+                    stored, visible_at=0, receipt_handle=None, receive_count=0
+                )
+            )
+            self._condition.notify_all()
+
+    def _expire_retained(self) -> None:
+        retention = int(self._attributes["MessageRetentionPeriod"])
+        now = time.time()
+        self._messages = [
+            m for m in self._messages if now - m.sent_at < retention
+        ]
+
+    def _find(self, receipt_handle: Optional[str]) -> Optional[_StoredMessage]:
+        for stored in self._messages:
+            if stored.receipt_handle == receipt_handle:
+                return stored
+        return None
+
+    def delete_message(self, receipt_handle: Optional[str]) -> dict[str, Any]:
+        """Delete a received message, see InMemoryMessage.delete."""
+        with self._condition:
+            # Deleting with a stale receipt handle is a no-op, as on SQS
+            if stored := self._find(receipt_handle):
+                self._messages.remove(stored)
+                self._condition.notify_all()
+
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def change_message_visibility(
+        self, receipt_handle: Optional[str], visibility_timeout: int
+    ) -> dict[str, Any]:
+        """Change the visibility timeout of a received message.
+
+        See InMemoryMessage.change_visibility.
+
+        """
+        now = time.monotonic()
+        with self._condition:
+            stored = self._find(receipt_handle)
+            if stored is None:
+                raise _client_error(
+                    "ReceiptHandleIsInvalid",
+                    f"The receipt handle {receipt_handle} is not valid.",
+                    "ChangeMessageVisibility",
+                )
+            # Like SQS, the latest receipt handle stays valid after the
+            # visibility timeout expired, until the message is received again
+            stored.visible_at = now + visibility_timeout
+            self._condition.notify_all()
+
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def purge(self) -> dict[str, Any]:
+        """Delete all messages."""
+        with self._condition:
+            self._messages.clear()
+            self._condition.notify_all()
+
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+    def delete(self) -> dict[str, Any]:
+        """Delete the queue."""
+        self._sqs.delete_queue(self.name)
+        return {"ResponseMetadata": {"HTTPStatusCode": 200}}
+
+
+class InMemorySQSClient:
+    """The subset of boto3's SQS client used by this package."""
+
+    def __init__(self, sqs: InMemorySQS):
+        """Get a new InMemorySQSClient, use InMemorySQS.meta.client."""
+        self._sqs = sqs
+
+    def get_queue_url(self, QueueName: str) -> dict[str, Any]:
+        """Get the URL of the queue."""
+        return {"QueueUrl": self._sqs.get_queue_by_name(QueueName).url}
+
+    def get_queue_attributes(
+        self, QueueUrl: str, AttributeNames: Optional[list[str]] = None
+    ) -> dict[str, Any]:
+        """Get the queue attributes."""
+        attributes = self._sqs.get_queue_by_url(QueueUrl).attributes
+        names = AttributeNames or ["All"]
+        return {
+            "Attributes": {
+                name: value
+                for name, value in attributes.items()
+                if "All" in names or name in names
+            }
+        }
+
+    def send_message(self, QueueUrl: str, **kwargs) -> dict[str, Any]:
+        """Send a message to the queue."""
+        return self._sqs.get_queue_by_url(QueueUrl).send_message(**kwargs)
+
+    def receive_message(self, QueueUrl: str, **kwargs) -> dict[str, Any]:
+        """Receive messages from the queue."""
+        messages = self._sqs.get_queue_by_url(QueueUrl).receive_messages(
+            **kwargs
+        )
+        return {
+            "Messages": [
+                {
+                    "MessageId": m.message_id,
+                    "ReceiptHandle": m.receipt_handle,
+                    "Body": m.body,
+                    "MD5OfBody": m.md5_of_body,
+                    "Attributes": m.attributes or {},
+                }
+                for m in messages
+            ]
+        }
+
+    def delete_message(
+        self, QueueUrl: str, ReceiptHandle: str
+    ) -> dict[str, Any]:
+        """Delete a received message."""
+        return self._sqs.get_queue_by_url(QueueUrl).delete_message(
+            ReceiptHandle
+        )
+
+    def change_message_visibility(
+        self, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int
+    ) -> dict[str, Any]:
+        """Change the visibility timeout of a received message."""
+        return self._sqs.get_queue_by_url(QueueUrl).change_message_visibility(
+            ReceiptHandle, VisibilityTimeout
+        )
+
+    def close(self) -> None:
+        """Do nothing, there are no connections."""
+
+
+class InMemorySQS:
+    """In-memory SQS, mirroring the used subset of boto3's SQS resource.
+
+    Pass as sqs= to Producer & Consumer to run them without network.
+
+    """
+
+    def __init__(self):
+        """Get a new InMemorySQS, without queues."""
+        self._queues: dict[str, InMemoryQueue] = {}
+        self._lock = threading.Lock()
+        self.meta = SimpleNamespace(client=InMemorySQSClient(self))
+
+    def create_queue(
+        self, QueueName: str, Attributes: Optional[dict[str, str]] = None
+    ) -> InMemoryQueue:
+        """Create a queue, or get it if it already exists."""
+        with self._lock:
+            if QueueName not in self._queues:
+                self._queues[QueueName] = InMemoryQueue(
+                    self, QueueName, Attributes or {}
+                )
+            return self._queues[QueueName]
+
+    def get_queue_by_name(self, QueueName: str) -> InMemoryQueue:
+        """Get an existing queue."""
+        with self._lock:
+            queue = self._queues.get(QueueName)
+
+        if queue is None:
+            raise _client_error(
+                "AWS.SimpleQueueService.NonExistentQueue",
+                "The specified queue does not exist.",
+                "GetQueueUrl",
+            )
+        return queue
+
+    def get_queue_by_url(self, url: str) -> InMemoryQueue:
+        """Get an existing queue by its URL."""
+        return self.get_queue_by_name(url.rsplit("/", 1)[-1])
+
+    def get_queue_by_arn(self, arn: str) -> InMemoryQueue:
+        """Get an existing queue by its ARN."""
+        return self.get_queue_by_name(arn.rsplit(":", 1)[-1])
+
+    def delete_queue(self, name: str) -> None:
+        """Delete a queue, if it exists."""
+        with self._lock:
+            self._queues.pop(name, None)
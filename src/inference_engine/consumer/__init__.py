@@ -5,5 +5,19 @@ from ..exceptions import (  # noqa: F401
     ConsumerRetryableError,
     ConsumerStopTimeoutError,
     ConsumerUnretryableError,
+    DuplicateJobError,
+    DuplicateJobInProgressError,
+    JobCancelledError,
+    PoisonMessageError,
 )
+from ._circuit_breaker import (  # noqa: F401
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitState,
+)
+from ._context import CancellationToken, JobContext  # noqa: F401
+from ._metrics import ConsumerMetrics, EmfStageHook  # noqa: F401
+from ._options import ConsumerOptions  # noqa: F401
+from ._poison import PoisonMessagePolicy  # noqa: F401
+from ._retry import RetryPolicy  # noqa: F401
 from .consumer import Consumer  # noqa: F401
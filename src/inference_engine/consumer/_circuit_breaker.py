@@ -0,0 +1,360 @@
+"""Circuit breaker of the Consumer's dependencies, DynamoDB & SQS."""
+from __future__ import annotations
+
+import contextlib
+import dataclasses
+import random
+import threading
+import time
+from collections.abc import Iterator
+from enum import Enum
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+from botocore.exceptions import BotoCoreError, ClientError
+from loguru import logger
+from mypy_boto3_sqs.service_resource import Message, Queue
+
+from ._metrics import ConsumerMetrics
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+# Stages calling DynamoDB or SQS, whose outcome the circuit breaker records
+_STAGE_DEPENDENCIES = {
+    "receive_wait": "sqs",
+    "request_claim_put": "dynamodb",
+    "in_progress_put": "dynamodb",
+    "result_put": "dynamodb",
+    "delete": "sqs",
+    "retry_backoff": "sqs",
+}
+# Errors of calls that reached the dependency, which is then working
+_NOT_FAILURE_ERROR_CODES = frozenset(
+    {"ConditionalCheckFailedException", "TransactionCanceledException"}
+)
+
+StateListenerT = Callable[["CircuitState", "CircuitState"], Any]
+
+
+class CircuitState(str, Enum):
+    """State of a CircuitBreaker."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class CircuitBreakerConfig:
+    """The thresholds & timeouts of a CircuitBreaker.
+
+    Attributes
+    ----------
+    failure_threshold : int
+        The number of consecutive failed calls that opens the circuit.
+    reset_timeout_seconds : float
+        The time the circuit stays open before the first probe.
+    max_reset_timeout_seconds : float
+        The maximum time the circuit stays open.
+    backoff_multiplier : float
+        The factor by which the timeout grows with each failed probe.
+    jitter : float
+        Fraction of the timeouts that is randomly removed, in [0, 1].
+    failure_errors : tuple of Exception types
+        The errors of failed calls.
+
+    """
+
+    failure_threshold: int = 5
+    reset_timeout_seconds: float = 5
+    max_reset_timeout_seconds: float = 5 * 60
+    backoff_multiplier: float = 2
+    jitter: float = 0.5
+    failure_errors: tuple[type[BaseException], ...] = (
+        BotoCoreError,
+        ClientError,
+    )
+
+    def __post_init__(self):
+        if self.failure_threshold < 1:
+            raise ValueError(
+                f"Invalid failure_threshold={self.failure_threshold}, "
+                "expected at least 1"
+            )
+        if (
+            not 0
+            < self.reset_timeout_seconds
+            <= self.max_reset_timeout_seconds
+        ):
+            raise ValueError(
+                "Expected 0 < reset_timeout_seconds <= "
+                "max_reset_timeout_seconds, got "
+                f"reset_timeout_seconds={self.reset_timeout_seconds}, "
+                f"max_reset_timeout_seconds={self.max_reset_timeout_seconds}"
+            )
+        if self.backoff_multiplier < 1:
+            raise ValueError(
+                f"Invalid backoff_multiplier={self.backoff_multiplier}"
+            )
+        if not 0 <= self.jitter <= 1:
+            raise ValueError(f"Invalid jitter={self.jitter}")
+
+
+class CircuitBreaker:
+    """Pause receiving messages while a dependency is failing.
+
+    The circuit opens after failure_threshold consecutive failed calls to a
+    dependency (e.g. "dynamodb" or "sqs"), the Consumer then stops receiving
+    messages. Once reset_timeout_seconds have passed, it is half open: the
+    Consumer probes the dependencies by receiving & processing again. A
+    successful call of the failing dependency closes the circuit, a failed
+    call opens it again, for a timeout growing by backoff_multiplier up to
+    max_reset_timeout_seconds. Timeouts are jittered, so that consumers don't
+    all probe at once.
+
+    Failures are counted per dependency, so that e.g. successful receives
+    don't hide failing DynamoDB calls.
+
+    Failed calls are those raising one of failure_errors (botocore errors
+    by default), except for failed conditions, which the dependency did
+    evaluate. The thresholds & timeouts are set with a CircuitBreakerConfig.
+
+    """
+
+    def __init__(self, config: Optional[CircuitBreakerConfig] = None):
+        """Get a new CircuitBreaker.
+
+        Parameters
+        ----------
+        config : CircuitBreakerConfig, optional
+            The thresholds & timeouts of the circuit breaker. Defaults to a
+            CircuitBreakerConfig with its default options.
+
+        """
+        self.config = config or CircuitBreakerConfig()
+        self._state = CircuitState.CLOSED
+        # dependency -> number of consecutive failed calls
+        self._failures: dict[str, int] = {}
+        self._reset_timeout = self.config.reset_timeout_seconds
+        self._open_until = 0.0
+        self._listeners: list[StateListenerT] = []
+        self._lock = threading.RLock()
+
+    @property
+    def state(self) -> CircuitState:
+        """Get the current state, half open once the timeout has passed."""
+        with self._lock:
+            if (
+                self._state == CircuitState.OPEN
+                and time.monotonic() >= self._open_until
+            ):
+                return self._transition(CircuitState.HALF_OPEN)
+            return self._state
+
+    @property
+    def is_open(self) -> bool:
+        """Check whether calls should be paused."""
+        return self.state == CircuitState.OPEN
+
+    @property
+    def seconds_until_probe(self) -> float:
+        """Get the time left until the circuit is half open."""
+        with self._lock:
+            if self._state != CircuitState.OPEN:
+                return 0
+            return max(self._open_until - time.monotonic(), 0)
+
+    def add_listener(self, listener: StateListenerT) -> None:
+        """Add a listener called with the old & new state on transitions.
+
+        Listeners are called by the thread recording the call, while holding
+        the circuit breaker's lock.
+
+        Parameters
+        ----------
+        listener : callable
+
+        """
+        self._listeners.append(listener)
+
+    def is_failure(self, exp: BaseException) -> bool:
+        """Check whether an error is a failed call.
+
+        Parameters
+        ----------
+        exp : Exception
+            The error raised by the call.
+
+        Returns
+        -------
+        bool
+
+        """
+        if not isinstance(exp, self.config.failure_errors):
+            return False
+        if isinstance(exp, ClientError):
+            code = exp.response.get("Error", {}).get("Code")
+            return code not in _NOT_FAILURE_ERROR_CODES
+        return True
+
+    def record_success(self, dependency: str) -> None:
+        """Record a successful call, which may close the circuit.
+
+        Parameters
+        ----------
+        dependency : str
+            The name of the called dependency.
+
+        """
+        with self._lock:
+            self._failures.pop(dependency, None)
+            if self._state == CircuitState.HALF_OPEN and all(
+                failures < self.config.failure_threshold
+                for failures in self._failures.values()
+            ):
+                self._reset_timeout = self.config.reset_timeout_seconds
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self, dependency: str) -> None:
+        """Record a failed call, which may open the circuit.
+
+        Parameters
+        ----------
+        dependency : str
+            The name of the called dependency.
+
+        """
+        with self._lock:
+            failures = self._failures.get(dependency, 0) + 1
+            self._failures[dependency] = failures
+            if self._state == CircuitState.HALF_OPEN:
+                # The probe failed, back off further
+                self._reset_timeout = min(
+                    self._reset_timeout * self.config.backoff_multiplier,
+                    self.config.max_reset_timeout_seconds,
+                )
+            elif (
+                self._state == CircuitState.OPEN
+                or failures < self.config.failure_threshold
+            ):
+                return
+
+            timeout = self._reset_timeout * (
+                1 - self.config.jitter * random.random()  # nosec B311
+            )
+            self._open_until = time.monotonic() + timeout
+            self._transition(CircuitState.OPEN)
+
+    def record(
+        self, dependency: str, exp: Optional[BaseException] = None
+    ) -> None:
+        """Record the outcome of a call.
+
+        Parameters
+        ----------
+        dependency : str
+            The name of the called dependency.
+        exp : Exception, optional
+            The error raised by the call, None if it succeeded. Errors that
+            aren't failures count as successful calls.
+
+        """
+        if exp is not None and self.is_failure(exp):
+            self.record_failure(dependency)
+        else:
+            self.record_success(dependency)
+
+    def _transition(self, state: CircuitState) -> CircuitState:
+        old_state, self._state = self._state, state
+        for listener in self._listeners:
+            try:
+                listener(old_state, state)
+            except Exception as exp:
+                logger.opt(exception=True).error(
+                    "Exp in circuit breaker listener {}: {}",
+                    listener,
+                    str(exp),
+                )
+        return state
+
+
+class _CircuitBreakerMixin:
+    """The circuit breaker of a Consumer, pausing its receives."""
+
+    circuit_breaker: Optional[CircuitBreaker]
+    queue: Queue
+    metrics: ConsumerMetrics
+    logger: Logger
+    _stop_event: Optional[threading.Event]
+    _stage: Callable[..., contextlib.AbstractContextManager]
+
+    def _init_circuit_breaker(
+        self, config: Optional[CircuitBreakerConfig]
+    ) -> None:
+        self.circuit_breaker = None
+        if config is None:
+            return
+
+        self.circuit_breaker = CircuitBreaker(config)
+        self.circuit_breaker.add_listener(self._on_circuit_state_change)
+        self._set_circuit_state_metric(self.circuit_breaker.state)
+
+    @contextlib.contextmanager
+    def _record_call(self, stage: str) -> Iterator[None]:
+        """Record the outcome of the dependency call of a stage, if any."""
+        dependency = _STAGE_DEPENDENCIES.get(stage)
+        if self.circuit_breaker is None or dependency is None:
+            yield
+            return
+
+        try:
+            yield
+        except Exception as exp:
+            self.circuit_breaker.record(dependency, exp)
+            raise
+        self.circuit_breaker.record(dependency)
+
+    def _set_circuit_state_metric(self, state: CircuitState) -> None:
+        for _state in CircuitState:
+            self.metrics.circuit_breaker_state.set(
+                _state.value, float(_state == state)
+            )
+
+    def _on_circuit_state_change(
+        self, old_state: CircuitState, state: CircuitState
+    ) -> None:
+        self._set_circuit_state_metric(state)
+        if state == CircuitState.OPEN:
+            self.logger.warning(
+                "Circuit breaker opened, pausing receiving for {:.2f}s",
+                self.circuit_breaker.seconds_until_probe,  # type: ignore
+            )
+        else:
+            self.logger.info(
+                "Circuit breaker {} -> {}", old_state.value, state.value
+            )
+
+    def _wait_while_circuit_open(self) -> bool:
+        """Wait until the circuit breaker probes, if it is open."""
+        if self.circuit_breaker is None or not self.circuit_breaker.is_open:
+            return False
+
+        self._stop_event.wait(  # type: ignore
+            self.circuit_breaker.seconds_until_probe
+        )
+        return True
+
+    def _receive_messages(self, **kwargs) -> list[Message]:
+        try:
+            with self._stage("receive_wait"):
+                return self.queue.receive_messages(**kwargs)
+        except Exception as exp:
+            if self.circuit_breaker is None or not (
+                self.circuit_breaker.is_failure(exp)
+            ):
+                raise
+
+            self.logger.opt(exception=True).error(
+                "Failed to receive messages: {}", str(exp)
+            )
+            return []
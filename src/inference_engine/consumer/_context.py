@@ -0,0 +1,180 @@
+"""Per job context passed onto compute functions by SQS Consumer."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Optional
+
+from loguru import logger
+
+from ..dynamo_db_client import DynamoDBClient
+from ..exceptions import JobCancelledError
+from ..types import MessageIdT, Progress
+
+
+class CancellationToken:
+    """Flag set once the job being computed has been cancelled.
+
+    The Consumer's heartbeat thread checks the status of the job
+    periodically and sets the token if it was cancelled (see
+    Producer.cancel).
+
+    """
+
+    def __init__(self):
+        """Get a new, not cancelled, CancellationToken."""
+        self._event = threading.Event()
+        # time.monotonic() of the last check of the job's status
+        self.checked_at: Optional[float] = None
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Check if the job has been cancelled."""
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Mark the job as cancelled."""
+        self._event.set()
+
+    def raise_if_cancelled(self) -> None:
+        """Raise JobCancelledError if the job has been cancelled.
+
+        Raises
+        ------
+        JobCancelledError
+
+        """
+        if self.is_cancelled:
+            raise JobCancelledError("Job was cancelled")
+
+
+class JobContext:
+    """Context of the job being computed, passed as the context kwarg.
+
+    Compute functions that accept a context keyword argument (or **kwargs)
+    receive a JobContext, which they can use to report their progress::
+
+        def your_function(body, message_id, context):
+            for i, step in enumerate(steps):
+                context.report_progress(i / len(steps), stage=step.name)
+                ...
+            return result
+
+    Reports are throttled to at most one write per min_interval_seconds,
+    and written with DynamoDBClient.progress_put. Failures to write progress
+    are logged and never interrupt the computation.
+
+    Long running compute functions should periodically call
+    raise_if_cancelled (or check is_cancelled), to abort early when the job
+    is cancelled.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        ddb_client: DynamoDBClient,
+        message_id: MessageIdT,
+        request_id: Optional[str] = None,
+        min_interval_seconds: float = 1,
+        cancellation_token: Optional[CancellationToken] = None,
+    ):
+        """Get a new JobContext.
+
+        Parameters
+        ----------
+        ddb_client : DynamoDBClient
+            The client used to write the progress.
+        message_id : str
+            The message_id of the job.
+        request_id : str, optional
+            The request_id of the job.
+        min_interval_seconds : float
+            The minimum time between progress writes.
+        cancellation_token : CancellationToken, optional
+            The token set when the job is cancelled.
+
+        """
+        self.ddb_client = ddb_client
+        self.message_id = message_id
+        self.request_id = request_id
+        self.min_interval_seconds = min_interval_seconds
+        self.cancellation_token = cancellation_token or CancellationToken()
+        self.progress: Optional[Progress] = None
+        self._last_write_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.logger = logger.bind(message_id=message_id)
+
+    @property
+    def is_cancelled(self) -> bool:
+        """Check if the job has been cancelled."""
+        return self.cancellation_token.is_cancelled
+
+    def raise_if_cancelled(self) -> None:
+        """Raise JobCancelledError if the job has been cancelled.
+
+        Raises
+        ------
+        JobCancelledError
+
+        """
+        self.cancellation_token.raise_if_cancelled()
+
+    def report_progress(
+        self,
+        fraction: Optional[float] = None,
+        *,
+        stage: Optional[str] = None,
+        eta_seconds: Optional[float] = None,
+        force: bool = False,
+    ) -> bool:
+        """Report the progress of the job.
+
+        Parameters
+        ----------
+        fraction : float, optional
+            The fraction of the job completed, in [0, 1].
+        stage : str, optional
+            A description of the current stage of the job.
+        eta_seconds : float, optional
+            The estimated number of seconds until the job completes.
+        force : bool
+            Whether to write regardless of the throttling.
+
+        Returns
+        -------
+        bool
+            Whether the progress was written to DynamoDB.
+
+        Raises
+        ------
+        ValueError
+            If fraction is not in [0, 1].
+
+        """
+        progress = Progress(
+            fraction=fraction,
+            stage=stage,
+            eta_seconds=eta_seconds,
+            reported_at=time.time(),
+        )
+        now = time.monotonic()
+        with self._lock:
+            self.progress = progress
+            if (
+                not force
+                and self._last_write_at is not None
+                and now - self._last_write_at < self.min_interval_seconds
+            ):
+                return False
+            self._last_write_at = now
+
+        try:
+            self.ddb_client.progress_put(self.message_id, progress)
+        except Exception as exp:
+            self.logger.opt(exception=True).warning(
+                "Failed to write progress={}: {}", progress, str(exp)
+            )
+            return False
+
+        return True
@@ -1,6 +1,9 @@
 """ECS Scale In Protection manager."""
+import contextlib
 import os
-from typing import Optional
+import threading
+from collections.abc import Iterator
+from typing import Callable, Optional
 
 import requests
 from loguru import logger
@@ -10,6 +13,7 @@ from ..exceptions import (
     ECSScaleInProtectionManagerAgentError,
     ECSScaleInProtectionManagerRequestError,
 )
+from ..tracing import NULL_TRACER, Tracer
 
 
 class ECSScaleInProtectionManager:
@@ -33,6 +37,7 @@ class ECSScaleInProtectionManager:
         request_timeout: float = 15,
         retries: int = 3,
         backoff_factor: float = 0.5,
+        tracer: Optional[Tracer] = None,
     ):
         """Get a new ECSScaleInProtectionManager.
 
@@ -55,6 +60,8 @@ class ECSScaleInProtectionManager:
             The number of times to retry API calls to the ECS agent.
         backoff_factor : float
             The backoff factor to use for retries.
+        tracer : Tracer, optional
+            Tracer to record a span for each acquire & release in.
 
         """
         self.ecs_agent_uri = ecs_agent_uri or os.environ["ECS_AGENT_URI"]
@@ -72,6 +79,7 @@ class ECSScaleInProtectionManager:
         self._session.mount("http://", self._adapter)
         self._session.mount("https://", self._adapter)
         self._timeout = request_timeout
+        self.tracer = tracer or NULL_TRACER
         self.logger = logger.bind(
             ecs_agent_uri=self.ecs_agent_uri, uri=self.uri
         )
@@ -79,14 +87,16 @@ class ECSScaleInProtectionManager:
     def acquire(self) -> None:
         """Acquire ECS Protection."""
         self.logger.info("Acquiring ECS protection")
-        self._set_state_wrapped(
-            protection_enabled=True,
-        )
+        with self.tracer.span("ecs_protection.acquire"):
+            self._set_state_wrapped(
+                protection_enabled=True,
+            )
 
     def release(self) -> None:
         """Release ECS Protection."""
         self.logger.info("Releasing ECS protection")
-        self._set_state_wrapped(protection_enabled=False)
+        with self.tracer.span("ecs_protection.release"):
+            self._set_state_wrapped(protection_enabled=False)
 
     def _set_state_wrapped(
         self,
@@ -149,3 +159,53 @@ class ECSScaleInProtectionManager:
         """Exit the context and release scale in protection."""
         self.release()
         self._session.close()
+
+
+class SharedScaleInProtection:
+    """ECS Scale in protection shared by concurrently processed messages.
+
+    Protection is acquired when the first message starts processing and
+    released when the last one is done, rather than being released while
+    other messages are still being processed.
+
+    """
+
+    def __init__(self, factory: Callable[[], ECSScaleInProtectionManager]):
+        """Get a new SharedScaleInProtection.
+
+        Parameters
+        ----------
+        factory : callable
+            Returns a new ECSScaleInProtectionManager, used for one
+            acquire/release cycle.
+
+        """
+        self.factory = factory
+        self._lock = threading.Lock()
+        self._holders = 0
+        # Exits the ECSScaleInProtectionManager once there are no holders
+        self._exit_stack: Optional[contextlib.ExitStack] = None
+
+    @property
+    def num_holders(self) -> int:
+        """Get the number of messages holding the protection."""
+        with self._lock:
+            return self._holders
+
+    @contextlib.contextmanager
+    def hold(self) -> Iterator[None]:
+        """Hold the protection while in the context."""
+        with self._lock:
+            if self._holders == 0:
+                exit_stack = contextlib.ExitStack()
+                exit_stack.enter_context(self.factory())
+                self._exit_stack = exit_stack
+            self._holders += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._holders -= 1
+                if self._holders == 0 and self._exit_stack is not None:
+                    exit_stack, self._exit_stack = self._exit_stack, None
+                    exit_stack.close()
@@ -2,13 +2,15 @@
 from __future__ import annotations
 
 import threading
-from typing import Optional
+from typing import Any, Callable, Optional
 
 import boto3
 from loguru import logger
 from mypy_boto3_sqs.client import SQSClient
 
 from ..exceptions import HeartbeatStopTimeoutError
+from ..tracing import NULL_TRACER, Tracer
+from ._metrics import ConsumerMetrics
 
 
 class Heartbeat:
@@ -44,6 +46,10 @@ class Heartbeat:
         start_immediately: bool = False,
         default_stop_timeout: Optional[float] = 5,
         join_on_stop: bool = False,
+        on_heartbeat: Optional[Callable[[], Any]] = None,
+        metrics: Optional[ConsumerMetrics] = None,
+        tracer: Optional[Tracer] = None,
+        sqs_client: Optional[Any] = None,
         **boto3_sqs_resource_kwargs,
     ):
         """Get a new Heartbeat.
@@ -68,13 +74,27 @@ class Heartbeat:
           The default timeout to use on Thread.join.
         join_on_stop : bool
             Whether to call join.
+        on_heartbeat : callable, optional
+            Called from the heartbeat thread after every successful
+            heartbeat. Exceptions raised are logged.
+        metrics : ConsumerMetrics, optional
+            Metrics to record heartbeat durations and outcomes in.
+        tracer : Tracer, optional
+            Tracer to record a span for each heartbeat in.
+        sqs_client : SQSClient, optional
+            The SQS client to use instead of creating one from kwargs. It is
+            not closed on stop.
 
         """
         self._thread = threading.Thread(
             target=self._run, name=f"Heartbeat:{receipt_handle}"
         )
         self._stop_event = threading.Event()
-        self.sqs_cli: SQSClient = boto3.client(
+        # Held while sending, release must not race with a heartbeat
+        self._send_lock = threading.Lock()
+        self._released = False
+        self._owns_sqs_cli = sqs_client is None
+        self.sqs_cli: SQSClient = sqs_client or boto3.client(
             "sqs", **boto3_sqs_resource_kwargs
         )
         self.queue_url = queue_url
@@ -90,6 +110,9 @@ class Heartbeat:
         self.interval = interval
         self.default_stop_timeout = default_stop_timeout
         self.join_on_stop = join_on_stop
+        self.on_heartbeat = on_heartbeat
+        self.metrics = metrics
+        self.tracer = tracer or NULL_TRACER
         self.logger = logger.bind(
             queue_url=self.queue_url,
             message_id=self.message_id,
@@ -147,8 +170,10 @@ class Heartbeat:
         wait_time = self.interval
         while not self._stop_event.wait(wait_time):
             try:
-                self.send_heartbeat()
+                if self._send_heartbeat_timed() is None:
+                    break
             except Exception as exp:
+                self._count_heartbeat("failure")
                 num_fails += 1
                 self.logger.opt(exception=True).error(
                     "Failed to set heartbeat {}, num_fails={}",
@@ -158,10 +183,15 @@ class Heartbeat:
                 # Don't wait full interval so that we can retry quickly
                 wait_time = 0.1
             else:
+                self._count_heartbeat("success")
                 self.logger.debug("Successfully sent heartbeat to SQS.")
                 wait_time = self.interval
+                self._call_on_heartbeat()
 
         self.logger.info("Heartbeat thread received stop event")
+        if not self._owns_sqs_cli:
+            return
+
         try:
             self.sqs_cli.close()
         except Exception as exp:
@@ -169,6 +199,34 @@ class Heartbeat:
                 "Exp closing SQS cli connection: {}", str(exp)
             )
 
+    def _send_heartbeat_timed(self) -> Optional[bool]:
+        with (
+            self._send_lock,
+            self.tracer.span("heartbeat.send", message_id=self.message_id),
+        ):
+            if self._released:
+                return None
+            if self.metrics is None:
+                return self.send_heartbeat()
+
+            with self.metrics.time("heartbeat"):
+                return self.send_heartbeat()
+
+    def _count_heartbeat(self, outcome: str) -> None:
+        if self.metrics is not None:
+            self.metrics.heartbeats_total.inc(outcome)
+
+    def _call_on_heartbeat(self) -> None:
+        if self.on_heartbeat is None:
+            return
+
+        try:
+            self.on_heartbeat()
+        except Exception as exp:
+            self.logger.opt(exception=True).error(
+                "Exp in on_heartbeat callback: {}", str(exp)
+            )
+
     def send_heartbeat(self) -> bool:
         """Send heartbeat.
 
@@ -186,6 +244,39 @@ class Heartbeat:
 
         return response["ResponseMetadata"]["HTTPStatusCode"] == 200
 
+    def release(self, visibility_timeout: int) -> bool:
+        """Stop the heartbeat and set the visibility timeout one last time.
+
+        Used to give the message back to the queue after visibility_timeout
+        seconds, no heartbeat is sent afterwards.
+
+        Parameters
+        ----------
+        visibility_timeout : int
+            The visibility timeout to set.
+
+        Returns
+        -------
+        bool
+            Whether the change_message_visibility call succeeded.
+
+        """
+        with self._send_lock:
+            self._released = True
+            try:
+                response = self.sqs_cli.change_message_visibility(
+                    QueueUrl=self.queue_url,
+                    ReceiptHandle=self.receipt_handle,
+                    VisibilityTimeout=visibility_timeout,
+                )
+            finally:
+                # Only now, as the thread closes the client it owns on stop
+                self._stop_event.set()  # type: ignore
+        self.logger.info(
+            "Released message with visibility_timeout={}", visibility_timeout
+        )
+        return response["ResponseMetadata"]["HTTPStatusCode"] == 200
+
     def __enter__(self):
         """Enter the context and start the heartbeat."""
         self.start()
@@ -0,0 +1,440 @@
+"""In-process metrics for SQS Consumer, in Prometheus text format."""
+from __future__ import annotations
+
+import bisect
+import contextlib
+import json
+import math
+import sys
+import threading
+import time
+from typing import Any, Callable, Iterator, Optional, TextIO
+
+from loguru import logger
+
+StageHookT = Callable[[str, float], Any]
+
+# Seconds, from fast DDB/SQS calls up to long running computations
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1,
+    2.5,
+    5,
+    10,
+    30,
+    60,
+    120,
+    300,
+)
+
+
+class Counter:
+    """Monotonic counter, with a single label."""
+
+    def __init__(self, name: str, documentation: str, label_name: str):
+        """Get a new Counter.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The metric HELP text.
+        label_name : str
+            The name of the label distinguishing the series.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_value: str, amount: float = 1) -> None:
+        """Increment the series for label_value.
+
+        Parameters
+        ----------
+        label_value : str
+        amount : float
+
+        """
+        with self._lock:
+            self._values[label_value] = (
+                self._values.get(label_value, 0) + amount
+            )
+
+    def value(self, label_value: str) -> float:
+        """Get the current value of the series for label_value."""
+        return self._values.get(label_value, 0)
+
+    def render(self) -> list[str]:
+        """Get the lines of the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+
+        lines += [
+            f'{self.name}{{{self.label_name}="{label_value}"}} {value}'
+            for label_value, value in values
+        ]
+        return lines
+
+
+class Gauge:
+    """Gauge, with a single label."""
+
+    def __init__(self, name: str, documentation: str, label_name: str):
+        """Get a new Gauge.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The metric HELP text.
+        label_name : str
+            The name of the label distinguishing the series.
+
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self._values: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def set(self, label_value: str, value: float) -> None:
+        """Set the series for label_value.
+
+        Parameters
+        ----------
+        label_value : str
+        value : float
+
+        """
+        with self._lock:
+            self._values[label_value] = value
+
+    def value(self, label_value: str) -> float:
+        """Get the current value of the series for label_value."""
+        return self._values.get(label_value, 0)
+
+    def render(self) -> list[str]:
+        """Get the lines of the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} gauge",
+        ]
+        with self._lock:
+            values = sorted(self._values.items())
+
+        lines += [
+            f'{self.name}{{{self.label_name}="{label_value}"}} {value}'
+            for label_value, value in values
+        ]
+        return lines
+
+
+class Histogram:
+    """Histogram with fixed buckets, with a single label."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_name: str,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """Get a new Histogram.
+
+        Parameters
+        ----------
+        name : str
+            The metric name.
+        documentation : str
+            The metric HELP text.
+        label_name : str
+            The name of the label distinguishing the series.
+        buckets : tuple of float
+            The sorted upper bounds of the buckets, excluding +Inf.
+
+        """
+        if list(buckets) != sorted(buckets):
+            raise ValueError(f"Buckets not sorted, {buckets=}")
+
+        self.name = name
+        self.documentation = documentation
+        self.label_name = label_name
+        self.buckets = tuple(buckets)
+        # Per label: non-cumulative bucket counts (last is +Inf) & sum
+        self._counts: dict[str, list[int]] = {}
+        self._sums: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_value: str, value: float) -> None:
+        """Record an observation in the series for label_value.
+
+        Parameters
+        ----------
+        label_value : str
+        value : float
+
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(label_value)
+            if counts is None:
+                counts = self._counts[label_value] = [0] * (
+                    len(self.buckets) + 1
+                )
+                self._sums[label_value] = 0
+            counts[index] += 1
+            self._sums[label_value] += value
+
+    def count(self, label_value: str) -> int:
+        """Get the number of observations for label_value."""
+        return sum(self._counts.get(label_value, []))
+
+    def render(self) -> list[str]:
+        """Get the lines of the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            series = [
+                (label_value, list(counts), self._sums[label_value])
+                for label_value, counts in sorted(self._counts.items())
+            ]
+
+        for label_value, counts, sum_ in series:
+            label = f'{self.label_name}="{label_value}"'
+            cumulative = 0
+            for upper, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = "+Inf" if upper == math.inf else f"{upper}"
+                lines.append(
+                    f'{self.name}_bucket{{{label},le="{le}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{label}}} {sum_}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+
+        return lines
+
+
+class ConsumerMetrics:
+    """Metrics of a Consumer.
+
+    Holds:
+    * <prefix>_stage_seconds: histogram of the duration of each processing
+      stage (receive_wait, decode, request_claim_put, in_progress_put,
+      compute, result_put, delete, retry_backoff & heartbeat).
+    * <prefix>_messages_total: counter of processed messages by outcome
+      (success, retryable, unretryable, cancelled, duplicate,
+      duplicate_in_progress & poison).
+    * <prefix>_heartbeats_total: counter of heartbeats by outcome (success
+      & failure).
+    * <prefix>_retries_total: counter of retries of a RetryPolicy by kind
+      (in_place & backoff).
+    * <prefix>_circuit_breaker_state: gauge of the state of a CircuitBreaker
+      (closed, open & half_open), 1 for the current state.
+
+    Aggregation is in-process, each observation costs a bisect and a dict
+    update under a lock. render gives the Prometheus text format, served by
+    the /metrics route of the api_wrapper. Stage durations can also be
+    forwarded with hooks, e.g. EmfStageHook to publish them to CloudWatch.
+
+    """
+
+    def __init__(
+        self,
+        prefix: str = "inference_engine_consumer",
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        hooks: Optional[list[StageHookT]] = None,
+    ):
+        """Get a new ConsumerMetrics.
+
+        Parameters
+        ----------
+        prefix : str
+            The prefix of all metric names.
+        buckets : tuple of float
+            The buckets of the stage duration histogram, in seconds.
+        hooks : list of callable, optional
+            Called with the stage and its duration in seconds, after every
+            stage. Exceptions raised are logged.
+
+        """
+        self.hooks: list[StageHookT] = list(hooks or [])
+        self.stage_seconds = Histogram(
+            f"{prefix}_stage_seconds",
+            "Duration of Consumer processing stages.",
+            "stage",
+            buckets,
+        )
+        self.messages_total = Counter(
+            f"{prefix}_messages_total",
+            "Messages processed by outcome.",
+            "outcome",
+        )
+        self.heartbeats_total = Counter(
+            f"{prefix}_heartbeats_total",
+            "Heartbeats by outcome.",
+            "outcome",
+        )
+        self.retries_total = Counter(
+            f"{prefix}_retries_total",
+            "Retries of failed messages by kind.",
+            "kind",
+        )
+        self.circuit_breaker_state = Gauge(
+            f"{prefix}_circuit_breaker_state",
+            "State of the dependency circuit breaker, 1 if current.",
+            "state",
+        )
+
+    def add_hook(self, hook: StageHookT) -> None:
+        """Add a hook called with every stage and its duration.
+
+        Parameters
+        ----------
+        hook : callable
+
+        """
+        self.hooks.append(hook)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """Record the duration of a stage and call the hooks.
+
+        Parameters
+        ----------
+        stage : str
+            The stage label.
+        seconds : float
+            The duration of the stage.
+
+        """
+        self.stage_seconds.observe(stage, seconds)
+        for hook in self.hooks:
+            try:
+                hook(stage, seconds)
+            except Exception as exp:
+                logger.opt(exception=True).error(
+                    "Exp in stage hook {}: {}", hook, str(exp)
+                )
+
+    @contextlib.contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        """Time the body of the with statement as stage.
+
+        The duration is recorded whether or not the body raises.
+
+        Parameters
+        ----------
+        stage : str
+            The stage label.
+
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def render(self) -> str:
+        """Get all metrics in the Prometheus text format.
+
+        Returns
+        -------
+        str
+
+        """
+        lines = [
+            *self.stage_seconds.render(),
+            *self.messages_total.render(),
+            *self.heartbeats_total.render(),
+            *self.retries_total.render(),
+            *self.circuit_breaker_state.render(),
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class EmfStageHook:
+    """Stage hook publishing durations to CloudWatch, via log lines.
+
+    Writes each selected stage duration as a CloudWatch embedded metric
+    format (EMF) JSON line. On ECS with CloudWatch logging (awslogs), the
+    lines are turned into CloudWatch metrics, without any API call from the
+    Consumer. The compute duration is published as ProcessingTime, which the
+    autoscaling lambda uses to estimate the queue backlog::
+
+        metrics = ConsumerMetrics(
+            hooks=[EmfStageHook("InferenceEngine", {"QueueName": queue_name})]
+        )
+        consumer = Consumer(
+            queue_name, options=ConsumerOptions(metrics=metrics), ...
+        )
+
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        dimensions: dict[str, str],
+        metric_names: Optional[dict[str, str]] = None,
+        stream: Optional[TextIO] = None,
+    ):
+        """Get a new EmfStageHook.
+
+        Parameters
+        ----------
+        namespace : str
+            The CloudWatch namespace of the metrics.
+        dimensions : dict
+            The CloudWatch dimensions of the metrics, e.g. the QueueName.
+        metric_names : dict, optional
+            The metric name of each published stage, defaults to
+            {"compute": "ProcessingTime"}.
+        stream : file object, optional
+            Where to write the lines, defaults to sys.stdout.
+
+        """
+        self.namespace = namespace
+        self.dimensions = dict(dimensions)
+        self.metric_names = metric_names or {"compute": "ProcessingTime"}
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def __call__(self, stage: str, seconds: float) -> None:
+        """Write the EMF line of the stage, if published."""
+        metric_name = self.metric_names.get(stage)
+        if metric_name is None:
+            return
+
+        record = {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [
+                    {
+                        "Namespace": self.namespace,
+                        "Dimensions": [list(self.dimensions)],
+                        "Metrics": [{"Name": metric_name, "Unit": "Seconds"}],
+                    }
+                ],
+            },
+            **self.dimensions,
+            metric_name: seconds,
+        }
+        stream = self.stream or sys.stdout
+        with self._lock:
+            stream.write(json.dumps(record) + "\n")
+            stream.flush()
@@ -0,0 +1,73 @@
+"""Options of the Consumer's processing of messages."""
+from __future__ import annotations
+
+import dataclasses
+from typing import Optional
+
+from ._circuit_breaker import CircuitBreakerConfig
+from ._metrics import ConsumerMetrics
+from ._poison import PoisonMessagePolicy
+from ._retry import RetryPolicy
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class ConsumerOptions:
+    """How a Consumer processes messages, beyond receiving & computing them.
+
+    Attributes
+    ----------
+    max_concurrency : int
+        The maximum number of messages processed at a time, each from a
+        different message group. compute_result must then be thread safe.
+    deduplicate : bool, optional
+        Whether to deduplicate messages by request_id. Defaults to True for
+        standard queues, False for FIFO queues, which have exactly once
+        processing.
+    request_claim_ttl_seconds : int, optional
+        The expiry ttl of the request_id claims, i.e. how long after
+        processing duplicates are detected.
+    stream_flush_interval_seconds : float
+        For streamed results, the minimum time between chunk writes.
+    stream_flush_size_bytes : int
+        For streamed results, the buffered chunks size that triggers a write
+        regardless of time.
+    progress_min_interval_seconds : float
+        The minimum time between progress writes, see JobContext.
+    cancel_check_interval_seconds : float
+        The minimum time between the heartbeat's reads of the status of the
+        job being processed, to detect that it was cancelled.
+    metrics : ConsumerMetrics, optional
+        The metrics to record stage durations and outcomes in. Defaults to a
+        new ConsumerMetrics.
+    retry_policy : RetryPolicy, optional
+        The in place retries & backoff of messages failing with a retryable
+        error. Defaults to retrying once the message's current visibility
+        timeout expires.
+    poison_policy : PoisonMessagePolicy, optional
+        When to quarantine messages that keep failing, instead of processing
+        them until the redrive policy moves them to the DLQ.
+    circuit_breaker : CircuitBreakerConfig, optional
+        The config of the Consumer's CircuitBreaker, pausing receiving while
+        DynamoDB or SQS are failing, its state is reported by the metrics &
+        the /ready route of the api wrapper.
+
+    """
+
+    max_concurrency: int = 1
+    deduplicate: Optional[bool] = None
+    request_claim_ttl_seconds: Optional[int] = 24 * 60 * 60
+    stream_flush_interval_seconds: float = 0.25
+    stream_flush_size_bytes: int = 4096
+    progress_min_interval_seconds: float = 1
+    cancel_check_interval_seconds: float = 30
+    metrics: Optional[ConsumerMetrics] = None
+    retry_policy: Optional[RetryPolicy] = None
+    poison_policy: Optional[PoisonMessagePolicy] = None
+    circuit_breaker: Optional[CircuitBreakerConfig] = None
+
+    def __post_init__(self):
+        if self.max_concurrency < 1:
+            raise ValueError(
+                f"Invalid max_concurrency={self.max_concurrency}, expected "
+                "at least 1"
+            )
@@ -0,0 +1,244 @@
+"""Quarantine of poison messages, which fail on every delivery."""
+from __future__ import annotations
+
+import collections
+import hashlib
+import threading
+import traceback
+from typing import TYPE_CHECKING, Callable, Optional
+
+from mypy_boto3_sqs.service_resource import Message
+
+from .._sqs_base import deserialise_message_body, message_to_dict
+from .._sqs_base import receive_count as message_receive_count
+from ..dynamo_db_client import DynamoDBClient
+from ..exceptions import PoisonMessageError, ResultCancelledStatusError
+from ..types import MessageIdT
+from ._metrics import ConsumerMetrics
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+def error_fingerprint(exp: BaseException) -> str:
+    """Get the fingerprint of an error, to recognise repeated failures.
+
+    The fingerprint is made of the types of the error & its causes, and of
+    the code locations of their tracebacks. Error messages are left out, as
+    they often contain ids or timestamps.
+
+    Parameters
+    ----------
+    exp : Exception
+        The error.
+
+    Returns
+    -------
+    str
+        The fingerprint, a hex digest.
+
+    """
+    digest = hashlib.sha256()
+    seen = set()
+    current: Optional[BaseException] = exp
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        digest.update(type(current).__qualname__.encode())
+        for frame in traceback.extract_tb(current.__traceback__):
+            digest.update(f"{frame.filename}:{frame.lineno}".encode())
+        current = current.__cause__ or current.__context__
+    return digest.hexdigest()
+
+
+class PoisonMessagePolicy:
+    """Quarantine messages that keep failing, without computing them again.
+
+    Once a message was received more than max_receive_count times, it is
+    quarantined on receive: an ERROR item is written (and its request_id
+    claimed as ERROR when deduplicating) and the message is deleted,
+    without the heartbeat, ECS protection & IN_PROGRESS write of processing
+    it. max_receive_count should be lower than the
+    maxReceiveCount of the queue's redrive policy, which moves the message
+    to the DLQ instead.
+
+    With max_identical_failures, messages are quarantined sooner once they
+    failed that many times in a row with the same error (see
+    error_fingerprint). Failures are tracked per Consumer, for the last
+    max_tracked_messages failed messages.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        max_receive_count: Optional[int] = None,
+        max_identical_failures: Optional[int] = None,
+        max_tracked_messages: int = 10_000,
+    ):
+        """Get a new PoisonMessagePolicy.
+
+        Parameters
+        ----------
+        max_receive_count : int, optional
+            The number of receives after which a message is quarantined.
+        max_identical_failures : int, optional
+            The number of identical failures in a row after which a message
+            is quarantined.
+        max_tracked_messages : int
+            The maximum number of failed messages tracked.
+
+        """
+        if max_receive_count is not None and max_receive_count < 1:
+            raise ValueError(
+                f"Invalid {max_receive_count=}, expected at least 1"
+            )
+        if max_identical_failures is not None and max_identical_failures < 1:
+            raise ValueError(
+                f"Invalid {max_identical_failures=}, expected at least 1"
+            )
+        if max_tracked_messages < 1:
+            raise ValueError(
+                f"Invalid {max_tracked_messages=}, expected at least 1"
+            )
+
+        self.max_receive_count = max_receive_count
+        self.max_identical_failures = max_identical_failures
+        self.max_tracked_messages = max_tracked_messages
+        # message_id -> (fingerprint, number of identical failures in a row)
+        self._failures: collections.OrderedDict[
+            MessageIdT, tuple[str, int]
+        ] = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def record_failure(self, message_id: MessageIdT, exp: Exception) -> None:
+        """Record a failed attempt at processing a message.
+
+        Parameters
+        ----------
+        message_id : str
+            The message_id of the message.
+        exp : Exception
+            The error of the attempt.
+
+        """
+        if self.max_identical_failures is None:
+            return
+
+        fingerprint = error_fingerprint(exp)
+        with self._lock:
+            previous, count = self._failures.pop(message_id, (None, 0))
+            count = count + 1 if previous == fingerprint else 1
+            self._failures[message_id] = (fingerprint, count)
+            while len(self._failures) > self.max_tracked_messages:
+                self._failures.popitem(last=False)
+
+    def forget(self, message_id: MessageIdT) -> None:
+        """Forget the failures of a message, once it is done.
+
+        Parameters
+        ----------
+        message_id : str
+            The message_id of the message.
+
+        """
+        with self._lock:
+            self._failures.pop(message_id, None)
+
+    def quarantine_reason(
+        self, message_id: MessageIdT, receive_count: int
+    ) -> Optional[str]:
+        """Check whether to quarantine a received message.
+
+        Parameters
+        ----------
+        message_id : str
+            The message_id of the message.
+        receive_count : int
+            The number of times the message was received, including this
+            one.
+
+        Returns
+        -------
+        str or None
+            Why the message should be quarantined, None if it should be
+            processed.
+
+        """
+        if (
+            self.max_receive_count is not None
+            and receive_count > self.max_receive_count
+        ):
+            return (
+                f"Message was received {receive_count} times, more than "
+                f"max_receive_count={self.max_receive_count}"
+            )
+
+        if self.max_identical_failures is not None:
+            with self._lock:
+                _, count = self._failures.get(message_id, (None, 0))
+            if count >= self.max_identical_failures:
+                return (
+                    f"Message failed {count} times in a row with the same "
+                    "error"
+                )
+        return None
+
+
+class _PoisonMixin:
+    """The quarantine of the poison messages a Consumer receives."""
+
+    poison_policy: Optional[PoisonMessagePolicy]
+    ddb_client: DynamoDBClient
+    metrics: ConsumerMetrics
+    logger: Logger
+    _delete_message: Callable[[Message], bool]
+    _request_claim_error: Callable[[MessageIdT, Optional[str]], None]
+
+    def _poison_reason(self, message: Message) -> Optional[str]:
+        """Get why the message is poison, None if it should be processed."""
+        if self.poison_policy is None:
+            return None
+
+        return self.poison_policy.quarantine_reason(
+            message.message_id, message_receive_count(message)
+        )
+
+    def _quarantine(self, message: Message, reason: str) -> bool:
+        """Quarantine a poison message, and get whether it was deleted."""
+        self.metrics.messages_total.inc("poison")
+        self.logger.error(
+            "Quarantining poison message w/ id={}: {}",
+            message.message_id,
+            reason,
+        )
+        try:
+            request_id = deserialise_message_body(message.body).get(
+                "request_id"
+            )
+        except Exception:
+            request_id = None
+        try:
+            # Before the error, as a duplicate of a request claimed as ERROR
+            # waits for its error rather than processing it
+            self._request_claim_error(message.message_id, request_id)
+            self.ddb_client.error_put(
+                message_id=message.message_id,
+                exp=PoisonMessageError(reason),
+                request_id=request_id,
+                serialised_message=message_to_dict(message),
+                unless_cancelled=True,
+            )
+        except ResultCancelledStatusError:
+            self.logger.info(
+                "Poison message w/ id={} was cancelled", message.message_id
+            )
+        except Exception as exp:
+            self.logger.opt(exception=True).error(
+                "Failed to put the error of poison message w/ id={}: {}",
+                message.message_id,
+                str(exp),
+            )
+            # Received again, to be quarantined once the error is written
+            return False
+
+        return self._delete_message(message)
@@ -0,0 +1,164 @@
+"""Deduplication of the messages of a request_id, by claiming it."""
+from __future__ import annotations
+
+import contextlib
+import uuid
+from collections.abc import Iterator
+from typing import TYPE_CHECKING, Callable, Optional
+
+from ..dynamo_db_client import DynamoDBClient, DynamoDBItem
+from ..exceptions import (
+    ConsumerUnretryableError,
+    DuplicateJobError,
+    DuplicateJobInProgressError,
+    JobCancelledError,
+    KeyNotFoundError,
+)
+from ..types import MessageIdT, RequestClaim, ResultStatus
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+
+class _RequestClaimMixin:
+    """The request_id claims of a Consumer deduplicating messages."""
+
+    ddb_client: DynamoDBClient
+    deduplicate: bool
+    heartbeat_visibility_timeout: int
+    request_claim_ttl_seconds: Optional[int]
+    logger: Logger
+    # message_id -> (request_id, claim_token), renewed by the heartbeat
+    _request_claims: dict[MessageIdT, tuple[str, str]]
+    _stage: Callable[..., contextlib.AbstractContextManager]
+
+    @contextlib.contextmanager
+    def _request_claim(
+        self, message_id: MessageIdT, request_id: Optional[str]
+    ) -> Iterator[None]:
+        if not self.deduplicate or not request_id:
+            yield
+            return
+
+        claim_token = str(uuid.uuid4())
+        with self._stage("request_claim_put", message_id):
+            claim = self.ddb_client.request_claim_put(
+                request_id,
+                message_id=message_id,
+                claim_token=claim_token,
+                lease_seconds=self.heartbeat_visibility_timeout,
+                ttl_seconds=self.request_claim_ttl_seconds,
+            )
+        if claim is not None:
+            self._raise_for_duplicate(message_id, claim)
+
+        self._request_claims[message_id] = (request_id, claim_token)
+        final_status: Optional[ResultStatus] = ResultStatus.SUCCESS
+        try:
+            yield
+        except JobCancelledError:
+            final_status = ResultStatus.CANCELLED
+            raise
+        except ConsumerUnretryableError:
+            final_status = ResultStatus.ERROR
+            raise
+        except BaseException:
+            # Let the message be processed again
+            final_status = None
+            raise
+        finally:
+            self._request_claims.pop(message_id, None)
+            try:
+                if final_status is None:
+                    self.ddb_client.request_claim_release(
+                        request_id, claim_token
+                    )
+                else:
+                    self.ddb_client.request_claim_complete(
+                        request_id, claim_token, final_status
+                    )
+            except Exception as exp:
+                self.logger.opt(exception=True).error(
+                    "Failed to end claim of request_id={}: {}",
+                    request_id,
+                    str(exp),
+                )
+
+    def _request_claim_error(
+        self, message_id: MessageIdT, request_id: Optional[str]
+    ) -> None:
+        """Claim a request_id as ERROR, without processing its message.
+
+        Used for quarantined messages, so that their duplicates get the error
+        rather than processing the request again. A claim held by another
+        message is left as is.
+
+        """
+        if not self.deduplicate or not request_id:
+            return
+
+        claim_token = str(uuid.uuid4())
+        claim = self.ddb_client.request_claim_put(
+            request_id,
+            message_id=message_id,
+            claim_token=claim_token,
+            lease_seconds=self.heartbeat_visibility_timeout,
+            ttl_seconds=self.request_claim_ttl_seconds,
+        )
+        if claim is None:
+            self.ddb_client.request_claim_complete(
+                request_id, claim_token, ResultStatus.ERROR
+            )
+
+    def _raise_for_duplicate(
+        self, message_id: MessageIdT, claim: RequestClaim
+    ) -> None:
+        if claim.status == ResultStatus.IN_PROGRESS:
+            raise DuplicateJobInProgressError(
+                f"request_id={claim.request_id} is being processed by "
+                f"message_id={claim.message_id}"
+            )
+        if claim.message_id == message_id:
+            raise DuplicateJobError(
+                f"Message was already processed, status={claim.status}"
+            )
+
+        try:
+            original = self.ddb_client.item_get(
+                claim.message_id, raise_for_expiry=False
+            )
+        except KeyNotFoundError as exp:
+            raise ConsumerUnretryableError(
+                f"Duplicate of message_id={claim.message_id}, whose result "
+                "is missing"
+            ) from exp
+        if original.status in (
+            ResultStatus.IN_PROGRESS,
+            ResultStatus.SUBMITTED,
+        ):
+            # Its final status isn't written yet
+            raise DuplicateJobInProgressError(
+                f"request_id={claim.request_id} is being processed by "
+                f"message_id={claim.message_id}"
+            )
+
+        self.ddb_client.item_put(
+            DynamoDBItem(
+                message_id=message_id,
+                request_id=claim.request_id,
+                status=original.status,
+                result=original.result,
+                error=original.error,
+                streamed=original.streamed,
+            )
+        )
+        raise DuplicateJobError(
+            f"Duplicate of message_id={claim.message_id}, copied its "
+            f"status={original.status}"
+        )
+
+    def _renew_request_claim(self, message_id: MessageIdT) -> None:
+        if (claim := self._request_claims.get(message_id)) is not None:
+            self.ddb_client.request_claim_renew(
+                *claim, lease_seconds=self.heartbeat_visibility_timeout
+            )
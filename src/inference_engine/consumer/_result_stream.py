@@ -0,0 +1,155 @@
+"""Incremental writer of streamed results for SQS Consumer."""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Iterator, Optional
+
+from loguru import logger
+
+from .._sqs_base import serialise_message_body
+from ..dynamo_db_client import DynamoDBClient
+from ..types import JsonStrT, JsonT, MessageIdT
+
+
+class ResultStreamWriter:
+    """Append the chunks of a streamed result to DynamoDB as they arrive.
+
+    Chunks are buffered and written with DynamoDBClient.chunks_append once
+    flush_interval_seconds have passed since the last write, or once the
+    buffer holds at least flush_size_bytes. The first chunk is always written
+    straight away, to minimise the time to first chunk for readers. While
+    consuming, a background thread also flushes the buffer once the interval
+    has passed, so chunks aren't held back when the stream stalls, e.g.
+    during slow token generation.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        ddb_client: DynamoDBClient,
+        message_id: MessageIdT,
+        flush_interval_seconds: float = 0.25,
+        flush_size_bytes: int = 4096,
+    ):
+        """Get a new ResultStreamWriter.
+
+        Parameters
+        ----------
+        ddb_client : DynamoDBClient
+            The client used to write the chunks.
+        message_id : str
+            The message_id of the item to append to.
+        flush_interval_seconds : float
+            The minimum time between writes.
+        flush_size_bytes : int
+            The buffered size that triggers a write regardless of time.
+
+        """
+        self.ddb_client = ddb_client
+        self.message_id = message_id
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_size_bytes = flush_size_bytes
+        self.chunks: list[JsonT] = []
+        self._buffer: list[JsonStrT] = []
+        self._buffer_bytes = 0
+        self._last_flush_at: Optional[float] = None
+        self._lock = threading.Lock()
+        self.logger = logger.bind(message_id=message_id)
+
+    def write(self, chunk: JsonT) -> None:
+        """Add a chunk, flushing the buffer if due.
+
+        Parameters
+        ----------
+        chunk : Any
+            json.dumps-able chunk.
+
+        """
+        serialised = serialise_message_body(chunk)
+        with self._lock:
+            self.chunks.append(chunk)
+            self._buffer.append(serialised)
+            self._buffer_bytes += len(serialised)
+            if (
+                self._flush_due()
+                or self._buffer_bytes >= self.flush_size_bytes
+            ):
+                self._flush()
+
+    def flush(self) -> None:
+        """Write the buffered chunks.
+
+        Failed writes are logged and the chunks kept buffered, to be retried
+        on the next flush. The final result holds every chunk regardless.
+
+        """
+        with self._lock:
+            self._flush()
+
+    def _flush_due(self) -> bool:
+        return (
+            self._last_flush_at is None
+            or time.monotonic() - self._last_flush_at
+            >= self.flush_interval_seconds
+        )
+
+    def _flush(self) -> None:
+        self._last_flush_at = time.monotonic()
+        if not self._buffer:
+            return
+
+        try:
+            self.ddb_client.chunks_append(self.message_id, self._buffer)
+        except Exception as exp:
+            self.logger.opt(exception=True).warning(
+                "Failed to append {} chunks: {}", len(self._buffer), str(exp)
+            )
+            return
+
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def consume(self, stream: Iterator[JsonT]) -> list[JsonT]:
+        """Write every chunk of the stream.
+
+        Chunks still buffered at the end are not flushed, as they are part
+        of the final result.
+
+        Parameters
+        ----------
+        stream : iterator
+            The chunks, e.g. a generator returned by compute_result.
+
+        Returns
+        -------
+        list
+            All chunks of the stream.
+
+        """
+        stop_event = threading.Event()
+        flusher = threading.Thread(
+            target=self._flush_periodically,
+            args=(stop_event,),
+            name="ResultStreamFlusher",
+            daemon=True,
+        )
+        if self.flush_interval_seconds > 0:
+            flusher.start()
+        try:
+            for chunk in stream:
+                self.write(chunk)
+        finally:
+            stop_event.set()
+            if flusher.is_alive():
+                flusher.join()
+
+        self.logger.info("Finished stream of {} chunks", len(self.chunks))
+        return self.chunks
+
+    def _flush_periodically(self, stop_event: threading.Event) -> None:
+        while not stop_event.wait(self.flush_interval_seconds):
+            with self._lock:
+                if self._buffer and self._flush_due():
+                    self._flush()
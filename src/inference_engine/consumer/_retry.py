@@ -0,0 +1,247 @@
+"""Retry policy of messages that failed with a retryable error."""
+from __future__ import annotations
+
+import contextlib
+import random
+import threading
+from typing import TYPE_CHECKING, Callable, Optional
+
+from mypy_boto3_sqs.service_resource import Message
+
+from .._sqs_base import receive_count as message_receive_count
+from ..exceptions import (
+    ConsumerRetryableError,
+    ConsumerUnretryableError,
+    JobCancelledError,
+)
+from ._context import CancellationToken
+from ._heartbeat import Heartbeat
+from ._metrics import ConsumerMetrics
+
+if TYPE_CHECKING:
+    from loguru import Logger
+
+# The maximum visibility timeout of SQS, 12 hours
+MAX_VISIBILITY_TIMEOUT_SECONDS = 12 * 60 * 60
+
+
+class RetryPolicy:
+    """Back off from messages that failed with a retryable error.
+
+    Transient errors are first retried in place, up to in_place_retries
+    times with a short exponential backoff. Once those are exhausted (or for
+    other retryable errors) the message is given back to the queue with a
+    visibility timeout that grows exponentially with its receive count
+    (ApproximateReceiveCount): base_delay_seconds after the first receive,
+    then multiplied by backoff_multiplier for every further receive, capped
+    at max_delay_seconds. Delays are jittered, so that the messages of an
+    incident don't come back all at once.
+
+    The queue's redrive policy still moves messages to the DLQ after
+    maxReceiveCount receives.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        base_delay_seconds: float = 5,
+        max_delay_seconds: float = 15 * 60,
+        backoff_multiplier: float = 2,
+        jitter: float = 0.5,
+        in_place_retries: int = 0,
+        in_place_delay_seconds: float = 0.5,
+        transient_errors: tuple[type[Exception], ...] = (
+            ConsumerRetryableError,
+        ),
+    ):
+        """Get a new RetryPolicy.
+
+        Parameters
+        ----------
+        base_delay_seconds : float
+            The visibility timeout after the first receive.
+        max_delay_seconds : float
+            The maximum visibility timeout, at most 12 hours.
+        backoff_multiplier : float
+            The factor by which the delays grow with each attempt.
+        jitter : float
+            Fraction of the delays that is randomly removed, in [0, 1].
+        in_place_retries : int
+            The number of times transient errors are retried in place,
+            before giving the message back to the queue.
+        in_place_delay_seconds : float
+            The delay before the first in place retry.
+        transient_errors : tuple of Exception types
+            The errors retried in place. Compute functions can raise
+            ConsumerRetryableError (the default) to signal transient errors.
+
+        """
+        if not 0 <= base_delay_seconds <= max_delay_seconds:
+            raise ValueError(
+                "Expected 0 <= base_delay_seconds <= max_delay_seconds, "
+                f"got {base_delay_seconds=}, {max_delay_seconds=}"
+            )
+        if max_delay_seconds > MAX_VISIBILITY_TIMEOUT_SECONDS:
+            raise ValueError(
+                f"Invalid {max_delay_seconds=}, expected at most "
+                f"{MAX_VISIBILITY_TIMEOUT_SECONDS}"
+            )
+        if backoff_multiplier < 1:
+            raise ValueError(f"Invalid {backoff_multiplier=}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"Invalid {jitter=}")
+        if in_place_retries < 0:
+            raise ValueError(f"Invalid {in_place_retries=}")
+
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = jitter
+        self.in_place_retries = in_place_retries
+        self.in_place_delay_seconds = in_place_delay_seconds
+        self.transient_errors = transient_errors
+
+    def _jittered(self, delay: float) -> float:
+        return delay * (1 - self.jitter * random.random())  # nosec B311
+
+    def visibility_timeout(self, receive_count: int) -> int:
+        """Get the visibility timeout to give a failed message back with.
+
+        Parameters
+        ----------
+        receive_count : int
+            The number of times the message was received, including this
+            one.
+
+        Returns
+        -------
+        int
+            The visibility timeout, in seconds.
+
+        """
+        exponent = max(receive_count - 1, 0)
+        try:
+            delay = (
+                self.base_delay_seconds * self.backoff_multiplier**exponent
+            )
+        except OverflowError:
+            delay = self.max_delay_seconds
+        return round(self._jittered(min(delay, self.max_delay_seconds)))
+
+    def should_retry_in_place(self, exp: Exception, attempt: int) -> bool:
+        """Check whether to retry in place after a failed attempt.
+
+        Parameters
+        ----------
+        exp : Exception
+            The error of the attempt.
+        attempt : int
+            The number of in place retries so far.
+
+        Returns
+        -------
+        bool
+
+        """
+        return (
+            attempt < self.in_place_retries
+            and isinstance(exp, self.transient_errors)
+            and not isinstance(
+                exp, (ConsumerUnretryableError, JobCancelledError)
+            )
+        )
+
+    def in_place_delay(self, attempt: int) -> float:
+        """Get the delay before an in place retry.
+
+        Parameters
+        ----------
+        attempt : int
+            The number of in place retries so far.
+
+        Returns
+        -------
+        float
+            The delay, in seconds.
+
+        """
+        return self._jittered(
+            self.in_place_delay_seconds * self.backoff_multiplier**attempt
+        )
+
+
+class _RetryMixin:
+    """The retries of the messages a Consumer failed to process."""
+
+    retry_policy: Optional[RetryPolicy]
+    metrics: ConsumerMetrics
+    logger: Logger
+    _stop_event: Optional[threading.Event]
+    _stage: Callable[..., contextlib.AbstractContextManager]
+
+    def _retry_in_place(
+        self,
+        exp: Exception,
+        attempt: int,
+        cancellation_token: Optional[CancellationToken],
+    ) -> bool:
+        """Wait before an in place retry, and get whether to retry."""
+        if self.retry_policy is None or not (
+            self.retry_policy.should_retry_in_place(exp, attempt)
+        ):
+            return False
+
+        delay = self.retry_policy.in_place_delay(attempt)
+        self.logger.warning(
+            "Retrying in place in {:.2f}s, attempt={}: {}",
+            delay,
+            attempt + 1,
+            str(exp),
+        )
+        self.metrics.retries_total.inc("in_place")
+        stop_event = self._stop_event or threading.Event()
+        if stop_event.wait(delay):
+            return False
+        return (
+            cancellation_token is None or not cancellation_token.is_cancelled
+        )
+
+    def _retry_later(
+        self, message: Message, heartbeat: Optional[Heartbeat]
+    ) -> None:
+        """Give the message back to the queue, after the retry backoff.
+
+        The message isn't deleted, so the held messages of its group are
+        given back too, and received again after it.
+
+        """
+        if self.retry_policy is None:
+            return
+
+        receive_count = message_receive_count(message)
+        visibility_timeout = self.retry_policy.visibility_timeout(
+            receive_count
+        )
+        self.logger.info(
+            "Retrying message w/ id={} in {}s, receive_count={}",
+            message.message_id,
+            visibility_timeout,
+            receive_count,
+        )
+        self.metrics.retries_total.inc("backoff")
+        try:
+            with self._stage("retry_backoff", message.message_id):
+                if heartbeat is not None:
+                    # No heartbeat must extend the visibility afterwards
+                    heartbeat.release(visibility_timeout)
+                else:
+                    message.change_visibility(
+                        VisibilityTimeout=visibility_timeout
+                    )
+        except Exception as exp:
+            self.logger.opt(exception=True).warning(
+                "Failed to set the retry backoff of message w/ id={}: {}",
+                message.message_id,
+                str(exp),
+            )
@@ -0,0 +1,146 @@
+"""Scheduler of messages by FIFO message group."""
+from __future__ import annotations
+
+import collections
+import threading
+from typing import Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class MessageGroupScheduler(Generic[T]):
+    """Runs at most one message per message group at a time.
+
+    Messages of a group that is already running are held, in order, until
+    the running message is done. Up to max_concurrency messages are held or
+    running at a time, i.e. the consumer should only receive free_slots
+    messages.
+
+    Example usage::
+
+        if scheduler.submit(group_id, message):
+            # start processing message, then
+            while (message := scheduler.done(group_id)) is not None:
+                # process message
+
+    """
+
+    def __init__(self, max_concurrency: int):
+        """Get a new MessageGroupScheduler.
+
+        Parameters
+        ----------
+        max_concurrency : int
+            The maximum number of messages held or running.
+
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"Invalid {max_concurrency=}, expected at least 1"
+            )
+        self.max_concurrency = max_concurrency
+        self._pending: dict[Hashable, collections.deque[T]] = {}
+        self._num_messages = 0
+        self._condition = threading.Condition()
+
+    @property
+    def num_running_groups(self) -> int:
+        """Get the number of groups with a running message."""
+        with self._condition:
+            return len(self._pending)
+
+    @property
+    def free_slots(self) -> int:
+        """Get the number of messages that can be submitted."""
+        with self._condition:
+            return self.max_concurrency - self._num_messages
+
+    def wait_for_free_slot(self, timeout: Optional[float] = None) -> bool:
+        """Wait until a message can be submitted.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The maximum time to wait, in seconds.
+
+        Returns
+        -------
+        bool
+            Whether there is a free slot.
+
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: self._num_messages < self.max_concurrency, timeout
+            )
+
+    def submit(self, group_id: Hashable, message: T) -> bool:
+        """Submit a received message.
+
+        Parameters
+        ----------
+        group_id : hashable
+            The message group of the message.
+        message : Any
+            The message.
+
+        Returns
+        -------
+        bool
+            Whether the message should run now. Else it is held until the
+            running message of its group is done.
+
+        """
+        with self._condition:
+            self._num_messages += 1
+            if group_id in self._pending:
+                self._pending[group_id].append(message)
+                return False
+
+            self._pending[group_id] = collections.deque()
+            return True
+
+    def done(self, group_id: Hashable) -> Optional[T]:
+        """Mark the running message of a group as done.
+
+        Parameters
+        ----------
+        group_id : hashable
+            The message group of the message.
+
+        Returns
+        -------
+        Any or None
+            The next held message of the group, which should run now. None if
+            there are none, the group is then no longer running.
+
+        """
+        with self._condition:
+            self._num_messages -= 1
+            self._condition.notify_all()
+            pending = self._pending[group_id]
+            if pending:
+                return pending.popleft()
+
+            del self._pending[group_id]
+            return None
+
+    def release(self, group_id: Hashable) -> list[T]:
+        """Mark the running message of a group as done, & drop the held ones.
+
+        Parameters
+        ----------
+        group_id : hashable
+            The message group of the message.
+
+        Returns
+        -------
+        list
+            The held messages of the group, which won't be run.
+
+        """
+        with self._condition:
+            pending = list(self._pending.pop(group_id))
+            self._num_messages -= 1 + len(pending)
+            self._condition.notify_all()
+            return pending
@@ -1,9 +1,11 @@
 """Fast API wrapper for Consumer.
 
 The app contains routes to probe the consumer state:
-    * /ready - indicates if the consumer is running and consuming messages
+    * /ready - indicates if the consumer is running and consuming messages,
+      i.e. also that its circuit breaker isn't open
     * /health - indicates if the consumer is healthy
     * /busy - indicates if the consumer is currently processing a message
+    * /metrics - the consumer metrics, in Prometheus text format
 
 """
 from contextlib import asynccontextmanager
@@ -11,6 +13,7 @@ from contextlib import asynccontextmanager
 import fastapi
 from fastapi import status
 from fastapi.exceptions import HTTPException
+from fastapi.responses import PlainTextResponse
 
 from .. import __version__
 from .consumer import Consumer, ConsumerAlreadyConsumingError, ConsumerError
@@ -20,9 +23,11 @@ def get_app(consumer: Consumer, **kwargs) -> fastapi.FastAPI:
     """Get a FastAPI app wrapper for this Consumer.
 
     The app contains routes to probe the consumer state:
-     * /ready - indicates if the consumer is running and consuming messages
+     * /ready - indicates if the consumer is running and consuming messages,
+       i.e. also that its circuit breaker isn't open
      * /health - indicates if the consumer is healthy
      * /busy - indicates if the consumer is currently processing a message
+     * /metrics - the consumer metrics, in Prometheus text format
 
     Parameters
     ----------
@@ -89,6 +94,15 @@ def get_router(consumer: Consumer) -> fastapi.APIRouter:
                 f"Queue can't be reached: {exp}",
             ) from exp
 
+    def _raise_for_circuit_open() -> None:
+        if consumer.circuit_breaker is not None and (
+            consumer.circuit_breaker.is_open
+        ):
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Circuit breaker is open, receiving is paused",
+            )
+
     def _raise_for_is_processing_message() -> None:
         try:
             _isprocessing = consumer.is_processing_message
@@ -115,6 +129,7 @@ def get_router(consumer: Consumer) -> fastapi.APIRouter:
         """Determine if the Consumer is ready."""
         _raise_for_not_running()
         _raise_for_queue_ping_fail()
+        _raise_for_circuit_open()
         return {"status": "ready"}
 
     @router.get("/health", status_code=status.HTTP_200_OK)
@@ -123,4 +138,16 @@ def get_router(consumer: Consumer) -> fastapi.APIRouter:
         _raise_for_not_running()
         return {"status": "healthy"}
 
+    @router.get(
+        "/metrics",
+        status_code=status.HTTP_200_OK,
+        response_class=PlainTextResponse,
+    )
+    def metrics():
+        """Get the Consumer metrics in Prometheus text format."""
+        return PlainTextResponse(
+            consumer.metrics.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
     return router
@@ -1,10 +1,13 @@
 """Consumer."""
+import concurrent.futures
 import contextlib
+import functools
 import inspect
 import threading
 import time
 import typing
-from typing import Optional, Type
+from collections.abc import Iterator
+from typing import Any, Optional, Type
 
 from loguru import logger
 from mypy_boto3_sqs.service_resource import Message
@@ -18,15 +21,44 @@ from ..exceptions import (
     ConsumerRetryableError,
     ConsumerStopTimeoutError,
     ConsumerUnretryableError,
+    DuplicateJobError,
+    DuplicateJobInProgressError,
     ECSScaleInProtectionManagerError,
     HeartbeatStopTimeoutError,
+    JobCancelledError,
+    ResultCancelledStatusError,
+)
+from ..tracing import NULL_TRACER, Tracer
+from ..types import (
+    ComputeResultCallableT,
+    MessageBodyT,
+    MessageIdT,
+    ResultStatus,
+    ResultT,
+)
+from ._circuit_breaker import _CircuitBreakerMixin
+from ._context import CancellationToken, JobContext
+from ._ecs_scalein_protection_manager import (
+    ECSScaleInProtectionManager,
+    SharedScaleInProtection,
 )
-from ..types import ComputeResultCallableT, ResultT
-from ._ecs_scalein_protection_manager import ECSScaleInProtectionManager
 from ._heartbeat import Heartbeat
-
-
-class Consumer(_SQSBase):
+from ._metrics import ConsumerMetrics
+from ._options import ConsumerOptions
+from ._poison import _PoisonMixin
+from ._request_claim import _RequestClaimMixin
+from ._result_stream import ResultStreamWriter
+from ._retry import _RetryMixin
+from ._scheduler import MessageGroupScheduler
+
+
+class Consumer(
+    _CircuitBreakerMixin,
+    _RetryMixin,
+    _PoisonMixin,
+    _RequestClaimMixin,
+    _SQSBase,
+):
     """Consumer.
 
     When it is running, this class:
@@ -48,6 +80,51 @@ class Consumer(_SQSBase):
         )
         consumer.start_consuming()
 
+    If compute_result returns an iterator (e.g. it is a generator function),
+    the result is streamed: each chunk is appended to the DynamoDB item as it
+    is yielded (see Producer.stream) and the final result is the list of all
+    chunks.
+
+    If compute_result accepts a context keyword argument (or **kwargs), it is
+    passed a JobContext, through which it can report its progress (see
+    Producer.retrieve_result_status).
+
+    Messages of jobs cancelled before processing starts are deleted without
+    calling compute_result. While processing, the heartbeat thread checks
+    whether the job was cancelled, at most once per
+    cancel_check_interval_seconds, which compute functions can observe
+    through JobContext.is_cancelled to abort early. Results of cancelled jobs
+    are never written.
+
+    The options below are set with ConsumerOptions. With max_concurrency > 1,
+    up to max_concurrency messages are processed at a time in a thread pool,
+    but at most one per MessageGroupId so that messages of a FIFO group are
+    still processed in order (see MessageGroupScheduler). Received messages
+    of a group that is already being processed are held, with a heartbeat,
+    until their turn. If a message isn't deleted, e.g. to be retried, the
+    held messages of its group are given back to the queue, to be received
+    again after it.
+
+    Standard (non FIFO) queues deliver messages at least once, so by default
+    their messages are deduplicated by request_id: a claim on the request_id
+    is written to the DynamoDB table (see DynamoDBClient.request_claim_put)
+    before processing, and renewed by the heartbeat. Messages of a request_id
+    that was already processed are deleted, the result of the original
+    message being copied to their message_id, and messages of a request_id
+    being processed are retried later.
+
+    Messages failing with a retryable error become visible again once their
+    visibility timeout expires. With a retry_policy, transient errors are
+    first retried in place, then the message is given back to the queue with
+    a visibility timeout growing exponentially with its receive count, so
+    that a failing dependency isn't retried at a fixed rate. With a
+    poison_policy, messages that keep failing are quarantined on receive: an
+    ERROR item is written and they are deleted without being computed again.
+
+    With a circuit_breaker, receiving is paused after repeated failed
+    DynamoDB or SQS calls, and probed again with backoff, so that an outage
+    doesn't turn into a storm of retried messages.
+
     """
 
     def __init__(
@@ -67,6 +144,9 @@ class Consumer(_SQSBase):
         non_retryable_errors: Optional[
             tuple[Type[Exception] | Exception, ...]
         ] = None,
+        options: Optional[ConsumerOptions] = None,
+        tracer: Optional[Tracer] = None,
+        sqs: Optional[Any] = None,
         **boto3_sqs_resource_kwargs,
     ):
         """Get a new Consumer.
@@ -95,15 +175,26 @@ class Consumer(_SQSBase):
         ecs_scalein_protection_manager_kwargs : dict, optional
             Dict of kwargs to pass onto the ECSScaleInProtectionManager
             __init__.
+        options : ConsumerOptions, optional
+            The concurrency, deduplication, streaming, retry & failure
+            handling options, see ConsumerOptions.
+        tracer : Tracer, optional
+            Tracer to record a span for each processing stage in, also passed
+            onto the Heartbeat & ECSScaleInProtectionManager.
+        sqs : SQSServiceResource, optional
+            The SQS resource to use instead of creating one from kwargs, e.g.
+            an inference_engine.backends.InMemorySQS.
         kwargs: Any
             Kwargs passed onto the boto3 as boto3.resource("sqs", **kwargs).
 
         """
         _check_compute_result_callable(compute_result)
+        options = options or ConsumerOptions()
 
         super().__init__(
-            queue_name=queue_name,
+            queue_name,
             ddb_client=ddb_client,
+            sqs=sqs,
             **boto3_sqs_resource_kwargs,
         )
 
@@ -115,10 +206,34 @@ class Consumer(_SQSBase):
         self.heartbeat_visibility_timeout = heartbeat_visibility_timeout
         self.heartbeat_interval = heartbeat_interval
         self.in_progress_ttl_seconds = in_progress_ttl_seconds
+        self.stream_flush_interval_seconds = (
+            options.stream_flush_interval_seconds
+        )
+        self.stream_flush_size_bytes = options.stream_flush_size_bytes
+        self.progress_min_interval_seconds = (
+            options.progress_min_interval_seconds
+        )
+        self.cancel_check_interval_seconds = (
+            options.cancel_check_interval_seconds
+        )
+        self.metrics = options.metrics or ConsumerMetrics()
+        self.tracer = tracer or NULL_TRACER
+        self.max_concurrency = options.max_concurrency
+        self.deduplicate = (
+            not self.is_fifo
+            if options.deduplicate is None
+            else options.deduplicate
+        )
+        self.request_claim_ttl_seconds = options.request_claim_ttl_seconds
+        self.retry_policy = options.retry_policy
+        self.poison_policy = options.poison_policy
+        self._init_circuit_breaker(options.circuit_breaker)
+        self._request_claims: dict[MessageIdT, tuple[str, str]] = {}
         self._thread: Optional[threading.Thread] = None
         self._stop_event: Optional[threading.Event] = None
-        self._is_processing: bool = False
+        self._num_processing: int = 0
         self._processing_lock: Optional[threading.Lock] = None
+        self._shared_protection: Optional[SharedScaleInProtection] = None
         self.enable_ecs_scalein_protection = enable_ecs_scalein_protection
         self._ecs_scalein_protection_manager_kwargs = (
             ecs_scalein_protection_manager_kwargs or {}
@@ -140,54 +255,167 @@ class Consumer(_SQSBase):
         if not self.is_running:
             return False
 
+        return self.num_processing_messages > 0
+
+    @property
+    def num_processing_messages(self) -> int:
+        """Number of messages currently being processed.
+
+        Returns
+        -------
+        int
+            The number of messages this consumer instance is processing.
+
+        """
+        if not self.is_running:
+            return 0
+
         if not self._processing_lock:
             raise ConsumerError("Running, but _processing_lock not defined!")
 
-        return self._processing_lock.locked()
+        with self._processing_lock:
+            return self._num_processing
 
-    def _process_message(self, message: Message) -> ResultT:
+    @contextlib.contextmanager
+    def _processing(self) -> Iterator[None]:
+        with self._processing_lock:  # type: ignore
+            self._num_processing += 1
+        try:
+            yield
+        finally:
+            with self._processing_lock:  # type: ignore
+                self._num_processing -= 1
+
+    @contextlib.contextmanager
+    def _stage(
+        self, stage: str, message_id: Optional[MessageIdT] = None
+    ) -> Iterator[None]:
+        with (
+            self.metrics.time(stage),
+            self.tracer.span(f"consumer.{stage}", message_id=message_id),
+            self._record_call(stage),
+        ):
+            yield
+
+    def _process_message(
+        self,
+        message: Message,
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> ResultT:
         self.logger.info(
             "Starting processing message, message_id={}", message.message_id
         )
         try:
-            body = deserialise_message_body(message.body)
-            request_id = body.get("request_id")
-            message_id = message.message_id
-            serialised_message = sqs_message_to_dict(message)
+            with self._stage("decode", message.message_id):
+                body = deserialise_message_body(message.body)
+                request_id = body.get("request_id")
+                message_id = message.message_id
+                serialised_message = sqs_message_to_dict(message)
         except Exception as exp:
             raise ConsumerUnretryableError(
                 f"Error decoding message: {str(exp)}"
             ) from exp
 
+        with self._request_claim(message_id, request_id):
+            attempt = 0
+            while True:
+                try:
+                    return self._process_body(
+                        body,
+                        message_id,
+                        request_id,
+                        serialised_message,
+                        cancellation_token,
+                    )
+                except Exception as exp:
+                    if not self._retry_in_place(
+                        exp, attempt, cancellation_token
+                    ):
+                        raise
+                attempt += 1
+
+    def _process_body(
+        self,
+        body: MessageBodyT,
+        message_id: MessageIdT,
+        request_id: Optional[str],
+        serialised_message: dict,
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> ResultT:
         try:
-            self.ddb_client.in_progress_put(
-                self.in_progress_ttl_seconds,
-                message_id=message_id,
-                serialised_message=serialised_message,
-                request_id=request_id,
-            )
+            with self._stage("in_progress_put", message_id):
+                self.ddb_client.in_progress_put(
+                    self.in_progress_ttl_seconds,
+                    message_id=message_id,
+                    serialised_message=serialised_message,
+                    request_id=request_id,
+                )
+        except ResultCancelledStatusError as exp:
+            raise JobCancelledError(
+                f"Job was cancelled before processing: {str(exp)}"
+            ) from exp
         except Exception as exp:
             raise ConsumerRetryableError(
                 f"Error setting in_progress ddb status: {str(exp)}"
             ) from exp
 
-        self.logger.info(
-            "Calling compute function message_id={}", message.message_id
-        )
+        self.logger.info("Calling compute function message_id={}", message_id)
+        streamed = False
         try:
-            result = self.compute_result(body, message_id)
+            with self._stage("compute", message_id):
+                result = self._compute(
+                    body, message_id, request_id, cancellation_token
+                )
+                if isinstance(result, Iterator):
+                    streamed = True
+                    result = ResultStreamWriter(
+                        ddb_client=self.ddb_client,
+                        message_id=message_id,
+                        flush_interval_seconds=(
+                            self.stream_flush_interval_seconds
+                        ),
+                        flush_size_bytes=self.stream_flush_size_bytes,
+                    ).consume(_until_cancelled(result, cancellation_token))
         except self.non_retryable_errors as exp:  # type: ignore
             raise ConsumerUnretryableError(
                 f"Error computing result: {str(exp)}"
             ) from exp
 
-        self.ddb_client.result_put(
-            result=result,
+        try:
+            with self._stage("result_put", message_id):
+                self.ddb_client.result_put(
+                    result=result,
+                    message_id=message_id,
+                    serialised_message=serialised_message,
+                    request_id=request_id,
+                    streamed=streamed,
+                )
+        except ResultCancelledStatusError as exp:
+            raise JobCancelledError(
+                f"Job was cancelled during processing: {str(exp)}"
+            ) from exp
+        return result
+
+    def _compute(
+        self,
+        body: MessageBodyT,
+        message_id: MessageIdT,
+        request_id,
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> ResultT:
+        if not _accepts_context(self.compute_result):
+            return self.compute_result(body, message_id)
+
+        context = JobContext(
+            ddb_client=self.ddb_client,
             message_id=message_id,
-            serialised_message=serialised_message,
             request_id=request_id,
+            min_interval_seconds=self.progress_min_interval_seconds,
+            cancellation_token=cancellation_token,
+        )
+        return self.compute_result(  # type: ignore
+            body, message_id, context=context
         )
-        return result
 
     def _consume_messages_wrapped(self):
         try:
@@ -199,8 +427,11 @@ class Consumer(_SQSBase):
             raise exp
 
     def _delete_message(self, message: Message) -> bool:
+        if self.poison_policy is not None:
+            self.poison_policy.forget(message.message_id)
         try:
-            message.delete()
+            with self._stage("delete", message.message_id):
+                message.delete()
         except Exception as exp:
             self.logger.opt(exception=True).error(
                 "Failed to delete message with message_id={}: {}",
@@ -215,42 +446,201 @@ class Consumer(_SQSBase):
         )
         return True
 
-    def _process_message_wrapped(self, message: Message) -> Optional[ResultT]:
-        result = None
+    def _check_cancelled(
+        self, message_id: MessageIdT, cancellation_token: CancellationToken
+    ) -> None:
+        now = time.monotonic()
+        checked_at = cancellation_token.checked_at
+        if (
+            checked_at is not None
+            and now - checked_at < self.cancel_check_interval_seconds
+        ):
+            return
+
+        cancellation_token.checked_at = now
+        status = self.ddb_client.status_get(message_id, consistent_read=False)
+        if status == ResultStatus.CANCELLED:
+            self.logger.info("Job was cancelled, message_id={}", message_id)
+            cancellation_token.cancel()
+
+    def _on_heartbeat(
+        self, message_id: MessageIdT, cancellation_token: CancellationToken
+    ) -> None:
+        self._check_cancelled(message_id, cancellation_token)
+        self._renew_request_claim(message_id)
+
+    def _process_message_wrapped(
+        self,
+        message: Message,
+        cancellation_token: Optional[CancellationToken] = None,
+        heartbeat: Optional[Heartbeat] = None,
+    ) -> bool:
+        """Process the message, and get whether it was deleted."""
         try:
-            result = self._process_message(message)
+            self._process_message(message, cancellation_token)
+        except JobCancelledError as exp:
+            self.metrics.messages_total.inc("cancelled")
+            self.logger.info(
+                "Skipping cancelled message w/ id={}: {}",
+                message.message_id,
+                str(exp),
+            )
+            deleted = self._delete_message(message)
+        except DuplicateJobError as exp:
+            self.metrics.messages_total.inc("duplicate")
+            self.logger.info(
+                "Skipping duplicate message w/ id={}: {}",
+                message.message_id,
+                str(exp),
+            )
+            deleted = self._delete_message(message)
+        except DuplicateJobInProgressError as exp:
+            self.metrics.messages_total.inc("duplicate_in_progress")
+            self.logger.info(
+                "Retrying duplicate message w/ id={} later: {}",
+                message.message_id,
+                str(exp),
+            )
+            self._retry_later(message, heartbeat)
+            deleted = False
         except ConsumerUnretryableError as exp:
+            self.metrics.messages_total.inc("unretryable")
             self.logger.opt(exception=True).error(
                 "Unretryable error processing message w/ id={}: {}",
                 message.message_id,
                 str(exp),
             )
-            self.ddb_client.error_put(
-                message_id=message.message_id,
-                exp=exp,
-                serialised_message=sqs_message_to_dict(message),
-            )
-            self._delete_message(message)
+            try:
+                self.ddb_client.error_put(
+                    message_id=message.message_id,
+                    exp=exp,
+                    serialised_message=sqs_message_to_dict(message),
+                    unless_cancelled=True,
+                )
+            except ResultCancelledStatusError:
+                self.logger.info(
+                    "Message w/ id={} was cancelled, not putting its error",
+                    message.message_id,
+                )
+            deleted = self._delete_message(message)
         except (
             ConsumerRetryableError,
             Exception,
         ) as exp:  # Retry generic exp for now
+            self.metrics.messages_total.inc("retryable")
             self.logger.opt(exception=True).error(
                 "Retryable error processing message w/ id={}: {}",
                 message.message_id,
                 str(exp),
             )
+            if self.poison_policy is not None:
+                self.poison_policy.record_failure(message.message_id, exp)
+            self._retry_later(message, heartbeat)
+            deleted = False
         else:
-            self._delete_message(message)
-            self.logger.info(
-                "Successfuly processed message with message_id={}",
+            self.metrics.messages_total.inc("success")
+            deleted = self._delete_message(message)
+            if deleted:
+                self.logger.info(
+                    "Successfuly processed message with message_id={}",
+                    message.message_id,
+                )
+        return deleted
+
+    def _heartbeat(
+        self, message: Message, cancellation_token: CancellationToken
+    ) -> Heartbeat:
+        return Heartbeat(
+            queue_url=self.queue.url,
+            receipt_handle=message.receipt_handle,
+            visibility_timeout=self.heartbeat_visibility_timeout,
+            interval=self.heartbeat_interval,
+            message_id=message.message_id,
+            on_heartbeat=functools.partial(
+                self._on_heartbeat,
                 message.message_id,
+                cancellation_token,
+            ),
+            metrics=self.metrics,
+            tracer=self.tracer,
+            sqs_client=(self.sqs.meta.client if self._sqs_injected else None),
+            **self._boto3_sqs_resource_kwargs,
+        )
+
+    def _ecs_scalein_protection_manager(self) -> ECSScaleInProtectionManager:
+        return ECSScaleInProtectionManager(
+            **self._ecs_scalein_protection_manager_kwargs,
+            tracer=self.tracer,
+        )
+
+    def _handle_message(
+        self,
+        message: Message,
+        heartbeat: Optional[Heartbeat] = None,
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> bool:
+        """Handle a received message, and get whether it was deleted.
+
+        Messages that weren't deleted, e.g. to be retried, are received
+        again later.
+
+        """
+        if (reason := self._poison_reason(message)) is not None:
+            deleted = self._quarantine(message, reason)
+            if heartbeat is not None:
+                heartbeat.stop()
+            return deleted
+
+        deleted = False
+        try:
+            ecs_prot_cm: contextlib.AbstractContextManager = (
+                contextlib.nullcontext()
             )
-        return result
+            if self._shared_protection is not None:
+                ecs_prot_cm = self._shared_protection.hold()
+            elif self.enable_ecs_scalein_protection:
+                ecs_prot_cm = self._ecs_scalein_protection_manager()
+            if heartbeat is None:
+                cancellation_token = CancellationToken()
+                heartbeat = self._heartbeat(message, cancellation_token)
+            with (
+                self.logger.contextualize(message_id=message.message_id),
+                self.tracer.span(
+                    "consumer.message", message_id=message.message_id
+                ),
+                heartbeat,
+                ecs_prot_cm,
+                self._processing(),
+            ):
+                # Internal exceptions raised by processes_message
+                # should be handled inside processes_message_wrapped
+                deleted = self._process_message_wrapped(
+                    message, cancellation_token, heartbeat
+                )
+
+        except HeartbeatStopTimeoutError as exp:
+            self.logger.opt(exception=True).warning(
+                "Heartbeat thread didn't exit correctly: {}",
+                str(exp),
+            )
+        except ECSScaleInProtectionManagerError as exp:
+            self.logger.opt(exception=True).warning(
+                "Error in ECS protection manager {}",
+                str(exp),
+            )
+        return deleted
 
     def _consume_messages(self):
+        if self.max_concurrency > 1:
+            self._consume_messages_concurrently()
+            return
+
         while not self._stop_event.is_set():  # type: ignore
-            messages = self.queue.receive_messages(
+            if self._wait_while_circuit_open():
+                continue
+
+            messages = self._receive_messages(
+                AttributeNames=["ApproximateReceiveCount"],
                 MaxNumberOfMessages=1,
                 WaitTimeSeconds=self.queue_wait_time_seconds,
             )
@@ -261,45 +651,121 @@ class Consumer(_SQSBase):
             self.logger.info(
                 "Received message with message_id={}", message.message_id
             )
+            self._handle_message(message)
 
-            try:
-                ecs_prot_cm = (
-                    ECSScaleInProtectionManager(
-                        **self._ecs_scalein_protection_manager_kwargs
-                    )
-                    if self.enable_ecs_scalein_protection
-                    else contextlib.nullcontext()
-                )
-                heartbeat_cm = Heartbeat(
-                    queue_url=self.queue.url,
-                    receipt_handle=message.receipt_handle,
-                    visibility_timeout=self.heartbeat_visibility_timeout,
-                    interval=self.heartbeat_interval,
-                    message_id=message.message_id,
-                    **self._boto3_sqs_resource_kwargs,
-                )
-                with (
-                    self.logger.contextualize(message_id=message.message_id),
-                    heartbeat_cm,
-                    ecs_prot_cm,
-                    self._processing_lock,  # type: ignore
+        self.logger.info("Recieved stop event")
+
+    def _consume_messages_concurrently(self):
+        scheduler: MessageGroupScheduler[
+            tuple[Message, Heartbeat, CancellationToken]
+        ] = MessageGroupScheduler(self.max_concurrency)
+        if self.enable_ecs_scalein_protection:
+            # Released once no message is being processed
+            self._shared_protection = SharedScaleInProtection(
+                self._ecs_scalein_protection_manager
+            )
+        with concurrent.futures.ThreadPoolExecutor(
+            self.max_concurrency, thread_name_prefix="consumer"
+        ) as executor:
+            while not self._stop_event.is_set():  # type: ignore
+                if self._wait_while_circuit_open():
+                    continue
+                if not scheduler.wait_for_free_slot(
+                    timeout=self.queue_wait_time_seconds
                 ):
-                    # Internal exceptions raised by processes_message
-                    # should be handled inside processes_message_wrapped
-                    _ = self._process_message_wrapped(message)
+                    continue
+
+                # Invisible for a heartbeat from the start, while held &
+                # until the first heartbeat, so that the group is blocked
+                messages = self._receive_messages(
+                    AttributeNames=[
+                        "MessageGroupId",
+                        "ApproximateReceiveCount",
+                    ],
+                    MaxNumberOfMessages=min(10, scheduler.free_slots),
+                    VisibilityTimeout=self.heartbeat_visibility_timeout,
+                    WaitTimeSeconds=self.queue_wait_time_seconds,
+                )
+                for message in messages:
+                    # Messages of standard queues have no group, they can
+                    # all run in parallel
+                    group_id = message.attributes.get(
+                        "MessageGroupId", message.message_id
+                    )
+                    self.logger.info(
+                        "Received message with message_id={}, "
+                        "message_group_id={}",
+                        message.message_id,
+                        group_id,
+                    )
+                    # Started now, so held messages stay invisible
+                    cancellation_token = CancellationToken()
+                    heartbeat = self._heartbeat(message, cancellation_token)
+                    heartbeat.start()
+                    job = (message, heartbeat, cancellation_token)
+                    if scheduler.submit(group_id, job):
+                        executor.submit(
+                            self._run_message_group, scheduler, group_id, job
+                        )
 
-            except HeartbeatStopTimeoutError as exp:
-                self.logger.opt(exception=True).warning(
-                    "Heartbeat thread didn't exit correctly: {}",
-                    str(exp),
+        self.logger.info("Recieved stop event")
+
+    def _run_message_group(
+        self,
+        scheduler: MessageGroupScheduler[
+            tuple[Message, Heartbeat, CancellationToken]
+        ],
+        group_id: str,
+        job: tuple[Message, Heartbeat, CancellationToken],
+    ) -> None:
+        next_job: Optional[tuple[Message, Heartbeat, CancellationToken]] = job
+        while next_job is not None:
+            deleted = False
+            try:
+                deleted = self._handle_message(*next_job)
+            except Exception as exp:
+                self.logger.opt(exception=True).critical(
+                    "Uncaught exception: {}", str(exp)
                 )
-            except ECSScaleInProtectionManagerError as exp:
+
+            if (
+                not deleted
+                or self._stop_event is None
+                or self._stop_event.is_set()
+            ):
+                self._release_held_messages(scheduler, group_id)
+                return
+
+            next_job = scheduler.done(group_id)
+
+    def _release_held_messages(
+        self,
+        scheduler: MessageGroupScheduler[
+            tuple[Message, Heartbeat, CancellationToken]
+        ],
+        group_id: str,
+    ) -> None:
+        """Give the held messages of a group back to the queue.
+
+        They are received again in order, i.e. after the message of the
+        group that wasn't deleted, which blocks the group while in flight.
+
+        """
+        for message, heartbeat, _ in scheduler.release(group_id):
+            self.logger.info(
+                "Releasing held message with message_id={}",
+                message.message_id,
+            )
+            try:
+                heartbeat.release(0)
+            except Exception as exp:
+                # Visible once its visibility timeout expires instead
                 self.logger.opt(exception=True).warning(
-                    "Error in ECS protection manager {}",
+                    "Failed to release held message w/ id={}: {}",
+                    message.message_id,
                     str(exp),
                 )
-
-        self.logger.info("Recieved stop event")
+                heartbeat.stop()
 
     @property
     def is_running(self) -> bool:
@@ -336,6 +802,7 @@ class Consumer(_SQSBase):
 
         self._stop_event = threading.Event()
         self._processing_lock = threading.Lock()
+        self._num_processing = 0
         self._thread = threading.Thread(target=self._consume_messages_wrapped)
         self.logger = self.logger.bind(
             consumer_thread_ident=self._thread.ident
@@ -383,7 +850,7 @@ def _check_compute_result_callable(func: ComputeResultCallableT) -> None:
     kw_only_without_default = {
         k: p
         for k, p in params.items()
-        if p.kind is p.KEYWORD_ONLY and p.default is p.empty
+        if p.kind is p.KEYWORD_ONLY and p.default is p.empty and k != "context"
     }
     if kw_only_without_default:
         raise ValueError(
@@ -397,3 +864,19 @@ def _check_compute_result_callable(func: ComputeResultCallableT) -> None:
             f"compute_result callable should have at least {expected_num_args}"
             f" args got {len(params)} with signature {sig}"
         )
+
+
+def _until_cancelled(
+    chunks: Iterator, cancellation_token: Optional[CancellationToken]
+) -> Iterator:
+    for chunk in chunks:
+        if cancellation_token is not None:
+            cancellation_token.raise_if_cancelled()
+        yield chunk
+
+
+def _accepts_context(func: ComputeResultCallableT) -> bool:
+    params = inspect.signature(func).parameters
+    return "context" in params or any(
+        p.kind is p.VAR_KEYWORD for p in params.values()
+    )
@@ -1,70 +1,133 @@
 """Client for interacting with DynamoDB."""
 from __future__ import annotations
 
-import dataclasses
-import datetime as dt
-import json
+import threading
 import time
-from decimal import Decimal
-from typing import Any, Literal, Optional
+from typing import Any, Iterable, Optional
 
 import boto3
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
 from loguru import logger
-from mypy_boto3_dynamodb.service_resource import DynamoDBServiceResource, Table
 
+from ._cache import LRUCache
+from ._ddb_batch import _BatchGetStore
+from ._ddb_chunks import _ChunkStore
+from ._ddb_coalesce import _CoalesceStore
+from ._ddb_item import (
+    DynamoDBItem,
+    _deserialise_result,
+    _dt_to_ts,
+    _expiration_from_ttl,
+    _is_conditional_check_failure,
+    _item_status,
+    _utcnow,
+)
+from ._ddb_request_claims import _RequestClaimStore
 from .exceptions import (
     AwaitingResultTimeoutError,
     DDBError,
     ExpiredItemError,
     KeyAlreadyExistsError,
     KeyNotFoundError,
+    ResultCancelledStatusError,
     ResultErrorStatusError,
     ResultInProgressStatusError,
     ResultMissingError,
-    UnparseableItemError,
-)
-from .types import (
-    JsonStrT,
-    JsonT,
-    MessageAsDictT,
-    MessageIdT,
-    ResultStatus,
-    ResultT,
 )
+from .polling import FixedPollStrategy, PollStrategy
+from .tracing import NULL_TRACER, Tracer
+from .types import MessageAsDictT, MessageIdT, Progress, ResultStatus, ResultT
 
 _DDBPollContinueErrors = (KeyNotFoundError, ResultInProgressStatusError)
-_KeyT = dict[Literal["message_id"], MessageIdT]
+_CANCELLABLE_STATUSES = (ResultStatus.SUBMITTED, ResultStatus.IN_PROGRESS)
+_NOT_CANCELLED_CONDITION = Attr("status").not_exists() | Attr("status").ne(
+    ResultStatus.CANCELLED
+)
+# "status" is a DDB reserved word, so must be aliased in expressions
+_STATUS_PROJECTION_KWARGS: dict[str, Any] = {
+    "ProjectionExpression": "#status, updated_at, expiration, progress",
+    "ExpressionAttributeNames": {"#status": "status"},
+}
 
 
-class DynamoDBClient:
-    """Client for interacting with DDB results."""
+class DynamoDBClient(
+    _BatchGetStore, _RequestClaimStore, _CoalesceStore, _ChunkStore
+):
+    """Client for interacting with DDB results.
 
-    def __init__(self, table_name: str, **boto3_ddb_resource_kwargs):
+    Request claims, coalesce records and result chunks share the table, their
+    methods are in the _ddb_* modules.
+
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        *,
+        cache_size: int = 0,
+        cache_ttl_seconds: Optional[float] = 300,
+        request_id_index_name: Optional[str] = None,
+        batch_get_concurrency: int = 4,
+        tracer: Optional[Tracer] = None,
+        dynamodb: Optional[Any] = None,
+        **boto3_ddb_resource_kwargs,
+    ):
         """Get a new DynamoDBClient.
 
         Parameters
         ----------
         table_name : str
             The DynamoDB table name.
+        cache_size : int
+            The maximum number of SUCCESS items to keep in an in memory LRU
+            cache, this status is final so repeat reads of them can be served
+            from memory. 0 disables the cache.
+        cache_ttl_seconds : float, optional
+            The maximum age of cached items.
+        request_id_index_name : str, optional
+            The name of the global secondary index with request_id as hash
+            key, required to get items by request_id.
+        batch_get_concurrency : int
+            The maximum number of concurrent BatchGetItem calls (or request_id
+            index queries) of bulk gets.
+        tracer : Tracer, optional
+            Tracer to record a span for each DynamoDB call in.
+        dynamodb : DynamoDBServiceResource, optional
+            The DynamoDB resource to use instead of creating one from kwargs,
+            e.g. an inference_engine.backends.InMemoryDynamoDB.
+        kwargs : Any
+            Kwargs passed onto boto3 as boto3.resource("dynamodb", **kwargs).
 
         """
         self.table_name = table_name
-        self.dynamodb: DynamoDBServiceResource = boto3.resource(
+        self.dynamodb = dynamodb or boto3.resource(
             "dynamodb", **boto3_ddb_resource_kwargs
         )
-        self.table: Table = self.dynamodb.Table(self.table_name)
+        self.table = self.dynamodb.Table(self.table_name)
+        self.cache = (
+            LRUCache(cache_size, cache_ttl_seconds) if cache_size else None
+        )
+        self.request_id_index_name = request_id_index_name
+        if batch_get_concurrency < 1:
+            raise ValueError(
+                f"Invalid {batch_get_concurrency=}, expected at least 1"
+            )
+        self.batch_get_concurrency = batch_get_concurrency
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self.tracer = tracer or NULL_TRACER
         self.logger = logger.bind(table_name=self.table_name)
 
-    @staticmethod
-    def _message_id_to_key(message_id: MessageIdT) -> _KeyT:
-        return {"message_id": message_id}
-
     def result_poll(
         self,
         message_id: MessageIdT,
         timeout_seconds: float = 5,
         poll_time_seconds: float = 0.1,
         return_request_id: bool = False,
+        *,
+        poll_strategy: Optional[PollStrategy] = None,
+        eta_seconds: Optional[float] = None,
     ) -> ResultT | tuple[ResultT, str | None]:
         """Poll until result ready and available.
 
@@ -75,9 +138,16 @@ class DynamoDBClient:
         timeout_seconds : float
             The number of seconds to wait before timing-out.
         poll_time_seconds : float
-            The interval with which to poll for result.
+            The interval with which to poll for result. Ignored if
+            poll_strategy is given.
         return_request_id : bool
             Whether to return the request_id aswell as the result.
+        poll_strategy : PollStrategy, optional
+            Strategy deciding the wait between polls. Defaults to a
+            FixedPollStrategy of poll_time_seconds.
+        eta_seconds : float, optional
+            The estimated number of seconds until the result is ready, passed
+            onto the poll_strategy.
 
         Returns
         -------
@@ -90,13 +160,64 @@ class DynamoDBClient:
             If polling timeout is reached.
 
         """
-        timeout = time.time() + timeout_seconds
+        item_obj = self.result_item_poll(
+            message_id,
+            timeout_seconds=timeout_seconds,
+            poll_strategy=poll_strategy
+            or FixedPollStrategy(poll_time_seconds),
+            eta_seconds=eta_seconds,
+        )
+        return self.result_from_item(item_obj, return_request_id)
 
-        while time.time() < timeout:
+    def result_item_poll(
+        self,
+        message_id: MessageIdT,
+        timeout_seconds: float = 5,
+        poll_strategy: Optional[PollStrategy] = None,
+        eta_seconds: Optional[float] = None,
+    ) -> DynamoDBItem:
+        """Poll until the item holds a successful result.
+
+        Like result_poll, but returns the item, whose result is decoded on
+        first access.
+
+        Parameters
+        ----------
+        message_id : str
+            The message ID to look for.
+        timeout_seconds : float
+            The number of seconds to wait before timing-out.
+        poll_strategy : PollStrategy, optional
+            Strategy deciding the wait between polls. Defaults to a
+            FixedPollStrategy of 0.1 seconds.
+        eta_seconds : float, optional
+            The estimated number of seconds until the result is ready, passed
+            onto the poll_strategy.
+
+        Returns
+        -------
+        DynamoDBItem
+
+        Raises
+        ------
+        AwaitingResultTimeoutError :
+            If polling timeout is reached.
+
+        """
+        poll_strategy = poll_strategy or FixedPollStrategy(0.1)
+        start = time.time()
+        timeout = start + timeout_seconds
+
+        while (now := time.time()) < timeout:
             try:
-                return self.result_get(message_id, return_request_id)
+                item_obj = self.item_get(message_id)
+                self.raise_for_result_status(item_obj)
+                return item_obj
             except _DDBPollContinueErrors:
-                time.sleep(poll_time_seconds)
+                wait_time = poll_strategy.next_interval(
+                    elapsed_seconds=now - start, eta_seconds=eta_seconds
+                )
+                time.sleep(max(min(wait_time, timeout - time.time()), 0))
 
         raise AwaitingResultTimeoutError("Timeout reached.")
 
@@ -114,7 +235,8 @@ class DynamoDBClient:
 
         """
         key = self._message_id_to_key(message_id)
-        response = self.table.get_item(Key=key, ConsistentRead=True)
+        with self.tracer.span("ddb.get_item", message_id=message_id):
+            response = self.table.get_item(Key=key, ConsistentRead=True)
         item = response.get("Item", {})
         return bool(item)
 
@@ -122,6 +244,7 @@ class DynamoDBClient:
         self,
         message_id: MessageIdT,
         raise_for_expiry: bool = True,
+        consistent_read: bool = True,
     ) -> DynamoDBItem:
         """Get the DDB item for this message_id.
 
@@ -131,6 +254,8 @@ class DynamoDBClient:
             The SQS message_id.
         raise_for_expiry : bool
             Check for item expiry and raise if it is expired.
+        consistent_read : bool
+            Whether to use a strongly consistent read.
 
         Returns
         -------
@@ -148,19 +273,18 @@ class DynamoDBClient:
 
         """
         key = self._message_id_to_key(message_id)
-        response = self.table.get_item(Key=key, ConsistentRead=True)
-        item = response.get("Item", {})
-        if not item:
-            raise KeyNotFoundError(f"No item found for key={key}")
-
-        self.logger.debug("Got item={} for key={}", item, key)
-        try:
-            item_obj = DynamoDBItem.from_get_item(item)
-        except Exception as exp:
-            raise UnparseableItemError(
-                f"Unable to parse {item=} with {key=}: "
-                f"{type(exp)} - {str(exp)}"
-            ) from exp
+        if not (item_obj := self._cache_get(message_id)):
+            with self.tracer.span("ddb.get_item", message_id=message_id):
+                response = self.table.get_item(
+                    Key=key, ConsistentRead=consistent_read
+                )
+            item = response.get("Item", {})
+            if not item:
+                raise KeyNotFoundError(f"No item found for key={key}")
+
+            self.logger.debug("Got item={} for key={}", item, key)
+            item_obj = self._parse_item(item, key)
+            self._cache_put(item_obj)
 
         if raise_for_expiry and item_obj.is_expired():
             raise ExpiredItemError(
@@ -196,14 +320,73 @@ class DynamoDBClient:
 
         """
         item_obj = self.item_get(message_id)
+        return self.result_from_item(item_obj, return_request_id)
 
-        self.logger.debug("Parsed item={}", item_obj)
+    def result_from_item(
+        self, item_obj: DynamoDBItem, return_request_id: bool = False
+    ) -> ResultT | tuple[ResultT, str | None]:
+        """Get the result from an already fetched item.
+
+        Parameters
+        ----------
+        item_obj : DynamoDBItem
+            The item, e.g. as returned by item_get or items_batch_get.
+        return_request_id : bool
+            Whether to return the request_id aswell as the result.
+
+        Returns
+        -------
+        dict or tuple of (dict, request_id)
+
+        Raises
+        ------
+        ResultMissingError
+            If the item has no result attribute.
+        ResultErrorStatusError
+            If the item has ERROR status.
+        ResultInProgressStatusError
+            If the result computation is still in progress.
+
+        """
+        self.raise_for_result_status(item_obj)
+        result = item_obj.result
+        request_id = item_obj.request_id
+        if return_request_id:
+            return result, request_id
+        return result
+
+    def raise_for_result_status(self, item_obj: DynamoDBItem) -> None:
+        """Check an item holds a successful result, without decoding it.
+
+        Parameters
+        ----------
+        item_obj : DynamoDBItem
+            The item, e.g. as returned by item_get or items_batch_get.
+
+        Raises
+        ------
+        ResultMissingError
+            If the item has no result attribute.
+        ResultErrorStatusError
+            If the item has ERROR status.
+        ResultCancelledStatusError
+            If the item has CANCELLED status.
+        ResultInProgressStatusError
+            If the result computation is still in progress.
+
+        """
+        message_id = item_obj.message_id
         if item_obj.status == ResultStatus.ERROR:
             raise ResultErrorStatusError(
                 f"Got item for {message_id=}, but has error status"
                 f"error={item_obj.error}"
             )
 
+        if item_obj.status == ResultStatus.CANCELLED:
+            raise ResultCancelledStatusError(
+                f"Got item for {message_id=}, but it was cancelled"
+            )
+
         if item_obj.status in [
             ResultStatus.IN_PROGRESS,
             ResultStatus.SUBMITTED,
@@ -213,39 +396,98 @@ class DynamoDBClient:
                 f"status={item_obj.status}"
             )
 
-        if item_obj.result is None:
+        if not item_obj.has_result:
             raise ResultMissingError(
                 f"Item is missing result for {message_id=} "
                 f"result status={item_obj.status}"
             )
 
-        result = item_obj.result
-        request_id = item_obj.request_id
         self.logger.info(
-            "Got result, message_id={}, request_id={}", message_id, request_id
+            "Got result, message_id={}, request_id={}",
+            message_id,
+            item_obj.request_id,
         )
-        if return_request_id:
-            return result, request_id
-        return result
 
-    def status_get(self, message_id: MessageIdT) -> ResultStatus:
+    def status_get(
+        self, message_id: MessageIdT, consistent_read: bool = True
+    ) -> ResultStatus:
         """Get the status of this message_id.
 
+        Only the status, updated_at, expiration & progress attributes are
+        fetched, so the (potentially large) result is neither read nor
+        decoded. Expired or unparseable items have status ERROR.
+
         Parameters
         ----------
         message_id : str
+        consistent_read : bool
+            Whether to use a strongly consistent read. Eventually consistent
+            reads cost half as much, but may return a stale status.
 
         Returns
         -------
         ResultStatus
 
+        Raises
+        ------
+        KeyNotFoundError
+            If there is no object corresponding to message_id.
+
+        """
+        return self._status_progress_get(message_id, consistent_read)[0]
+
+    def status_get_with_progress(
+        self, message_id: MessageIdT, consistent_read: bool = True
+    ) -> tuple[ResultStatus, Optional[Progress]]:
+        """Get the status of this message_id & its last reported progress.
+
+        Like status_get, with the same single projected read.
+
+        Parameters
+        ----------
+        message_id : str
+        consistent_read : bool
+            Whether to use a strongly consistent read.
+
+        Returns
+        -------
+        tuple of (ResultStatus, Progress or None)
+
+        Raises
+        ------
+        KeyNotFoundError
+            If there is no object corresponding to message_id.
+
         """
+        return self._status_progress_get(message_id, consistent_read)
+
+    def _status_progress_get(
+        self, message_id: MessageIdT, consistent_read: bool
+    ) -> tuple[ResultStatus, Optional[Progress]]:
+        if item_obj := self._cache_get(message_id):
+            expired = item_obj.is_expired()
+            return ResultStatus.ERROR if expired else item_obj.status, None
+
+        item = self._projected_get(
+            message_id, consistent_read, _STATUS_PROJECTION_KWARGS
+        )
         try:
-            item_obj = self.item_get(message_id)
-        except (ExpiredItemError, UnparseableItemError):
-            return ResultStatus.ERROR
+            status = _item_status(item)
+            progress = (
+                Progress(**_deserialise_result(item["progress"]))
+                if "progress" in item
+                else None
+            )
+        except Exception as exp:
+            self.logger.opt(exception=True).warning(
+                "Unable to parse status of item={} with message_id={}: {}",
+                item,
+                message_id,
+                str(exp),
+            )
+            return ResultStatus.ERROR, None
 
-        return item_obj.status
+        return status, progress
 
     def result_exists(self, message_id: MessageIdT) -> bool:
         """Check if this result exists.
@@ -271,6 +513,7 @@ class DynamoDBClient:
         self,
         item: Optional[DynamoDBItem] = None,
         allow_overwrite: bool = True,
+        unless_cancelled: bool = False,
         **ddb_item_kwargs,
     ) -> None:
         """Put item in DynamoDB table.
@@ -280,11 +523,15 @@ class DynamoDBClient:
         item : DynamoDBItem
         allow_overwrite : bool
             Whether to allow overwrite of pre-existing key.
+        unless_cancelled : bool
+            Whether to refuse to overwrite an item with status CANCELLED.
 
         Raises
         ------
         KeyAlreadyExistsError :
             If allow_overwrite=false & key already exists.
+        ResultCancelledStatusError :
+            If unless_cancelled=true & the existing item is cancelled.
 
         """
         item = item or DynamoDBItem(  # pylint: disable=missing-kwoa
@@ -297,7 +544,22 @@ class DynamoDBClient:
                 f"Item with {message_id=} already found and {allow_overwrite=}"
             )
         _puttable = item.to_puttable()
-        self.table.put_item(Item=_puttable)
+        condition_kwargs = (
+            {"ConditionExpression": _NOT_CANCELLED_CONDITION}
+            if unless_cancelled
+            else {}
+        )
+        try:
+            with self.tracer.span("ddb.put_item", message_id=message_id):
+                self.table.put_item(Item=_puttable, **condition_kwargs)
+        except ClientError as exp:
+            if unless_cancelled and _is_conditional_check_failure(exp):
+                raise ResultCancelledStatusError(
+                    f"Item with {message_id=} was cancelled"
+                ) from exp
+            raise
+        if self.cache is not None:
+            self.cache.pop(message_id)
         self.logger.info(
             "Successfully put item in DynamoDB message_id={}, "
             "status={} request_id={}",
@@ -315,6 +577,7 @@ class DynamoDBClient:
         ttl_seconds: Optional[int] = None,
         error: Optional[str] = None,
         serialised_message: Optional[MessageAsDictT] = None,
+        unless_cancelled: bool = False,
     ) -> None:
         """Put a status item for key as message_id.
 
@@ -332,10 +595,14 @@ class DynamoDBClient:
             The error message string, for error statuses.
         serialised_message : dict, optional
             The serialised message.
+        unless_cancelled : bool
+            Whether to refuse to overwrite an item with status CANCELLED.
 
         Raises
         ------
         ValueError
+        ResultCancelledStatusError
+            If unless_cancelled=true & the existing item is cancelled.
 
         """
         if status == ResultStatus.SUCCESS:
@@ -357,14 +624,14 @@ class DynamoDBClient:
             error=error,
             expiration=expiration,
         )
-        self.item_put(item)
+        self.item_put(item, unless_cancelled=unless_cancelled)
 
     def in_progress_put(
         self,
         ttl_seconds: Optional[int],
         **kwargs,
     ) -> None:
-        """Put in_progress flag for item.
+        """Put in_progress flag for item, unless it was cancelled.
 
         Parameters
         ----------
@@ -373,11 +640,17 @@ class DynamoDBClient:
         kwargs : Any
             Passed onto the status_put method.
 
+        Raises
+        ------
+        ResultCancelledStatusError
+            If the item was cancelled.
+
         """
         self.status_put(
             status=ResultStatus.IN_PROGRESS,
             error=None,
             ttl_seconds=ttl_seconds,
+            unless_cancelled=True,
             **kwargs,
         )
 
@@ -434,14 +707,24 @@ class DynamoDBClient:
         result: ResultT,
         serialised_message: Optional[MessageAsDictT] = None,
         request_id: Optional[str] = None,
+        streamed: bool = False,
     ) -> None:
-        """Put the successful result into DDB table.
+        """Put the successful result into DDB table, unless cancelled.
 
         Parameters
         ----------
         message_id : str
         result : dict (json.dumps serialisable)
         serialised_message : dict
+        request_id : str, optional
+        streamed : bool
+            Whether the result is the list of all chunks of a streamed
+            result.
+
+        Raises
+        ------
+        ResultCancelledStatusError
+            If the item was cancelled.
 
         """
         item = DynamoDBItem(
@@ -450,134 +733,111 @@ class DynamoDBClient:
             result=result,
             serialised_message=serialised_message,
             request_id=request_id,
+            streamed=streamed,
         )
-        self.item_put(item)
-
-
-def _utcnow() -> dt.datetime:
-    dt_ = dt.datetime.now(dt.timezone.utc)
-    rounded_down = dt_.replace(microsecond=0)
-    return rounded_down
-
+        self.item_put(item, unless_cancelled=True)
 
-def _expiration_from_ttl(
-    ttl_seconds: int, dt_: Optional[dt.datetime] = None
-) -> dt.datetime:
-    dt_ = dt_ or _utcnow()
-    ttl = dt.timedelta(seconds=ttl_seconds)
-    return dt_ + ttl
-
-
-def _dt_to_ts(dt_: dt.datetime) -> int:
-    if not dt_.tzinfo:
-        raise ValueError("Got naive datetime")
-
-    return int(round(dt_.timestamp()))
-
-
-def _ts_to_dt(
-    timestamp: float | Decimal, tzinfo: dt.tzinfo = dt.timezone.utc
-) -> dt.datetime:
-    timestamp = float(timestamp)
-    return dt.datetime.fromtimestamp(timestamp, tzinfo)
-
-
-@dataclasses.dataclass(kw_only=True)
-class DynamoDBItem:
-    """Class encapsulating a DynamoDB result item."""
-
-    message_id: MessageIdT  # Primary key for ddb
-    request_id: Optional[str] = None
-    status: ResultStatus = ResultStatus.SUCCESS
-    result: Optional[ResultT]
-    # created_at: dt.datetime = dataclasses.field(default_factory=_utcnow)
-    updated_at: dt.datetime = dataclasses.field(default_factory=_utcnow)
-    serialised_message: Optional[MessageAsDictT] = None
-    error: Optional[str] = None
-    expiration: Optional[dt.datetime] = None  # ttl
-
-    def __post_init__(self):
-        if self.status == ResultStatus.SUCCESS and self.error:
-            raise ValueError("Cannot set error message and status=SUCCESS")
-        if self.status == ResultStatus.SUCCESS and self.result is None:
-            raise ValueError("Successful result should not be none")
-        if self.result and self.expiration:
-            raise ValueError("Successful result should not expire")
-
-    def to_puttable(
+    def cancel_put(
         self,
-    ) -> dict[str, str | JsonT | MessageAsDictT | None | int]:
-        """Get a DDB puttable version of this Item."""
-        out = {
-            "message_id": self.message_id,
-            "status": self.status,
-            # "created_at": _dt_to_ts(self.created_at),
-            "updated_at": _dt_to_ts(self.updated_at),
-        }
-        if self.result:
-            out["result"] = _serialise_result(self.result)
-        if self.serialised_message:
-            out["serialised_message"] = self.serialised_message
-        if self.error:
-            out["error"] = self.error
-        if self.expiration:
-            out["expiration"] = _dt_to_ts(self.expiration)
-        if self.request_id:
-            out["request_id"] = self.request_id
-        return out
-
-    @classmethod
-    def from_get_item(cls, item: dict[str, Any]) -> DynamoDBItem:
-        """Instantiate a DynamoDBItem from a .get_item call.
+        message_id: MessageIdT,
+        ttl_seconds: Optional[int] = None,
+        *,
+        remove_request_id: bool = False,
+    ) -> bool:
+        """Mark a SUBMITTED or IN_PROGRESS item as CANCELLED.
+
+        Consumers skip cancelled items, and running compute functions are
+        notified through their JobContext.
 
         Parameters
         ----------
-        item : dict
+        message_id : str
+        ttl_seconds : int, optional
+            If given, the new expiry ttl of the item. Should outlive the
+            message in the queue, so the Consumer still sees the item as
+            cancelled when it receives the message.
+        remove_request_id : bool
+            Whether to also remove the item's request_id, so that it is no
+            longer got by request_id, e.g. as its request was coalesced onto
+            another message.
 
         Returns
         -------
-        DynamoDBItem
+        bool
+            Whether the item was cancelled. False if it doesn't exist or
+            already has a final status.
 
         """
-        if result := item.get("result"):
-            result = _deserialise_result(result)
+        update_expression = (
+            "SET #status = :cancelled, updated_at = :updated_at"
+        )
+        values: dict[str, Any] = {
+            ":cancelled": ResultStatus.CANCELLED.value,
+            ":updated_at": _dt_to_ts(_utcnow()),
+        }
+        if ttl_seconds:
+            update_expression += ", expiration = :expiration"
+            values[":expiration"] = _dt_to_ts(
+                _expiration_from_ttl(ttl_seconds)
+            )
+        if remove_request_id:
+            update_expression += " REMOVE request_id"
 
-        if expiration := item.get("expiration"):
-            expiration = _ts_to_dt(expiration)
+        try:
+            with self.tracer.span("ddb.update_item", message_id=message_id):
+                self.table.update_item(
+                    Key=self._message_id_to_key(message_id),
+                    UpdateExpression=update_expression,
+                    ConditionExpression=Attr("status").is_in(
+                        [status.value for status in _CANCELLABLE_STATUSES]
+                    ),
+                    ExpressionAttributeNames={"#status": "status"},
+                    ExpressionAttributeValues=values,
+                )
+        except ClientError as exp:
+            if _is_conditional_check_failure(exp):
+                self.logger.info(
+                    "Item not cancellable, message_id={}", message_id
+                )
+                return False
+            raise
+
+        if self.cache is not None:
+            self.cache.pop(message_id)
+        self.logger.info("Cancelled item, message_id={}", message_id)
+        return True
 
-        return cls(
-            message_id=item["message_id"],
-            result=result,
-            status=item["status"],
-            # created_at=_ts_to_dt(item["created_at"]),
-            updated_at=_ts_to_dt(item["updated_at"]),
-            serialised_message=item.get("serialised_message"),
-            error=item.get("error"),
-            expiration=expiration,
-            request_id=item.get("request_id"),
-        )
+    def cancel_many_put(
+        self,
+        message_ids: Iterable[MessageIdT],
+        ttl_seconds: Optional[int] = None,
+    ) -> dict[MessageIdT, bool]:
+        """Mark many SUBMITTED or IN_PROGRESS items as CANCELLED.
 
-    def is_expired(self) -> bool:
-        """Check whether this item is expired.
+        Conditional updates can't be batched, so the items are updated with
+        cancel_put, up to batch_get_concurrency at a time.
+
+        Parameters
+        ----------
+        message_ids : iterable of str
+        ttl_seconds : int, optional
+            See cancel_put.
 
         Returns
         -------
-        bool
-            Whether or not this Item is expired.
+        dict of str to bool
+            Whether each item was cancelled.
 
         """
-        if self.status == ResultStatus.SUCCESS:
-            return False
-
-        if not self.expiration:
-            return False
-
-        return _utcnow() > self.expiration
-
-
-def _serialise_result(result: ResultT) -> JsonStrT:
-    return json.dumps(result)
-
-
-def _deserialise_result(json_str: JsonStrT) -> ResultT:
-    return json.loads(json_str)
+        unique_message_ids = list(dict.fromkeys(message_ids))
+        return dict(
+            zip(
+                unique_message_ids,
+                self._map_concurrently(
+                    lambda message_id: self.cancel_put(
+                        message_id, ttl_seconds
+                    ),
+                    unique_message_ids,
+                ),
+            )
+        )
@@ -30,6 +30,14 @@ class ResultErrorStatusError(DDBError):
     """To be raised when result has status ERROR."""
 
 
+class ResultCancelledStatusError(DDBError):
+    """To be raised when result has status CANCELLED.
+
+    Also raised by writes that must not overwrite a cancelled item.
+
+    """
+
+
 class ResultInProgressStatusError(DDBError):
     """To be raised when result has status IN_PROGRESS."""
 
@@ -46,6 +54,23 @@ class ExpiredItemError(DDBError):
     """Raised when DDB item expired."""
 
 
+class UnprocessedKeysError(DDBError):
+    """Raised when BatchGetItem keeps leaving keys unprocessed."""
+
+    def __init__(self, message: str, unprocessed_keys: list):
+        """Get a new UnprocessedKeysError.
+
+        Parameters
+        ----------
+        message : str
+        unprocessed_keys : list of dict
+            The keys still unprocessed.
+
+        """
+        super().__init__(message)
+        self.unprocessed_keys = unprocessed_keys
+
+
 # Producer
 class ProducerError(BaseError):
     """Base Producer error."""
@@ -92,6 +117,41 @@ class ConsumerUnretryableError(ConsumerError):
     """
 
 
+class PoisonMessageError(ConsumerUnretryableError):
+    """For messages quarantined as poison, see PoisonMessagePolicy.
+
+    An ERROR item is written & the message deleted, without computing it.
+
+    """
+
+
+class JobCancelledError(ConsumerError):
+    """For jobs that were cancelled, before or during their computation.
+
+    Compute functions can raise this (see JobContext.raise_if_cancelled) to
+    abort early. The message is deleted and no result is written.
+
+    """
+
+
+class DuplicateJobError(ConsumerError):
+    """For messages of a request_id that was already processed.
+
+    The result of the original message is copied to the duplicate's
+    message_id, and the message is deleted without being computed.
+
+    """
+
+
+class DuplicateJobInProgressError(ConsumerRetryableError):
+    """For messages of a request_id being processed by another message.
+
+    This should NOT trigger a message.delete, the message is received again
+    once the other is processed.
+
+    """
+
+
 class ConsumerStopTimeoutError(ConsumerError, TimeoutError, RuntimeError):
     """For timeout of consumer stop."""
 
@@ -0,0 +1,228 @@
+"""Result polling strategies."""
+from __future__ import annotations
+
+import abc
+import random
+import threading
+from typing import Optional
+
+
+class PollStrategy(abc.ABC):
+    """Base result polling strategy.
+
+    A strategy decides how long to wait before the next poll for a result,
+    given how long ago the job was submitted and optionally an estimate of
+    how long the job should take.
+
+    """
+
+    #: Whether the strategy makes use of eta_seconds. Callers can skip the
+    #: (possibly costly) ETA estimation when this is False.
+    uses_eta: bool = False
+
+    @abc.abstractmethod
+    def next_interval(
+        self, *, elapsed_seconds: float, eta_seconds: Optional[float] = None
+    ) -> float:
+        """Get the number of seconds to wait before the next poll.
+
+        Parameters
+        ----------
+        elapsed_seconds : float
+            The number of seconds since the job was submitted.
+        eta_seconds : float, optional
+            The estimated number of seconds the job takes from submission.
+
+        Returns
+        -------
+        float
+
+        """
+
+
+class FixedPollStrategy(PollStrategy):
+    """Poll with a fixed interval."""
+
+    def __init__(self, interval_seconds: float = 1):
+        """Get a new FixedPollStrategy.
+
+        Parameters
+        ----------
+        interval_seconds : float
+            The interval between polls.
+
+        """
+        self.interval_seconds = interval_seconds
+
+    def next_interval(
+        self, *, elapsed_seconds: float, eta_seconds: Optional[float] = None
+    ) -> float:
+        """Get the number of seconds to wait before the next poll."""
+        return self.interval_seconds
+
+
+class AdaptivePollStrategy(PollStrategy):
+    """Poll rarely early on and frequently around the expected finish time.
+
+    Before the ETA the wait is a fraction (approach_fraction) of the time
+    remaining until the ETA, so polls get denser as the ETA approaches.
+    After the ETA, or when there is no ETA, the wait grows exponentially with
+    how overdue the job is: each poll happens once the overdue time has grown
+    by backoff_multiplier. All waits are jittered and clamped to
+    [min_interval_seconds, max_interval_seconds].
+
+    """
+
+    uses_eta = True
+
+    def __init__(
+        self,
+        *,
+        min_interval_seconds: float = 0.05,
+        max_interval_seconds: float = 10,
+        approach_fraction: float = 0.5,
+        backoff_multiplier: float = 2,
+        jitter: float = 0.2,
+    ):
+        """Get a new AdaptivePollStrategy.
+
+        Parameters
+        ----------
+        min_interval_seconds : float
+            The minimum wait between polls.
+        max_interval_seconds : float
+            The maximum wait between polls.
+        approach_fraction : float
+            The fraction of the remaining time to the ETA to wait.
+        backoff_multiplier : float
+            The factor by which the overdue time grows between polls.
+        jitter : float
+            Fraction of the wait that is randomly removed, in [0, 1].
+
+        """
+        if not 0 < min_interval_seconds <= max_interval_seconds:
+            raise ValueError(
+                "Expected 0 < min_interval_seconds <= max_interval_seconds, "
+                f"got {min_interval_seconds=}, {max_interval_seconds=}"
+            )
+        if not 0 < approach_fraction <= 1:
+            raise ValueError(f"Invalid {approach_fraction=}")
+        if backoff_multiplier <= 1:
+            raise ValueError(f"Invalid {backoff_multiplier=}")
+        if not 0 <= jitter <= 1:
+            raise ValueError(f"Invalid {jitter=}")
+
+        self.min_interval_seconds = min_interval_seconds
+        self.max_interval_seconds = max_interval_seconds
+        self.approach_fraction = approach_fraction
+        self.backoff_multiplier = backoff_multiplier
+        self.jitter = jitter
+
+    def next_interval(
+        self, *, elapsed_seconds: float, eta_seconds: Optional[float] = None
+    ) -> float:
+        """Get the number of seconds to wait before the next poll."""
+        eta_seconds = eta_seconds or 0
+        remaining = eta_seconds - elapsed_seconds
+        if remaining > 0:
+            interval = remaining * self.approach_fraction
+        else:
+            interval = -remaining * (self.backoff_multiplier - 1)
+
+        interval *= 1 - self.jitter * random.random()  # nosec B311
+        return min(
+            max(interval, self.min_interval_seconds),
+            self.max_interval_seconds,
+        )
+
+
+class EtaEstimator:
+    """Estimate job durations from observed durations and queue depth.
+
+    Observed durations, from submission to result, are normalised by the
+    queue depth at submission time, i.e. divided by
+    (1 + queue_depth / parallelism), and kept as an exponentially weighted
+    moving average (EWMA). The estimate for a new job is the EWMA scaled back
+    up by the current queue depth.
+
+    """
+
+    def __init__(
+        self,
+        *,
+        alpha: float = 0.2,
+        parallelism: int = 1,
+        initial_seconds: Optional[float] = None,
+    ):
+        """Get a new EtaEstimator.
+
+        Parameters
+        ----------
+        alpha : float
+            The EWMA smoothing factor, in (0, 1].
+        parallelism : int
+            The expected number of jobs processed in parallel by consumers.
+        initial_seconds : float, optional
+            The duration to assume before any have been observed.
+
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError(f"Invalid {alpha=}")
+        if parallelism < 1:
+            raise ValueError(f"Invalid {parallelism=}")
+
+        self.alpha = alpha
+        self.parallelism = parallelism
+        self._ewma_seconds = initial_seconds
+        self._lock = threading.Lock()
+
+    @property
+    def ewma_seconds(self) -> Optional[float]:
+        """Get the moving average of the normalised observed durations."""
+        return self._ewma_seconds
+
+    def observe(
+        self, duration_seconds: float, queue_depth: Optional[int] = None
+    ) -> None:
+        """Record the duration of a completed job.
+
+        Parameters
+        ----------
+        duration_seconds : float
+            The number of seconds from submission to result.
+        queue_depth : int, optional
+            The approximate queue depth when the job was submitted.
+
+        """
+        duration_seconds /= self._depth_factor(queue_depth)
+        with self._lock:
+            if self._ewma_seconds is None:
+                self._ewma_seconds = duration_seconds
+            else:
+                self._ewma_seconds += self.alpha * (
+                    duration_seconds - self._ewma_seconds
+                )
+
+    def estimate(self, queue_depth: Optional[int] = None) -> Optional[float]:
+        """Estimate the duration of a job being submitted now.
+
+        Parameters
+        ----------
+        queue_depth : int, optional
+            The approximate number of messages waiting in the queue.
+
+        Returns
+        -------
+        float or None
+            The estimated number of seconds, None if nothing has been
+            observed yet.
+
+        """
+        ewma_seconds = self._ewma_seconds
+        if ewma_seconds is None:
+            return None
+
+        return ewma_seconds * self._depth_factor(queue_depth)
+
+    def _depth_factor(self, queue_depth: Optional[int]) -> float:
+        return 1 + (queue_depth or 0) / self.parallelism
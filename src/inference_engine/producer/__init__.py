@@ -1,3 +1,4 @@
 """Producer module."""
 from ..exceptions import ProducerError  # noqa: F401
+from ._message_grouping import MessageGrouping  # noqa: F401
 from .producer import Producer  # noqa: F401
@@ -0,0 +1,74 @@
+"""MessageGroupIds of the messages sent to FIFO queues."""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import typing
+from typing import Literal, Optional
+
+MessageGroupIdModeT = Literal["global", "producer", "request", "sharded"]
+
+
+@dataclasses.dataclass(frozen=True, kw_only=True)
+class MessageGrouping:
+    """How a Producer assigns the MessageGroupId of its messages.
+
+    "global" uses a single group, i.e. messages are processed one at a time
+    in order, "producer" one group per Producer, "request" one group per
+    request, i.e. no ordering, and "sharded" hashes the ordering_key of each
+    post (the request_id if not given) into one of shards groups, so
+    messages of the same key are processed in order and up to shards in
+    parallel.
+
+    """
+
+    mode: MessageGroupIdModeT = "global"
+    shards: int = 16  # Of the "sharded" mode
+
+    def __post_init__(self):
+        if self.mode not in typing.get_args(MessageGroupIdModeT):
+            raise ValueError(
+                f"Invalid message_group_id_mode={self.mode!r}, expected one "
+                f"of {typing.get_args(MessageGroupIdModeT)}"
+            )
+        if self.shards < 1:
+            raise ValueError(
+                f"Invalid message_group_shards={self.shards}, expected at "
+                "least 1"
+            )
+
+    def group_id(
+        self,
+        request_id: str,
+        ordering_key: Optional[str] = None,
+        producer_id: str = "",
+    ) -> str:
+        """Get the MessageGroupId of a message.
+
+        Parameters
+        ----------
+        request_id : str
+            The request_id of the message.
+        ordering_key : str, optional
+            The key whose messages are processed in order, in the "sharded"
+            mode.
+        producer_id : str
+            The id of the Producer sending the message, in the "producer"
+            mode.
+
+        Returns
+        -------
+        str
+
+        """
+        if self.mode == "global":
+            return "default_message_group_id"
+        if self.mode == "request":
+            return request_id
+        if self.mode == "producer":
+            return producer_id
+
+        # A stable hash, the same key maps to the same group in every process
+        digest = hashlib.sha256((ordering_key or request_id).encode()).digest()
+        shard = int.from_bytes(digest[:8], "big") % self.shards
+        return f"shard-{shard}"
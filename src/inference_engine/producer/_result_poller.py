@@ -0,0 +1,395 @@
+"""Shared result poller for Producer."""
+from __future__ import annotations
+
+import dataclasses
+import math
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Optional
+
+from loguru import logger
+
+from ..dynamo_db_client import DynamoDBClient, DynamoDBItem
+from ..exceptions import AwaitingResultTimeoutError, ExpiredItemError
+from ..polling import FixedPollStrategy, PollStrategy
+from ..types import MessageIdT, ResultStatus
+
+_WAITING_STATUSES = (ResultStatus.IN_PROGRESS, ResultStatus.SUBMITTED)
+
+
+@dataclasses.dataclass(kw_only=True)
+class _Waiter:
+    futures: list[Future[DynamoDBItem]]
+    # Of each future, the waiter is polled at the shortest of their intervals
+    poll_strategies: list[PollStrategy]
+    submitted_at: float
+    next_poll_at: float
+    eta_seconds: Optional[float] = None
+
+
+class ResultPoller:
+    """Background thread polling DynamoDB on behalf of many waiters.
+
+    Rather than every blocked caller polling DynamoDB for its own message_id,
+    callers register the message_id with the poller and wait on a Future.
+    The poller thread periodically fetches all outstanding message_ids with
+    BatchGetItem (100 keys per call) and completes the Futures once the
+    items reach a final status. Each message_id is only included in a batch
+    once it is due according to the poll_strategy, so long running jobs with
+    an ETA are checked rarely until they are expected to finish. Due times
+    are rounded up to a common tick of poll_tick_seconds, so that waiters due
+    around the same time are fetched in one batch.
+
+    A single poller per DynamoDBClient can be obtained through
+    ResultPoller.shared, so that all Producers of a process share one
+    polling loop. It is stopped & dropped once all its holders called
+    release. Each caller can pass its own poll_strategy to submit/wait, the
+    poller's poll_strategy is only the default.
+
+    """
+
+    _shared: dict[int, ResultPoller] = {}
+    _shared_lock = threading.Lock()
+
+    def __init__(
+        self,
+        ddb_client: DynamoDBClient,
+        *,
+        poll_time_seconds: float = 1,
+        poll_strategy: Optional[PollStrategy] = None,
+        poll_tick_seconds: float = 0.1,
+        start_immediately: bool = False,
+    ):
+        """Get a new ResultPoller.
+
+        Parameters
+        ----------
+        ddb_client : DynamoDBClient
+            The DynamoDBClient used to fetch the items.
+        poll_time_seconds : float
+            The interval between polls of a message_id. Ignored if
+            poll_strategy is given.
+        poll_strategy : PollStrategy, optional
+            Default strategy deciding the wait between polls of a
+            message_id. Defaults to a FixedPollStrategy of poll_time_seconds.
+        poll_tick_seconds : float
+            The tick due times are rounded up to, i.e. the minimum time
+            between two batches. 0 to poll every message_id when it is due.
+        start_immediately : bool
+            Whether to start the background thread immediatly upon __init__.
+
+        """
+        if poll_tick_seconds < 0:
+            raise ValueError(f"Invalid {poll_tick_seconds=}")
+
+        self.ddb_client = ddb_client
+        self.poll_tick_seconds = poll_tick_seconds
+        self.poll_strategy = poll_strategy or FixedPollStrategy(
+            poll_time_seconds
+        )
+        self._waiters: dict[MessageIdT, _Waiter] = {}
+        self._lock = threading.Lock()
+        self._wakeup_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Of a shared poller, the number of callers of shared not released
+        self._num_holders = 0
+        self.logger = logger.bind(table_name=ddb_client.table_name)
+        if start_immediately:
+            self.start()
+
+    @classmethod
+    def shared(cls, ddb_client: DynamoDBClient, **kwargs) -> ResultPoller:
+        """Get the process wide, running, ResultPoller for this client.
+
+        Each call must be paired with a call of release, once the caller is
+        done with the poller.
+
+        Parameters
+        ----------
+        ddb_client : DynamoDBClient
+            The DynamoDBClient used to fetch the items.
+        kwargs : Any
+            Passed onto ResultPoller.__init__ if the poller is created. Pass
+            per caller poll strategies to submit/wait instead, as the poller
+            may already exist.
+
+        Returns
+        -------
+        ResultPoller
+
+        """
+        with cls._shared_lock:
+            poller = cls._shared.get(id(ddb_client))
+            if poller is None or poller.ddb_client is not ddb_client:
+                poller = cls(ddb_client, **kwargs)
+                cls._shared[id(ddb_client)] = poller
+            poller._num_holders += 1
+
+        return poller.start()
+
+    def release(self) -> None:
+        """Release a poller got from shared, stopping it once unused.
+
+        The poller thread isn't joined, it exits after its current poll.
+
+        """
+        with ResultPoller._shared_lock:
+            self._num_holders -= 1
+            if self._num_holders > 0:
+                return
+            if ResultPoller._shared.get(id(self.ddb_client)) is self:
+                del ResultPoller._shared[id(self.ddb_client)]
+
+        self.stop(timeout=0)
+
+    @property
+    def is_running(self) -> bool:
+        """Check if poller thread is alive."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def num_waiting(self) -> int:
+        """Get the number of message_ids currently being polled for."""
+        with self._lock:
+            return len(self._waiters)
+
+    def start(self) -> ResultPoller:
+        """Start the poller thread."""
+        with self._lock:
+            if not self.is_running:
+                self._stop_event.clear()
+                self._thread = threading.Thread(
+                    target=self._run, name="ResultPoller", daemon=True
+                )
+                self._thread.start()
+                self.logger.info("Started result poller thread")
+
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the poller thread.
+
+        Outstanding waiters are not completed and will hit their timeout.
+
+        Parameters
+        ----------
+        timeout : float, optional
+            The timeout to pass to the Thread.join.
+
+        """
+        self._stop_event.set()
+        self._wakeup_event.set()
+        if self._thread and self.is_running:
+            self._thread.join(timeout=timeout)
+
+    def submit(
+        self,
+        message_id: MessageIdT,
+        eta_seconds: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+    ) -> Future[DynamoDBItem]:
+        """Register interest in the final item for this message_id.
+
+        Parameters
+        ----------
+        message_id : str
+            The message_id to poll for.
+        eta_seconds : float, optional
+            The estimated number of seconds until the item is final, passed
+            onto the poll_strategy.
+        poll_strategy : PollStrategy, optional
+            The strategy deciding the wait between polls for this caller.
+            Defaults to the poller's poll_strategy.
+
+        Returns
+        -------
+        Future of DynamoDBItem
+            Completed with the item once it has a final status, or with
+            ExpiredItemError if the item expired. Cancelling it stops
+            waiting, the other futures of the message_id are still completed.
+
+        """
+        future: Future[DynamoDBItem] = Future()
+        poll_strategy = poll_strategy or self.poll_strategy
+        now = time.monotonic()
+        next_poll_at = self._round_to_tick(
+            now
+            + poll_strategy.next_interval(
+                elapsed_seconds=0, eta_seconds=eta_seconds
+            )
+        )
+        with self._lock:
+            if waiter := self._waiters.get(message_id):
+                waiter.futures.append(future)
+                waiter.poll_strategies.append(poll_strategy)
+                waiter.next_poll_at = min(waiter.next_poll_at, next_poll_at)
+            else:
+                self._waiters[message_id] = _Waiter(
+                    futures=[future],
+                    poll_strategies=[poll_strategy],
+                    submitted_at=now,
+                    next_poll_at=next_poll_at,
+                    eta_seconds=eta_seconds,
+                )
+        self._wakeup_event.set()
+        return future
+
+    def wait(
+        self,
+        message_id: MessageIdT,
+        timeout_seconds: float,
+        eta_seconds: Optional[float] = None,
+        poll_strategy: Optional[PollStrategy] = None,
+    ) -> DynamoDBItem:
+        """Block until the item for this message_id has a final status.
+
+        Parameters
+        ----------
+        message_id : str
+            The message_id to poll for.
+        timeout_seconds : float
+            The number of seconds to wait before timing-out.
+        eta_seconds : float, optional
+            The estimated number of seconds until the item is final.
+        poll_strategy : PollStrategy, optional
+            The strategy deciding the wait between polls for this caller.
+            Defaults to the poller's poll_strategy.
+
+        Returns
+        -------
+        DynamoDBItem
+            The item, with status other than IN_PROGRESS or SUBMITTED.
+
+        Raises
+        ------
+        AwaitingResultTimeoutError
+            If polling timeout is reached.
+        ExpiredItemError
+            If the item expired before reaching a final status.
+
+        """
+        future = self.submit(message_id, eta_seconds, poll_strategy)
+        try:
+            return future.result(timeout=timeout_seconds)
+        except FutureTimeoutError as exp:
+            self._discard(message_id, future)
+            raise AwaitingResultTimeoutError("Timeout reached.") from exp
+
+    def _discard(
+        self, message_id: MessageIdT, future: Future[DynamoDBItem]
+    ) -> None:
+        with self._lock:
+            waiter = self._waiters.get(message_id)
+            if waiter is None:
+                return
+            if future in waiter.futures:
+                index = waiter.futures.index(future)
+                del waiter.futures[index]
+                del waiter.poll_strategies[index]
+            if not waiter.futures:
+                self._waiters.pop(message_id, None)
+
+    def _round_to_tick(self, poll_at: float) -> float:
+        if not self.poll_tick_seconds:
+            return poll_at
+        return math.ceil(poll_at / self.poll_tick_seconds) * (
+            self.poll_tick_seconds
+        )
+
+    def _due_message_ids(self) -> tuple[list[MessageIdT], Optional[float]]:
+        now = time.monotonic()
+        with self._lock:
+            due = [
+                message_id
+                for message_id, waiter in self._waiters.items()
+                if waiter.next_poll_at <= now
+            ]
+            next_poll_at = min(
+                (waiter.next_poll_at for waiter in self._waiters.values()),
+                default=None,
+            )
+
+        wait_time = None if next_poll_at is None else next_poll_at - now
+        return due, wait_time
+
+    def _reschedule(self, message_ids: list[MessageIdT]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for message_id in message_ids:
+                if not (waiter := self._waiters.get(message_id)):
+                    continue
+                waiter.next_poll_at = self._round_to_tick(
+                    now
+                    + min(
+                        strategy.next_interval(
+                            elapsed_seconds=now - waiter.submitted_at,
+                            eta_seconds=waiter.eta_seconds,
+                        )
+                        for strategy in waiter.poll_strategies
+                    )
+                )
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            self._wakeup_event.clear()
+            message_ids, wait_time = self._due_message_ids()
+
+            if not message_ids:
+                # Sleep until the next poll is due or a new submission
+                self._wakeup_event.wait(wait_time)
+                continue
+
+            try:
+                self.poll_once(message_ids)
+            except Exception as exp:
+                self.logger.opt(exception=True).error(
+                    "Failed to poll results {}", str(exp)
+                )
+
+            self._reschedule(message_ids)
+
+        self.logger.info("Result poller thread received stop event")
+
+    def poll_once(self, message_ids: list[MessageIdT]) -> None:
+        """Fetch these message_ids and complete the waiters of final items.
+
+        Parameters
+        ----------
+        message_ids : list of str
+            The message_ids to fetch.
+
+        """
+        items = self.ddb_client.items_batch_get(message_ids)
+        for message_id, item_obj in items.items():
+            if item_obj.is_expired():
+                self._complete(
+                    message_id,
+                    exp=ExpiredItemError(
+                        f"Item with {message_id=} has expired, "
+                        f"expiry={item_obj.expiration}"
+                    ),
+                )
+            elif item_obj.status not in _WAITING_STATUSES:
+                self._complete(message_id, item_obj=item_obj)
+
+    def _complete(
+        self,
+        message_id: MessageIdT,
+        *,
+        item_obj: Optional[DynamoDBItem] = None,
+        exp: Optional[Exception] = None,
+    ) -> None:
+        with self._lock:
+            waiter = self._waiters.pop(message_id, None)
+
+        for future in waiter.futures if waiter else []:
+            # Callers may have cancelled the future they got from submit
+            if not future.set_running_or_notify_cancel():
+                continue
+            if exp is not None:
+                future.set_exception(exp)
+            else:
+                future.set_result(item_obj)  # type: ignore
@@ -1,21 +1,35 @@
 """Producer."""
 from __future__ import annotations
 
+import collections
 import dataclasses
+import hashlib
+import json
 import math
-import typing
+import threading
+import time
 import uuid
-from typing import Literal, Optional
+import weakref
+from typing import Any, Iterable, Iterator, Optional
 
 from loguru import logger
 from mypy_boto3_sqs.type_defs import SendMessageResultTypeDef
 
 from .._sqs_base import _SQSBase, serialise_message_body
-from ..dynamo_db_client import DynamoDBClient
-from ..exceptions import ResultErrorStatusError, ResultMissingError
-from ..types import JsonT, MessageIdT, ResultStatus, ResultT
-
-MessageGroupIdModeT = Literal["global", "producer", "request"]
+from ..dynamo_db_client import DynamoDBClient, DynamoDBItem
+from ..exceptions import (
+    AwaitingResultTimeoutError,
+    ExpiredItemError,
+    KeyNotFoundError,
+    ResultCancelledStatusError,
+    ResultErrorStatusError,
+    ResultMissingError,
+)
+from ..polling import EtaEstimator, FixedPollStrategy, PollStrategy
+from ..tracing import NULL_TRACER, Tracer
+from ..types import JsonT, MessageIdT, Progress, ResultStatus, ResultT
+from ._message_grouping import MessageGroupIdModeT, MessageGrouping
+from ._result_poller import ResultPoller
 
 _DDB500Exps = (ResultMissingError, ResultErrorStatusError)
 
@@ -27,10 +41,19 @@ class Producer(_SQSBase):
         self,
         queue_name: str,
         *,
-        message_group_id_mode: MessageGroupIdModeT = "global",
+        message_group_id_mode: MessageGroupIdModeT
+        | MessageGrouping = "global",
         timeout_seconds: float = 5 * 60,
         poll_time_seconds: float = 1,
+        use_shared_poller: bool = False,
+        poll_strategy: Optional[PollStrategy] = None,
+        eta_estimator: Optional[EtaEstimator] = None,
+        queue_depth_cache_seconds: float = 5,
+        coalesce: bool = False,
+        coalesce_ttl_seconds: Optional[float] = None,
         ddb_client: DynamoDBClient,
+        tracer: Optional[Tracer] = None,
+        sqs: Optional[Any] = None,
         **boto3_sqs_resource_kwargs,
     ):
         """Get a new Producer.
@@ -39,16 +62,54 @@ class Producer(_SQSBase):
         ----------
         queue_name : str
             The name of the SQS queue.
-        message_group_id_mode: MessageGroupIdModeT
-            Creation method for the MessageGroupID.
+        message_group_id_mode: MessageGroupIdModeT or MessageGrouping
+            Creation method for the MessageGroupID, see MessageGrouping,
+            e.g. MessageGrouping(mode="sharded", shards=32). A mode is a
+            MessageGrouping with the default options. Unused for standard
+            (non FIFO) queues, which have no groups.
         timeout_seconds : float
             The timeout to set for DDB item ttl and for timing out on polling.
             This should be set to the maximum time of the longest running task
             consuming from the queue.
         poll_time_seconds : float
-            The wait time to use for polling for result.
+            The wait time to use for polling for result. Ignored if
+            poll_strategy is given.
+        use_shared_poller : bool
+            Whether blocking posts should wait on the process wide
+            ResultPoller for ddb_client, which checks all outstanding
+            message_ids with BatchGetItem, instead of each polling DynamoDB
+            individually. The Producer releases the poller once closed or
+            garbage collected, see close.
+        poll_strategy : PollStrategy, optional
+            Strategy deciding the wait between polls for result, e.g.
+            AdaptivePollStrategy. Defaults to a FixedPollStrategy of
+            poll_time_seconds.
+        eta_estimator : EtaEstimator, optional
+            Estimator of job durations, fed with the durations of blocking
+            posts and used to give the poll_strategy an ETA.
+        queue_depth_cache_seconds : float
+            How long to reuse the fetched queue depth used for ETAs.
+        coalesce : bool
+            Whether to coalesce identical requests: posting a body identical
+            (ignoring the request_id) to one still in flight, i.e. submitted
+            or in progress, returns the message_id of the latter instead of
+            sending a new message. In flight requests are tracked locally and
+            in the DynamoDB table, so coalescing works across producers. Two
+            producers racing to submit the same body may still both send,
+            the later one then cancels its message and its posts get the
+            message_id of the former. The request_ids of coalesced posts
+            are mapped to the message_id they got, for the
+            *_by_request_id(s) methods.
+        coalesce_ttl_seconds : float, optional
+            How long a request can be coalesced on. Defaults to
+            timeout_seconds.
         ddb_client : DynamoDBClient
             The DynamoDBClient to use.
+        tracer : Tracer, optional
+            Tracer to record spans for submitting & awaiting results in.
+        sqs : SQSServiceResource, optional
+            The SQS resource to use instead of creating one from kwargs, e.g.
+            an inference_engine.backends.InMemorySQS.
         kwargs : Any
             Kwargs passed onto the boto3 as boto3.resource("sqs", **kwargs).
 
@@ -56,33 +117,92 @@ class Producer(_SQSBase):
         super().__init__(
             queue_name=queue_name,
             ddb_client=ddb_client,
+            sqs=sqs,
             **boto3_sqs_resource_kwargs,
         )
 
-        if message_group_id_mode not in typing.get_args(MessageGroupIdModeT):
-            raise ValueError(
-                f"Invalid {message_group_id_mode=}, expected one of"
-                f"{typing.get_args(MessageGroupIdModeT)}"
-            )
-        self.message_group_id_mode = message_group_id_mode
+        self.message_grouping = (
+            message_group_id_mode
+            if isinstance(message_group_id_mode, MessageGrouping)
+            else MessageGrouping(mode=message_group_id_mode)
+        )
         self.poll_time_seconds = poll_time_seconds
+        self.use_shared_poller = use_shared_poller
+        self._shared_poller: Optional[ResultPoller] = None
+        self._release_shared_poller: Optional[weakref.finalize] = None
+        self._shared_poller_lock = threading.Lock()
+        self.poll_strategy = poll_strategy or FixedPollStrategy(
+            poll_time_seconds
+        )
+        self.eta_estimator = eta_estimator or EtaEstimator()
+        self.queue_depth_cache_seconds = queue_depth_cache_seconds
+        self._queue_depth: Optional[int] = None
+        self._queue_depth_fetched_at: Optional[float] = None
         self.timeout_seconds = timeout_seconds
+        self.coalesce = coalesce
+        self.coalesce_ttl_seconds = coalesce_ttl_seconds or timeout_seconds
+        # body hash -> (message_id, monotonic expiry), in expiry order
+        self._coalesced: collections.OrderedDict[
+            str, tuple[MessageIdT, float]
+        ] = collections.OrderedDict()
+        # body hash -> set once its submission is done, so that concurrent
+        # identical posts of this Producer wait for it instead of sending
+        self._coalescing: dict[str, threading.Event] = {}
+        self._coalesce_lock = threading.Lock()
+        self.tracer = tracer or NULL_TRACER
         self.logger = logger.bind(queue_name=self.queue_name)
 
-    def _message_group_id(self, request_id: str) -> str:
-        if self.message_group_id_mode == "global":
-            return "default_message_group_id"
-        if self.message_group_id_mode == "request":
-            return request_id
-        if self.message_group_id_mode == "producer":
-            return str(id(self))
+    def approximate_queue_depth(self) -> Optional[int]:
+        """Get the approximate number of messages waiting in the queue.
+
+        The value is cached for queue_depth_cache_seconds.
 
-        raise ValueError(f"Unknown {self.message_group_id_mode=}")
+        Returns
+        -------
+        int or None
+            ApproximateNumberOfMessages, None if it couldn't be fetched.
+
+        """
+        now = time.monotonic()
+        if (
+            self._queue_depth_fetched_at is None
+            or now - self._queue_depth_fetched_at
+            >= self.queue_depth_cache_seconds
+        ):
+            self._queue_depth_fetched_at = now
+            try:
+                attributes = self.sqs.meta.client.get_queue_attributes(
+                    QueueUrl=self.queue.url,
+                    AttributeNames=["ApproximateNumberOfMessages"],
+                )["Attributes"]
+                self._queue_depth = int(
+                    attributes.get("ApproximateNumberOfMessages", 0)
+                )
+            except Exception as exp:
+                self.logger.opt(exception=True).warning(
+                    "Failed to get queue depth: {}", str(exp)
+                )
+                self._queue_depth = None
+
+        return self._queue_depth
+
+    @property
+    def message_group_id_mode(self) -> MessageGroupIdModeT:
+        """Get the creation method for the MessageGroupID."""
+        return self.message_grouping.mode
+
+    def _message_group_id(
+        self, request_id: str, ordering_key: Optional[str] = None
+    ) -> str:
+        return self.message_grouping.group_id(
+            request_id, ordering_key, producer_id=str(id(self))
+        )
 
     def post(
         self,
         message_body: JsonT,
         request_id: Optional[str] = None,
+        ordering_key: Optional[str] = None,
     ) -> Response:
         """Send message to the queue and block until result is ready.
 
@@ -92,17 +212,35 @@ class Producer(_SQSBase):
             json.dumps-able dict.
         request_id : str, optional
             The request_id to attach, if none, one is automatically created.
+        ordering_key : str, optional
+            See post_non_blocking.
 
         Returns
         -------
         Response
 
         """
-        message_id = self.post_non_blocking(message_body, request_id)
-        resp = self._poll_storage_and_block(message_id)
+        started_at = time.monotonic()
+        queue_depth, eta_seconds = None, None
+        if self.poll_strategy.uses_eta:
+            queue_depth = self.approximate_queue_depth()
+            eta_seconds = self.eta_estimator.estimate(queue_depth)
+
+        message_id = self.post_non_blocking(
+            message_body, request_id, ordering_key
+        )
+        with self.tracer.span("producer.await_result", message_id=message_id):
+            resp = self._poll_storage_and_block(message_id, eta_seconds)
+        if request_id is not None:
+            # The item's is another request's, if coalesced
+            resp.request_id = request_id
         self.logger.info(
             "Successfully got result from storage, message_id={}", message_id
         )
+        if resp.status == ResultStatus.SUCCESS:
+            self.eta_estimator.observe(
+                time.monotonic() - started_at, queue_depth
+            )
 
         return resp
 
@@ -110,6 +248,7 @@ class Producer(_SQSBase):
         self,
         message_body: JsonT,
         request_id: Optional[str] = None,
+        ordering_key: Optional[str] = None,
     ) -> MessageIdT:
         """Submit a message but do not block.
 
@@ -117,21 +256,149 @@ class Producer(_SQSBase):
         ----------
         message_body : dict
             json.dumps-able dict.
+        request_id : str, optional
+            The request_id to attach, if none, one is automatically created.
+        ordering_key : str, optional
+            The key (e.g. a tenant or session id) whose messages are
+            processed in order, in the "sharded" message_group_id_mode.
+            Ignored by the other modes.
 
         Returns
         -------
         str
-            The message_id for the submitted job.
+            The message_id for the submitted job. With coalesce, possibly
+            that of an identical job still in flight.
 
         """
+        if self.coalesce:
+            return self._post_coalesced(message_body, request_id, ordering_key)
+        return self._send(message_body, request_id, ordering_key)
+
+    def _coalesce_hash(self, message_body: JsonT) -> str:
+        normalised = {
+            k: v for k, v in message_body.items() if k != "request_id"
+        }
+        # Sorted keys, so that equal bodies hash equally
+        serialised = json.dumps(
+            [self.queue_name, normalised],
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(serialised.encode()).hexdigest()
+
+    def _is_in_flight(self, message_id: MessageIdT) -> bool:
+        try:
+            status = self.ddb_client.status_get(
+                message_id, consistent_read=False
+            )
+        except KeyNotFoundError:
+            return False
+        return status in (ResultStatus.SUBMITTED, ResultStatus.IN_PROGRESS)
+
+    def _coalesced_get(self, body_hash: str) -> Optional[MessageIdT]:
+        now = time.monotonic()
+        with self._coalesce_lock:
+            # Drop the expired entries, the oldest first
+            while (
+                self._coalesced
+                and next(iter(self._coalesced.values()))[1] <= now
+            ):
+                self._coalesced.popitem(last=False)
+            entry = self._coalesced.get(body_hash)
+        return entry[0] if entry else None
+
+    def _coalesced_put(self, body_hash: str, message_id: MessageIdT) -> None:
+        with self._coalesce_lock:
+            self._coalesced.pop(body_hash, None)
+            self._coalesced[body_hash] = (
+                message_id,
+                time.monotonic() + self.coalesce_ttl_seconds,
+            )
+
+    def _post_coalesced(
+        self,
+        message_body: JsonT,
+        request_id: Optional[str],
+        ordering_key: Optional[str],
+    ) -> MessageIdT:
+        body_hash = self._coalesce_hash(message_body)
+        stale_message_id: Optional[MessageIdT] = None
+        while True:
+            with self._coalesce_lock:
+                submitting = self._coalescing.get(body_hash)
+                if submitting is None:
+                    self._coalescing[body_hash] = threading.Event()
+                    break
+            submitting.wait()
+
+        try:
+            # The local entry saves a read, but another producer may have
+            # submitted since it completed
+            message_id = self._coalesced_get(body_hash)
+            if message_id is None or not self._is_in_flight(message_id):
+                message_id = self.ddb_client.coalesce_get(body_hash)
+                if message_id is not None and not self._is_in_flight(
+                    message_id
+                ):
+                    stale_message_id, message_id = message_id, None
+            if message_id is not None:
+                self.logger.info(
+                    "Coalesced request onto in flight message_id={}",
+                    message_id,
+                )
+            else:
+                message_id = self._send(message_body, request_id, ordering_key)
+                winner = self.ddb_client.coalesce_put(
+                    body_hash,
+                    message_id,
+                    int(math.ceil(self.coalesce_ttl_seconds)),
+                    replaces=stale_message_id,
+                )
+                if winner is None or winner == message_id:
+                    self._coalesced_put(body_hash, message_id)
+                    return message_id
+
+                # Another producer submitted the body meanwhile, wait on its
+                # message like the posts coalesced onto it, and skip ours
+                self.logger.info(
+                    "Coalesced request onto concurrently submitted "
+                    "message_id={}, instead of message_id={}",
+                    winner,
+                    message_id,
+                )
+                self.ddb_client.cancel_put(
+                    message_id,
+                    self._message_retention_seconds(),
+                    remove_request_id=True,
+                )
+                message_id = winner
+
+            self._coalesced_put(body_hash, message_id)
+            if request_id is not None:
+                self.ddb_client.coalesced_request_put(request_id, message_id)
+            return message_id
+        finally:
+            with self._coalesce_lock:
+                self._coalescing.pop(body_hash).set()
+
+    def _send(
+        self,
+        message_body: JsonT,
+        request_id: Optional[str],
+        ordering_key: Optional[str],
+    ) -> MessageIdT:
         request_id = request_id or str(uuid.uuid4())
         message_body["request_id"] = request_id
         message_str = serialise_message_body(message_body)
-        message_group_id = self._message_group_id(request_id)
-        response: SendMessageResultTypeDef = self.queue.send_message(
-            MessageBody=message_str,
-            MessageGroupId=message_group_id,
-        )
+        message_group_id = None
+        send_kwargs = {}
+        if self.is_fifo:
+            message_group_id = self._message_group_id(request_id, ordering_key)
+            send_kwargs["MessageGroupId"] = message_group_id
+        with self.tracer.span("producer.send_message", request_id=request_id):
+            response: SendMessageResultTypeDef = self.queue.send_message(
+                MessageBody=message_str, **send_kwargs
+            )
         message_id = response["MessageId"]
         self.ddb_client.submitted_put(
             ttl_seconds=int(math.ceil(self.timeout_seconds)),
@@ -148,13 +415,75 @@ class Producer(_SQSBase):
         )
         return message_id
 
-    def retrieve_result_status(self, message_id: MessageIdT) -> ResultStatus:
+    def cancel(
+        self, message_id: MessageIdT, ttl_seconds: Optional[int] = None
+    ) -> bool:
+        """Cancel a submitted or in progress job.
+
+        Consumers skip the message of a cancelled job, and running compute
+        functions can observe the cancellation through their JobContext.
+
+        Parameters
+        ----------
+        message_id : str
+            The message_id of the job to cancel.
+        ttl_seconds : int, optional
+            The expiry ttl of the cancelled item. Defaults to the queue's
+            message retention period, so that the item outlives the message.
+
+        Returns
+        -------
+        bool
+            Whether the job was cancelled. False if it doesn't exist or has
+            already completed.
+
+        """
+        return self.ddb_client.cancel_put(
+            message_id, ttl_seconds or self._message_retention_seconds()
+        )
+
+    def cancel_many(
+        self,
+        message_ids: Iterable[MessageIdT],
+        ttl_seconds: Optional[int] = None,
+    ) -> dict[MessageIdT, bool]:
+        """Cancel many submitted or in progress jobs, e.g. to flush a backlog.
+
+        The jobs are cancelled concurrently, see
+        DynamoDBClient.cancel_many_put.
+
+        Parameters
+        ----------
+        message_ids : iterable of str
+            The message_ids of the jobs to cancel.
+        ttl_seconds : int, optional
+            See cancel.
+
+        Returns
+        -------
+        dict of str to bool
+            Whether each job was cancelled.
+
+        """
+        return self.ddb_client.cancel_many_put(
+            message_ids, ttl_seconds or self._message_retention_seconds()
+        )
+
+    def _message_retention_seconds(self) -> Optional[int]:
+        retention = self.queue.attributes.get("MessageRetentionPeriod")
+        return int(retention) if retention else None
+
+    def retrieve_result_status(
+        self, message_id: MessageIdT, consistent_read: bool = True
+    ) -> ResultStatus:
         """Check the status of the result for this message_id.
 
         Parameters
         ----------
         message_id : str
             The SQS message_id key for the desired result.
+        consistent_read : bool
+            Whether to use a strongly consistent read.
 
         Returns
         -------
@@ -166,7 +495,33 @@ class Producer(_SQSBase):
             If no key found for message_id.
 
         """
-        return self.ddb_client.status_get(message_id)
+        return self.ddb_client.status_get(message_id, consistent_read)
+
+    def retrieve_result_status_with_progress(
+        self, message_id: MessageIdT, consistent_read: bool = True
+    ) -> tuple[ResultStatus, Optional[Progress]]:
+        """Check the status of this message_id & its JobContext progress.
+
+        Parameters
+        ----------
+        message_id : str
+            The SQS message_id key for the desired result.
+        consistent_read : bool
+            Whether to use a strongly consistent read.
+
+        Returns
+        -------
+        tuple of (ResultStatus, Progress or None)
+
+        Raises
+        ------
+        KeyNotFoundError
+            If no key found for message_id.
+
+        """
+        return self.ddb_client.status_get_with_progress(
+            message_id, consistent_read
+        )
 
     def retrieve_result(self, message_id: MessageIdT) -> Response:
         """Retrieve the result for this message_id.
@@ -182,37 +537,340 @@ class Producer(_SQSBase):
 
         """
         try:
-            result, request_id = self.ddb_client.result_get(
-                message_id, return_request_id=True
-            )
+            item_obj = self.ddb_client.item_get(message_id)
         except _DDB500Exps as exp:
             return Response.from_exp(exp, message_id, 500)
+        return self._response_from_item(item_obj)
 
-        return Response(
-            message_id=message_id, result=result, request_id=request_id
-        )
-
-    def _poll_storage_and_block(self, message_id: str) -> Response:
+    def _response_from_item(self, item_obj: DynamoDBItem) -> Response:
         try:
-            result, request_id = self.ddb_client.result_poll(
-                message_id,
-                timeout_seconds=self.timeout_seconds,
-                poll_time_seconds=self.poll_time_seconds,
-                return_request_id=True,
+            self.ddb_client.raise_for_result_status(item_obj)
+        except _DDB500Exps as exp:
+            return Response.from_exp(exp, item_obj.message_id, 500)
+        except ResultCancelledStatusError as exp:
+            return Response.from_cancelled(exp, item_obj.message_id)
+
+        return Response.from_item(item_obj)
+
+    def retrieve_result_status_by_request_id(
+        self, request_id: str
+    ) -> ResultStatus:
+        """Check the status of the result for this request_id.
+
+        Requires the request_id_index_name of the DynamoDBClient. If the
+        request_id was posted more than once, the status of the most
+        recently updated job is returned.
+
+        Parameters
+        ----------
+        request_id : str
+            The request_id of the post.
+
+        Returns
+        -------
+        ResultStatus
+
+        Raises
+        ------
+        KeyNotFoundError
+            If no item found for request_id.
+
+        """
+        return self.ddb_client.status_get_by_request_id(request_id)
+
+    def retrieve_result_by_request_id(self, request_id: str) -> Response:
+        """Retrieve the result for this request_id.
+
+        See retrieve_result_status_by_request_id.
+
+        Parameters
+        ----------
+        request_id : str
+            The request_id of the post.
+
+        Returns
+        -------
+        Response
+
+        Raises
+        ------
+        KeyNotFoundError
+            If no item found for request_id.
+
+        """
+        item_obj = self.ddb_client.item_get_by_request_id(request_id)
+        response = self._response_from_item(item_obj)
+        # The item's is another request's, if coalesced
+        response.request_id = request_id
+        return response
+
+    def retrieve_results_by_request_ids(
+        self, request_ids: Iterable[str]
+    ) -> dict[str, Response]:
+        """Retrieve the results for many request_ids.
+
+        See retrieve_result_status_by_request_id.
+
+        Parameters
+        ----------
+        request_ids : iterable of str
+            The request_ids of the posts.
+
+        Returns
+        -------
+        dict of str to Response
+            The responses keyed by request_id. Request ids without an item
+            are not included, those still in progress have a response with
+            status SUBMITTED or IN_PROGRESS and status_code 202.
+
+        """
+        responses = {
+            request_id: self._bulk_response_from_item(item_obj)
+            for request_id, item_obj in (
+                self.ddb_client.items_batch_get_by_request_ids(request_ids)
+            ).items()
+        }
+        for request_id, response in responses.items():
+            response.request_id = request_id
+        return responses
+
+    def _bulk_response_from_item(self, item_obj: DynamoDBItem) -> Response:
+        if item_obj.is_expired():
+            return Response.from_exp(
+                ExpiredItemError(
+                    f"Item with message_id={item_obj.message_id} has "
+                    f"expired, expiry={item_obj.expiration}"
+                ),
+                item_obj.message_id,
+                500,
+            )
+        if item_obj.status in (
+            ResultStatus.SUBMITTED,
+            ResultStatus.IN_PROGRESS,
+        ):
+            return Response(
+                message_id=item_obj.message_id,
+                request_id=item_obj.request_id,
+                status=item_obj.status,
+                status_code=202,
+                result=None,
+            )
+        return self._response_from_item(item_obj)
+
+    def retrieve_result_statuses(
+        self, message_ids: Iterable[MessageIdT]
+    ) -> dict[MessageIdT, ResultStatus]:
+        """Check the statuses of the results for many message_ids.
+
+        Uses BatchGetItem calls of up to 100 keys, see
+        DynamoDBClient.statuses_batch_get.
+
+        Parameters
+        ----------
+        message_ids : iterable of str
+            The SQS message_ids of the desired results.
+
+        Returns
+        -------
+        dict of str to ResultStatus
+            The statuses keyed by message_id. Message ids without an item are
+            not included.
+
+        """
+        return self.ddb_client.statuses_batch_get(message_ids)
+
+    def retrieve_results(
+        self, message_ids: Iterable[MessageIdT]
+    ) -> dict[MessageIdT, Response]:
+        """Retrieve the results for many message_ids.
+
+        Uses BatchGetItem calls of up to 100 keys, see
+        DynamoDBClient.items_batch_get.
+
+        Parameters
+        ----------
+        message_ids : iterable of str
+            The SQS message_ids of the desired results.
+
+        Returns
+        -------
+        dict of str to Response
+            The responses keyed by message_id. Message ids without an item
+            are not included, those still in progress have a response with
+            status SUBMITTED or IN_PROGRESS and status_code 202.
+
+        """
+        return {
+            message_id: self._bulk_response_from_item(item_obj)
+            for message_id, item_obj in (
+                self.ddb_client.items_batch_get(message_ids)
+            ).items()
+        }
+
+    def stream(
+        self, message_id: MessageIdT, timeout_seconds: Optional[float] = None
+    ) -> Iterator[JsonT]:
+        """Iterate over the chunks of a streamed result as they land.
+
+        The Consumer streams results of compute functions that return an
+        iterator, writing chunks as they are yielded. For results that were
+        not streamed the whole result is yielded once it is ready.
+
+        The wait between polls is given by poll_strategy, with the elapsed
+        time counted from the last time new chunks were seen.
+
+        Parameters
+        ----------
+        message_id : str
+            The SQS message_id for the desired result.
+        timeout_seconds : float, optional
+            The number of seconds to wait for the result to complete.
+            Defaults to timeout_seconds of this Producer.
+
+        Yields
+        ------
+        Any
+            The result chunks.
+
+        Raises
+        ------
+        AwaitingResultTimeoutError
+            If the timeout is reached before the result completes.
+        ResultErrorStatusError
+            If the result has status ERROR.
+        ResultCancelledStatusError
+            If the job was cancelled.
+        ExpiredItemError
+            If the in progress item expired.
+
+        """
+        start = last_progress_at = time.time()
+        timeout = start + (timeout_seconds or self.timeout_seconds)
+        num_yielded = 0
+        while (now := time.time()) < timeout:
+            try:
+                status, chunks = self.ddb_client.chunks_get(message_id)
+            except KeyNotFoundError:
+                status, chunks = ResultStatus.SUBMITTED, []
+
+            if status not in (
+                ResultStatus.IN_PROGRESS,
+                ResultStatus.SUBMITTED,
+            ):
+                item_obj = self.ddb_client.item_get(message_id)
+                self.ddb_client.raise_for_result_status(item_obj)
+                if item_obj.streamed:
+                    yield from item_obj.result[num_yielded:]  # type: ignore
+                else:
+                    yield item_obj.result
+                return
+
+            if len(chunks) > num_yielded:
+                new_chunks = chunks[num_yielded:]
+                num_yielded = len(chunks)
+                last_progress_at = now
+                yield from new_chunks
+
+            wait_time = self.poll_strategy.next_interval(
+                elapsed_seconds=time.time() - last_progress_at
             )
+            time.sleep(max(min(wait_time, timeout - time.time()), 0))
+
+        raise AwaitingResultTimeoutError("Timeout reached.")
+
+    def _poll_storage_and_block(
+        self, message_id: str, eta_seconds: Optional[float] = None
+    ) -> Response:
+        try:
+            if self.use_shared_poller:
+                item_obj = self._wait_on_shared_poller(message_id, eta_seconds)
+            else:
+                item_obj = self.ddb_client.result_item_poll(
+                    message_id,
+                    timeout_seconds=self.timeout_seconds,
+                    poll_strategy=self.poll_strategy,
+                    eta_seconds=eta_seconds,
+                )
         except _DDB500Exps as exp:
             return Response.from_exp(exp, message_id, 500)
+        except ResultCancelledStatusError as exp:
+            return Response.from_cancelled(exp, message_id)
         except TimeoutError as exp:
             return Response.from_exp(exp, message_id, 500)
 
-        return Response(
-            message_id=message_id, result=result, request_id=request_id
+        return Response.from_item(item_obj)
+
+    def _get_shared_poller(self) -> ResultPoller:
+        with self._shared_poller_lock:
+            if self._shared_poller is None:
+                # The shared poller may have been created by another Producer
+                self._shared_poller = ResultPoller.shared(self.ddb_client)
+                # Released if the Producer is discarded without close
+                self._release_shared_poller = weakref.finalize(
+                    self, self._shared_poller.release
+                )
+            return self._shared_poller
+
+    def close(self) -> None:
+        """Release the shared ResultPoller, if this Producer got it.
+
+        The poller is stopped once no Producer holds it, blocking posts of
+        other threads still waiting on it then time out. The Producer can
+        still be used afterwards, getting the shared poller again.
+
+        """
+        with self._shared_poller_lock:
+            if self._release_shared_poller is not None:
+                self._release_shared_poller()
+            self._shared_poller = None
+            self._release_shared_poller = None
+
+    def _wait_on_shared_poller(
+        self, message_id: MessageIdT, eta_seconds: Optional[float]
+    ) -> DynamoDBItem:
+        item_obj = self._get_shared_poller().wait(
+            message_id,
+            timeout_seconds=self.timeout_seconds,
+            eta_seconds=eta_seconds,
+            poll_strategy=self.poll_strategy,
         )
+        self.ddb_client.raise_for_result_status(item_obj)
+        return item_obj
+
+
+class _LazyResult:
+    """The result slot of a Response, decoded from its item on first get."""
+
+    def __init__(self, slot: Any):
+        self.slot = slot
+
+    def __get__(self, obj: Optional[_ItemSlot], objtype=None) -> Any:
+        if obj is None:
+            return self
+        if (item_obj := obj._item) is not None:
+            self.slot.__set__(obj, item_obj.result)
+            obj._item = None
+        return self.slot.__get__(obj, objtype)
+
+    def __set__(self, obj: _ItemSlot, result: Optional[ResultT]) -> None:
+        self.slot.__set__(obj, result)
+        obj._item = None
 
 
-@dataclasses.dataclass(kw_only=True)
-class Response:
-    """Class encapsulating a post request Response."""
+class _ItemSlot:
+    """The undecoded item of a Response, kept out of its dataclass fields."""
+
+    __slots__ = ("_item",)
+    _item: Optional[DynamoDBItem]
+
+
+@dataclasses.dataclass(kw_only=True, slots=True)
+class Response(_ItemSlot):
+    """Class encapsulating a post request Response.
+
+    Responses created by from_item decode the result on first access.
+
+    """
 
     message_id: MessageIdT
     request_id: Optional[str] = None
@@ -221,6 +879,28 @@ class Response:
     result: Optional[ResultT]
     error: Optional[Exception] = None
 
+    @classmethod
+    def from_item(cls, item_obj: DynamoDBItem) -> Response:
+        """Derive a SUCCESS Response from a DynamoDBItem with result.
+
+        Parameters
+        ----------
+        item_obj : DynamoDBItem
+            The item holding the result.
+
+        Returns
+        -------
+        Response
+
+        """
+        response = cls(
+            message_id=item_obj.message_id,
+            request_id=item_obj.request_id,
+            result=None,
+        )
+        response._item = item_obj
+        return response
+
     @classmethod
     def from_exp(
         cls, exp: Exception, message_id: MessageIdT, status_code: int
@@ -249,3 +929,32 @@ class Response:
             error=exp,
             # error=f"{type(exp).__name__} - {str(exp)}"
         )
+
+    @classmethod
+    def from_cancelled(
+        cls, exp: Exception, message_id: MessageIdT
+    ) -> Response:
+        """Derive a CANCELLED status result, with status_code 409.
+
+        Parameters
+        ----------
+        exp : Exception
+            The exception raised for the cancelled item.
+        message_id : str
+            The message_id for the cancelled response.
+
+        Returns
+        -------
+        Response
+
+        """
+        return Response(
+            message_id=message_id,
+            status=ResultStatus.CANCELLED,
+            status_code=409,
+            result=None,
+            error=exp,
+        )
+
+
+Response.result = _LazyResult(Response.result)  # type: ignore
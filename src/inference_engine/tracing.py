@@ -0,0 +1,236 @@
+"""Span tracing, exportable as Chrome trace events.
+
+A Tracer records spans, the start and end of a named stage, with the thread
+it ran on and attributes such as the message_id. Spans can be exported with
+Tracer.export_chrome_trace, as JSON viewable as a flame-chart timeline in
+chrome://tracing or https://ui.perfetto.dev, and/or forwarded to an external
+tracer through hooks.
+
+Example usage::
+
+    tracer = Tracer()
+    ddb_client = DynamoDBClient(table_name, tracer=tracer)
+    consumer = Consumer(queue_name, ddb_client=ddb_client, tracer=tracer, ...)
+    ...
+    tracer.export_chrome_trace("trace.json")
+
+Components default to NULL_TRACER, which records nothing.
+
+"""
+from __future__ import annotations
+
+import collections
+import contextlib
+import dataclasses
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, ContextManager, Iterator, Optional, TextIO
+
+from loguru import logger
+
+SpanHookT = Callable[["Span"], Any]
+
+
+@dataclasses.dataclass(kw_only=True)
+class Span:
+    """A finished span."""
+
+    name: str
+    start_ns: int  # time.perf_counter_ns
+    end_ns: int
+    thread_id: int
+    thread_name: str
+    attributes: dict[str, Any] = dataclasses.field(default_factory=dict)
+    error: Optional[str] = None
+
+    @property
+    def duration_seconds(self) -> float:
+        """Get the duration of the span."""
+        return (self.end_ns - self.start_ns) / 1e9
+
+
+class Tracer:
+    """Records spans in memory, bounded to the last max_spans."""
+
+    def __init__(
+        self,
+        max_spans: Optional[int] = 100_000,
+        hooks: Optional[list[SpanHookT]] = None,
+    ):
+        """Get a new Tracer.
+
+        Parameters
+        ----------
+        max_spans : int, optional
+            The number of most recent spans kept. If None, all are kept.
+        hooks : list of callable, optional
+            Called with every finished Span, e.g. to forward spans to an
+            external tracer. Exceptions raised are logged.
+
+        """
+        self.hooks: list[SpanHookT] = list(hooks or [])
+        self._spans: collections.deque[Span] = collections.deque(
+            maxlen=max_spans
+        )
+        self._lock = threading.Lock()
+
+    @property
+    def spans(self) -> list[Span]:
+        """Get the recorded spans, in order of completion."""
+        with self._lock:
+            return list(self._spans)
+
+    def add_hook(self, hook: SpanHookT) -> None:
+        """Add a hook called with every finished Span.
+
+        Parameters
+        ----------
+        hook : callable
+
+        """
+        self.hooks.append(hook)
+
+    def clear(self) -> None:
+        """Remove all recorded spans."""
+        with self._lock:
+            self._spans.clear()
+
+    @contextlib.contextmanager
+    def _span(self, name: str, attributes: dict[str, Any]) -> Iterator[None]:
+        start_ns = time.perf_counter_ns()
+        error = None
+        try:
+            yield
+        except BaseException as exp:
+            error = f"{type(exp).__name__}: {str(exp)}"
+            raise
+        finally:
+            thread = threading.current_thread()
+            self.record(
+                Span(
+                    name=name,
+                    start_ns=start_ns,
+                    end_ns=time.perf_counter_ns(),
+                    thread_id=thread.ident or 0,
+                    thread_name=thread.name,
+                    attributes=attributes,
+                    error=error,
+                )
+            )
+
+    def span(self, name: str, **attributes) -> ContextManager[None]:
+        """Trace the body of the with statement as a span.
+
+        Parameters
+        ----------
+        name : str
+            The span name, e.g. "consumer.compute".
+        attributes : Any
+            Attributes of the span, e.g. message_id.
+
+        Returns
+        -------
+        ContextManager
+
+        """
+        return self._span(name, attributes)
+
+    def record(self, span: Span) -> None:
+        """Record a finished span and call the hooks.
+
+        Parameters
+        ----------
+        span : Span
+
+        """
+        with self._lock:
+            self._spans.append(span)
+
+        for hook in self.hooks:
+            try:
+                hook(span)
+            except Exception as exp:
+                logger.opt(exception=True).error(
+                    "Exp in span hook {}: {}", hook, str(exp)
+                )
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Get the recorded spans as Chrome trace events.
+
+        Each span is a complete ("X") event, with timestamps in microseconds
+        and the thread names as metadata ("M") events.
+
+        Returns
+        -------
+        dict
+            The JSON object format, with a traceEvents list.
+
+        """
+        pid = os.getpid()
+        spans = self.spans
+        events: list[dict[str, Any]] = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": pid,
+                "tid": thread_id,
+                "args": {"name": thread_name},
+            }
+            for thread_id, thread_name in sorted(
+                {(span.thread_id, span.thread_name) for span in spans}
+            )
+        ]
+        for span in spans:
+            args = dict(span.attributes)
+            if span.error is not None:
+                args["error"] = span.error
+            events.append(
+                {
+                    "name": span.name,
+                    "cat": span.name.split(".", 1)[0],
+                    "ph": "X",
+                    "ts": span.start_ns / 1e3,
+                    "dur": (span.end_ns - span.start_ns) / 1e3,
+                    "pid": pid,
+                    "tid": span.thread_id,
+                    "args": args,
+                }
+            )
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, file: str | os.PathLike | TextIO) -> None:
+        """Write the recorded spans as Chrome trace event JSON.
+
+        Parameters
+        ----------
+        file : str, path or file object
+            The path or open text file to write to.
+
+        """
+        trace = self.to_chrome_trace()
+        if isinstance(file, (str, os.PathLike)):
+            with open(file, "w", encoding="utf-8") as f:
+                json.dump(trace, f, default=str)
+        else:
+            json.dump(trace, file, default=str)
+
+
+class NullTracer(Tracer):
+    """Tracer recording nothing, with negligible overhead."""
+
+    def __init__(self):
+        """Get a new NullTracer."""
+        super().__init__(max_spans=0)
+
+    def span(self, name: str, **attributes) -> ContextManager[None]:
+        """Do nothing."""
+        return contextlib.nullcontext()
+
+    def record(self, span: Span) -> None:
+        """Do nothing."""
+
+
+NULL_TRACER = NullTracer()
@@ -2,8 +2,9 @@
 # pylint: disable=invalid-name
 from __future__ import annotations
 
+import dataclasses
 from enum import Enum
-from typing import Any, Callable, Literal
+from typing import Any, Callable, Literal, Optional
 
 JsonStrT = str
 JsonT = Any
@@ -31,6 +32,34 @@ class ResultStatus(str, Enum):
     ERROR = "error"
     IN_PROGRESS = "in_progress"
     SUBMITTED = "submitted"
+    CANCELLED = "cancelled"
+
+
+@dataclasses.dataclass(kw_only=True)
+class Progress:
+    """Progress of a running job, as reported by its compute function."""
+
+    fraction: Optional[float] = None  # In [0, 1]
+    stage: Optional[str] = None
+    eta_seconds: Optional[float] = None
+    reported_at: Optional[float] = None  # Unix timestamp
+
+    def __post_init__(self):
+        if self.fraction is not None and not 0 <= self.fraction <= 1:
+            raise ValueError(
+                f"Progress fraction not in [0, 1], {self.fraction=}"
+            )
+
+
+@dataclasses.dataclass(kw_only=True)
+class RequestClaim:
+    """The deduplication record of a request_id, see Consumer(deduplicate)."""
+
+    request_id: str
+    message_id: MessageIdT  # Of the message that claimed the request
+    claim_token: str
+    status: ResultStatus  # IN_PROGRESS until the message is processed
+    lease_expires_at: Optional[float] = None  # Unix timestamp
 
 
 ComputeResultCallableT = Callable[[MessageBodyT, MessageIdT], ResultT]
@@ -66,6 +66,7 @@ module "inference_pipeline" {
 
   dynamodb_deletion_protection_enabled    = var.dynamodb_deletion_protection_enabled
   dynamodb_point_in_time_recovery_enabled = var.dynamodb_point_in_time_recovery_enabled
+  dynamodb_request_id_index_enabled       = var.dynamodb_request_id_index_enabled
 
   queue_content_based_deduplication = var.queue_content_based_deduplication
   queue_deduplication_scope         = var.queue_deduplication_scope
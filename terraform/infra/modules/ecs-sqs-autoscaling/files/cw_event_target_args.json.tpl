@@ -1,8 +0,0 @@
-{
-  "metric_name": "${metric_name}",
-  "cluster_name": "${cluster_name}",
-  "service_name": "${service_name}",
-  "queue_name": "${queue_name}",
-  "queue_owner_aws_account_id": "${queue_owner_aws_account_id}",
-  "est_secs_per_msg": "${est_secs_per_msg}"
-}
@@ -31,6 +31,7 @@ module "autoscale_service" {
 
 module "compute_queue_backlog_lambda" {
   source = "./modules/lambda-function"
+  count  = var.create_backlog_lambda ? 1 : 0
 
   name      = var.lambda_name
   log_level = var.lambda_log_level
@@ -40,43 +41,64 @@ module "compute_queue_backlog_lambda" {
 
 # Create cloudwatch event resources to invoke the compute-queue-backlog lambda
 resource "aws_cloudwatch_event_rule" "compute_queue_backlog" {
-  name                = "${module.compute_queue_backlog_lambda.name}-${var.service_name}"
-  description         = "Schedule execution of ${module.compute_queue_backlog_lambda.name} to compute queue backlog metrics for ${var.service_name} ${var.queue_name} queue."
+  count = var.create_backlog_lambda ? 1 : 0
+
+  name                = "${local.lambda_name}-${var.service_name}"
+  description         = "Schedule execution of ${local.lambda_name} to compute queue backlog metrics for ${var.service_name} ${var.queue_name} queue."
   schedule_expression = var.lambda_invocation_interval
 
   tags = merge(
     {
-      Name        = "${module.compute_queue_backlog_lambda.name}-${var.service_name}"
-      Description = "Schedule execution of ${module.compute_queue_backlog_lambda.name} to compute queue backlog metrics for ${var.service_name} ${var.queue_name} queue."
+      Name        = "${local.lambda_name}-${var.service_name}"
+      Description = "Schedule execution of ${local.lambda_name} to compute queue backlog metrics for ${var.service_name} ${var.queue_name} queue."
     },
     var.cloudwatch_event_rule_tags
   )
 }
 
+locals {
+  # The services are processed by a single invocation, see compute_queue_backlog.py
+  service_event = {
+    cluster_name                     = var.cluster_name
+    service_name                     = var.service_name
+    metric_name                      = var.metric_name
+    queue_name                       = var.queue_name
+    queue_owner_aws_account_id       = var.queue_owner_aws_account_id != "" ? var.queue_owner_aws_account_id : data.aws_caller_identity.current.account_id
+    est_secs_per_msg                 = var.service_est_secs_per_msg
+    processing_time_metric_namespace = var.processing_time_metric_namespace
+    processing_time_statistic        = var.processing_time_statistic
+    processing_time_window_seconds   = var.processing_time_window_seconds
+    in_flight_weight                 = var.in_flight_weight
+  }
+  # The lambda computing this service's metrics, either created here or the
+  # one of the pipeline listing this service in its additional_services
+  lambda_name               = var.create_backlog_lambda ? module.compute_queue_backlog_lambda[0].name : ""
+  lambda_execution_role_arn = var.create_backlog_lambda ? module.compute_queue_backlog_lambda[0].execution_role_arn : var.backlog_lambda_execution_role_arn
+}
+
 resource "aws_cloudwatch_event_target" "compute_queue_backlog" {
-  rule      = aws_cloudwatch_event_rule.compute_queue_backlog.name
-  target_id = "${module.compute_queue_backlog_lambda.name}-${var.service_name}"
-  arn       = module.compute_queue_backlog_lambda.arn
-  input = templatefile(
-    "${path.module}/files/cw_event_target_args.json.tpl",
-    {
-      cluster_name               = var.cluster_name,
-      service_name               = var.service_name,
-      metric_name                = var.metric_name,
-      queue_name                 = var.queue_name,
-      queue_owner_aws_account_id = var.queue_owner_aws_account_id != "" ? var.queue_owner_aws_account_id : data.aws_caller_identity.current.account_id,
-      est_secs_per_msg           = var.service_est_secs_per_msg,
+  count = var.create_backlog_lambda ? 1 : 0
+
+  rule      = aws_cloudwatch_event_rule.compute_queue_backlog[0].name
+  target_id = "${local.lambda_name}-${var.service_name}"
+  arn       = module.compute_queue_backlog_lambda[0].arn
+  input = jsonencode({
+    services = concat([local.service_event], var.additional_services)
   })
 }
 
 resource "aws_lambda_permission" "compute_queue_backlog" {
+  count = var.create_backlog_lambda ? 1 : 0
+
   action        = "lambda:InvokeFunction"
-  function_name = module.compute_queue_backlog_lambda.name
+  function_name = local.lambda_name
   principal     = "events.amazonaws.com"
-  source_arn    = aws_cloudwatch_event_rule.compute_queue_backlog.arn
+  source_arn    = aws_cloudwatch_event_rule.compute_queue_backlog[0].arn
 }
 
 resource "aws_sqs_queue_policy" "main" {
+  count = var.create_backlog_lambda || var.backlog_lambda_execution_role_arn != "" ? 1 : 0
+
   queue_url = var.queue_url
   policy    = data.aws_iam_policy_document.sqs.json
 }
@@ -88,7 +110,7 @@ data "aws_iam_policy_document" "sqs" {
     resources = [var.queue_arn]
 
     principals {
-      identifiers = [module.compute_queue_backlog_lambda.execution_role_arn]
+      identifiers = [local.lambda_execution_role_arn]
       type        = "AWS"
     }
   }
@@ -1,4 +1,4 @@
-"""Determine queue backlog for an ECS service or task group.
+"""Determine queue backlog for ECS services or task groups.
 
 This lambda function computes the following metrics.
     QueueBacklog - Non-negative integer that represents the estimated duration
@@ -8,12 +8,26 @@ This lambda function computes the following metrics.
         reader as a boolean, that indicates if a queue is backlogged with no
         consumer. If so, the value is '1'. Otherwise, the value is '0'.
 
+The backlog is
+    (visible + in_flight_weight * in_flight) * secs_per_msg / running_tasks
+where in_flight are the messages being processed
+(ApproximateNumberOfMessagesNotVisible), and secs_per_msg is the statistic
+(e.g. p90) of the ProcessingTime metric published by the consumers (see
+inference_engine.consumer.EmfStageHook) over the last window_seconds, falling
+back to est_secs_per_msg when there are no datapoints.
+
+The event is either a single service, or {"services": [...]} to process many
+services in one invocation. ECS services are described in batches of 10 per
+cluster, the ProcessingTime statistics fetched with one GetMetricData call
+and the metrics put in batches, and queue URLs are cached across warm
+invocations.
+
 """
 
 import datetime
 import logging
 import os
-from typing import Any, Dict, Mapping
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 
 import boto3
 
@@ -23,112 +37,242 @@ logger.setLevel(log_level)
 
 cw = boto3.client("cloudwatch")
 ecs = boto3.client("ecs")
-ssm = boto3.client("ssm")
+sqs = boto3.client("sqs")
+
+IN_FLIGHT_METRIC_NAME = "ApproximateNumberOfMessagesNotVisible"
+DESCRIBE_SERVICES_MAX = 10
+GET_METRIC_DATA_MAX_QUERIES = 500
+PUT_METRIC_DATA_MAX_METRICS = 1000
+
+# (queue_name, owner account id) -> queue url, kept across warm invocations
+_queue_urls: Dict[Tuple[str, str], str] = {}
+
+
+def _chunks(items: List[Any], size: int) -> List[List[Any]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
 
 
-def get_queue_metric_from_sqs(event: Mapping[str, Any]) -> int:
-    """Retrieve the assigned queue metric for an SQS queue."""
-    sqs = boto3.client("sqs")
+def get_queue_url(queue_name: str, owner_account_id: str) -> str:
+    """Get the (cached) url of a queue."""
+    key = (queue_name, owner_account_id)
+    if key not in _queue_urls:
+        _queue_urls[key] = sqs.get_queue_url(
+            QueueName=queue_name, QueueOwnerAWSAccountId=owner_account_id
+        )["QueueUrl"]
+    return _queue_urls[key]
+
+
+def get_queue_metrics_from_sqs(event: Mapping[str, Any]) -> Tuple[int, int]:
+    """Retrieve the assigned queue metric & in flight messages of a queue."""
     metric_name = event.get("metric_name", "ApproximateNumberOfMessages")
-    queue_url = sqs.get_queue_url(
-        QueueName=event["queue_name"],
-        QueueOwnerAWSAccountId=event["queue_owner_aws_account_id"],
-    )["QueueUrl"]
-    queue_attrs = sqs.get_queue_attributes(
-        QueueUrl=queue_url, AttributeNames=[metric_name]
-    )["Attributes"]
+    key = (event["queue_name"], event["queue_owner_aws_account_id"])
+    try:
+        queue_attrs = sqs.get_queue_attributes(
+            QueueUrl=get_queue_url(*key),
+            AttributeNames=[metric_name, IN_FLIGHT_METRIC_NAME],
+        )["Attributes"]
+    except sqs.exceptions.QueueDoesNotExist:
+        # The queue may have been recreated since its url was cached
+        _queue_urls.pop(key, None)
+        raise
 
-    return int(queue_attrs.get(metric_name, 0))
+    return (
+        int(queue_attrs.get(metric_name, 0)),
+        int(queue_attrs.get(IN_FLIGHT_METRIC_NAME, 0)),
+    )
 
 
-def lambda_handler(
-    event: Mapping[str, Any], context: Mapping[str, Any]
-) -> Dict[str, Any]:
-    """Entrypoint to compute the metrics."""
-    metric_value = get_queue_metric_from_sqs(event)
+def describe_services(
+    events: List[Mapping[str, Any]]
+) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Describe the ECS services, in batches of 10 per cluster."""
+    services_by_cluster: Dict[str, List[str]] = {}
+    for event in events:
+        services = services_by_cluster.setdefault(event["cluster_name"], [])
+        if event["service_name"] not in services:
+            services.append(event["service_name"])
+
+    descriptions = {}
+    for cluster, services in services_by_cluster.items():
+        for chunk in _chunks(services, DESCRIBE_SERVICES_MAX):
+            response = ecs.describe_services(cluster=cluster, services=chunk)
+            for service_desc in response["services"]:
+                descriptions[
+                    (cluster, service_desc["serviceName"])
+                ] = service_desc
+            for failure in response.get("failures", []):
+                logger.error(
+                    "Failed to describe service in cluster=%s: %s",
+                    cluster,
+                    failure,
+                )
+    return descriptions
+
 
-    cluster = event["cluster_name"]
-    service = event["service_name"]
-    queue_name = event["queue_name"]
+def get_secs_per_msg(events: List[Mapping[str, Any]]) -> List[float]:
+    """Retrieve the measured processing time of a message, per event.
 
-    service_desc = ecs.describe_services(cluster=cluster, services=[service])[
-        "services"
-    ][0]
-    num_tasks = service_desc["desiredCount"]
+    Uses the processing_time_statistic (e.g. "p90" or "Average") of the
+    processing_time_metric_name metric, in the
+    processing_time_metric_namespace namespace with a QueueName dimension,
+    over the last processing_time_window_seconds. Falls back to
+    est_secs_per_msg if not configured or if there are no datapoints.
+    """
+    secs_per_msg = [float(e.get("est_secs_per_msg", 1)) for e in events]
+    queries = []
+    for i, event in enumerate(events):
+        namespace = event.get("processing_time_metric_namespace")
+        if not namespace:
+            continue
 
-    queue_requires_consumer = 1 if num_tasks == 0 and metric_value > 0 else 0
-    cw.put_metric_data(
-        Namespace="AWS/ECS",
-        MetricData=[
+        window = int(event.get("processing_time_window_seconds", 600))
+        # The period must be a multiple of 60 seconds
+        period = max(60, window - window % 60)
+        metric_name = event.get(
+            "processing_time_metric_name", "ProcessingTime"
+        )
+        queries.append(
             {
-                "MetricName": "QueueRequiresConsumer",
-                "Dimensions": [
-                    {"Name": "ClusterName", "Value": cluster},
-                    {"Name": "ServiceName", "Value": service},
-                    {"Name": "QueueName", "Value": queue_name},
-                ],
-                "Timestamp": datetime.datetime.utcnow(),
-                "Value": queue_requires_consumer,
+                "Id": f"q{i}",
+                "MetricStat": {
+                    "Metric": {
+                        "Namespace": namespace,
+                        "MetricName": metric_name,
+                        "Dimensions": [
+                            {"Name": "QueueName", "Value": event["queue_name"]}
+                        ],
+                    },
+                    "Period": period,
+                    "Stat": event.get("processing_time_statistic", "p90"),
+                },
+                "ReturnData": True,
             }
+        )
+    if not queries:
+        return secs_per_msg
+
+    measured = set()
+    now = datetime.datetime.utcnow()
+    max_period = max(q["MetricStat"]["Period"] for q in queries)
+    for chunk in _chunks(queries, GET_METRIC_DATA_MAX_QUERIES):
+        paginator = cw.get_paginator("get_metric_data")
+        for page in paginator.paginate(
+            MetricDataQueries=chunk,
+            StartTime=now - datetime.timedelta(seconds=max_period),
+            EndTime=now,
+            ScanBy="TimestampDescending",
+        ):
+            for result in page["MetricDataResults"]:
+                index = int(result["Id"][1:])
+                # Latest first, later pages have older values
+                if result["Values"] and index not in measured:
+                    secs_per_msg[index] = float(result["Values"][0])
+                    measured.add(index)
+    return secs_per_msg
+
+
+def _metric(
+    event: Mapping[str, Any], metric_name: str, value: float
+) -> Dict[str, Any]:
+    return {
+        "MetricName": metric_name,
+        "Dimensions": [
+            {"Name": "ClusterName", "Value": event["cluster_name"]},
+            {"Name": "ServiceName", "Value": event["service_name"]},
+            {"Name": "QueueName", "Value": event["queue_name"]},
         ],
-    )
-    logger.info(
-        "Emitted QueueRequiresConsumer=%d for cluster=%s service=%s queue=%s.",
-        queue_requires_consumer,
-        cluster,
-        service,
-        queue_name,
-        extra={
-            "ctx": {
-                "cluster_name": cluster,
-                "service_name": service,
-                "queue_name": queue_name,
-                "queue_requires_consumer": queue_requires_consumer,
-            }
-        },
-    )
+        "Timestamp": datetime.datetime.utcnow(),
+        "Value": value,
+    }
+
+
+def compute_metrics(
+    event: Mapping[str, Any],
+    service_desc: Mapping[str, Any],
+    secs_per_msg: float,
+) -> List[Dict[str, Any]]:
+    """Compute the QueueRequiresConsumer & QueueBacklog of a service."""
+    metric_value, in_flight = get_queue_metrics_from_sqs(event)
+    # Tasks still starting don't consume messages yet
+    num_tasks = service_desc["runningCount"]
+    desired_tasks = service_desc["desiredCount"]
 
-    secs_per_msg = float(event.get("est_secs_per_msg", 1))
+    queue_requires_consumer = (
+        1 if desired_tasks == 0 and metric_value > 0 else 0
+    )
+    metrics = [
+        _metric(event, "QueueRequiresConsumer", queue_requires_consumer)
+    ]
 
+    in_flight_weight = float(event.get("in_flight_weight", 0.5))
+    messages = metric_value + in_flight_weight * in_flight
+    backlog_secs: Optional[float] = None
     if num_tasks > 0:
-        backlog_secs = metric_value * secs_per_msg / num_tasks
-    elif metric_value == 0:
+        backlog_secs = messages * secs_per_msg / num_tasks
+    elif messages == 0:
         backlog_secs = 0
-    else:
-        # Backlog is undefined when there are no tasks but a message
-        # backlog.
-        return {}
-
-    cw.put_metric_data(
-        Namespace="AWS/ECS",
-        MetricData=[
-            {
-                "MetricName": "QueueBacklog",
-                "Dimensions": [
-                    {"Name": "ClusterName", "Value": cluster},
-                    {"Name": "ServiceName", "Value": service},
-                    {"Name": "QueueName", "Value": queue_name},
-                ],
-                "Timestamp": datetime.datetime.utcnow(),
-                "Value": backlog_secs,
-            }
-        ],
-    )
+    # Else the backlog is undefined, there are no tasks but a message
+    # backlog.
+    if backlog_secs is not None:
+        metrics.append(_metric(event, "QueueBacklog", backlog_secs))
 
     logger.info(
-        "Emitted QueueBacklog=%d for cluster=%s service=%s queue=%s.",
+        "Computed QueueRequiresConsumer=%d QueueBacklog=%s for cluster=%s "
+        "service=%s queue=%s.",
+        queue_requires_consumer,
         backlog_secs,
-        cluster,
-        service,
-        queue_name,
+        event["cluster_name"],
+        event["service_name"],
+        event["queue_name"],
         extra={
             "ctx": {
-                "cluster_name": cluster,
-                "service_name": service,
-                "queue_name": queue_name,
+                "cluster_name": event["cluster_name"],
+                "service_name": event["service_name"],
+                "queue_name": event["queue_name"],
                 "queue_requires_consumer": queue_requires_consumer,
+                "queue_backlog": backlog_secs,
+                "visible": metric_value,
+                "in_flight": in_flight,
+                "secs_per_msg": secs_per_msg,
+                "running_tasks": num_tasks,
             }
         },
     )
+    return metrics
 
-    return {}
+
+def put_metric_data(metric_data: List[Dict[str, Any]]) -> None:
+    """Put the metrics, in batches."""
+    for chunk in _chunks(metric_data, PUT_METRIC_DATA_MAX_METRICS):
+        cw.put_metric_data(Namespace="AWS/ECS", MetricData=chunk)
+
+
+def lambda_handler(
+    event: Mapping[str, Any], context: Mapping[str, Any]
+) -> Dict[str, Any]:
+    """Entrypoint to compute the metrics."""
+    events: List[Mapping[str, Any]] = event.get("services") or [event]
+    service_descs = describe_services(events)
+    secs_per_msg = get_secs_per_msg(events)
+
+    metric_data: List[Dict[str, Any]] = []
+    failed = []
+    for service_event, service_secs_per_msg in zip(events, secs_per_msg):
+        key = (service_event["cluster_name"], service_event["service_name"])
+        try:
+            metric_data += compute_metrics(
+                service_event, service_descs[key], service_secs_per_msg
+            )
+        except Exception:  # pylint: disable=broad-except
+            # Don't let one service stop the metrics of the others
+            logger.exception("Failed to compute metrics for %s", key)
+            failed.append("/".join(key))
+
+    put_metric_data(metric_data)
+    logger.info(
+        "Emitted %d metrics for %d services, failed=%s.",
+        len(metric_data),
+        len(events),
+        failed,
+    )
+    return {"num_services": len(events), "failed": failed}
@@ -24,6 +24,7 @@ resource "aws_lambda_function" "compute_queue_backlog" { # tfsec:ignore:aws-lamb
   function_name = var.name
   role          = aws_iam_role.compute_queue_backlog.arn
   handler       = "compute_queue_backlog.lambda_handler"
+  timeout       = var.timeout
 
   source_code_hash = filebase64sha256(data.archive_file.compute_queue_backlog.output_path)
 
@@ -94,6 +95,7 @@ data "aws_iam_policy_document" "compute_queue_backlog" {
     effect = "Allow"
 
     actions = [
+      "cloudwatch:GetMetricData",
       "cloudwatch:PutMetricData",
       "ecs:DescribeServices",
     ]
@@ -10,6 +10,12 @@ variable "log_level" {
   type        = string
 }
 
+variable "timeout" {
+  description = "The lambda timeout in seconds, enough to process all the services of an invocation."
+  default     = 30
+  type        = number
+}
+
 variable "tags" {
   description = "Map of AWS tags to add to the Lambda. Note that the 'Name' tag is always added, and is the same as the value of the resource's 'name' attribute by default. The 'Description' tag is added as well."
   default     = {}
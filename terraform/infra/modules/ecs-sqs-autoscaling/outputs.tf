@@ -1,4 +1,14 @@
 output "aws_cloudwatch_event_rule_arn" {
-  value       = aws_cloudwatch_event_rule.compute_queue_backlog.arn
-  description = "ARN for the CloudWatch Event Rule that invokes the compute queue backlog lambda at a user-defined interval."
+  value       = join("", aws_cloudwatch_event_rule.compute_queue_backlog[*].arn)
+  description = "ARN for the CloudWatch Event Rule that invokes the compute queue backlog lambda at a user-defined interval. Empty if create_backlog_lambda is false."
+}
+
+output "lambda_execution_role_arn" {
+  value       = local.lambda_execution_role_arn
+  description = "ARN for the execution role of the compute queue backlog lambda, to pass as the backlog_lambda_execution_role_arn of the services listed in additional_services."
+}
+
+output "service_event" {
+  value       = local.service_event
+  description = "The service as processed by the compute queue backlog lambda, to list in the additional_services of another module when create_backlog_lambda is false."
 }
@@ -22,7 +22,31 @@ variable "service_min_capacity" {
 }
 
 variable "service_est_secs_per_msg" {
-  description = "Non-negative integer that represents the estimated number of seconds it takes the service to consume a single message from its queue."
+  description = "Non-negative integer that represents the estimated number of seconds it takes the service to consume a single message from its queue. Used when no processing_time_metric_namespace is set, or no ProcessingTime datapoints are available."
+  type        = number
+}
+
+variable "processing_time_metric_namespace" {
+  description = "CloudWatch namespace of the ProcessingTime metric published by the consumers (QueueName dimension). If empty, service_est_secs_per_msg is used as the processing time of a message."
+  default     = ""
+  type        = string
+}
+
+variable "processing_time_statistic" {
+  description = "Statistic of the ProcessingTime metric used as the processing time of a message, a percentile (e.g. p90) or Average."
+  default     = "p90"
+  type        = string
+}
+
+variable "processing_time_window_seconds" {
+  description = "Window, in seconds, over which the ProcessingTime statistic is computed."
+  default     = 600
+  type        = number
+}
+
+variable "in_flight_weight" {
+  description = "Weight of the in flight (being processed) messages in the queue backlog, relative to the visible messages. 0.5 assumes in flight messages are half done on average."
+  default     = 0.5
   type        = number
 }
 
@@ -66,7 +90,7 @@ variable "queue_arn" {
 }
 
 variable "queue_backlog_target_value" {
-  description = "Queue backlog (in seconds) to maintain for the service when under maximum load. Queue backlog is defined as (metric*secs_per_msg/num_tasks). Defaults to 600 seconds (10 minutes)."
+  description = "Queue backlog (in seconds) to maintain for the service when under maximum load. Queue backlog is defined as ((metric + in_flight_weight*in_flight)*secs_per_msg/running_tasks). Defaults to 600 seconds (10 minutes)."
   default     = 0
   type        = number
 }
@@ -130,3 +154,21 @@ variable "queue_owner_aws_account_id" {
   default     = ""
   type        = string
 }
+
+variable "additional_services" {
+  description = "Other services (the service_event outputs of modules with create_backlog_lambda = false) whose queue backlog metrics are computed by the same lambda invocation. Saves a lambda invocation and API calls per service when running many pipelines."
+  default     = []
+  type        = list(any)
+}
+
+variable "create_backlog_lambda" {
+  description = "Whether to create the compute queue backlog lambda and its schedule. Set to false for a service listed in the additional_services of another module, so that its metrics are computed once per interval, by that module's lambda."
+  default     = true
+  type        = bool
+}
+
+variable "backlog_lambda_execution_role_arn" {
+  description = "With create_backlog_lambda = false, the execution role of the lambda computing the metrics (the lambda_execution_role_arn output of the module listing this service), allowed to read the queue attributes. No queue policy is created if empty."
+  default     = ""
+  type        = string
+}
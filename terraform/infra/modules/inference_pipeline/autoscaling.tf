@@ -7,6 +7,7 @@ module "autoscaling" {
   service_max_capacity               = var.service_autoscaling_max_capacity
   service_min_capacity               = var.service_autoscaling_min_capacity
   service_est_secs_per_msg           = var.service_est_secs_per_msg
+  processing_time_metric_namespace   = var.processing_time_metric_namespace
   service_scalein_cooldown           = var.service_autoscaling_scalein_cooldown
   service_scaleout_cooldown          = var.service_autoscaling_scaleout_cooldown
   service_rampup_capacity            = var.service_autoscaling_rampup_capacity
@@ -16,6 +17,9 @@ module "autoscaling" {
   queue_backlog_target_value         = var.queue_backlog_target_value
   lambda_name                        = "${var.name}-lambda"
   lambda_invocation_interval         = var.compute_queue_backlog_lambda_invocation_interval
+  create_backlog_lambda              = var.create_compute_queue_backlog_lambda
+  additional_services                = var.compute_queue_backlog_additional_services
+  backlog_lambda_execution_role_arn  = var.compute_queue_backlog_lambda_execution_role_arn
   lambda_tags                        = local.tags
   cloudwatch_event_rule_tags         = local.tags
   queue_requires_consumer_alarm_tags = local.tags
@@ -5,12 +5,29 @@ module "dynamodb_table" { # tfsec:ignore:aws-dynamodb-enable-recovery
   source  = "terraform-aws-modules/dynamodb-table/aws"
   version = ">= 3.2.0"
 
-  attributes = [
+  attributes = concat(
+    [
+      {
+        name = "message_id"
+        type = "S"
+      }
+    ],
+    var.dynamodb_request_id_index_enabled ? [
+      {
+        name = "request_id"
+        type = "S"
+      }
+    ] : []
+  )
+  # Sparse, KEYS_ONLY index to find the message_ids of a request_id, the
+  # items are then read from the table (see DynamoDBClient)
+  global_secondary_indexes = var.dynamodb_request_id_index_enabled ? [
     {
-      name = "message_id"
-      type = "S"
+      name            = local.dynamodb_request_id_index_name
+      hash_key        = "request_id"
+      projection_type = "KEYS_ONLY"
     }
-  ]
+  ] : []
   deletion_protection_enabled    = var.dynamodb_deletion_protection_enabled
   hash_key                       = "message_id"
   name                           = "${var.name}-results"
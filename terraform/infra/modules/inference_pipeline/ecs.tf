@@ -89,6 +89,10 @@ module "ecs_service" {
           name  = "DDB_TABLE_NAME"
           value = module.dynamodb_table.dynamodb_table_id
         },
+        {
+          name  = "DDB_REQUEST_ID_INDEX_NAME"
+          value = var.dynamodb_request_id_index_enabled ? local.dynamodb_request_id_index_name : ""
+        },
         {
           name  = "HEARTBEAT_VISIBILITY_TIMEOUT"
           value = var.heartbeat_visibility_timeout_seconds
@@ -101,6 +105,10 @@ module "ecs_service" {
           name  = "ENABLE_ESC_SCALEIN_PROTECTION"
           value = var.enable_ecs_scalein_protection
         },
+        {
+          name  = "METRICS_EMF_NAMESPACE"
+          value = var.processing_time_metric_namespace
+        },
         ],
         var.container_environment
       )
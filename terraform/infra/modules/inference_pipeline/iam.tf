@@ -79,8 +79,11 @@ resource "aws_iam_policy" "ddb_full" {
           "dynamodb:UpdateItem",
           "dynamodb:PutItem"
         ],
-        Effect   = "Allow"
-        Resource = module.dynamodb_table.dynamodb_table_arn
+        Effect = "Allow"
+        Resource = [
+          module.dynamodb_table.dynamodb_table_arn,
+          "${module.dynamodb_table.dynamodb_table_arn}/index/*",
+        ]
       },
     ]
   })
@@ -16,6 +16,8 @@ locals {
   )
 
   queue_name = "${var.name}.fifo"
+
+  dynamodb_request_id_index_name = "request_id-index"
 }
 
 
@@ -30,3 +30,13 @@ output "ecr_image_url" {
   value       = local.image_url
   description = "Image URL associated with the given ECR image"
 }
+
+output "autoscaling_service_event" {
+  value       = var.enable_autoscaling ? module.autoscaling[0].service_event : null
+  description = "The service as processed by the compute queue backlog lambda, to list in the compute_queue_backlog_additional_services of another pipeline."
+}
+
+output "autoscaling_lambda_execution_role_arn" {
+  value       = var.enable_autoscaling ? module.autoscaling[0].lambda_execution_role_arn : ""
+  description = "ARN for the execution role of the compute queue backlog lambda, to pass as the compute_queue_backlog_lambda_execution_role_arn of the pipelines listed in compute_queue_backlog_additional_services."
+}
@@ -110,6 +110,12 @@ variable "service_autoscaling_rampup_capacity" {
   type        = number
 }
 
+variable "processing_time_metric_namespace" {
+  description = "CloudWatch namespace the consumers publish their ProcessingTime metric to (METRICS_EMF_NAMESPACE env var), used by the autoscaling to estimate the queue backlog. If empty, service_est_secs_per_msg is used instead."
+  type        = string
+  default     = "InferenceEngine"
+}
+
 variable "service_est_secs_per_msg" {
   description = "Non-negative integer that represents the estimated number of seconds it takes the service to consume a single message from its queue."
   type        = number
@@ -128,6 +134,24 @@ variable "compute_queue_backlog_lambda_invocation_interval" {
   type        = string
 }
 
+variable "create_compute_queue_backlog_lambda" {
+  description = "Whether to create the compute queue backlog lambda and its schedule. Set to false for a pipeline listed in the compute_queue_backlog_additional_services of another pipeline, whose lambda then computes its metrics."
+  default     = true
+  type        = bool
+}
+
+variable "compute_queue_backlog_additional_services" {
+  description = "The autoscaling_service_event outputs of the pipelines with create_compute_queue_backlog_lambda = false, whose queue backlog metrics are computed by this pipeline's lambda invocation."
+  default     = []
+  type        = list(any)
+}
+
+variable "compute_queue_backlog_lambda_execution_role_arn" {
+  description = "With create_compute_queue_backlog_lambda = false, the autoscaling_lambda_execution_role_arn output of the pipeline computing the metrics, allowed to read the queue attributes."
+  default     = ""
+  type        = string
+}
+
 
 variable "heartbeat_visibility_timeout_seconds" {
   description = "The visibility timeout that should be set by the Consumer heartbeat. An integer from 0 to 43200 (12 hours) as a string"
@@ -162,6 +186,12 @@ variable "dynamodb_point_in_time_recovery_enabled" {
   default     = false
 }
 
+variable "dynamodb_request_id_index_enabled" {
+  description = "Creates a global secondary index on request_id, to get results by request_id"
+  type        = bool
+  default     = false
+}
+
 
 
 # ################ SQS ################
@@ -127,6 +127,12 @@ variable "dynamodb_point_in_time_recovery_enabled" {
   default     = false
 }
 
+variable "dynamodb_request_id_index_enabled" {
+  description = "Creates a global secondary index on request_id, to get results by request_id"
+  type        = bool
+  default     = false
+}
+
 variable "queue_content_based_deduplication" {
   description = "Enables content-based deduplication for FIFO queues"
   type        = bool
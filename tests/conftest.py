@@ -10,13 +10,31 @@ import pytest
 from http_server_mock import HttpServerMock, _RunInBackground
 from mypy_boto3_dynamodb.service_resource import Table
 from mypy_boto3_sqs.service_resource import Queue
-from utils import create_queue, create_table
+from utils import REQUEST_ID_INDEX_NAME, create_queue, create_table
 
+from inference_engine.backends import InMemoryDynamoDB, InMemorySQS
 from inference_engine.consumer.consumer import ComputeResultCallableT, Consumer
 from inference_engine.dynamo_db_client import DynamoDBClient
 from inference_engine.producer.producer import Producer
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--backend",
+        choices=["local", "memory"],
+        default=os.environ.get("INFERENCE_ENGINE_TEST_BACKEND", "local"),
+        help=(
+            "local: SQS & DynamoDB at SQS_ENDPOINT_URL & DDB_ENDPOINT_URL "
+            "(see docker-compose.yml), memory: the in-memory backends"
+        ),
+    )
+
+
+@pytest.fixture
+def backend(request: pytest.FixtureRequest) -> str:
+    return request.config.getoption("--backend")
+
+
 @pytest.fixture
 def sqs_queue_name() -> str:
     return f"queue_{uuid.uuid4()}.fifo"
@@ -38,7 +56,10 @@ def ddb_endpoint_url() -> str:
 
 
 @pytest.fixture
-def boto3_ddb_resource_kwargs(ddb_endpoint_url: str) -> dict:
+def boto3_ddb_resource_kwargs(ddb_endpoint_url: str, backend: str) -> dict:
+    if backend == "memory":
+        return {"dynamodb": InMemoryDynamoDB()}
+
     return {
         "use_ssl": False,
         "endpoint_url": ddb_endpoint_url,
@@ -64,7 +85,9 @@ def ddb_client(
     ddb_table: Table,
 ) -> DynamoDBClient:
     return DynamoDBClient(
-        table_name=ddb_table_name, **boto3_ddb_resource_kwargs
+        table_name=ddb_table_name,
+        request_id_index_name=REQUEST_ID_INDEX_NAME,
+        **boto3_ddb_resource_kwargs,
     )
 
 
@@ -96,7 +119,30 @@ def dl_queue(_create_queue: tuple[Queue, Queue]) -> Queue:
 
 
 @pytest.fixture
-def boto3_sqs_resource_kwargs(sqs_endpoint_url: str) -> dict:
+def standard_sqs_queue_name() -> str:
+    return f"queue_{uuid.uuid4()}"
+
+
+@pytest.fixture
+def standard_sqs_queue(
+    boto3_sqs_resource_kwargs: dict,
+    standard_sqs_queue_name: str,
+) -> Generator[Queue, None, None]:
+    queue, dl_queue = create_queue(
+        standard_sqs_queue_name, fifo=False, **boto3_sqs_resource_kwargs
+    )
+    yield queue
+    queue.purge()
+    queue.delete()
+    dl_queue.purge()
+    dl_queue.delete()
+
+
+@pytest.fixture
+def boto3_sqs_resource_kwargs(sqs_endpoint_url: str, backend: str) -> dict:
+    if backend == "memory":
+        return {"sqs": InMemorySQS()}
+
     return {
         "region_name": "elasticmq",
         "aws_secret_access_key": "x",
@@ -0,0 +1,260 @@
+"""Test the in-memory SQS & DynamoDB backends."""
+# pylint: disable=redefined-outer-name
+import json
+import time
+from decimal import Decimal
+
+import pytest
+
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+
+from inference_engine.backends import (
+    InMemoryDynamoDB,
+    InMemorySQS,
+    evaluate_condition,
+)
+
+
+@pytest.fixture
+def sqs() -> InMemorySQS:
+    return InMemorySQS()
+
+
+@pytest.fixture
+def fifo_queue(sqs: InMemorySQS):
+    return sqs.create_queue(
+        QueueName="queue.fifo",
+        Attributes={
+            "FifoQueue": "true",
+            "ContentBasedDeduplication": "true",
+            "VisibilityTimeout": "30",
+        },
+    )
+
+
+@pytest.fixture
+def dynamodb() -> InMemoryDynamoDB:
+    return InMemoryDynamoDB()
+
+
+@pytest.fixture
+def table(dynamodb: InMemoryDynamoDB):
+    return dynamodb.create_table(
+        TableName="table",
+        KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
+        TimeToLiveAttribute="expiration",
+    )
+
+
+def test_queue_visibility_timeout(sqs: InMemorySQS):
+    queue = sqs.create_queue(
+        QueueName="queue", Attributes={"VisibilityTimeout": "30"}
+    )
+    queue.send_message(MessageBody="a")
+    (message,) = queue.receive_messages()
+    assert message.body == "a"
+    assert queue.receive_messages() == []
+    assert queue.attributes["ApproximateNumberOfMessagesNotVisible"] == "1"
+
+    message.change_visibility(VisibilityTimeout=0)
+    (message,) = queue.receive_messages(AttributeNames=["All"])
+    assert message.attributes["ApproximateReceiveCount"] == "2"
+
+    message.delete()
+    assert queue.receive_messages() == []
+    assert queue.attributes["ApproximateNumberOfMessages"] == "0"
+
+
+def test_queue_long_polling(sqs: InMemorySQS):
+    queue = sqs.create_queue(QueueName="queue", Attributes={})
+    queue.send_message(MessageBody="a", DelaySeconds=1)
+    assert queue.receive_messages() == []
+
+    start = time.monotonic()
+    (message,) = queue.receive_messages(WaitTimeSeconds=5)
+    assert message.body == "a"
+    assert time.monotonic() - start < 2
+
+
+def test_fifo_group_ordering(fifo_queue):
+    for body in ["a1", "a2", "b1"]:
+        fifo_queue.send_message(MessageBody=body, MessageGroupId=body[0])
+
+    messages = fifo_queue.receive_messages(MaxNumberOfMessages=10)
+    assert [m.body for m in messages] == ["a1", "a2", "b1"]
+
+    for message in messages:
+        message.change_visibility(VisibilityTimeout=0)
+    (message,) = fifo_queue.receive_messages()
+    assert message.body == "a1"
+    # Group a is blocked until a1 is deleted
+    (message_b,) = fifo_queue.receive_messages(MaxNumberOfMessages=10)
+    assert message_b.body == "b1"
+
+    message.delete()
+    (message,) = fifo_queue.receive_messages()
+    assert message.body == "a2"
+
+
+def test_fifo_deduplication(fifo_queue):
+    first = fifo_queue.send_message(MessageBody="a", MessageGroupId="g")
+    second = fifo_queue.send_message(MessageBody="a", MessageGroupId="g")
+    assert first["MessageId"] == second["MessageId"]
+    assert len(fifo_queue.receive_messages(MaxNumberOfMessages=10)) == 1
+
+
+def test_fifo_missing_group_id(fifo_queue):
+    with pytest.raises(ClientError, match="MessageGroupId"):
+        fifo_queue.send_message(MessageBody="a")
+
+
+def test_redrive(sqs: InMemorySQS):
+    dl_queue = sqs.create_queue(QueueName="dl_queue", Attributes={})
+    queue = sqs.create_queue(
+        QueueName="queue",
+        Attributes={
+            "VisibilityTimeout": "0",
+            "RedrivePolicy": json.dumps(
+                {
+                    "deadLetterTargetArn": dl_queue.attributes["QueueArn"],
+                    "maxReceiveCount": "2",
+                }
+            ),
+        },
+    )
+    queue.send_message(MessageBody="a")
+    assert len(queue.receive_messages()) == 1
+    assert len(queue.receive_messages()) == 1
+    assert queue.receive_messages() == []
+    (message,) = dl_queue.receive_messages()
+    assert message.body == "a"
+
+
+def test_change_visibility_errors(sqs: InMemorySQS):
+    queue = sqs.create_queue(
+        QueueName="queue", Attributes={"VisibilityTimeout": "0"}
+    )
+    queue.send_message(MessageBody="a")
+    (stale,) = queue.receive_messages()
+    (message,) = queue.receive_messages()
+    with pytest.raises(ClientError, match="ReceiptHandleIsInvalid"):
+        stale.change_visibility(VisibilityTimeout=10)
+
+    # Still valid after the visibility timeout expired
+    message.change_visibility(VisibilityTimeout=10)
+    assert queue.receive_messages() == []
+
+    message.delete()
+    with pytest.raises(ClientError, match="ReceiptHandleIsInvalid"):
+        message.change_visibility(VisibilityTimeout=10)
+
+
+def test_get_queue_by_name(sqs: InMemorySQS):
+    with pytest.raises(ClientError, match="NonExistentQueue"):
+        sqs.get_queue_by_name(QueueName="missing")
+
+    queue = sqs.create_queue(QueueName="queue", Attributes={})
+    assert sqs.get_queue_by_name(QueueName="queue") is queue
+    url = sqs.meta.client.get_queue_url(QueueName="queue")["QueueUrl"]
+    assert url == queue.url
+
+
+@pytest.mark.parametrize(
+    "condition,expected",
+    [
+        (Attr("status").eq("submitted"), True),
+        (Attr("status").ne("submitted"), False),
+        (Attr("status").is_in(["success", "submitted"]), True),
+        (Attr("status").not_exists() | Attr("count").gt(1), True),
+        (Attr("status").exists() & Attr("count").lt(1), False),
+        (Attr("count").between(1, 3), True),
+        (Attr("status").begins_with("sub"), True),
+        (~Attr("missing").exists(), True),
+        (Attr("tags").contains("a"), True),
+        (Attr("tags").size().eq(2), True),
+    ],
+)
+def test_evaluate_condition(condition, expected: bool):
+    item = {"status": "submitted", "count": Decimal(2), "tags": ["a", "b"]}
+    assert evaluate_condition(condition, item) is expected
+
+
+def test_put_item_condition(table):
+    table.put_item(Item={"message_id": "a", "status": "submitted"})
+    with pytest.raises(ClientError, match="ConditionalCheckFailed"):
+        table.put_item(
+            Item={"message_id": "a", "status": "success"},
+            ConditionExpression=Attr("message_id").not_exists(),
+        )
+    assert table.get_item(Key={"message_id": "a"})["Item"]["status"] == (
+        "submitted"
+    )
+
+
+def test_update_item(table):
+    response = table.update_item(
+        Key={"message_id": "a"},
+        UpdateExpression=(
+            "SET #status = :status, attempts = if_not_exists(attempts, :zero)"
+            " + :one REMOVE progress"
+        ),
+        ExpressionAttributeNames={"#status": "status"},
+        ExpressionAttributeValues={
+            ":status": "in_progress",
+            ":zero": 0,
+            ":one": 1,
+        },
+        ReturnValues="ALL_NEW",
+    )
+    assert response["Attributes"] == {
+        "message_id": "a",
+        "status": "in_progress",
+        "attempts": Decimal(1),
+    }
+
+
+def test_get_item_projection(table):
+    table.put_item(Item={"message_id": "a", "status": "success", "x": 1})
+    item = table.get_item(
+        Key={"message_id": "a"},
+        ProjectionExpression="#status, x",
+        ExpressionAttributeNames={"#status": "status"},
+    )["Item"]
+    assert item == {"status": "success", "x": Decimal(1)}
+
+
+def test_ttl(table):
+    table.put_item(Item={"message_id": "a", "expiration": int(time.time())})
+    table.put_item(
+        Item={"message_id": "b", "expiration": int(time.time()) + 60}
+    )
+    time.sleep(1.1)
+    assert table.get_item(Key={"message_id": "a"}) == {}
+    assert "Item" in table.get_item(Key={"message_id": "b"})
+
+
+def test_float_unsupported(table):
+    with pytest.raises(TypeError):
+        table.put_item(Item={"message_id": "a", "x": 0.5})
+
+
+def test_batch_get_item(dynamodb: InMemoryDynamoDB, table):
+    for message_id in ["a", "b"]:
+        table.put_item(Item={"message_id": message_id})
+
+    response = dynamodb.batch_get_item(
+        RequestItems={
+            "table": {"Keys": [{"message_id": id_} for id_ in ["a", "b", "c"]]}
+        }
+    )
+    assert sorted(i["message_id"] for i in response["Responses"]["table"]) == [
+        "a",
+        "b",
+    ]
+    with pytest.raises(ClientError, match="ValidationException"):
+        dynamodb.batch_get_item(
+            RequestItems={
+                "table": {"Keys": [{"message_id": str(i)} for i in range(101)]}
+            }
+        )
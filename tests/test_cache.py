@@ -0,0 +1,31 @@
+"""Tests for the LRU cache."""
+import time
+
+import pytest
+
+from inference_engine._cache import LRUCache
+
+
+def test_lru_eviction():
+    cache: LRUCache[str, int] = LRUCache(2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_ttl():
+    cache: LRUCache[str, int] = LRUCache(2, ttl_seconds=0.05)
+    cache.put("a", 1)
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert not cache
+
+
+def test_invalid_size():
+    with pytest.raises(ValueError):
+        _ = LRUCache(0)
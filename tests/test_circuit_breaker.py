@@ -0,0 +1,107 @@
+"""Tests for the CircuitBreaker."""
+import time
+
+import pytest
+
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from inference_engine.consumer import (
+    CircuitBreaker,
+    CircuitBreakerConfig,
+    CircuitState,
+)
+
+
+def _client_error(code: str) -> ClientError:
+    return ClientError({"Error": {"Code": code}}, "PutItem")
+
+
+def test_opens_after_failure_threshold():
+    breaker = CircuitBreaker(
+        CircuitBreakerConfig(failure_threshold=3, reset_timeout_seconds=60)
+    )
+    breaker.record_failure("dynamodb")
+    breaker.record_failure("dynamodb")
+    # Successful calls of other dependencies don't reset the failures
+    breaker.record_success("sqs")
+    assert breaker.state == CircuitState.CLOSED
+    breaker.record_failure("dynamodb")
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.is_open
+    assert 30 <= breaker.seconds_until_probe <= 60
+
+
+def test_success_resets_failures():
+    breaker = CircuitBreaker(CircuitBreakerConfig(failure_threshold=2))
+    breaker.record_failure("dynamodb")
+    breaker.record_success("dynamodb")
+    breaker.record_failure("dynamodb")
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_half_open_probe():
+    transitions = []
+    breaker = CircuitBreaker(
+        CircuitBreakerConfig(
+            failure_threshold=1,
+            reset_timeout_seconds=0.05,
+            max_reset_timeout_seconds=0.1,
+            jitter=0,
+        )
+    )
+    breaker.add_listener(lambda old, new: transitions.append((old, new)))
+    breaker.record_failure("dynamodb")
+    assert breaker.is_open
+
+    # A failed probe opens it again, for longer
+    time.sleep(0.06)
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.record_failure("dynamodb")
+    assert breaker.is_open
+    assert breaker.seconds_until_probe > 0.05
+
+    time.sleep(0.11)
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Only a successful call of the failing dependency closes it
+    breaker.record_success("sqs")
+    assert breaker.state == CircuitState.HALF_OPEN
+    breaker.record_success("dynamodb")
+    assert breaker.state == CircuitState.CLOSED
+
+    assert transitions == [
+        (CircuitState.CLOSED, CircuitState.OPEN),
+        (CircuitState.OPEN, CircuitState.HALF_OPEN),
+        (CircuitState.HALF_OPEN, CircuitState.OPEN),
+        (CircuitState.OPEN, CircuitState.HALF_OPEN),
+        (CircuitState.HALF_OPEN, CircuitState.CLOSED),
+    ]
+
+
+@pytest.mark.parametrize(
+    "exp, is_failure",
+    [
+        (_client_error("ProvisionedThroughputExceededException"), True),
+        (EndpointConnectionError(endpoint_url="http://localhost"), True),
+        (_client_error("ConditionalCheckFailedException"), False),
+        (ValueError(), False),
+    ],
+)
+def test_record(exp: Exception, is_failure: bool):
+    breaker = CircuitBreaker(CircuitBreakerConfig(failure_threshold=1))
+    breaker.record("dynamodb", exp)
+    assert breaker.is_open == is_failure
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"failure_threshold": 0},
+        {"reset_timeout_seconds": 0},
+        {"reset_timeout_seconds": 10, "max_reset_timeout_seconds": 5},
+        {"backoff_multiplier": 0.5},
+        {"jitter": 2},
+    ],
+)
+def test_invalid(kwargs: dict):
+    with pytest.raises(ValueError):
+        CircuitBreakerConfig(**kwargs)
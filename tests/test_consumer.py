@@ -4,7 +4,14 @@ import time
 
 import pytest
 
-from inference_engine.consumer import Consumer, ConsumerAlreadyConsumingError
+from inference_engine.consumer import (
+    Consumer,
+    ConsumerAlreadyConsumingError,
+    ConsumerOptions,
+)
+from inference_engine.consumer._ecs_scalein_protection_manager import (
+    SharedScaleInProtection,
+)
 from inference_engine.dynamo_db_client import DynamoDBClient
 
 
@@ -70,3 +77,20 @@ def test_multiple_stop_ok(consumer: Consumer):
 
 def test_is_processing_no_messages(consumer: Consumer):
     assert not consumer.is_processing_message
+
+
+def test_shared_scalein_protection(mocker):
+    manager = mocker.MagicMock()
+    protection = SharedScaleInProtection(lambda: manager)
+    with protection.hold():
+        with protection.hold():
+            assert protection.num_holders == 2
+        manager.__exit__.assert_not_called()
+    assert protection.num_holders == 0
+    manager.__enter__.assert_called_once()
+    manager.__exit__.assert_called_once()
+
+
+def test_invalid_max_concurrency():
+    with pytest.raises(ValueError):
+        _ = ConsumerOptions(max_concurrency=0)
@@ -9,6 +9,7 @@ from pytest_mock import MockerFixture
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
 
+from inference_engine.consumer import CircuitBreaker, CircuitBreakerConfig
 from inference_engine.consumer.api_wrapper import get_app
 from inference_engine.consumer.consumer import Consumer
 
@@ -42,8 +43,29 @@ def test_ready(client: TestClient, mocker: MockerFixture, consumer: Consumer):
     assert client.get("/ready").status_code == 500
 
 
+def test_ready_circuit_open(client: TestClient, consumer: Consumer):
+    consumer.circuit_breaker = CircuitBreaker(
+        CircuitBreakerConfig(failure_threshold=1, reset_timeout_seconds=60)
+    )
+    consumer.circuit_breaker.record_failure("dynamodb")
+    assert client.get("/ready").status_code == 503
+    assert client.get("/health").status_code == 200
+
+
 @pytest.mark.parametrize("route", ["ready", "health"])
 def test_shutdown(client: TestClient, consumer: Consumer, route: str):
     consumer.stop_consuming()
     assert not consumer.is_running
     assert client.get(f"/{route}").status_code == 500
+
+
+def test_metrics(client: TestClient, consumer: Consumer):
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain")
+    assert "# TYPE inference_engine_consumer_stage_seconds histogram" in (
+        resp.text
+    )
+    assert "# TYPE inference_engine_consumer_messages_total counter" in (
+        resp.text
+    )
@@ -4,16 +4,23 @@ import uuid
 
 import pytest
 from pytest_lazyfixture import lazy_fixture
+from pytest_mock import MockerFixture
 
+from botocore.exceptions import ClientError
+from mypy_boto3_dynamodb.service_resource import Table
+
+from inference_engine import _ddb_batch, _ddb_item
 from inference_engine.dynamo_db_client import (
     AwaitingResultTimeoutError,
     DynamoDBClient,
     DynamoDBItem,
     ExpiredItemError,
     KeyNotFoundError,
+    ResultCancelledStatusError,
     ResultErrorStatusError,
 )
-from inference_engine.types import ResultStatus
+from inference_engine.exceptions import UnprocessedKeysError
+from inference_engine.types import Progress, ResultStatus
 
 
 @pytest.fixture
@@ -51,6 +58,28 @@ def test_item_error(message_id: str, exp: Exception):
     )
 
 
+def test_item_lazy_result(message_id: str, result, mocker: MockerFixture):
+    item = DynamoDBItem(message_id=message_id, result=result)
+    spy = mocker.spy(_ddb_item, "_deserialise_result")
+    item_obj = DynamoDBItem.from_get_item(item.to_puttable())
+    assert not hasattr(item_obj, "__dict__")
+    assert item_obj.has_result
+    assert spy.call_count == 0
+    assert item_obj.to_puttable() == item.to_puttable()
+    assert spy.call_count == 0
+    assert item_obj.result == result
+    assert item_obj.result == result
+    assert spy.call_count == 1
+    assert item_obj == item
+
+
+def test_item_invalid_success(message_id: str):
+    with pytest.raises(ValueError):
+        _ = DynamoDBItem.from_get_item(
+            {"message_id": message_id, "status": "success", "updated_at": 1}
+        )
+
+
 @pytest.fixture
 def result_put(
     message_id: str,
@@ -197,3 +226,427 @@ def test_result_exists(
     ddb_client: DynamoDBClient, _: None, expected: bool, message_id: str
 ):
     assert ddb_client.result_exists(message_id) is expected
+
+
+def test_items_batch_get(ddb_client: DynamoDBClient, result):
+    message_ids = [str(uuid.uuid4()) for _ in range(120)]
+    for message_id in message_ids[:110]:
+        ddb_client.result_put(message_id=message_id, result=result)
+
+    items = ddb_client.items_batch_get(message_ids)
+    assert set(items) == set(message_ids[:110])
+    assert all(item.result == result for item in items.values())
+
+
+def test_statuses_batch_get(ddb_client: DynamoDBClient, result):
+    message_ids = [str(uuid.uuid4()) for _ in range(250)]
+    for message_id in message_ids[:100]:
+        ddb_client.result_put(message_id=message_id, result=result)
+    for message_id in message_ids[100:200]:
+        ddb_client.submitted_put(60, message_id=message_id)
+    ddb_client.in_progress_put(-1, message_id=message_ids[0])
+
+    statuses = ddb_client.statuses_batch_get(message_ids)
+    assert set(statuses) == set(message_ids[:200])
+    # Expired
+    assert statuses[message_ids[0]] == ResultStatus.ERROR
+    assert {statuses[id_] for id_ in message_ids[1:100]} == {
+        ResultStatus.SUCCESS
+    }
+    assert {statuses[id_] for id_ in message_ids[100:200]} == {
+        ResultStatus.SUBMITTED
+    }
+
+
+def test_items_batch_get_unprocessed_keys(
+    ddb_client: DynamoDBClient, result, mocker: MockerFixture
+):
+    message_ids = [str(uuid.uuid4()) for _ in range(3)]
+    for message_id in message_ids:
+        ddb_client.result_put(message_id=message_id, result=result)
+
+    batch_get_item = ddb_client.dynamodb.batch_get_item
+
+    def throttled_batch_get_item(**kwargs):
+        # Only process the first key of each call
+        request = kwargs["RequestItems"][ddb_client.table_name]
+        response = batch_get_item(
+            RequestItems={
+                ddb_client.table_name: {**request, "Keys": request["Keys"][:1]}
+            }
+        )
+        if len(request["Keys"]) > 1:
+            response["UnprocessedKeys"] = {
+                ddb_client.table_name: {**request, "Keys": request["Keys"][1:]}
+            }
+        return response
+
+    mocked = mocker.patch.object(
+        ddb_client.dynamodb,
+        "batch_get_item",
+        side_effect=throttled_batch_get_item,
+    )
+    sleep = mocker.patch.object(_ddb_batch.time, "sleep")
+
+    items = ddb_client.items_batch_get(message_ids)
+    assert set(items) == set(message_ids)
+    assert mocked.call_count == 3
+    assert sleep.call_count == 2
+
+
+def test_items_batch_get_always_unprocessed_keys(
+    ddb_client: DynamoDBClient, mocker: MockerFixture
+):
+    message_ids = [str(uuid.uuid4()) for _ in range(3)]
+
+    def throttled_batch_get_item(**kwargs):
+        return {
+            "Responses": {},
+            "UnprocessedKeys": kwargs["RequestItems"],
+        }
+
+    mocked = mocker.patch.object(
+        ddb_client.dynamodb,
+        "batch_get_item",
+        side_effect=throttled_batch_get_item,
+    )
+    mocker.patch.object(_ddb_batch.time, "sleep")
+
+    with pytest.raises(UnprocessedKeysError) as exc_info:
+        ddb_client.items_batch_get(message_ids)
+    assert mocked.call_count == 10
+    assert exc_info.value.unprocessed_keys == [
+        {"message_id": message_id} for message_id in message_ids
+    ]
+
+
+def test_invalid_batch_get_concurrency(
+    ddb_table_name: str, boto3_ddb_resource_kwargs: dict, ddb_table: Table
+):
+    with pytest.raises(ValueError):
+        DynamoDBClient(
+            ddb_table_name,
+            batch_get_concurrency=0,
+            **boto3_ddb_resource_kwargs,
+        )
+
+
+def test_result_from_item_on_error(
+    error_put: None, ddb_client: DynamoDBClient, message_id: str
+):
+    item = ddb_client.item_get(message_id)
+    with pytest.raises(ResultErrorStatusError):
+        _ = ddb_client.result_from_item(item)
+
+
+@pytest.fixture
+def cached_ddb_client(
+    ddb_table_name: str, boto3_ddb_resource_kwargs: dict, ddb_table: Table
+) -> DynamoDBClient:
+    return DynamoDBClient(
+        ddb_table_name, cache_size=10, **boto3_ddb_resource_kwargs
+    )
+
+
+def test_cache_final_item(
+    cached_ddb_client: DynamoDBClient, message_id: str, result
+):
+    cached_ddb_client.in_progress_put(None, message_id=message_id)
+    assert cached_ddb_client.status_get(message_id) == ResultStatus.IN_PROGRESS
+    cached_ddb_client.result_put(message_id=message_id, result=result)
+    assert cached_ddb_client.result_get(message_id) == result
+    assert cached_ddb_client.result_exists(message_id)
+    assert cached_ddb_client.status_get(message_id) == ResultStatus.SUCCESS
+    assert cached_ddb_client.items_batch_get([message_id])
+    assert cached_ddb_client.cache
+    assert cached_ddb_client.cache.misses == 2
+    assert cached_ddb_client.cache.hits == 3
+
+
+def test_cache_returns_copies(
+    cached_ddb_client: DynamoDBClient, message_id: str
+):
+    cached_ddb_client.result_put(message_id=message_id, result={"a": [1]})
+    item = cached_ddb_client.item_get(message_id)
+    item.result["a"].append(2)
+    item.status = ResultStatus.ERROR
+    assert cached_ddb_client.result_get(message_id) == {"a": [1]}
+    assert cached_ddb_client.item_get(message_id).status == (
+        ResultStatus.SUCCESS
+    )
+    assert cached_ddb_client.cache
+    assert cached_ddb_client.cache.hits == 2
+
+
+def test_cache_skips_error_item(
+    cached_ddb_client: DynamoDBClient, message_id: str
+):
+    cached_ddb_client.error_put(message_id=message_id, exp="Failed")
+    assert cached_ddb_client.status_get(message_id) == ResultStatus.ERROR
+    # e.g. written by a retry of the message, which succeeded
+    DynamoDBClient(
+        cached_ddb_client.table_name, dynamodb=cached_ddb_client.dynamodb
+    ).result_put(message_id=message_id, result={"a": 1})
+    assert cached_ddb_client.result_get(message_id) == {"a": 1}
+
+
+def test_cache_invalidated_on_put(
+    cached_ddb_client: DynamoDBClient, message_id: str
+):
+    cached_ddb_client.result_put(message_id=message_id, result={"a": 1})
+    assert cached_ddb_client.result_get(message_id) == {"a": 1}
+    cached_ddb_client.result_put(message_id=message_id, result={"a": 2})
+    assert cached_ddb_client.result_get(message_id) == {"a": 2}
+
+
+def test_status_get_expired(
+    ddb_client: DynamoDBClient,
+    message_id: str,
+    in_progress_put: None,
+    in_progress_ttl: int,
+):
+    time.sleep(in_progress_ttl + 1)
+    assert ddb_client.status_get(message_id) == ResultStatus.ERROR
+
+
+@pytest.mark.parametrize("consistent_read", [True, False])
+def test_status_get_projection(
+    ddb_client: DynamoDBClient,
+    message_id: str,
+    result_put: None,
+    consistent_read: bool,
+    mocker: MockerFixture,
+):
+    spy = mocker.spy(ddb_client.table, "get_item")
+    status = ddb_client.status_get(message_id, consistent_read=consistent_read)
+    assert status == ResultStatus.SUCCESS
+    kwargs = spy.call_args.kwargs
+    assert kwargs["ConsistentRead"] is consistent_read
+    assert "result" not in kwargs["ProjectionExpression"]
+    assert "result" not in spy.spy_return["Item"]
+
+
+def test_status_get_doesnt_exist(ddb_client: DynamoDBClient, message_id: str):
+    with pytest.raises(KeyNotFoundError):
+        _ = ddb_client.status_get(message_id, consistent_read=False)
+
+
+def test_chunks_append(
+    ddb_client: DynamoDBClient, message_id: str, in_progress_put: None
+):
+    ddb_client.chunks_append(message_id, ['"a"'])
+    ddb_client.chunks_append(message_id, ['"b"', '{"c": 1}'])
+    status, chunks = ddb_client.chunks_get(message_id)
+    assert status == ResultStatus.IN_PROGRESS
+    assert chunks == ["a", "b", {"c": 1}]
+
+    ddb_client.result_put(message_id=message_id, result=chunks, streamed=True)
+    item = ddb_client.item_get(message_id)
+    assert item.streamed
+    assert ddb_client.chunks_get(message_id) == (ResultStatus.SUCCESS, [])
+
+
+def test_chunks_append_not_in_progress(
+    ddb_client: DynamoDBClient, message_id: str, result_put: None
+):
+    with pytest.raises(ClientError):
+        ddb_client.chunks_append(message_id, ['"a"'])
+
+
+def test_progress_put(
+    ddb_client: DynamoDBClient, message_id: str, in_progress_put: None
+):
+    assert ddb_client.status_get_with_progress(message_id) == (
+        ResultStatus.IN_PROGRESS,
+        None,
+    )
+
+    progress = Progress(fraction=0.5, stage="loading", reported_at=1.0)
+    ddb_client.progress_put(message_id, progress)
+    assert ddb_client.status_get_with_progress(message_id) == (
+        ResultStatus.IN_PROGRESS,
+        progress,
+    )
+    assert ddb_client.status_get(message_id) == ResultStatus.IN_PROGRESS
+
+
+def test_progress_put_not_in_progress(
+    ddb_client: DynamoDBClient, message_id: str, result_put: None
+):
+    with pytest.raises(ClientError):
+        ddb_client.progress_put(message_id, Progress(fraction=1))
+
+
+def test_progress_invalid_fraction():
+    with pytest.raises(ValueError):
+        Progress(fraction=1.5)
+
+
+@pytest.mark.parametrize(
+    "put_fixture",
+    [lazy_fixture("submitted_put"), lazy_fixture("in_progress_put")],
+)
+def test_cancel_put(
+    ddb_client: DynamoDBClient, message_id: str, put_fixture: None, result
+):
+    assert ddb_client.cancel_put(message_id, ttl_seconds=60)
+    assert ddb_client.status_get(message_id) == ResultStatus.CANCELLED
+    with pytest.raises(ResultCancelledStatusError):
+        ddb_client.result_get(message_id)
+    with pytest.raises(ResultCancelledStatusError):
+        ddb_client.in_progress_put(60, message_id=message_id)
+    with pytest.raises(ResultCancelledStatusError):
+        ddb_client.result_put(message_id=message_id, result=result)
+
+    assert ddb_client.status_get(message_id) == ResultStatus.CANCELLED
+
+
+@pytest.mark.parametrize(
+    "put_fixture", [lazy_fixture("result_put"), lazy_fixture("error_put")]
+)
+def test_cancel_put_final(
+    ddb_client: DynamoDBClient, message_id: str, put_fixture: None
+):
+    status = ddb_client.status_get(message_id)
+    assert not ddb_client.cancel_put(message_id)
+    assert ddb_client.status_get(message_id) == status
+
+
+def test_cancel_put_doesnt_exist(ddb_client: DynamoDBClient, message_id: str):
+    assert not ddb_client.cancel_put(message_id)
+    with pytest.raises(KeyNotFoundError):
+        ddb_client.status_get(message_id)
+
+
+def test_cancel_many_put(
+    ddb_client: DynamoDBClient, message_id: str, submitted_put: None
+):
+    other_message_id = str(uuid.uuid4())
+    assert ddb_client.cancel_many_put(
+        [message_id, other_message_id, message_id], ttl_seconds=60
+    ) == {message_id: True, other_message_id: False}
+    assert ddb_client.status_get(message_id) == ResultStatus.CANCELLED
+
+
+def test_request_claim(ddb_client: DynamoDBClient, request_id: str):
+    assert ddb_client.request_claim_get(request_id) is None
+    assert (
+        ddb_client.request_claim_put(
+            request_id, message_id="a", claim_token="token_a", lease_seconds=60
+        )
+        is None
+    )
+    claim = ddb_client.request_claim_put(
+        request_id, message_id="b", claim_token="token_b", lease_seconds=60
+    )
+    assert claim is not None
+    assert claim.message_id == "a"
+    assert claim.status == ResultStatus.IN_PROGRESS
+
+    assert ddb_client.request_claim_renew(request_id, "token_a", 60)
+    assert not ddb_client.request_claim_renew(request_id, "token_b", 60)
+    assert ddb_client.request_claim_complete(
+        request_id, "token_a", ResultStatus.SUCCESS
+    )
+    claim = ddb_client.request_claim_get(request_id)
+    assert claim is not None
+    assert claim.status == ResultStatus.SUCCESS
+
+
+def test_request_claim_lease_expired(
+    ddb_client: DynamoDBClient, request_id: str
+):
+    ddb_client.request_claim_put(
+        request_id, message_id="a", claim_token="token_a", lease_seconds=-1
+    )
+    assert (
+        ddb_client.request_claim_put(
+            request_id, message_id="b", claim_token="token_b", lease_seconds=60
+        )
+        is None
+    )
+    assert not ddb_client.request_claim_complete(
+        request_id, "token_a", ResultStatus.SUCCESS
+    )
+    assert not ddb_client.request_claim_release(request_id, "token_a")
+    assert ddb_client.request_claim_release(request_id, "token_b")
+    assert ddb_client.request_claim_get(request_id) is None
+
+
+def test_items_get_by_request_id(ddb_client: DynamoDBClient, result):
+    request_id, other_request_id = str(uuid.uuid4()), str(uuid.uuid4())
+    ddb_client.submitted_put(60, message_id="a", request_id=request_id)
+    ddb_client.result_put(message_id="a", result=result, request_id=request_id)
+    # Posted again later
+    time.sleep(1)
+    ddb_client.submitted_put(60, message_id="b", request_id=request_id)
+    ddb_client.submitted_put(60, message_id="c", request_id=other_request_id)
+    # Claims & other records don't have a request_id attribute
+    ddb_client.request_claim_put(
+        request_id, message_id="a", claim_token="token", lease_seconds=60
+    )
+
+    assert sorted(ddb_client.message_ids_get_by_request_id(request_id)) == [
+        "a",
+        "b",
+    ]
+    item_obj = ddb_client.item_get_by_request_id(request_id)
+    assert item_obj.message_id == "b"
+    assert ddb_client.status_get_by_request_id(request_id) == (
+        ResultStatus.SUBMITTED
+    )
+
+    items = ddb_client.items_batch_get_by_request_ids(
+        [request_id, other_request_id, "missing"]
+    )
+    assert {k: v.message_id for k, v in items.items()} == {
+        request_id: "b",
+        other_request_id: "c",
+    }
+    with pytest.raises(KeyNotFoundError):
+        ddb_client.item_get_by_request_id("missing")
+
+
+def test_status_get_by_request_id_projection(
+    ddb_client: DynamoDBClient, result, mocker: MockerFixture
+):
+    request_id = str(uuid.uuid4())
+    ddb_client.submitted_put(60, message_id="a", request_id=request_id)
+    time.sleep(1)
+    ddb_client.submitted_put(60, message_id="b", request_id=request_id)
+    ddb_client.result_put(message_id="b", result=result, request_id=request_id)
+
+    spy = mocker.spy(ddb_client.dynamodb, "batch_get_item")
+    assert ddb_client.status_get_by_request_id(request_id) == (
+        ResultStatus.SUCCESS
+    )
+    request = spy.call_args.kwargs["RequestItems"][ddb_client.table_name]
+    assert "result" not in request["ProjectionExpression"]
+    assert all(
+        "result" not in item
+        for item in spy.spy_return["Responses"][ddb_client.table_name]
+    )
+    with pytest.raises(KeyNotFoundError):
+        ddb_client.status_get_by_request_id("missing")
+
+
+def test_coalesced_request_put(ddb_client: DynamoDBClient, result):
+    request_id = f"{uuid.uuid4()}#coalesced"
+    ddb_client.submitted_put(60, message_id="a", request_id="other")
+    ddb_client.result_put(message_id="a", result=result, request_id="other")
+    # Sent concurrently to "a", then coalesced onto it
+    ddb_client.submitted_put(60, message_id="b", request_id=request_id)
+    assert ddb_client.cancel_put("b", remove_request_id=True)
+    ddb_client.coalesced_request_put(request_id, "a")
+
+    assert ddb_client.message_ids_get_by_request_id(request_id) == ["a"]
+    assert ddb_client.item_get_by_request_id(request_id).result == result
+    assert ddb_client.status_get("b") == ResultStatus.CANCELLED
+
+
+def test_items_get_by_request_id_without_index(
+    ddb_table_name: str, boto3_ddb_resource_kwargs: dict, ddb_table: Table
+):
+    ddb_client = DynamoDBClient(ddb_table_name, **boto3_ddb_resource_kwargs)
+    with pytest.raises(ValueError):
+        ddb_client.status_get_by_request_id("request_id")
@@ -1,18 +1,33 @@
 """Test the overall system integration."""
+import threading
 import time
+from typing import Optional
 
 import pytest
+from pytest_mock import MockerFixture
 
+from botocore.exceptions import ClientError
 from http_server_mock import _RunInBackground
 from mypy_boto3_sqs.service_resource import Queue
 
 import inference_engine
+from inference_engine.consumer import (
+    CircuitBreakerConfig,
+    CircuitState,
+    ConsumerOptions,
+    PoisonMessagePolicy,
+    RetryPolicy,
+)
 from inference_engine.consumer.consumer import Consumer
 from inference_engine.exceptions import (
     AwaitingResultTimeoutError,
+    ConsumerRetryableError,
+    ConsumerUnretryableError,
     ResultErrorStatusError,
 )
+from inference_engine.polling import AdaptivePollStrategy
 from inference_engine.producer.producer import Producer
+from inference_engine.tracing import NULL_TRACER, Tracer
 from inference_engine.types import ResultStatus
 
 
@@ -29,6 +44,33 @@ def test_happy(consumer: Consumer, producer: Producer, request_id: str):
     assert not resp.error
     assert resp.result == consumer.compute_result(body, resp.message_id)
 
+    time.sleep(0.1)
+    metrics = consumer.metrics
+    assert metrics.messages_total.value("success") == 1
+    for stage in ["decode", "in_progress_put", "compute", "result_put"]:
+        assert metrics.stage_seconds.count(stage) == 1
+
+
+def test_happy_shared_poller(
+    consumer: Consumer, producer: Producer, request_id: str
+):
+    producer.use_shared_poller = True
+    body = {"parameters": [1, 2, 3]}
+    resp = producer.post(body, request_id=request_id)
+    assert resp.status == ResultStatus.SUCCESS
+    assert resp.request_id == request_id
+    assert resp.result == consumer.compute_result(body, resp.message_id)
+
+
+@pytest.mark.usefixtures("consumer")
+def test_happy_adaptive_polling(producer: Producer):
+    producer.poll_strategy = AdaptivePollStrategy(max_interval_seconds=0.2)
+    for _ in range(2):
+        resp = producer.post({"parameters": [1, 2, 3]})
+        assert resp.status == ResultStatus.SUCCESS
+    assert producer.eta_estimator.ewma_seconds
+    assert producer.approximate_queue_depth() is not None
+
 
 def test_happy_non_blocking(
     consumer: Consumer, producer: Producer, request_id: str
@@ -142,3 +184,483 @@ def test_message_is_deleted(
     assert not int(sqs_queue.attributes["ApproximateNumberOfMessages"])
     dl_queue.load()
     assert not int(dl_queue.attributes["ApproximateNumberOfMessages"])
+
+
+def test_stream(consumer: Consumer, producer: Producer):
+    def generate(body, _):
+        for i in range(body["n"]):
+            time.sleep(0.05)
+            yield {"token": i}
+
+    consumer.compute_result = generate
+    consumer.stream_flush_interval_seconds = 0
+    producer.timeout_seconds = 5
+
+    id_ = producer.post_non_blocking({"n": 5})
+    chunks = list(producer.stream(id_))
+    assert chunks == [{"token": i} for i in range(5)]
+
+    resp = producer.retrieve_result(id_)
+    assert resp.status == ResultStatus.SUCCESS
+    assert resp.result == chunks
+
+
+def test_stream_not_streamed(consumer: Consumer, producer: Producer):
+    body = {"parameters": [1, 2, 3]}
+    id_ = producer.post_non_blocking(body)
+    chunks = list(producer.stream(id_))
+    assert chunks == [consumer.compute_result(body, id_)]
+
+
+def test_report_progress(consumer: Consumer, producer: Producer):
+    def compute(body, _, context):
+        context.report_progress(0.5, stage="halfway")
+        time.sleep(1)
+        return body["a"]
+
+    consumer.compute_result = compute
+    id_ = producer.post_non_blocking({"a": 1})
+    time.sleep(0.5)
+    status, progress = producer.retrieve_result_status_with_progress(id_)
+    assert status == ResultStatus.IN_PROGRESS
+    assert progress.fraction == 0.5
+    assert progress.stage == "halfway"
+
+    time.sleep(1.5)
+    assert producer.retrieve_result(id_).result == 1
+
+
+def test_cancel_submitted(consumer: Consumer, producer: Producer):
+    calls = []
+    consumer.compute_result = lambda body, _: calls.append(body)
+    consumer.stop_consuming()
+
+    id_ = producer.post_non_blocking({"a": 1})
+    assert producer.cancel_many([id_]) == {id_: True}
+    assert not producer.cancel(id_)
+
+    consumer.start_consuming()
+    time.sleep(2)
+    assert not calls
+    assert producer.retrieve_result_status(id_) == ResultStatus.CANCELLED
+    resp = producer.retrieve_result(id_)
+    assert resp.status == ResultStatus.CANCELLED
+    assert resp.status_code == 409
+
+
+def test_cancel_in_progress(
+    consumer: Consumer, producer: Producer, sqs_queue: Queue
+):
+    def compute(_, __, context):
+        while not context.is_cancelled:
+            time.sleep(0.05)
+        context.raise_if_cancelled()
+
+    consumer.compute_result = compute
+    consumer.heartbeat_interval = 0.1
+    consumer.cancel_check_interval_seconds = 0.1
+    id_ = producer.post_non_blocking({"a": 1})
+    time.sleep(1)
+    assert producer.retrieve_result_status(id_) == ResultStatus.IN_PROGRESS
+    assert producer.cancel(id_)
+
+    time.sleep(1)
+    assert not consumer.is_processing_message
+    assert producer.retrieve_result_status(id_) == ResultStatus.CANCELLED
+    sqs_queue.load()
+    assert not int(sqs_queue.attributes["ApproximateNumberOfMessages"])
+    assert not int(
+        sqs_queue.attributes["ApproximateNumberOfMessagesNotVisible"]
+    )
+
+
+def test_cancel_in_progress_unretryable_error(
+    consumer: Consumer, producer: Producer
+):
+    def compute(_, __, context):
+        while not context.is_cancelled:
+            time.sleep(0.05)
+        raise ConsumerUnretryableError("Failed after the cancellation")
+
+    consumer.compute_result = compute
+    consumer.heartbeat_interval = 0.1
+    consumer.cancel_check_interval_seconds = 0.1
+    id_ = producer.post_non_blocking({"a": 1})
+    time.sleep(1)
+    assert producer.cancel(id_)
+
+    time.sleep(1)
+    assert not consumer.is_processing_message
+    assert producer.retrieve_result_status(id_) == ResultStatus.CANCELLED
+
+
+def test_cancel_check_interval(
+    consumer: Consumer, producer: Producer, mocker: MockerFixture
+):
+    def compute(body, _):
+        time.sleep(1.5)
+        return body["a"]
+
+    consumer.compute_result = compute
+    consumer.heartbeat_interval = 0.1
+    consumer.cancel_check_interval_seconds = 0.5
+    status_get = mocker.spy(consumer.ddb_client, "status_get")
+    id_ = producer.post_non_blocking({"a": 1})
+    time.sleep(2)
+    assert producer.retrieve_result(id_).result == 1
+    # ~15 heartbeats, but the status is read at most every 0.5s
+    assert 1 <= status_get.call_count <= 4
+
+
+def test_tracing(consumer: Consumer, producer: Producer):
+    tracer = Tracer()
+    consumer.tracer = producer.tracer = consumer.ddb_client.tracer = tracer
+    resp = producer.post({"parameters": [1, 2, 3]})
+    assert resp.status == ResultStatus.SUCCESS
+    time.sleep(0.1)
+
+    names = {
+        span.name
+        for span in tracer.spans
+        if span.attributes.get("message_id") == resp.message_id
+    }
+    assert {
+        "producer.await_result",
+        "consumer.message",
+        "consumer.compute",
+        "consumer.result_put",
+        "ddb.put_item",
+    } <= names
+    consumer.ddb_client.tracer = NULL_TRACER
+
+
+@pytest.mark.usefixtures("sqs_queue", "mock_ecs_agent_task_protection_server")
+def test_max_concurrency_per_message_group(
+    ddb_client, sqs_queue_name: str, boto3_sqs_resource_kwargs: dict
+):
+    lock = threading.Lock()
+    running: dict[str, int] = {}
+    calls: list[tuple[str, int]] = []
+    max_running = 0
+
+    def compute(body, _):
+        nonlocal max_running
+        with lock:
+            assert not running.get(body["group"]), "group ran concurrently"
+            running[body["group"]] = 1
+            max_running = max(max_running, sum(running.values()))
+            calls.append((body["group"], body["i"]))
+        time.sleep(0.05)
+        with lock:
+            running[body["group"]] = 0
+        return body
+
+    consumer = Consumer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=compute,
+        enable_ecs_scalein_protection=True,
+        options=ConsumerOptions(max_concurrency=4),
+        **boto3_sqs_resource_kwargs,
+    )
+    producer = Producer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        message_group_id_mode="sharded",
+        poll_time_seconds=0.05,
+        **boto3_sqs_resource_kwargs,
+    )
+    groups = ["a", "b", "c"]
+    message_ids = [
+        producer.post_non_blocking(
+            {"group": group, "i": i}, ordering_key=group
+        )
+        for i in range(4)
+        for group in groups
+    ]
+
+    consumer.start_consuming()
+    try:
+        timeout = time.time() + 10
+        while time.time() < timeout and not all(
+            producer.retrieve_result_status(id_) == ResultStatus.SUCCESS
+            for id_ in message_ids
+        ):
+            time.sleep(0.05)
+    finally:
+        consumer.stop_consuming()
+
+    assert len(calls) == len(message_ids)
+    for group in groups:
+        assert [i for g, i in calls if g == group] == list(range(4))
+    assert max_running > 1
+
+
+@pytest.mark.usefixtures("sqs_queue", "mock_ecs_agent_task_protection_server")
+@pytest.mark.parametrize(
+    "retry_policy", [None, RetryPolicy(base_delay_seconds=1, jitter=0)]
+)
+def test_max_concurrency_message_group_retry(
+    ddb_client,
+    sqs_queue_name: str,
+    boto3_sqs_resource_kwargs: dict,
+    retry_policy: Optional[RetryPolicy],
+):
+    calls: list[int] = []
+
+    def compute(body, _):
+        calls.append(body["i"])
+        if calls == [0]:
+            raise ConsumerRetryableError("First attempt fails")
+        return body
+
+    consumer = Consumer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=compute,
+        heartbeat_visibility_timeout=2,
+        heartbeat_interval=0.5,
+        options=ConsumerOptions(max_concurrency=4, retry_policy=retry_policy),
+        **boto3_sqs_resource_kwargs,
+    )
+    producer = Producer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        poll_time_seconds=0.05,
+        **boto3_sqs_resource_kwargs,
+    )
+    # Both received at once, the second held while the first is processed
+    message_ids = [producer.post_non_blocking({"i": i}) for i in range(2)]
+
+    consumer.start_consuming()
+    try:
+        timeout = time.time() + 15
+        while time.time() < timeout and not all(
+            producer.retrieve_result_status(id_) == ResultStatus.SUCCESS
+            for id_ in message_ids
+        ):
+            time.sleep(0.05)
+    finally:
+        consumer.stop_consuming()
+
+    # The second message waits for the retry of the first, also when it is
+    # released for a backoff
+    assert calls == [0, 0, 1]
+
+
+@pytest.mark.usefixtures("mock_ecs_agent_task_protection_server")
+def test_standard_queue_deduplication(
+    ddb_client,
+    standard_sqs_queue_name: str,
+    standard_sqs_queue: Queue,
+    boto3_sqs_resource_kwargs: dict,
+    request_id: str,
+):
+    calls = []
+
+    def compute(body, message_id):
+        calls.append(message_id)
+        return {"value": body["value"]}
+
+    consumer = Consumer(
+        standard_sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=compute,
+        enable_ecs_scalein_protection=True,
+        **boto3_sqs_resource_kwargs,
+    )
+    producer = Producer(
+        standard_sqs_queue_name,
+        ddb_client=ddb_client,
+        poll_time_seconds=0.05,
+        **boto3_sqs_resource_kwargs,
+    )
+    assert consumer.deduplicate
+    # E.g. a client retrying its post, or an at least once delivery
+    message_ids = [
+        producer.post_non_blocking({"value": 1}, request_id=request_id)
+        for _ in range(2)
+    ]
+
+    consumer.start_consuming()
+    try:
+        timeout = time.time() + 10
+        while time.time() < timeout and not all(
+            producer.retrieve_result_status(id_) == ResultStatus.SUCCESS
+            for id_ in message_ids
+        ):
+            time.sleep(0.05)
+    finally:
+        consumer.stop_consuming()
+
+    for message_id in message_ids:
+        assert producer.retrieve_result(message_id).result == {"value": 1}
+    assert len(calls) == 1
+    assert len(standard_sqs_queue.receive_messages()) == 0
+
+
+@pytest.mark.usefixtures("sqs_queue", "mock_ecs_agent_task_protection_server")
+def test_retry_in_place(
+    ddb_client,
+    sqs_queue_name: str,
+    boto3_sqs_resource_kwargs: dict,
+    producer: Producer,
+):
+    calls = []
+
+    def compute(body, message_id):
+        calls.append(message_id)
+        if len(calls) < 3:
+            raise ConsumerRetryableError("Flapping dependency")
+        return body
+
+    consumer = Consumer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=compute,
+        options=ConsumerOptions(
+            retry_policy=RetryPolicy(
+                in_place_retries=2, in_place_delay_seconds=0.01
+            ),
+        ),
+        **boto3_sqs_resource_kwargs,
+    )
+    consumer.start_consuming()
+    try:
+        response = producer.post({"a": 1})
+    finally:
+        consumer.stop_consuming()
+
+    assert response.status == ResultStatus.SUCCESS
+    assert len(set(calls)) == 1
+    assert consumer.metrics.retries_total.value("in_place") == 2
+
+
+@pytest.mark.usefixtures("sqs_queue", "mock_ecs_agent_task_protection_server")
+def test_retry_backoff(
+    ddb_client,
+    sqs_queue_name: str,
+    boto3_sqs_resource_kwargs: dict,
+    producer: Producer,
+):
+    calls = []
+
+    def compute(_, __):
+        calls.append(time.monotonic())
+        raise ValueError("Dependency down")
+
+    consumer = Consumer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=compute,
+        options=ConsumerOptions(
+            retry_policy=RetryPolicy(base_delay_seconds=2, jitter=0)
+        ),
+        **boto3_sqs_resource_kwargs,
+    )
+    producer.post_non_blocking({"a": 1})
+    consumer.start_consuming()
+    try:
+        time.sleep(3.5)
+    finally:
+        consumer.stop_consuming()
+
+    # The test queue has a visibility timeout of 0, without the backoff the
+    # message would be retried continuously
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 2
+    assert consumer.metrics.retries_total.value("backoff") == 2
+
+
+@pytest.mark.parametrize(
+    "poison_policy",
+    [
+        PoisonMessagePolicy(max_receive_count=2),
+        PoisonMessagePolicy(max_identical_failures=2),
+    ],
+)
+@pytest.mark.usefixtures("sqs_queue", "mock_ecs_agent_task_protection_server")
+def test_poison_message(
+    ddb_client,
+    sqs_queue_name: str,
+    boto3_sqs_resource_kwargs: dict,
+    producer: Producer,
+    poison_policy: PoisonMessagePolicy,
+):
+    calls = []
+
+    def compute(_, message_id):
+        calls.append(message_id)
+        raise ValueError("Crashes every time")
+
+    consumer = Consumer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=compute,
+        options=ConsumerOptions(poison_policy=poison_policy, deduplicate=True),
+        **boto3_sqs_resource_kwargs,
+    )
+    message_id = producer.post_non_blocking({"a": 1}, request_id="r")
+    consumer.start_consuming()
+    try:
+        for _ in range(50):
+            if consumer.metrics.messages_total.value("poison"):
+                break
+            time.sleep(0.1)
+    finally:
+        consumer.stop_consuming()
+
+    # Quarantined on the third receive, without being computed
+    assert len(calls) == 2
+    assert consumer.metrics.messages_total.value("poison") == 1
+    item = ddb_client.item_get(message_id)
+    assert item.status == ResultStatus.ERROR
+    assert "PoisonMessageError" in item.error
+    assert item.request_id == "r"
+    assert not producer.queue.receive_messages(WaitTimeSeconds=0)
+    # Its duplicates get the error rather than processing it again
+    claim = ddb_client.request_claim_get("r")
+    assert claim.message_id == message_id
+    assert claim.status == ResultStatus.ERROR
+
+
+@pytest.mark.usefixtures("sqs_queue", "mock_ecs_agent_task_protection_server")
+def test_circuit_breaker(
+    ddb_client,
+    sqs_queue_name: str,
+    boto3_sqs_resource_kwargs: dict,
+    producer: Producer,
+    mocker: MockerFixture,
+):
+    in_progress_put = mocker.patch.object(
+        ddb_client,
+        "in_progress_put",
+        side_effect=ClientError(
+            {"Error": {"Code": "ThrottlingException"}}, "PutItem"
+        ),
+    )
+    consumer = Consumer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        compute_result=lambda body, message_id: body,
+        options=ConsumerOptions(
+            circuit_breaker=CircuitBreakerConfig(
+                failure_threshold=3, reset_timeout_seconds=60
+            ),
+        ),
+        **boto3_sqs_resource_kwargs,
+    )
+    assert consumer.metrics.circuit_breaker_state.value("closed") == 1
+
+    producer.post_non_blocking({"a": 1})
+    consumer.start_consuming()
+    try:
+        time.sleep(1.5)
+        # The test queue has a visibility timeout of 0, the message would be
+        # received continuously without the circuit breaker
+        assert in_progress_put.call_count == 3
+        assert consumer.circuit_breaker.state == CircuitState.OPEN
+        assert consumer.metrics.circuit_breaker_state.value("open") == 1
+        assert consumer.metrics.circuit_breaker_state.value("closed") == 0
+    finally:
+        consumer.stop_consuming()
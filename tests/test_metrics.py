@@ -0,0 +1,101 @@
+"""Test Consumer metrics."""
+import io
+import json
+
+import pytest
+
+from inference_engine.consumer import ConsumerMetrics, EmfStageHook
+from inference_engine.consumer._metrics import Counter, Gauge, Histogram
+
+
+def test_counter():
+    counter = Counter("requests_total", "Requests.", "outcome")
+    counter.inc("success")
+    counter.inc("success", 2)
+    counter.inc("error")
+    assert counter.value("success") == 3
+    assert counter.value("missing") == 0
+    assert counter.render() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        'requests_total{outcome="error"} 1',
+        'requests_total{outcome="success"} 3',
+    ]
+
+
+def test_gauge():
+    gauge = Gauge("state", "State.", "state")
+    gauge.set("open", 1)
+    gauge.set("closed", 1)
+    gauge.set("closed", 0)
+    assert gauge.value("open") == 1
+    assert gauge.value("missing") == 0
+    assert gauge.render() == [
+        "# HELP state State.",
+        "# TYPE state gauge",
+        'state{state="closed"} 0',
+        'state{state="open"} 1',
+    ]
+
+
+def test_histogram():
+    histogram = Histogram("latency", "Latency.", "stage", buckets=(0.1, 1))
+    for value in [0.05, 0.1, 0.5, 2]:
+        histogram.observe("compute", value)
+
+    assert histogram.count("compute") == 4
+    assert histogram.render()[2:] == [
+        'latency_bucket{stage="compute",le="0.1"} 2',
+        'latency_bucket{stage="compute",le="1"} 3',
+        'latency_bucket{stage="compute",le="+Inf"} 4',
+        'latency_sum{stage="compute"} 2.65',
+        'latency_count{stage="compute"} 4',
+    ]
+
+
+def test_histogram_unsorted_buckets():
+    with pytest.raises(ValueError):
+        Histogram("latency", "Latency.", "stage", buckets=(1, 0.1))
+
+
+def test_consumer_metrics_time():
+    metrics = ConsumerMetrics(prefix="test")
+    with pytest.raises(RuntimeError):
+        with metrics.time("compute"):
+            raise RuntimeError
+
+    assert metrics.stage_seconds.count("compute") == 1
+    assert 'test_stage_seconds_count{stage="compute"} 1' in metrics.render()
+
+
+def test_consumer_metrics_hooks():
+    calls = []
+
+    def failing_hook(stage: str, seconds: float):
+        raise RuntimeError
+
+    metrics = ConsumerMetrics(hooks=[failing_hook])
+    metrics.add_hook(lambda stage, seconds: calls.append((stage, seconds)))
+    with metrics.time("compute"):
+        pass
+
+    assert [stage for stage, _ in calls] == ["compute"]
+    assert metrics.stage_seconds.count("compute") == 1
+
+
+def test_emf_stage_hook():
+    stream = io.StringIO()
+    hook = EmfStageHook("Namespace", {"QueueName": "queue"}, stream=stream)
+    hook("decode", 0.1)
+    hook("compute", 2.5)
+
+    (line,) = stream.getvalue().splitlines()
+    record = json.loads(line)
+    assert record["QueueName"] == "queue"
+    assert record["ProcessingTime"] == 2.5
+    (metric_directive,) = record["_aws"]["CloudWatchMetrics"]
+    assert metric_directive == {
+        "Namespace": "Namespace",
+        "Dimensions": [["QueueName"]],
+        "Metrics": [{"Name": "ProcessingTime", "Unit": "Seconds"}],
+    }
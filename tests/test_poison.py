@@ -0,0 +1,70 @@
+"""Tests for the PoisonMessagePolicy."""
+import pytest
+
+from inference_engine.consumer import PoisonMessagePolicy
+from inference_engine.consumer._poison import error_fingerprint
+
+
+def _raise(exp: Exception) -> Exception:
+    with pytest.raises(type(exp)) as exc_info:
+        raise exp
+    return exc_info.value
+
+
+def _raise_other(exp: Exception) -> Exception:
+    with pytest.raises(type(exp)) as exc_info:
+        raise exp
+    return exc_info.value
+
+
+def test_error_fingerprint():
+    fingerprint = error_fingerprint(_raise(ValueError("id=1")))
+    # Messages are ignored
+    assert error_fingerprint(_raise(ValueError("id=2"))) == fingerprint
+    assert error_fingerprint(_raise(KeyError("id=1"))) != fingerprint
+    assert error_fingerprint(_raise_other(ValueError("id=1"))) != fingerprint
+
+
+def test_max_receive_count():
+    policy = PoisonMessagePolicy(max_receive_count=3)
+    assert policy.quarantine_reason("m", 3) is None
+    assert "max_receive_count=3" in policy.quarantine_reason("m", 4)
+
+
+def test_max_identical_failures():
+    policy = PoisonMessagePolicy(max_identical_failures=2)
+    policy.record_failure("m", _raise(ValueError()))
+    assert policy.quarantine_reason("m", 2) is None
+    # A different error starts over
+    policy.record_failure("m", _raise(KeyError()))
+    assert policy.quarantine_reason("m", 3) is None
+    policy.record_failure("m", _raise(KeyError()))
+    assert policy.quarantine_reason("m", 4) is not None
+    assert policy.quarantine_reason("other", 4) is None
+
+    policy.forget("m")
+    assert policy.quarantine_reason("m", 5) is None
+
+
+def test_max_tracked_messages():
+    policy = PoisonMessagePolicy(
+        max_identical_failures=1, max_tracked_messages=2
+    )
+    for message_id in ["a", "b", "c"]:
+        policy.record_failure(message_id, _raise(ValueError()))
+    assert policy.quarantine_reason("a", 2) is None
+    assert policy.quarantine_reason("b", 2) is not None
+    assert policy.quarantine_reason("c", 2) is not None
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"max_receive_count": 0},
+        {"max_identical_failures": 0},
+        {"max_tracked_messages": 0},
+    ],
+)
+def test_invalid(kwargs: dict):
+    with pytest.raises(ValueError):
+        PoisonMessagePolicy(**kwargs)
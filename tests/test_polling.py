@@ -0,0 +1,68 @@
+"""Tests for the result polling strategies."""
+import pytest
+
+from inference_engine.polling import (
+    AdaptivePollStrategy,
+    EtaEstimator,
+    FixedPollStrategy,
+    PollStrategy,
+)
+
+
+def test_fixed():
+    strategy = FixedPollStrategy(0.5)
+    assert strategy.next_interval(elapsed_seconds=10, eta_seconds=3) == 0.5
+
+
+def test_adaptive_approaches_eta():
+    strategy = AdaptivePollStrategy(
+        min_interval_seconds=0.01, max_interval_seconds=100, jitter=0
+    )
+    intervals = [
+        strategy.next_interval(elapsed_seconds=elapsed, eta_seconds=10)
+        for elapsed in [0, 5, 9, 9.99]
+    ]
+    assert intervals == sorted(intervals, reverse=True)
+    assert intervals[0] == 5
+    assert intervals[-1] == 0.01
+
+
+def test_adaptive_backs_off_after_eta():
+    strategy = AdaptivePollStrategy(
+        min_interval_seconds=0.01, max_interval_seconds=4, jitter=0
+    )
+    intervals = [
+        strategy.next_interval(elapsed_seconds=elapsed, eta_seconds=1)
+        for elapsed in [1, 2, 3, 100]
+    ]
+    assert intervals == [0.01, 1, 2, 4]
+
+
+def test_adaptive_jitter_bounds():
+    strategy = AdaptivePollStrategy(max_interval_seconds=100, jitter=0.5)
+    for _ in range(100):
+        interval = strategy.next_interval(elapsed_seconds=0, eta_seconds=10)
+        assert 2.5 <= interval <= 5
+
+
+@pytest.mark.parametrize("kwargs", [{"jitter": 2}, {"backoff_multiplier": 1}])
+def test_adaptive_invalid(kwargs: dict):
+    with pytest.raises(ValueError):
+        _ = AdaptivePollStrategy(**kwargs)
+
+
+def test_strategy_without_next_interval():
+    class NoIntervalStrategy(PollStrategy):  # pylint: disable=abstract-method
+        uses_eta = True
+
+    with pytest.raises(TypeError):
+        _ = NoIntervalStrategy()  # pylint: disable=abstract-class-instantiated
+
+
+def test_eta_estimator():
+    estimator = EtaEstimator(alpha=0.5, parallelism=2)
+    assert estimator.estimate() is None
+    estimator.observe(4, queue_depth=2)
+    assert estimator.estimate() == 2
+    estimator.observe(4)
+    assert estimator.estimate(queue_depth=4) == 9
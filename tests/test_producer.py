@@ -1,6 +1,440 @@
-"""Tests for the Consumer."""
-from inference_engine.producer import Producer
+"""Tests for the Producer."""
+# pylint: disable=redefined-outer-name,unused-argument
+import concurrent.futures
+import dataclasses
+import gc
+import time
+import uuid
+from typing import Generator
+
+import pytest
+from pytest_mock import MockerFixture
+
+from mypy_boto3_sqs.service_resource import Queue
+
+from inference_engine.dynamo_db_client import DynamoDBClient, DynamoDBItem
+from inference_engine.exceptions import AwaitingResultTimeoutError
+from inference_engine.polling import FixedPollStrategy
+from inference_engine.producer import MessageGrouping, Producer
+from inference_engine.producer._result_poller import ResultPoller
+from inference_engine.producer.producer import Response
+from inference_engine.types import ResultStatus
+
+
+@pytest.fixture
+def result_poller(
+    ddb_client: DynamoDBClient,
+) -> Generator[ResultPoller, None, None]:
+    poller = ResultPoller(
+        ddb_client, poll_time_seconds=0.05, start_immediately=True
+    )
+    yield poller
+    poller.stop(timeout=1)
 
 
 def test_ping(producer: Producer):
     producer.ping_queue()
+
+
+def test_sharded_message_group_ids(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+):
+    producer = Producer(
+        queue_name=sqs_queue_name,
+        ddb_client=ddb_client,
+        message_group_id_mode=MessageGrouping(mode="sharded", shards=4),
+        **boto3_sqs_resource_kwargs,
+    )
+    keys = ["tenant-a", "tenant-b", "tenant-a", None, "tenant-a"]
+    message_ids = [
+        producer.post_non_blocking({"i": i}, ordering_key=key)
+        for i, key in enumerate(keys)
+    ]
+
+    group_ids = {}
+    while len(group_ids) < len(message_ids):
+        messages = sqs_queue.receive_messages(
+            AttributeNames=["MessageGroupId"],
+            MaxNumberOfMessages=10,
+            WaitTimeSeconds=1,
+        )
+        assert messages
+        for message in messages:
+            group_ids[message.message_id] = message.attributes[
+                "MessageGroupId"
+            ]
+            message.delete()
+
+    groups = [group_ids[message_id] for message_id in message_ids]
+    assert groups[0] == groups[2] == groups[4]
+    assert all(g in {f"shard-{i}" for i in range(4)} for g in groups)
+    # Of the ordering_key, whatever the request_id
+    assert groups[0] == MessageGrouping(mode="sharded", shards=4).group_id(
+        "other", "tenant-a"
+    )
+
+
+def test_invalid_message_grouping(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+):
+    with pytest.raises(ValueError):
+        MessageGrouping(mode="sharded", shards=0)
+    with pytest.raises(ValueError):
+        Producer(
+            queue_name=sqs_queue_name,
+            ddb_client=ddb_client,
+            message_group_id_mode="unknown",  # type: ignore
+            **boto3_sqs_resource_kwargs,
+        )
+
+
+def test_coalesce(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+):
+    def producer() -> Producer:
+        return Producer(
+            queue_name=sqs_queue_name,
+            ddb_client=ddb_client,
+            message_group_id_mode="request",
+            coalesce=True,
+            **boto3_sqs_resource_kwargs,
+        )
+
+    producer_a, producer_b = producer(), producer()
+    message_id = producer_a.post_non_blocking({"a": 1, "b": [1, 2]})
+    # Identical bodies, whatever their key order & request_id
+    assert producer_a.post_non_blocking({"b": [1, 2], "a": 1}) == message_id
+    assert (
+        producer_b.post_non_blocking({"a": 1, "b": [1, 2]}, request_id="x")
+        == message_id
+    )
+    other_message_id = producer_a.post_non_blocking({"a": 2, "b": [1, 2]})
+    assert other_message_id != message_id
+
+    # Once completed, identical bodies are submitted again
+    ddb_client.result_put(message_id=message_id, result={"c": 3})
+    new_message_id = producer_b.post_non_blocking({"a": 1, "b": [1, 2]})
+    assert new_message_id != message_id
+    assert producer_a.post_non_blocking({"a": 1, "b": [1, 2]}) == (
+        new_message_id
+    )
+
+    messages = sqs_queue.receive_messages(
+        MaxNumberOfMessages=10, WaitTimeSeconds=1
+    )
+    assert {m.message_id for m in messages} == {
+        message_id,
+        other_message_id,
+        new_message_id,
+    }
+
+
+def test_coalesce_concurrent_posts(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+):
+    producer = Producer(
+        queue_name=sqs_queue_name,
+        ddb_client=ddb_client,
+        coalesce=True,
+        **boto3_sqs_resource_kwargs,
+    )
+    with concurrent.futures.ThreadPoolExecutor(8) as pool:
+        message_ids = set(
+            pool.map(lambda _: producer.post_non_blocking({"a": 1}), range(8))
+        )
+        assert len(message_ids) == 1
+
+        # No later post waits on a finished submission
+        (message_id,) = message_ids
+        ddb_client.result_put(message_id=message_id, result={"b": 2})
+        future = pool.submit(producer.post_non_blocking, {"a": 1})
+        assert future.result(timeout=5) != message_id
+
+
+def test_coalesce_request_ids(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+):
+    producer = Producer(
+        queue_name=sqs_queue_name,
+        ddb_client=ddb_client,
+        message_group_id_mode="request",
+        coalesce=True,
+        **boto3_sqs_resource_kwargs,
+    )
+    message_id = producer.post_non_blocking({"a": 1}, request_id="first")
+    assert producer.post_non_blocking({"a": 1}, request_id="second") == (
+        message_id
+    )
+    ddb_client.result_put(
+        message_id=message_id, result={"b": 2}, request_id="first"
+    )
+
+    response = producer.retrieve_result_by_request_id("second")
+    assert response.message_id == message_id
+    assert response.request_id == "second"
+    assert response.result == {"b": 2}
+    responses = producer.retrieve_results_by_request_ids(["first", "second"])
+    assert {r.message_id for r in responses.values()} == {message_id}
+    assert {k: r.request_id for k, r in responses.items()} == {
+        "first": "first",
+        "second": "second",
+    }
+
+
+def test_coalesce_concurrent_producers(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+    mocker: MockerFixture,
+):
+    def producer() -> Producer:
+        return Producer(
+            queue_name=sqs_queue_name,
+            ddb_client=ddb_client,
+            message_group_id_mode="request",
+            coalesce=True,
+            **boto3_sqs_resource_kwargs,
+        )
+
+    producer_a, producer_b = producer(), producer()
+    message_id = producer_a.post_non_blocking({"a": 1})
+
+    coalesce_get = ddb_client.coalesce_get
+    reads = []
+
+    def racing_coalesce_get(body_hash: str):
+        # The first read misses the record of producer_a, as if both
+        # submitted at once
+        reads.append(body_hash)
+        return None if len(reads) == 1 else coalesce_get(body_hash)
+
+    mocker.patch.object(
+        ddb_client, "coalesce_get", side_effect=racing_coalesce_get
+    )
+    # Both sent, but producer_b's posts wait on the message that won
+    assert producer_b.post_non_blocking({"a": 1}, request_id="b") == (
+        message_id
+    )
+    assert producer_b.post_non_blocking({"a": 1}) == message_id
+    messages = sqs_queue.receive_messages(
+        MaxNumberOfMessages=10, WaitTimeSeconds=1
+    )
+    assert len(messages) == 2
+    (duplicate,) = {m.message_id for m in messages} - {message_id}
+    assert producer_b.retrieve_result_status(duplicate) == (
+        ResultStatus.CANCELLED
+    )
+
+    ddb_client.result_put(message_id=message_id, result={"b": 2})
+    response = producer_b.retrieve_result_by_request_id("b")
+    assert response.request_id == "b"
+    assert response.result == {"b": 2}
+
+
+def test_retrieve_results(producer: Producer, ddb_client: DynamoDBClient):
+    message_ids = [producer.post_non_blocking({"i": i}) for i in range(3)]
+    ddb_client.result_put(message_id=message_ids[0], result={"i": 0})
+    ddb_client.error_put("failed", message_id=message_ids[1])
+
+    assert producer.retrieve_result_statuses(message_ids + ["missing"]) == {
+        message_ids[0]: ResultStatus.SUCCESS,
+        message_ids[1]: ResultStatus.ERROR,
+        message_ids[2]: ResultStatus.SUBMITTED,
+    }
+    responses = producer.retrieve_results(message_ids + ["missing"])
+    assert set(responses) == set(message_ids)
+    assert responses[message_ids[0]].result == {"i": 0}
+    assert responses[message_ids[1]].status_code == 500
+    assert responses[message_ids[2]].status_code == 202
+
+
+def test_retrieve_results_by_request_ids(
+    producer: Producer, ddb_client: DynamoDBClient
+):
+    done_id, running_id = str(uuid.uuid4()), str(uuid.uuid4())
+    message_id = producer.post_non_blocking({"a": 1}, request_id=done_id)
+    producer.post_non_blocking({"a": 2}, request_id=running_id)
+    ddb_client.result_put(
+        message_id=message_id, result={"b": 1}, request_id=done_id
+    )
+
+    assert producer.retrieve_result_status_by_request_id(done_id) == (
+        ResultStatus.SUCCESS
+    )
+    response = producer.retrieve_result_by_request_id(done_id)
+    assert response.message_id == message_id
+    assert response.result == {"b": 1}
+
+    responses = producer.retrieve_results_by_request_ids(
+        [done_id, running_id, "missing"]
+    )
+    assert set(responses) == {done_id, running_id}
+    assert responses[done_id].result == {"b": 1}
+    assert responses[running_id].status == ResultStatus.SUBMITTED
+    assert responses[running_id].status_code == 202
+
+
+def test_result_poller_completes_waiters(
+    result_poller: ResultPoller, ddb_client: DynamoDBClient
+):
+    message_ids = [str(uuid.uuid4()) for _ in range(3)]
+    futures = [result_poller.submit(id_) for id_ in message_ids]
+    for message_id in message_ids:
+        ddb_client.result_put(message_id=message_id, result={"id": message_id})
+
+    for message_id, future in zip(message_ids, futures):
+        item = future.result(timeout=2)
+        assert item.status == ResultStatus.SUCCESS
+        assert item.result == {"id": message_id}
+    assert result_poller.num_waiting == 0
+
+
+def test_result_poller_cancelled_future(
+    result_poller: ResultPoller, ddb_client: DynamoDBClient
+):
+    message_ids = [str(uuid.uuid4()) for _ in range(2)]
+    cancelled = result_poller.submit(message_ids[0])
+    sibling = result_poller.submit(message_ids[0])
+    other = result_poller.submit(message_ids[1])
+    assert cancelled.cancel()
+    for message_id in message_ids:
+        ddb_client.result_put(message_id=message_id, result={"id": message_id})
+
+    # Neither the sibling nor the rest of the batch are skipped
+    assert sibling.result(timeout=2).result == {"id": message_ids[0]}
+    assert other.result(timeout=2).result == {"id": message_ids[1]}
+    assert cancelled.cancelled()
+    assert result_poller.num_waiting == 0
+
+
+def test_result_poller_timeout(result_poller: ResultPoller):
+    with pytest.raises(AwaitingResultTimeoutError):
+        _ = result_poller.wait(str(uuid.uuid4()), timeout_seconds=0.1)
+    assert result_poller.num_waiting == 0
+
+
+def test_result_poller_batches_waiters(
+    ddb_client: DynamoDBClient, mocker: MockerFixture
+):
+    items_batch_get = mocker.spy(ddb_client, "items_batch_get")
+    poller = ResultPoller(
+        ddb_client,
+        poll_strategy=FixedPollStrategy(0.05),
+        poll_tick_seconds=0.25,
+        start_immediately=True,
+    )
+    try:
+        # Submitted over ~0.5s, each due on its own every 0.05s
+        futures = []
+        for _ in range(250):
+            futures.append(poller.submit(str(uuid.uuid4())))
+            time.sleep(0.002)
+        time.sleep(0.5)
+    finally:
+        poller.stop(timeout=1)
+
+    # One batch per tick of the ~1s, rather than a batch per waiter & poll
+    assert 2 <= items_batch_get.call_count <= 6
+    assert (
+        max(len(call.args[0]) for call in items_batch_get.call_args_list) > 1
+    )
+    assert not any(future.done() for future in futures)
+
+
+def test_result_poller_shared(ddb_client: DynamoDBClient):
+    poller = ResultPoller.shared(ddb_client)
+    assert poller.is_running
+    assert ResultPoller.shared(ddb_client) is poller
+
+    poller.release()
+    assert poller.is_running
+    poller.release()
+    poller.stop(timeout=1)
+    assert not poller.is_running
+    # Released by all, a new poller is created
+    new_poller = ResultPoller.shared(ddb_client)
+    assert new_poller is not poller
+    new_poller.release()
+
+
+@pytest.mark.parametrize("close", [True, False])
+def test_producer_releases_shared_poller(
+    sqs_queue_name: str,
+    sqs_queue: Queue,
+    ddb_client: DynamoDBClient,
+    boto3_sqs_resource_kwargs: dict,
+    close: bool,
+):
+    producer = Producer(
+        sqs_queue_name,
+        ddb_client=ddb_client,
+        use_shared_poller=True,
+        timeout_seconds=0.1,
+        **boto3_sqs_resource_kwargs,
+    )
+    # Not consumed, waits on the shared poller until the timeout
+    assert producer.post({"a": 1}).status_code == 500
+    poller = ResultPoller.shared(ddb_client)
+    poller.release()
+    assert poller.is_running
+
+    if close:
+        producer.close()
+    else:
+        del producer
+        gc.collect()
+    for _ in range(20):
+        if not poller.is_running:
+            break
+        time.sleep(0.05)
+    assert not poller.is_running
+    new_poller = ResultPoller.shared(ddb_client)
+    assert new_poller is not poller
+    new_poller.release()
+
+
+def test_result_poller_shared_poll_strategy(ddb_client: DynamoDBClient):
+    poller = ResultPoller.shared(
+        ddb_client, poll_strategy=FixedPollStrategy(60)
+    )
+    message_id = str(uuid.uuid4())
+    ddb_client.result_put(message_id=message_id, result={"a": 1})
+    # Polled with the strategy of the caller, not of the poller's creator
+    item = poller.wait(
+        message_id,
+        timeout_seconds=2,
+        poll_strategy=FixedPollStrategy(0.05),
+    )
+    assert item.result == {"a": 1}
+
+
+def test_response_from_item():
+    item = DynamoDBItem.from_get_item(
+        DynamoDBItem(message_id="id", result={"a": 1}).to_puttable()
+    )
+    response = Response.from_item(item)
+    assert not hasattr(response, "__dict__")
+    assert response == Response(message_id="id", result={"a": 1})
+    assert response.status_code == 200
+    assert dataclasses.asdict(Response.from_item(item)) == dataclasses.asdict(
+        response
+    )
+    replaced = dataclasses.replace(Response.from_item(item), status_code=202)
+    assert replaced.result == {"a": 1}
+    assert replaced.status_code == 202
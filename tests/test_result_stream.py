@@ -0,0 +1,47 @@
+"""Tests for the ResultStreamWriter."""
+import time
+import uuid
+
+from inference_engine.consumer._result_stream import ResultStreamWriter
+from inference_engine.dynamo_db_client import DynamoDBClient
+
+
+def test_flush_while_stalled(ddb_client: DynamoDBClient):
+    message_id = str(uuid.uuid4())
+    ddb_client.in_progress_put(None, message_id=message_id)
+    writer = ResultStreamWriter(
+        ddb_client=ddb_client,
+        message_id=message_id,
+        flush_interval_seconds=0.1,
+    )
+    seen_while_stalled = []
+
+    def generate():
+        yield "a"
+        # Within the interval of the first write, so buffered
+        yield "b"
+        time.sleep(0.5)
+        seen_while_stalled.extend(ddb_client.chunks_get(message_id)[1])
+        yield "c"
+
+    assert writer.consume(generate()) == ["a", "b", "c"]
+    assert seen_while_stalled == ["a", "b"]
+
+
+def test_flush_by_size(ddb_client: DynamoDBClient):
+    message_id = str(uuid.uuid4())
+    ddb_client.in_progress_put(None, message_id=message_id)
+    writer = ResultStreamWriter(
+        ddb_client=ddb_client,
+        message_id=message_id,
+        flush_interval_seconds=60,
+        flush_size_bytes=8,
+    )
+    assert writer.consume(iter(["a", "bb", "cccc", "d"])) == [
+        "a",
+        "bb",
+        "cccc",
+        "d",
+    ]
+    # The last chunk is part of the final result only
+    assert ddb_client.chunks_get(message_id)[1] == ["a", "bb", "cccc"]
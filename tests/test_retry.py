@@ -0,0 +1,61 @@
+"""Tests for the RetryPolicy."""
+import pytest
+
+from inference_engine.consumer import (
+    ConsumerRetryableError,
+    ConsumerUnretryableError,
+    RetryPolicy,
+)
+
+
+def test_visibility_timeout():
+    policy = RetryPolicy(
+        base_delay_seconds=5,
+        max_delay_seconds=60,
+        backoff_multiplier=2,
+        jitter=0,
+    )
+    assert [policy.visibility_timeout(n) for n in range(1, 7)] == [
+        5,
+        10,
+        20,
+        40,
+        60,
+        60,
+    ]
+    assert policy.visibility_timeout(10_000) == 60
+
+
+def test_visibility_timeout_jitter():
+    policy = RetryPolicy(base_delay_seconds=100, jitter=0.5)
+    timeouts = {policy.visibility_timeout(1) for _ in range(100)}
+    assert all(50 <= timeout <= 100 for timeout in timeouts)
+    assert len(timeouts) > 1
+
+
+def test_should_retry_in_place():
+    policy = RetryPolicy(in_place_retries=2)
+    assert policy.should_retry_in_place(ConsumerRetryableError(), 0)
+    assert policy.should_retry_in_place(ConsumerRetryableError(), 1)
+    assert not policy.should_retry_in_place(ConsumerRetryableError(), 2)
+    assert not policy.should_retry_in_place(ValueError(), 0)
+    assert not policy.should_retry_in_place(ConsumerUnretryableError(), 0)
+    assert RetryPolicy(
+        in_place_retries=1, transient_errors=(ValueError,)
+    ).should_retry_in_place(ValueError(), 0)
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"base_delay_seconds": -1},
+        {"base_delay_seconds": 10, "max_delay_seconds": 5},
+        {"max_delay_seconds": 12 * 60 * 60 + 1},
+        {"backoff_multiplier": 0.5},
+        {"jitter": 2},
+        {"in_place_retries": -1},
+    ],
+)
+def test_invalid(kwargs: dict):
+    with pytest.raises(ValueError):
+        RetryPolicy(**kwargs)
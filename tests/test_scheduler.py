@@ -0,0 +1,48 @@
+"""Tests for the MessageGroupScheduler."""
+import threading
+
+import pytest
+
+from inference_engine.consumer._scheduler import MessageGroupScheduler
+
+
+def test_one_message_per_group():
+    scheduler: MessageGroupScheduler[str] = MessageGroupScheduler(4)
+    assert scheduler.submit("a", "a1")
+    assert scheduler.submit("b", "b1")
+    assert not scheduler.submit("a", "a2")
+    assert not scheduler.submit("a", "a3")
+    assert scheduler.free_slots == 0
+    assert scheduler.num_running_groups == 2
+
+    assert scheduler.done("a") == "a2"
+    assert scheduler.done("b") is None
+    assert scheduler.num_running_groups == 1
+    assert scheduler.done("a") == "a3"
+    assert scheduler.done("a") is None
+    assert scheduler.free_slots == 4
+    assert scheduler.num_running_groups == 0
+
+
+def test_release():
+    scheduler: MessageGroupScheduler[str] = MessageGroupScheduler(4)
+    scheduler.submit("a", "a1")
+    scheduler.submit("a", "a2")
+    scheduler.submit("a", "a3")
+    assert scheduler.release("a") == ["a2", "a3"]
+    assert scheduler.free_slots == 4
+    assert scheduler.submit("a", "a4")
+
+
+def test_wait_for_free_slot():
+    scheduler: MessageGroupScheduler[str] = MessageGroupScheduler(1)
+    scheduler.submit("a", "a1")
+    assert not scheduler.wait_for_free_slot(timeout=0.01)
+
+    threading.Timer(0.05, scheduler.done, args=("a",)).start()
+    assert scheduler.wait_for_free_slot(timeout=2)
+
+
+def test_invalid_max_concurrency():
+    with pytest.raises(ValueError):
+        MessageGroupScheduler(0)
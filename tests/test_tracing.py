@@ -0,0 +1,73 @@
+"""Test span tracing."""
+import json
+import threading
+
+import pytest
+
+from inference_engine.tracing import NULL_TRACER, Span, Tracer
+
+
+def test_span():
+    tracer = Tracer()
+    with tracer.span("ddb.get_item", message_id="a"):
+        pass
+
+    (span,) = tracer.spans
+    assert span.name == "ddb.get_item"
+    assert span.attributes == {"message_id": "a"}
+    assert span.end_ns >= span.start_ns
+    assert span.thread_name == threading.current_thread().name
+    assert span.error is None
+
+
+def test_span_error():
+    tracer = Tracer()
+    with pytest.raises(ValueError):
+        with tracer.span("consumer.compute"):
+            raise ValueError("bad")
+
+    assert tracer.spans[0].error == "ValueError: bad"
+
+
+def test_max_spans():
+    tracer = Tracer(max_spans=2)
+    for i in range(3):
+        with tracer.span(f"span.{i}"):
+            pass
+
+    assert [span.name for span in tracer.spans] == ["span.1", "span.2"]
+
+
+def test_hooks():
+    spans: list[Span] = []
+    tracer = Tracer(hooks=[spans.append])
+    tracer.add_hook(lambda _: 1 / 0)  # Errors in hooks are only logged
+    with tracer.span("a"):
+        pass
+
+    assert spans == tracer.spans
+
+
+def test_chrome_trace(tmp_path):
+    tracer = Tracer()
+    with tracer.span("consumer.message", message_id="a"):
+        with tracer.span("consumer.compute", message_id="a"):
+            pass
+
+    path = tmp_path / "trace.json"
+    tracer.export_chrome_trace(path)
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["ph"] for e in events] == ["M", "X", "X"]
+    compute, message = events[1:]
+    assert compute["name"] == "consumer.compute"
+    assert compute["cat"] == "consumer"
+    assert compute["args"] == {"message_id": "a"}
+    assert message["ts"] <= compute["ts"]
+    assert message["ts"] + message["dur"] >= compute["ts"] + compute["dur"]
+
+
+def test_null_tracer():
+    with NULL_TRACER.span("a"):
+        pass
+
+    assert not NULL_TRACER.spans
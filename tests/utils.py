@@ -5,19 +5,37 @@ import boto3
 from mypy_boto3_dynamodb.service_resource import DynamoDBServiceResource, Table
 from mypy_boto3_sqs.service_resource import Queue, SQSServiceResource
 
+REQUEST_ID_INDEX_NAME = "request_id-index"
+
 
 def create_table(
     table_name: str,
     tolerate_already_exists: bool = False,
     **kwargs,
 ) -> Table:
-    dynamodb: DynamoDBServiceResource = boto3.resource("dynamodb", **kwargs)
+    dynamodb: DynamoDBServiceResource = kwargs.get(
+        "dynamodb"
+    ) or boto3.resource("dynamodb", **kwargs)
     try:
         table = dynamodb.create_table(
             TableName=table_name,
             KeySchema=[{"AttributeName": "message_id", "KeyType": "HASH"}],
             AttributeDefinitions=[
                 {"AttributeName": "message_id", "AttributeType": "S"},
+                {"AttributeName": "request_id", "AttributeType": "S"},
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    "IndexName": REQUEST_ID_INDEX_NAME,
+                    "KeySchema": [
+                        {"AttributeName": "request_id", "KeyType": "HASH"}
+                    ],
+                    "Projection": {"ProjectionType": "KEYS_ONLY"},
+                    "ProvisionedThroughput": {
+                        "ReadCapacityUnits": 5,
+                        "WriteCapacityUnits": 5,
+                    },
+                }
             ],
             ProvisionedThroughput={
                 "ReadCapacityUnits": 5,
@@ -29,18 +47,28 @@ def create_table(
             raise
         table = dynamodb.Table(table_name)
 
-    dynamodb.meta.client.get_waiter("table_exists").wait(TableName=table_name)
+    if "dynamodb" not in kwargs:
+        waiter = dynamodb.meta.client.get_waiter("table_exists")
+        waiter.wait(TableName=table_name)
     return table
 
 
-def create_queue(queue_name: str, **kwargs) -> tuple[Queue, Queue]:
-    sqs: SQSServiceResource = boto3.resource("sqs", **kwargs)
+def create_queue(
+    queue_name: str, fifo: bool = True, **kwargs
+) -> tuple[Queue, Queue]:
+    sqs: SQSServiceResource = kwargs.get("sqs") or boto3.resource(
+        "sqs", **kwargs
+    )
+    fifo_attributes = (
+        {"FifoQueue": "true", "ContentBasedDeduplication": "true"}
+        if fifo
+        else {}
+    )
 
     dl_queue = sqs.create_queue(
         QueueName=f"dl_{queue_name}",
         Attributes={
-            "FifoQueue": "true",
-            "ContentBasedDeduplication": "true",
+            **fifo_attributes,
             "VisibilityTimeout": "1",
             "MessageRetentionPeriod": "600",
         },
@@ -52,8 +80,7 @@ def create_queue(queue_name: str, **kwargs) -> tuple[Queue, Queue]:
     queue = sqs.create_queue(
         QueueName=queue_name,
         Attributes={
-            "FifoQueue": "true",
-            "ContentBasedDeduplication": "true",
+            **fifo_attributes,
             "VisibilityTimeout": "0",
             "MessageRetentionPeriod": "300",
             "RedrivePolicy": json.dumps(